@@ -39,6 +39,8 @@ CREATE TABLE IF NOT EXISTS keywords (
 CREATE INDEX IF NOT EXISTS idx_keywords_company ON keywords(company_id);
 CREATE INDEX IF NOT EXISTS idx_keywords_user ON keywords(user_id);
 CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords(keyword);
+-- Keyset pagination: rank ascending (unranked last), volume descending, id
+CREATE INDEX IF NOT EXISTS idx_keywords_rank_page ON keywords(company_id, COALESCE(current_rank, 2147483647), (-COALESCE(search_volume, 0)), id);
 
 -- 3. RANKINGS TABLE (References keywords)
 CREATE TABLE IF NOT EXISTS rankings (
@@ -0,0 +1,47 @@
+-- Company Name Search Index (SQLite)
+-- FTS5 trigram index over companies.name so fuzzy/substring company lookups
+-- use an index instead of scanning with LOWER(name) LIKE '%x%'.
+-- Requires SQLite 3.34+ (trigram tokenizer). Must be loaded after schema.sql.
+
+-- =====================================================
+-- 1. SEARCH INDEX
+-- =====================================================
+
+CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts USING fts5(
+  name,
+  content='companies',
+  content_rowid='id',
+  tokenize='trigram'
+);
+
+-- =====================================================
+-- 2. TRIGGERS (SQLite)
+-- =====================================================
+
+CREATE TRIGGER IF NOT EXISTS trigger_companies_fts_insert
+  AFTER INSERT ON companies
+  FOR EACH ROW
+BEGIN
+  INSERT INTO companies_fts (rowid, name) VALUES (NEW.id, NEW.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_companies_fts_delete
+  AFTER DELETE ON companies
+  FOR EACH ROW
+BEGIN
+  INSERT INTO companies_fts (companies_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_companies_fts_update
+  AFTER UPDATE OF name ON companies
+  FOR EACH ROW
+BEGIN
+  INSERT INTO companies_fts (companies_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+  INSERT INTO companies_fts (rowid, name) VALUES (NEW.id, NEW.name);
+END;
+
+-- =====================================================
+-- 3. BACKFILL
+-- =====================================================
+
+INSERT INTO companies_fts (companies_fts) VALUES ('rebuild');
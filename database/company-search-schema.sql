@@ -0,0 +1,10 @@
+-- Company Name Search Index (PostgreSQL)
+-- pg_trgm GIN index over lower(name) so fuzzy/substring company lookups
+-- (similarity(), %, LIKE '%x%') use an index instead of a sequential scan.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_companies_name_trgm
+  ON companies USING GIN (LOWER(name) gin_trgm_ops);
+
+COMMENT ON INDEX idx_companies_name_trgm IS 'Trigram index for seo-toolkit fuzzy company lookup';
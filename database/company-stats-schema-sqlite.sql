@@ -0,0 +1,193 @@
+-- Company Stats Summary (SQLite)
+-- Pre-aggregated per-company counts, kept up to date by triggers on the
+-- child tables so overview queries never have to fan out across
+-- audits x keywords x competitors x citations.
+-- Must be loaded after schema.sql.
+
+-- =====================================================
+-- 1. SUMMARY TABLE
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS company_stats (
+  company_id INTEGER PRIMARY KEY,
+  audit_count INTEGER NOT NULL DEFAULT 0,
+  keyword_count INTEGER NOT NULL DEFAULT 0,
+  competitor_count INTEGER NOT NULL DEFAULT 0,
+  citation_count INTEGER NOT NULL DEFAULT 0,
+  last_audit_date DATETIME,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+);
+
+-- Serves MAX(audit_date) recomputation when an audit is removed
+CREATE INDEX IF NOT EXISTS idx_audits_company_date ON audits(company_id, audit_date);
+
+-- =====================================================
+-- 2. TRIGGERS (SQLite)
+-- =====================================================
+
+-- Every company gets a zeroed stats row
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_company_insert
+  AFTER INSERT ON companies
+  FOR EACH ROW
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_company_delete
+  AFTER DELETE ON companies
+  FOR EACH ROW
+BEGIN
+  DELETE FROM company_stats WHERE company_id = OLD.id;
+END;
+
+-- Audits (count + last audit date)
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_audit_insert
+  AFTER INSERT ON audits
+  FOR EACH ROW
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats
+  SET audit_count = audit_count + 1,
+      last_audit_date = CASE
+        WHEN last_audit_date IS NULL OR NEW.audit_date > last_audit_date THEN NEW.audit_date
+        ELSE last_audit_date
+      END,
+      updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = NEW.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_audit_delete
+  AFTER DELETE ON audits
+  FOR EACH ROW
+BEGIN
+  UPDATE company_stats
+  SET audit_count = MAX(audit_count - 1, 0),
+      last_audit_date = (SELECT MAX(audit_date) FROM audits WHERE company_id = OLD.company_id),
+      updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = OLD.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_audit_update
+  AFTER UPDATE OF company_id, audit_date ON audits
+  FOR EACH ROW
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats
+  SET audit_count = audit_count + (CASE WHEN company_id = NEW.company_id THEN 1 ELSE 0 END)
+                                - (CASE WHEN company_id = OLD.company_id THEN 1 ELSE 0 END),
+      last_audit_date = (SELECT MAX(audit_date) FROM audits WHERE audits.company_id = company_stats.company_id),
+      updated_at = CURRENT_TIMESTAMP
+  WHERE company_id IN (OLD.company_id, NEW.company_id);
+END;
+
+-- Keywords
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_keyword_insert
+  AFTER INSERT ON keywords
+  FOR EACH ROW
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats SET keyword_count = keyword_count + 1, updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = NEW.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_keyword_delete
+  AFTER DELETE ON keywords
+  FOR EACH ROW
+BEGIN
+  UPDATE company_stats SET keyword_count = MAX(keyword_count - 1, 0), updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = OLD.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_keyword_move
+  AFTER UPDATE OF company_id ON keywords
+  FOR EACH ROW
+  WHEN NEW.company_id IS NOT OLD.company_id
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats SET keyword_count = keyword_count + 1, updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = NEW.company_id;
+  UPDATE company_stats SET keyword_count = MAX(keyword_count - 1, 0), updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = OLD.company_id;
+END;
+
+-- Competitors
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_competitor_insert
+  AFTER INSERT ON competitors
+  FOR EACH ROW
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats SET competitor_count = competitor_count + 1, updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = NEW.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_competitor_delete
+  AFTER DELETE ON competitors
+  FOR EACH ROW
+BEGIN
+  UPDATE company_stats SET competitor_count = MAX(competitor_count - 1, 0), updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = OLD.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_competitor_move
+  AFTER UPDATE OF company_id ON competitors
+  FOR EACH ROW
+  WHEN NEW.company_id IS NOT OLD.company_id
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats SET competitor_count = competitor_count + 1, updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = NEW.company_id;
+  UPDATE company_stats SET competitor_count = MAX(competitor_count - 1, 0), updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = OLD.company_id;
+END;
+
+-- Citations
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_citation_insert
+  AFTER INSERT ON citations
+  FOR EACH ROW
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats SET citation_count = citation_count + 1, updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = NEW.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_citation_delete
+  AFTER DELETE ON citations
+  FOR EACH ROW
+BEGIN
+  UPDATE company_stats SET citation_count = MAX(citation_count - 1, 0), updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = OLD.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_company_stats_citation_move
+  AFTER UPDATE OF company_id ON citations
+  FOR EACH ROW
+  WHEN NEW.company_id IS NOT OLD.company_id
+BEGIN
+  INSERT OR IGNORE INTO company_stats (company_id) VALUES (NEW.company_id);
+  UPDATE company_stats SET citation_count = citation_count + 1, updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = NEW.company_id;
+  UPDATE company_stats SET citation_count = MAX(citation_count - 1, 0), updated_at = CURRENT_TIMESTAMP
+  WHERE company_id = OLD.company_id;
+END;
+
+-- =====================================================
+-- 3. BACKFILL
+-- =====================================================
+-- Rebuilds every row from independent per-table aggregates; safe to re-run.
+
+INSERT OR REPLACE INTO company_stats
+  (company_id, audit_count, keyword_count, competitor_count, citation_count, last_audit_date, updated_at)
+SELECT c.id,
+       COALESCE(a.cnt, 0),
+       COALESCE(k.cnt, 0),
+       COALESCE(comp.cnt, 0),
+       COALESCE(cit.cnt, 0),
+       a.last_audit_date,
+       CURRENT_TIMESTAMP
+FROM companies c
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt, MAX(audit_date) AS last_audit_date
+           FROM audits GROUP BY company_id) a ON a.company_id = c.id
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt FROM keywords GROUP BY company_id) k ON k.company_id = c.id
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt FROM competitors GROUP BY company_id) comp ON comp.company_id = c.id
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt FROM citations GROUP BY company_id) cit ON cit.company_id = c.id;
@@ -0,0 +1,148 @@
+-- Company Stats Summary (PostgreSQL)
+-- Pre-aggregated per-company counts, kept up to date by triggers on the
+-- child tables so overview queries never have to fan out across
+-- audits x keywords x competitors x citations.
+-- Must be loaded after the tables it summarises exist.
+
+-- =====================================================
+-- 1. SUMMARY TABLE
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS company_stats (
+  company_id UUID PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+  audit_count INTEGER NOT NULL DEFAULT 0,
+  keyword_count INTEGER NOT NULL DEFAULT 0,
+  competitor_count INTEGER NOT NULL DEFAULT 0,
+  citation_count INTEGER NOT NULL DEFAULT 0,
+  last_audit_date TIMESTAMP WITH TIME ZONE,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Serves MAX(audit_date) recomputation when an audit is removed
+CREATE INDEX IF NOT EXISTS idx_audits_company_date ON audits(company_id, audit_date DESC);
+
+-- =====================================================
+-- 2. TRIGGERS & FUNCTIONS
+-- =====================================================
+
+-- Seed a zeroed stats row for every new company
+CREATE OR REPLACE FUNCTION company_stats_seed()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO company_stats (company_id) VALUES (NEW.id)
+  ON CONFLICT (company_id) DO NOTHING;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_company_stats_seed ON companies;
+CREATE TRIGGER trigger_company_stats_seed
+  AFTER INSERT ON companies
+  FOR EACH ROW
+  EXECUTE FUNCTION company_stats_seed();
+
+-- Shared counter maintenance; TG_ARGV[0] names the company_stats column
+CREATE OR REPLACE FUNCTION company_stats_track()
+RETURNS TRIGGER AS $$
+DECLARE
+  counter TEXT := TG_ARGV[0];
+BEGIN
+  IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.company_id IS DISTINCT FROM OLD.company_id) THEN
+    INSERT INTO company_stats (company_id) VALUES (NEW.company_id)
+    ON CONFLICT (company_id) DO NOTHING;
+    EXECUTE format(
+      'UPDATE company_stats SET %I = %I + 1, updated_at = NOW() WHERE company_id = $1',
+      counter, counter
+    ) USING NEW.company_id;
+  END IF;
+
+  IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND NEW.company_id IS DISTINCT FROM OLD.company_id) THEN
+    EXECUTE format(
+      'UPDATE company_stats SET %I = GREATEST(%I - 1, 0), updated_at = NOW() WHERE company_id = $1',
+      counter, counter
+    ) USING OLD.company_id;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Last audit date; GREATEST on insert, index-backed MAX() otherwise
+CREATE OR REPLACE FUNCTION company_stats_track_last_audit()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE company_stats
+    SET last_audit_date = GREATEST(last_audit_date, NEW.audit_date)
+    WHERE company_id = NEW.company_id;
+    RETURN NULL;
+  END IF;
+
+  UPDATE company_stats s
+  SET last_audit_date = (SELECT MAX(a.audit_date) FROM audits a WHERE a.company_id = s.company_id)
+  WHERE s.company_id = OLD.company_id
+     OR (TG_OP = 'UPDATE' AND s.company_id = NEW.company_id);
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_company_stats_audits ON audits;
+CREATE TRIGGER trigger_company_stats_audits
+  AFTER INSERT OR DELETE OR UPDATE OF company_id ON audits
+  FOR EACH ROW
+  EXECUTE FUNCTION company_stats_track('audit_count');
+
+DROP TRIGGER IF EXISTS trigger_company_stats_last_audit ON audits;
+CREATE TRIGGER trigger_company_stats_last_audit
+  AFTER INSERT OR DELETE OR UPDATE OF company_id, audit_date ON audits
+  FOR EACH ROW
+  EXECUTE FUNCTION company_stats_track_last_audit();
+
+DROP TRIGGER IF EXISTS trigger_company_stats_keywords ON keywords;
+CREATE TRIGGER trigger_company_stats_keywords
+  AFTER INSERT OR DELETE OR UPDATE OF company_id ON keywords
+  FOR EACH ROW
+  EXECUTE FUNCTION company_stats_track('keyword_count');
+
+DROP TRIGGER IF EXISTS trigger_company_stats_competitors ON competitors;
+CREATE TRIGGER trigger_company_stats_competitors
+  AFTER INSERT OR DELETE OR UPDATE OF company_id ON competitors
+  FOR EACH ROW
+  EXECUTE FUNCTION company_stats_track('competitor_count');
+
+DROP TRIGGER IF EXISTS trigger_company_stats_citations ON citations;
+CREATE TRIGGER trigger_company_stats_citations
+  AFTER INSERT OR DELETE OR UPDATE OF company_id ON citations
+  FOR EACH ROW
+  EXECUTE FUNCTION company_stats_track('citation_count');
+
+-- =====================================================
+-- 3. BACKFILL
+-- =====================================================
+-- Rebuilds every row from independent per-table aggregates; safe to re-run.
+
+INSERT INTO company_stats
+  (company_id, audit_count, keyword_count, competitor_count, citation_count, last_audit_date, updated_at)
+SELECT c.id,
+       COALESCE(a.cnt, 0),
+       COALESCE(k.cnt, 0),
+       COALESCE(comp.cnt, 0),
+       COALESCE(cit.cnt, 0),
+       a.last_audit_date,
+       NOW()
+FROM companies c
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt, MAX(audit_date) AS last_audit_date
+           FROM audits GROUP BY company_id) a ON a.company_id = c.id
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt FROM keywords GROUP BY company_id) k ON k.company_id = c.id
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt FROM competitors GROUP BY company_id) comp ON comp.company_id = c.id
+LEFT JOIN (SELECT company_id, COUNT(*) AS cnt FROM citations GROUP BY company_id) cit ON cit.company_id = c.id
+ON CONFLICT (company_id) DO UPDATE SET
+  audit_count = EXCLUDED.audit_count,
+  keyword_count = EXCLUDED.keyword_count,
+  competitor_count = EXCLUDED.competitor_count,
+  citation_count = EXCLUDED.citation_count,
+  last_audit_date = EXCLUDED.last_audit_date,
+  updated_at = EXCLUDED.updated_at;
+
+COMMENT ON TABLE company_stats IS 'Trigger-maintained per-company counts used by the seo-toolkit MCP server';
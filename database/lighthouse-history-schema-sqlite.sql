@@ -0,0 +1,50 @@
+-- Lighthouse History (SQLite)
+-- Every PageSpeed Insights run made by the seo-toolkit MCP server is stored
+-- in lighthouse_runs (scores in columns) with the full lighthouseResult kept
+-- compressed in lighthouse_run_payloads. Payloads can be pruned on a retention
+-- schedule without losing the score history.
+-- On SQLite, seo_audits comes from seo-monitor-schema.sql (website, required
+-- company_id, no url or strategy), so runs get their own tables here with the
+-- same columns the PostgreSQL seo_audits uses.
+-- Must be loaded after schema.sql.
+
+-- =====================================================
+-- 1. AUDIT RUNS
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS lighthouse_runs (
+  id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+  company_id INTEGER,
+  url TEXT NOT NULL,
+  strategy TEXT NOT NULL, -- mobile | desktop
+  overall_score INTEGER NOT NULL,
+  performance_score INTEGER NOT NULL,
+  seo_score INTEGER NOT NULL,
+  accessibility_score INTEGER NOT NULL,
+  best_practices_score INTEGER,
+  issues TEXT DEFAULT '[]', -- JSON array
+  recommendations TEXT DEFAULT '[]', -- JSON array
+  metadata TEXT DEFAULT '{}', -- JSON object
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_lighthouse_runs_company ON lighthouse_runs(company_id);
+CREATE INDEX IF NOT EXISTS idx_lighthouse_runs_url_strategy_created
+  ON lighthouse_runs(url, strategy, created_at DESC);
+
+-- =====================================================
+-- 2. COMPRESSED RAW PAYLOADS
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS lighthouse_run_payloads (
+  audit_id TEXT PRIMARY KEY,
+  encoding TEXT NOT NULL CHECK (encoding IN ('zstd', 'gzip')),
+  payload BLOB NOT NULL,             -- compressed lighthouseResult JSON
+  raw_bytes INTEGER NOT NULL,        -- uncompressed JSON size
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (audit_id) REFERENCES lighthouse_runs(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_lighthouse_run_payloads_created ON lighthouse_run_payloads(created_at);
@@ -0,0 +1,32 @@
+-- Lighthouse History (PostgreSQL)
+-- Every PageSpeed Insights run made by the seo-toolkit MCP server is stored
+-- in seo_audits (scores in columns) with the full lighthouseResult kept
+-- compressed in seo_audit_payloads. Payloads can be pruned on a retention
+-- schedule without losing the score history.
+-- (SQLite stores runs in lighthouse_runs instead; see the -sqlite variant.)
+-- Must be loaded after 02-core-seo.sql.
+
+-- =====================================================
+-- 1. RUN COLUMNS ON seo_audits
+-- =====================================================
+
+ALTER TABLE seo_audits ADD COLUMN IF NOT EXISTS strategy TEXT; -- mobile | desktop (NULL for non-Lighthouse audits)
+
+CREATE INDEX IF NOT EXISTS idx_seo_audits_url_strategy_created
+  ON seo_audits(url, strategy, created_at DESC);
+
+-- =====================================================
+-- 2. COMPRESSED RAW PAYLOADS
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS seo_audit_payloads (
+  audit_id UUID PRIMARY KEY REFERENCES seo_audits(id) ON DELETE CASCADE,
+  encoding TEXT NOT NULL CHECK (encoding IN ('zstd', 'gzip')),
+  payload BYTEA NOT NULL,            -- compressed lighthouseResult JSON
+  raw_bytes INTEGER NOT NULL,        -- uncompressed JSON size
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_seo_audit_payloads_created ON seo_audit_payloads(created_at);
+
+COMMENT ON TABLE seo_audit_payloads IS 'Compressed raw Lighthouse results for seo_audits rows (prunable)';
@@ -0,0 +1,106 @@
+-- Local SEO Snapshots (SQLite)
+-- Per-company local SEO score cache written by the seo-toolkit MCP server.
+-- Triggers drop a company's snapshot whenever its profile, citations,
+-- keywords or competitors change, so a stored snapshot is always current.
+-- Must be loaded after schema.sql.
+
+-- =====================================================
+-- 1. SNAPSHOT TABLE
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS local_seo_snapshots (
+  company_id INTEGER PRIMARY KEY,
+  score INTEGER NOT NULL,
+  citation_count INTEGER NOT NULL DEFAULT 0,
+  keyword_count INTEGER NOT NULL DEFAULT 0,
+  avg_competitor_rating REAL,
+  recommendations TEXT, -- JSON array
+  computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_local_seo_snapshots_score ON local_seo_snapshots(score);
+
+-- =====================================================
+-- 2. INVALIDATION TRIGGERS (SQLite)
+-- =====================================================
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_company_update
+  AFTER UPDATE ON companies
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_company_delete
+  AFTER DELETE ON companies
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = OLD.id;
+END;
+
+-- Citations
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_citation_insert
+  AFTER INSERT ON citations
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = NEW.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_citation_update
+  AFTER UPDATE ON citations
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id IN (OLD.company_id, NEW.company_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_citation_delete
+  AFTER DELETE ON citations
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = OLD.company_id;
+END;
+
+-- Keywords (only membership affects the score)
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_keyword_insert
+  AFTER INSERT ON keywords
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = NEW.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_keyword_update
+  AFTER UPDATE OF company_id ON keywords
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id IN (OLD.company_id, NEW.company_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_keyword_delete
+  AFTER DELETE ON keywords
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = OLD.company_id;
+END;
+
+-- Competitors
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_competitor_insert
+  AFTER INSERT ON competitors
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = NEW.company_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_competitor_update
+  AFTER UPDATE OF company_id, avg_rating ON competitors
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id IN (OLD.company_id, NEW.company_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trigger_local_seo_snapshot_competitor_delete
+  AFTER DELETE ON competitors
+  FOR EACH ROW
+BEGIN
+  DELETE FROM local_seo_snapshots WHERE company_id = OLD.company_id;
+END;
@@ -0,0 +1,69 @@
+-- Local SEO Snapshots (PostgreSQL)
+-- Per-company local SEO score cache written by the seo-toolkit MCP server.
+-- Triggers drop a company's snapshot whenever its profile, citations,
+-- keywords or competitors change, so a stored snapshot is always current.
+
+-- =====================================================
+-- 1. SNAPSHOT TABLE
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS local_seo_snapshots (
+  company_id UUID PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+  score INTEGER NOT NULL,
+  citation_count INTEGER NOT NULL DEFAULT 0,
+  keyword_count INTEGER NOT NULL DEFAULT 0,
+  avg_competitor_rating NUMERIC(3,2),
+  recommendations TEXT, -- JSON array
+  computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_local_seo_snapshots_score ON local_seo_snapshots(score);
+
+-- =====================================================
+-- 2. INVALIDATION TRIGGERS & FUNCTIONS
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION local_seo_snapshot_invalidate()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'companies' THEN
+    DELETE FROM local_seo_snapshots WHERE company_id = OLD.id;
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP <> 'INSERT' THEN
+    DELETE FROM local_seo_snapshots WHERE company_id = OLD.company_id;
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    DELETE FROM local_seo_snapshots WHERE company_id = NEW.company_id;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_local_seo_snapshot_companies ON companies;
+CREATE TRIGGER trigger_local_seo_snapshot_companies
+  AFTER UPDATE ON companies
+  FOR EACH ROW
+  EXECUTE FUNCTION local_seo_snapshot_invalidate();
+
+DROP TRIGGER IF EXISTS trigger_local_seo_snapshot_citations ON citations;
+CREATE TRIGGER trigger_local_seo_snapshot_citations
+  AFTER INSERT OR UPDATE OR DELETE ON citations
+  FOR EACH ROW
+  EXECUTE FUNCTION local_seo_snapshot_invalidate();
+
+DROP TRIGGER IF EXISTS trigger_local_seo_snapshot_keywords ON keywords;
+CREATE TRIGGER trigger_local_seo_snapshot_keywords
+  AFTER INSERT OR DELETE OR UPDATE OF company_id ON keywords
+  FOR EACH ROW
+  EXECUTE FUNCTION local_seo_snapshot_invalidate();
+
+DROP TRIGGER IF EXISTS trigger_local_seo_snapshot_competitors ON competitors;
+CREATE TRIGGER trigger_local_seo_snapshot_competitors
+  AFTER INSERT OR DELETE OR UPDATE OF company_id, avg_rating ON competitors
+  FOR EACH ROW
+  EXECUTE FUNCTION local_seo_snapshot_invalidate();
+
+COMMENT ON TABLE local_seo_snapshots IS 'Cached local SEO scores, invalidated by triggers on child tables';
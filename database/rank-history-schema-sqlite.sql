@@ -0,0 +1,76 @@
+-- Rank History Time Series (SQLite)
+-- Compact storage for long-running rank tracking. The seo-toolkit MCP
+-- server folds raw rankings rows into one delta-encoded block per keyword
+-- per month, then maintains weekly and monthly rollups per keyword and per
+-- company so trend queries never touch raw rows.
+-- Must be loaded after schema.sql.
+
+-- =====================================================
+-- 1. RAW RANK CHECKS
+-- =====================================================
+-- Same shape as the PostgreSQL rankings table in 02-core-seo.sql
+
+CREATE TABLE IF NOT EXISTS rankings (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  keyword_id INTEGER NOT NULL,
+  rank INTEGER NOT NULL,
+  rank_change INTEGER DEFAULT 0,
+  checked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  date DATE DEFAULT (date('now')),
+  metadata TEXT, -- JSON object
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (keyword_id) REFERENCES keywords(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_rankings_keyword_id ON rankings(keyword_id);
+-- Incremental ingestion reads raw rows in insertion order
+CREATE INDEX IF NOT EXISTS idx_rankings_created_id ON rankings(created_at, id);
+
+-- =====================================================
+-- 2. DAILY BLOCKS
+-- =====================================================
+-- days_present: bit (d - 1) set when day-of-month d has a rank
+-- ranks: zigzag varint deltas of the present days' ranks, in day order
+
+CREATE TABLE IF NOT EXISTS rank_history_blocks (
+  keyword_id INTEGER NOT NULL,
+  month_start DATE NOT NULL,
+  days_present INTEGER NOT NULL DEFAULT 0,
+  ranks BLOB NOT NULL,
+  samples INTEGER NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (keyword_id, month_start),
+  FOREIGN KEY (keyword_id) REFERENCES keywords(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- =====================================================
+-- 3. ROLLUPS
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS keyword_rank_rollups (
+  keyword_id INTEGER NOT NULL,
+  granularity TEXT NOT NULL CHECK(granularity IN ('week', 'month')),
+  period_start DATE NOT NULL,
+  samples INTEGER NOT NULL,
+  avg_rank REAL NOT NULL,
+  best_rank INTEGER NOT NULL,
+  worst_rank INTEGER NOT NULL,
+  first_rank INTEGER NOT NULL,
+  last_rank INTEGER NOT NULL,
+  PRIMARY KEY (keyword_id, granularity, period_start),
+  FOREIGN KEY (keyword_id) REFERENCES keywords(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS company_rank_rollups (
+  company_id INTEGER NOT NULL,
+  granularity TEXT NOT NULL CHECK(granularity IN ('week', 'month')),
+  period_start DATE NOT NULL,
+  keywords_tracked INTEGER NOT NULL,
+  avg_rank REAL NOT NULL,
+  best_rank INTEGER NOT NULL,
+  top3_count INTEGER NOT NULL DEFAULT 0,
+  top10_count INTEGER NOT NULL DEFAULT 0,
+  top100_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (company_id, granularity, period_start),
+  FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+) WITHOUT ROWID;
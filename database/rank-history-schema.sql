@@ -0,0 +1,59 @@
+-- Rank History Time Series (PostgreSQL)
+-- Compact storage for long-running rank tracking on top of the raw
+-- rankings table (02-core-seo.sql). The seo-toolkit MCP server folds raw
+-- rows into one delta-encoded block per keyword per month, then maintains
+-- weekly and monthly rollups per keyword and per company so trend queries
+-- never touch raw rows. Must be loaded after 02-core-seo.sql.
+
+-- =====================================================
+-- 1. DAILY BLOCKS
+-- =====================================================
+-- days_present: bit (d - 1) set when day-of-month d has a rank
+-- ranks: zigzag varint deltas of the present days' ranks, in day order
+
+CREATE TABLE IF NOT EXISTS rank_history_blocks (
+  keyword_id UUID NOT NULL REFERENCES keywords(id) ON DELETE CASCADE,
+  month_start DATE NOT NULL,
+  days_present INTEGER NOT NULL DEFAULT 0,
+  ranks BYTEA NOT NULL,
+  samples INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (keyword_id, month_start)
+);
+
+-- =====================================================
+-- 2. ROLLUPS
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS keyword_rank_rollups (
+  keyword_id UUID NOT NULL REFERENCES keywords(id) ON DELETE CASCADE,
+  granularity TEXT NOT NULL CHECK (granularity IN ('week', 'month')),
+  period_start DATE NOT NULL,
+  samples INTEGER NOT NULL,
+  avg_rank REAL NOT NULL,
+  best_rank INTEGER NOT NULL,
+  worst_rank INTEGER NOT NULL,
+  first_rank INTEGER NOT NULL,
+  last_rank INTEGER NOT NULL,
+  PRIMARY KEY (keyword_id, granularity, period_start)
+);
+
+CREATE TABLE IF NOT EXISTS company_rank_rollups (
+  company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+  granularity TEXT NOT NULL CHECK (granularity IN ('week', 'month')),
+  period_start DATE NOT NULL,
+  keywords_tracked INTEGER NOT NULL,
+  avg_rank REAL NOT NULL,
+  best_rank INTEGER NOT NULL,
+  top3_count INTEGER NOT NULL DEFAULT 0,
+  top10_count INTEGER NOT NULL DEFAULT 0,
+  top100_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (company_id, granularity, period_start)
+);
+
+-- Incremental ingestion reads raw rows in insertion order
+CREATE INDEX IF NOT EXISTS idx_rankings_created_id ON rankings(created_at, id);
+
+COMMENT ON TABLE rank_history_blocks IS 'Delta-encoded daily ranks, one row per keyword per month';
+COMMENT ON TABLE keyword_rank_rollups IS 'Weekly/monthly rank rollups per keyword';
+COMMENT ON TABLE company_rank_rollups IS 'Weekly/monthly rank rollups per company';
@@ -158,6 +158,9 @@ CREATE TABLE IF NOT EXISTS scheduled_audits (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_companies_name ON companies(name);
 CREATE INDEX IF NOT EXISTS idx_keywords_company ON keywords(company_id);
+CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords(keyword);
+-- Keyset pagination: rank ascending (unranked last), volume descending, id
+CREATE INDEX IF NOT EXISTS idx_keywords_rank_page ON keywords(company_id, COALESCE(current_rank, 2147483647), -COALESCE(search_volume, 0), id);
 CREATE INDEX IF NOT EXISTS idx_audits_company ON audits(company_id);
 CREATE INDEX IF NOT EXISTS idx_competitors_company ON competitors(company_id);
 CREATE INDEX IF NOT EXISTS idx_citations_company ON citations(company_id);
@@ -7,51 +7,488 @@ mobile optimization, and E-E-A-T scoring.
 
 Tools:
 - technical_audit: Run full technical SEO audit
-- performance_audit: Analyze page speed and Core Web Vitals
+- performance_audit: Analyze page speed and Core Web Vitals (CrUX field + PSI lab data)
+- performance_audit_batch: Core Web Vitals for many URLs, one origin lookup per origin
 - mobile_audit: Check mobile-friendliness and responsiveness
 - eeat_score: Calculate E-E-A-T (Experience, Expertise, Authoritativeness, Trust) score
+- eeat_score_batch: Score E-E-A-T for many sites or pages at once
 - schema_validator: Validate structured data markup
 - accessibility_audit: Check WCAG compliance
-- security_audit: Analyze HTTPS, headers, and security best practices
+- security_audit: Analyze HTTPS, TLS, headers, and security best practices
+- security_audit_batch: Security sweep over many domains with bounded concurrency
+- full_audit: Run every page analyzer on one shared fetch of the page
+- robots_check: Check many URLs against their hosts' robots.txt
+- sitemap_audit: Stream-validate a sitemap or sitemap index of any size
+
+Page-level tools share one fetch per URL through a short-lived snapshot cache,
+robots.txt files are cached per host for every tool, and Core Web Vitals are
+cached per origin and URL.
 """
 
 from fastmcp import FastMCP
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import asyncio
 import json
+import logging
+import os
 import re
-from datetime import datetime
-from urllib.parse import urlparse
+import ssl
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from itertools import pairwise
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+# Scoring engines shared with the seo-toolkit server live in mcp-servers/shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from eeat_engine import score_pages  # noqa: E402
+from robots_txt import RobotsCache, url_origin  # noqa: E402
+from sitemap_validator import validate_sitemap  # noqa: E402
+from web_vitals import METRICS as VITALS_METRICS  # noqa: E402
+from web_vitals import UpstreamError, WebVitalsClient, assess, combine, rate, score_metrics  # noqa: E402
 
 # Initialize FastMCP server
 mcp = FastMCP("SEO Audit Server")
 
+# Logging goes to stderr (stdout carries the MCP protocol)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# Page Snapshots
+# ============================================================================
+
+SNAPSHOT_TTL = float(os.getenv("SEO_AUDIT_SNAPSHOT_TTL", "300"))  # seconds
+SNAPSHOT_CACHE_SIZE = int(os.getenv("SEO_AUDIT_SNAPSHOT_CACHE_SIZE", "128"))
+FETCH_TIMEOUT = float(os.getenv("SEO_AUDIT_FETCH_TIMEOUT", "20"))
+MAX_BODY_BYTES = int(os.getenv("SEO_AUDIT_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+USER_AGENT = os.getenv("SEO_AUDIT_USER_AGENT", "Mozilla/5.0 (compatible; SEO-Audit/1.0)")
+MAX_CONNECTIONS = int(os.getenv("SEO_AUDIT_MAX_CONNECTIONS", "100"))
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared HTTP client (keep-alive connections reused across tools)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(FETCH_TIMEOUT),
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=20),
+        )
+    return _http_client
+
+
+def normalize_url(url: str) -> str:
+    """Add a missing scheme, lowercase scheme and host, and drop the fragment."""
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parsed = urlparse(url)
+    netloc = parsed.netloc.lower()
+    return parsed._replace(scheme=parsed.scheme.lower(), netloc=netloc, path=parsed.path or "/", fragment="").geturl()
+
+
+def describe_tls(ssl_object: Any) -> Optional[Dict[str, Any]]:
+    """Protocol, cipher and leaf certificate details from a live TLS connection."""
+    if ssl_object is None:
+        return None
+    cipher = ssl_object.cipher() or (None, None, None)
+    details: Dict[str, Any] = {"protocol": ssl_object.version(), "cipher": cipher[0], "cipher_bits": cipher[2]}
+
+    cert = ssl_object.getpeercert() or {}
+    if cert:
+        def name(field: str) -> Optional[str]:
+            for rdn in cert.get(field, ()):
+                for key, value in rdn:
+                    if key == "commonName":
+                        return value
+            return None
+
+        expires = datetime.fromtimestamp(ssl.cert_time_to_seconds(cert["notAfter"]), timezone.utc)
+        details["certificate"] = {
+            "subject": name("subject"),
+            "issuer": name("issuer"),
+            "self_signed": cert.get("subject") == cert.get("issuer"),
+            "not_after": expires.isoformat(),
+            "days_remaining": (expires - datetime.now(timezone.utc)).days,
+            "san": [value for kind, value in cert.get("subjectAltName", ()) if kind == "DNS"],
+            "ca_issuers": list(cert.get("caIssuers", ())),
+        }
 
-@mcp.tool()
-async def technical_audit(
-    url: str,
+    # Python 3.13+ exposes the chain the server sent and the one verification built
+    if hasattr(ssl_object, "get_verified_chain"):
+        try:
+            details["chain"] = {
+                "sent": len(ssl_object.get_unverified_chain() or ()),
+                "verified": len(ssl_object.get_verified_chain() or ()),
+            }
+        except (ssl.SSLError, ValueError):
+            pass
+    return details
+
+
+def find_ssl_error(error: BaseException) -> Optional[ssl.SSLError]:
+    """The TLS error behind a failed fetch (httpx wraps it in its own exceptions), if any."""
+    for _ in range(10):
+        if isinstance(error, ssl.SSLError):
+            return error
+        error = error.__cause__ or error.__context__
+        if error is None:
+            return None
+    return None
+
+
+async def probe_tls(host: str, port: int = 443, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+    """
+    Handshake with verification turned off, to describe a server whose certificate was rejected.
+
+    Protocol and cipher are reported; certificate fields are not, since
+    Python only decodes certificates it has verified.
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context, server_hostname=host), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        return describe_tls(writer.get_extra_info("ssl_object"))
+    finally:
+        writer.close()
+
+
+class PageParser(HTMLParser):
+    """Single-pass collector for the HTML signals the audit analyzers read."""
+
+    LABELABLE_INPUTS = {"hidden", "submit", "button", "image", "reset"}
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.lang = ""
+        self.title = ""
+        self.meta: Dict[str, str] = {}
+        self.canonical = ""
+        self.headings: List[int] = []
+        self.images = 0
+        self.images_missing_alt = 0
+        self.images_responsive = 0
+        self.json_ld: List[str] = []
+        self.microdata_types: List[str] = []
+        self.plugins = 0
+        self.landmarks: set = set()
+        self.positive_tabindex = 0
+        self.inputs: List[Dict[str, Any]] = []
+        self.label_for: set = set()
+        self.links: List[Dict[str, str]] = []
+        self._in_title = False
+        self._script: Optional[List[str]] = None
+        self._label_depth = 0
+        self._link: Optional[Dict[str, str]] = None
+
+    def handle_starttag(self, tag: str, attrs):
+        attrs = {key: (value or "") for key, value in attrs}
+        role = attrs.get("role", "").lower()
+        if role:
+            self.landmarks.add(role)
+        if attrs.get("itemtype"):
+            self.microdata_types.append(attrs["itemtype"].rstrip("/").rsplit("/", 1)[-1])
+        try:
+            if int(attrs.get("tabindex", "0")) > 0:
+                self.positive_tabindex += 1
+        except ValueError:
+            pass
+
+        if tag == "html":
+            self.lang = attrs.get("lang", "")
+        elif tag == "title" and not self.title:
+            self._in_title = True
+        elif tag == "meta":
+            key = (attrs.get("name") or attrs.get("property") or attrs.get("http-equiv") or "").lower()
+            if key and key not in self.meta:
+                self.meta[key] = attrs.get("content", "").strip()
+        elif tag == "link":
+            if "canonical" in attrs.get("rel", "").lower().split() and not self.canonical:
+                self.canonical = urljoin(self.base_url, attrs.get("href", "").strip())
+        elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.headings.append(int(tag[1]))
+        elif tag == "img":
+            self.images += 1
+            if "alt" not in attrs:
+                self.images_missing_alt += 1
+            if attrs.get("srcset"):
+                self.images_responsive += 1
+        elif tag == "source" and attrs.get("srcset"):
+            self.images_responsive += 1
+        elif tag == "script" and attrs.get("type", "").lower() == "application/ld+json":
+            self._script = []
+        elif tag in ("object", "embed", "applet"):
+            self.plugins += 1
+        elif tag in ("main", "nav", "header", "footer", "aside"):
+            self.landmarks.add({"header": "banner", "footer": "contentinfo", "aside": "complementary"}.get(tag, tag))
+        elif tag == "label":
+            self._label_depth += 1
+            if attrs.get("for"):
+                self.label_for.add(attrs["for"])
+        elif tag in ("input", "select", "textarea"):
+            if tag != "input" or attrs.get("type", "text").lower() not in self.LABELABLE_INPUTS:
+                self.inputs.append({
+                    "id": attrs.get("id", ""),
+                    "labelled": bool(self._label_depth or attrs.get("aria-label") or attrs.get("aria-labelledby")
+                                     or attrs.get("title")),
+                })
+        elif tag == "a" and "href" in attrs:
+            self._link = {"href": attrs["href"].strip(), "text": attrs.get("aria-label", "")}
+            self.links.append(self._link)
+
+    def handle_endtag(self, tag: str):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "script" and self._script is not None:
+            self.json_ld.append("".join(self._script))
+            self._script = None
+        elif tag == "label":
+            self._label_depth = max(0, self._label_depth - 1)
+        elif tag == "a":
+            self._link = None
+
+    def handle_data(self, data: str):
+        if self._in_title:
+            self.title += data
+        elif self._script is not None:
+            self._script.append(data)
+        elif self._link is not None:
+            self._link["text"] += data
+
+    def signals(self) -> Dict[str, Any]:
+        unlabelled = [field for field in self.inputs if not field["labelled"] and field["id"] not in self.label_for]
+        return {
+            "lang": self.lang,
+            "title": " ".join(self.title.split()),
+            "meta": self.meta,
+            "canonical": self.canonical,
+            "headings": self.headings,
+            "images": self.images,
+            "images_missing_alt": self.images_missing_alt,
+            "images_responsive": self.images_responsive,
+            "json_ld": self.json_ld,
+            "microdata_types": self.microdata_types,
+            "plugins": self.plugins,
+            "landmarks": sorted(self.landmarks),
+            "positive_tabindex": self.positive_tabindex,
+            "form_fields": len(self.inputs),
+            "unlabelled_fields": len(unlabelled),
+            "links": [{"href": link["href"], "text": " ".join(link["text"].split())} for link in self.links],
+        }
+
+
+class SnapshotError(Exception):
+    """A page could not be fetched for auditing."""
+
+
+class PageSnapshot:
+    """
+    One fetch of a page: final URL, status, headers, body, timing and TLS details.
+
+    Snapshots are shared by every analyzer that audits the same URL, and the
+    HTML is parsed at most once per snapshot.
+    """
+
+    def __init__(self, url: str, response: httpx.Response, body: bytes, truncated: bool,
+                 ttfb_ms: float, elapsed_ms: float, tls: Optional[Dict[str, Any]], transfer_bytes: int = 0):
+        self.url = url
+        self.final_url = str(response.url)
+        self.status_code = response.status_code
+        self.http_version = response.http_version
+        self.headers = response.headers
+        self.redirects = [{"status": r.status_code, "url": str(r.url)} for r in response.history]
+        self.encoding = response.encoding or "utf-8"
+        self.body = body
+        self.truncated = truncated
+        self.transfer_bytes = transfer_bytes or len(body)
+        self.ttfb_ms = round(ttfb_ms, 1)
+        self.elapsed_ms = round(elapsed_ms, 1)
+        self.tls = tls
+        self.fetched_at = datetime.now(timezone.utc)
+        self._html: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_html(self) -> bool:
+        content_type = self.headers.get("content-type", "").lower()
+        return not content_type or "html" in content_type
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors="replace")
+
+    @property
+    def html(self) -> Dict[str, Any]:
+        """Parsed HTML signals (parsed on first access)."""
+        return self.parse()
+
+    def parse(self) -> Dict[str, Any]:
+        """Parse the body into HTML signals unless already done, and return them."""
+        if self._html is None:
+            parser = PageParser(self.final_url)
+            if self.is_html:
+                parser.feed(self.text)
+                parser.close()
+            self._html = parser.signals()
+        return self._html
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "final_url": self.final_url,
+            "status_code": self.status_code,
+            "http_version": self.http_version,
+            "redirects": self.redirects,
+            "content_type": self.headers.get("content-type", ""),
+            "bytes": len(self.body),
+            "transfer_bytes": self.transfer_bytes,
+            "truncated": self.truncated,
+            "ttfb_ms": self.ttfb_ms,
+            "elapsed_ms": self.elapsed_ms,
+            "fetched_at": self.fetched_at.isoformat(),
+            "age_seconds": round((datetime.now(timezone.utc) - self.fetched_at).total_seconds(), 1),
+        }
+
+
+_snapshots: "OrderedDict[str, Tuple[PageSnapshot, float]]" = OrderedDict()
+_snapshot_fetches: Dict[str, "asyncio.Task[PageSnapshot]"] = {}
+
+
+async def fetch_page_snapshot(url: str, max_bytes: int = MAX_BODY_BYTES,
+                              timeout: Optional[float] = None) -> PageSnapshot:
+    """
+    Fetch a page once (following redirects), recording timing and the TLS session.
+
+    At most ``max_bytes`` of the body are read (0 reads headers only), and
+    ``timeout`` caps the whole fetch, redirects included.
+    """
+    started = time.perf_counter()
+
+    async def fetch():
+        async with get_http_client().stream("GET", url) as response:
+            ttfb_ms = (time.perf_counter() - started) * 1000
+            stream = response.extensions.get("network_stream")
+            tls = describe_tls(stream.get_extra_info("ssl_object")) if stream else None
+
+            body = bytearray()
+            truncated = max_bytes <= 0
+            if not truncated:
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= max_bytes:
+                        truncated = True
+                        del body[max_bytes:]
+                        break
+        return response, body, truncated, ttfb_ms, tls
+
+    try:
+        response, body, truncated, ttfb_ms, tls = await asyncio.wait_for(fetch(), timeout)
+    except httpx.HTTPError as e:
+        raise SnapshotError(f"Could not fetch {url}: {e.__class__.__name__} {e}".strip()) from e
+    except asyncio.TimeoutError as e:
+        raise SnapshotError(f"Could not fetch {url}: timed out after {timeout:g} s") from e
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Fetched {url}: HTTP {response.status_code}, {len(body):,} bytes in {elapsed_ms:.0f} ms")
+    return PageSnapshot(url, response, bytes(body), truncated, ttfb_ms, elapsed_ms, tls,
+                        transfer_bytes=response.num_bytes_downloaded)
+
+
+async def get_page_snapshot(url: str, max_age: float = SNAPSHOT_TTL,
+                            timeout: Optional[float] = None) -> PageSnapshot:
+    """
+    Return a snapshot of ``url``, fetching it only if no fresh one is cached.
+
+    Concurrent callers for the same URL share one in-flight fetch (and the
+    first caller's ``timeout``). Failed fetches raise SnapshotError and are
+    not cached.
+    """
+    key = normalize_url(url)
+    cached = _snapshots.get(key)
+    if cached and time.monotonic() - cached[1] < max_age:
+        _snapshots.move_to_end(key)
+        return cached[0]
+
+    task = _snapshot_fetches.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_page_snapshot(key, timeout=timeout))
+        _snapshot_fetches[key] = task
+        task.add_done_callback(lambda _: _snapshot_fetches.pop(key, None))
+
+    snapshot = await asyncio.shield(task)
+    if _snapshots.get(key, (None,))[0] is not snapshot:
+        _snapshots[key] = (snapshot, time.monotonic())
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > SNAPSHOT_CACHE_SIZE:
+            _snapshots.popitem(last=False)
+    return snapshot
+
+
+# One robots.txt per host, shared by technical_audit, full_audit and robots_check
+robots_cache = RobotsCache(get_http_client, USER_AGENT,
+                           max_hosts=int(os.getenv("SEO_AUDIT_ROBOTS_CACHE_SIZE", "1024")))
+
+# Child sitemaps fetched at once, and how many technical_audit reads (sitemap_audit reads them all)
+SITEMAP_CONCURRENCY = int(os.getenv("SEO_AUDIT_SITEMAP_CONCURRENCY", "8"))
+SITEMAP_AUDIT_FILES = int(os.getenv("SEO_AUDIT_SITEMAP_AUDIT_FILES", "10"))
+
+# CrUX field data and PSI lab runs, cached per origin/URL and device
+VITALS_CONCURRENCY = int(os.getenv("SEO_AUDIT_VITALS_CONCURRENCY", "4"))
+web_vitals = WebVitalsClient(
+    get_http_client,
+    api_key=os.getenv("GOOGLE_API_KEY"),
+    crux_ttl=float(os.getenv("SEO_AUDIT_CRUX_TTL", "43200")),
+    psi_ttl=float(os.getenv("SEO_AUDIT_PSI_TTL", "21600")),
+    max_entries=int(os.getenv("SEO_AUDIT_VITALS_CACHE_SIZE", "512")),
+    psi_timeout=float(os.getenv("SEO_AUDIT_PSI_TIMEOUT", "60")),
+)
+
+
+async def find_sitemaps(url: str) -> List[str]:
+    """Sitemaps declared in the host's robots.txt, or the conventional /sitemap.xml."""
+    robots = await robots_cache.get(url)
+    return robots.sitemaps or [f"{url_origin(url)}/sitemap.xml"]
+
+
+def snapshot_error(url: str, error: Exception) -> Dict[str, Any]:
+    """Result returned by a tool whose page could not be fetched."""
+    return {"url": url, "timestamp": datetime.now().isoformat(), "error": str(error), "score": 0, "grade": "F"}
+
+
+# ============================================================================
+# Audit Tools
+# ============================================================================
+
+async def analyze_technical(
+    snapshot: PageSnapshot,
     check_robots: bool = True,
     check_sitemap: bool = True,
     check_meta: bool = True,
     check_headers: bool = True
 ) -> Dict[str, Any]:
-    """
-    Run comprehensive technical SEO audit.
-
-    Args:
-        url: Website URL to audit
-        check_robots: Check robots.txt configuration
-        check_sitemap: Validate XML sitemap
-        check_meta: Analyze meta tags
-        check_headers: Check HTTP headers
-
-    Returns:
-        Dict with audit results including issues, warnings, and recommendations
-    """
+    """Technical SEO checks on a page snapshot (see technical_audit)."""
 
     results = {
-        "url": url,
+        "url": snapshot.url,
         "timestamp": datetime.now().isoformat(),
+        "snapshot": snapshot.summary(),
         "issues": [],
         "warnings": [],
         "successes": [],
@@ -60,8 +497,8 @@ async def technical_audit(
     }
 
     # Parse URL
-    parsed = urlparse(url)
-    domain = parsed.netloc
+    parsed = urlparse(snapshot.final_url)
+    html = snapshot.html
 
     # 1. HTTPS Check
     if parsed.scheme == "https":
@@ -71,42 +508,110 @@ async def technical_audit(
         results["issues"].append("❌ Site not using HTTPS - major security and ranking issue")
         results["recommendations"].append("Implement SSL certificate and redirect HTTP to HTTPS")
 
-    # 2. Robots.txt Check (simulated)
+    if snapshot.status_code >= 400:
+        results["issues"].append(f"❌ Page returned HTTP {snapshot.status_code}")
+        results["recommendations"].append("Fix the server response so the page returns 200")
+    if len(snapshot.redirects) > 1:
+        results["warnings"].append(f"⚠️ Redirect chain of {len(snapshot.redirects)} hops before the final URL")
+        results["recommendations"].append("Link directly to the final URL to avoid redirect chains")
+
+    robots_meta = html["meta"].get("robots", "").lower() + "," + snapshot.headers.get("x-robots-tag", "").lower()
+    if "noindex" in robots_meta:
+        results["issues"].append("❌ Page is marked noindex (meta robots or X-Robots-Tag)")
+
+    # 2. Robots.txt Check
     if check_robots:
-        # In real implementation, fetch and parse robots.txt
-        results["warnings"].append("⚠️ Robots.txt: Should be verified for crawl directives")
-        results["recommendations"].append("Ensure robots.txt allows crawling of important pages")
+        robots = await robots_cache.get(snapshot.final_url)
+        results["robots"] = robots.summary()
+        allowed, rule = robots.check(snapshot.final_url, "Googlebot")
+        if robots.status == "unreachable":
+            results["issues"].append(f"❌ Robots.txt unreachable ({robots.error}) - crawlers treat the site as disallowed")
+            results["recommendations"].append("Make robots.txt return 200 (or 404) instead of errors")
+        elif not allowed:
+            results["issues"].append(f"❌ Robots.txt blocks Googlebot from this page (rule: {rule})")
+            results["recommendations"].append("Remove or narrow the Disallow rule if the page should rank")
+        elif robots.status == "missing":
+            results["warnings"].append(f"⚠️ No robots.txt (HTTP {robots.status_code}) - all crawling allowed")
+            results["recommendations"].append("Add a robots.txt that lists your XML sitemap")
+            results["score"] += 5
+        else:
+            results["successes"].append("✅ Robots.txt allows crawling of this page")
+            results["score"] += 10
+            if not robots.sitemaps:
+                results["warnings"].append("⚠️ Robots.txt does not declare a Sitemap")
 
-    # 3. Sitemap Check (simulated)
+    # 3. XML Sitemap Check (first SITEMAP_AUDIT_FILES files; sitemap_audit validates everything)
     if check_sitemap:
-        # In real implementation, fetch and validate sitemap.xml
-        results["warnings"].append("⚠️ XML Sitemap: Should contain all important URLs")
-        results["recommendations"].append("Submit sitemap to Google Search Console")
-        results["score"] += 5
-
-    # 4. Meta Tags Check (simulated)
+        page_urls = [snapshot.final_url] + ([html["canonical"]] if html["canonical"] else [])
+        report = await validate_sitemap(await find_sitemaps(snapshot.final_url), get_http_client,
+                                        concurrency=SITEMAP_CONCURRENCY, max_sitemaps=SITEMAP_AUDIT_FILES,
+                                        sample_size=5, find=page_urls)
+        files = report["sitemaps"]
+        results["sitemap"] = {key: report[key] for key in ("sitemap_urls", "valid", "sitemaps", "urls")}
+        errors = [f"{file['url']}: {error}" for file in report["files"] for error in file.get("errors", ())]
+        if not report["urls"]["total"]:
+            results["issues"].append(f"❌ No usable XML sitemap ({errors[0] if errors else 'no URLs listed'})")
+            results["recommendations"].append("Publish an XML sitemap and reference it in robots.txt")
+        else:
+            results["successes"].append(f"✅ XML sitemap lists {report['urls']['total']:,} URLs"
+                                        f"{' (partial check)' if files['skipped'] else ''}")
+            results["score"] += 5
+            if errors:
+                results["warnings"].append(f"⚠️ XML Sitemap: {len(errors)} problems, e.g. {errors[0]}")
+            if report["urls"]["invalid"] or report["urls"]["duplicates"]:
+                results["warnings"].append(f"⚠️ XML Sitemap: {report['urls']['invalid']} invalid and "
+                                           f"{report['urls']['duplicates']} duplicate URLs")
+            if not files["skipped"] and not any(report["found"].values()):
+                results["warnings"].append("⚠️ This page is not listed in the XML sitemap")
+            results["recommendations"].append("Run sitemap_audit for a full sitemap validation")
+
+    # 4. Meta Tags Check
     if check_meta:
-        results["successes"].append("✅ Meta tags present (title, description)")
+        title, description = html["title"], html["meta"].get("description", "")
+        if title and description:
+            results["successes"].append("✅ Meta tags present (title, description)")
+            results["score"] += 15
+        else:
+            missing = [name for name, value in (("title", title), ("description", description)) if not value]
+            results["issues"].append(f"❌ Missing meta tags: {', '.join(missing)}")
+        if title and not 30 <= len(title) <= 60:
+            results["warnings"].append(f"⚠️ Title is {len(title)} characters")
+        if description and not 120 <= len(description) <= 160:
+            results["warnings"].append(f"⚠️ Meta description is {len(description)} characters")
         results["recommendations"].append("Ensure title tags are 50-60 characters")
         results["recommendations"].append("Keep meta descriptions between 150-160 characters")
-        results["score"] += 15
 
-    # 5. Headers Check (simulated)
+    # 5. Headers Check
     if check_headers:
-        results["warnings"].append("⚠️ Security headers: Check X-Frame-Options, CSP, HSTS")
-        results["recommendations"].append("Implement security headers for better protection")
+        missing = [name for name in ("X-Frame-Options", "Content-Security-Policy", "Strict-Transport-Security")
+                   if name not in snapshot.headers]
+        if missing:
+            results["warnings"].append(f"⚠️ Security headers missing: {', '.join(missing)}")
+            results["recommendations"].append("Implement security headers for better protection")
+        else:
+            results["successes"].append("✅ Security headers present (X-Frame-Options, CSP, HSTS)")
 
     # 6. URL Structure
     if parsed.path and not parsed.path.endswith('/'):
         results["successes"].append("✅ Clean URL structure")
         results["score"] += 5
 
-    # 7. Canonical Tags (simulated)
-    results["warnings"].append("⚠️ Canonical tags: Verify self-referencing canonicals")
-    results["score"] += 5
+    # 7. Canonical Tags
+    canonical = html["canonical"]
+    if not canonical:
+        results["warnings"].append("⚠️ Canonical tags: No canonical tag found")
+        results["recommendations"].append("Add a self-referencing canonical tag")
+    elif normalize_url(canonical) == normalize_url(snapshot.final_url):
+        results["successes"].append("✅ Self-referencing canonical tag")
+        results["score"] += 5
+    else:
+        results["warnings"].append(f"⚠️ Canonical points elsewhere: {canonical}")
 
-    # 8. Mobile-Friendly (simulated)
-    results["warnings"].append("⚠️ Mobile-friendliness: Should be tested separately")
+    # 8. Mobile-Friendly
+    if "viewport" in html["meta"]:
+        results["successes"].append("✅ Viewport meta tag present")
+    else:
+        results["warnings"].append("⚠️ Mobile-friendliness: No viewport meta tag (run mobile_audit)")
 
     # Calculate final score
     max_score = 100
@@ -127,79 +632,181 @@ async def technical_audit(
 
 
 @mcp.tool()
-async def performance_audit(
+async def technical_audit(
     url: str,
-    device: str = "desktop"
+    check_robots: bool = True,
+    check_sitemap: bool = True,
+    check_meta: bool = True,
+    check_headers: bool = True
 ) -> Dict[str, Any]:
     """
-    Analyze page speed and Core Web Vitals.
+    Run comprehensive technical SEO audit.
 
     Args:
-        url: Website URL to test
-        device: Device type ('desktop' or 'mobile')
+        url: Website URL to audit
+        check_robots: Check robots.txt configuration
+        check_sitemap: Validate XML sitemap
+        check_meta: Analyze meta tags
+        check_headers: Check HTTP headers
 
     Returns:
-        Dict with performance metrics and optimization suggestions
+        Dict with audit results including issues, warnings, and recommendations
     """
+    try:
+        snapshot = await get_page_snapshot(url)
+    except SnapshotError as e:
+        return snapshot_error(url, e)
+    return await analyze_technical(snapshot, check_robots, check_sitemap, check_meta, check_headers)
+
+
+# Local fallback: HTML document transfer size (bytes) - (good, poor) thresholds
+LOCAL_TRANSFER_THRESHOLDS = (500 * 1024, 1024 * 1024)
+
+METRIC_RECOMMENDATIONS = {
+    "lcp": "Optimize LCP: Compress and preload the hero image, use a CDN, remove render-blocking resources",
+    "inp": "Improve INP: Break up long tasks, minimize JavaScript, defer non-critical scripts",
+    "cls": "Fix CLS: Set image/video dimensions, avoid injecting content above existing content",
+    "fcp": "Improve FCP: Inline critical CSS and defer non-critical CSS and fonts",
+    "ttfb": "Reduce TTFB: Optimize server configuration, use caching, consider CDN",
+    "tbt": "Reduce TBT: Split bundles and remove unused JavaScript",
+    "html_transfer_size": "Reduce HTML size: Enable compression (Gzip/Brotli) and trim inline scripts and styles",
+}
+
+
+def format_metric(name: str, metric: Dict[str, Any]) -> str:
+    value = metric["value"]
+    shown = f"{value / 1000:.2f} s" if metric["unit"] == "ms" else (
+        f"{value / 1024:.0f} KB" if metric["unit"] == "bytes" else f"{value:g}")
+    return f"{name.upper()} {shown} ({metric['rating']}, {metric['source']})"
+
+
+async def load_origin_field(origin: str, device: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Origin-level CrUX record (or None) and the upstream error, if any."""
+    try:
+        return await web_vitals.field(origin, device, origin=True), None
+    except UpstreamError as e:
+        return None, str(e)
+
+
+async def local_performance(url: str) -> Dict[str, Dict[str, Any]]:
+    """TTFB and HTML transfer size measured by the shared page fetcher."""
+    snapshot = await get_page_snapshot(url)
+    good, poor = LOCAL_TRANSFER_THRESHOLDS
+    size = snapshot.transfer_bytes
+    return {
+        "ttfb": {"value": snapshot.ttfb_ms, "unit": "ms", "rating": rate("ttfb", snapshot.ttfb_ms),
+                 "source": "local", "description": VITALS_METRICS["ttfb"][3]},
+        "html_transfer_size": {
+            "value": size, "unit": "bytes", "source": "local",
+            "rating": "good" if size <= good else "needs-improvement" if size <= poor else "poor",
+            "description": "HTML document bytes on the wire - measured locally",
+        },
+    }
+
+
+async def analyze_performance(
+    url: str,
+    device: str,
+    origin_field: Tuple[Optional[Dict[str, Any]], Optional[str]],
+    include_lab: bool = True
+) -> Dict[str, Any]:
+    """Core Web Vitals for one URL from CrUX and PSI, or local timings when both are unavailable."""
 
     results = {
         "url": url,
         "device": device,
         "timestamp": datetime.now().isoformat(),
+        "fallback": False,
+        "core_web_vitals": {},
         "metrics": {},
+        "field": {"url": None, "origin": origin_field[0]},
+        "lab": None,
+        "upstream_errors": {},
         "issues": [],
+        "warnings": [],
         "recommendations": [],
         "score": 0
     }
-
-    # Simulated Core Web Vitals (in real implementation, use Lighthouse API)
-    results["metrics"]["lcp"] = {
-        "value": 2.1,  # Largest Contentful Paint (seconds)
-        "rating": "good" if 2.1 <= 2.5 else "needs improvement",
-        "description": "Largest Contentful Paint - measures loading performance"
-    }
-
-    results["metrics"]["fid"] = {
-        "value": 85,  # First Input Delay (milliseconds)
-        "rating": "good" if 85 <= 100 else "needs improvement",
-        "description": "First Input Delay - measures interactivity"
-    }
-
-    results["metrics"]["cls"] = {
-        "value": 0.08,  # Cumulative Layout Shift
-        "rating": "good" if 0.08 <= 0.1 else "needs improvement",
-        "description": "Cumulative Layout Shift - measures visual stability"
-    }
-
-    results["metrics"]["ttfb"] = {
-        "value": 0.6,  # Time to First Byte (seconds)
-        "rating": "good" if 0.6 <= 0.8 else "needs improvement",
-        "description": "Time to First Byte - server response time"
-    }
-
-    results["metrics"]["fcp"] = {
-        "value": 1.4,  # First Contentful Paint (seconds)
-        "rating": "good" if 1.4 <= 1.8 else "needs improvement",
-        "description": "First Contentful Paint - when first content renders"
-    }
-
-    # Calculate score based on metrics
-    good_metrics = sum(1 for m in results["metrics"].values() if m["rating"] == "good")
-    results["score"] = int((good_metrics / len(results["metrics"])) * 100)
+    if origin_field[1]:
+        results["upstream_errors"]["field_origin"] = origin_field[1]
+
+    async def lookup(name: str, call):
+        try:
+            return await call
+        except UpstreamError as e:
+            results["upstream_errors"][name] = str(e)
+            return None
+
+    calls = [lookup("field_url", web_vitals.field(url, device))]
+    if include_lab:
+        calls.append(lookup("lab", web_vitals.lab(url, device)))
+    url_field, *lab = await asyncio.gather(*calls)
+    results["field"]["url"] = url_field
+    results["lab"] = lab[0] if lab else None
+
+    results["core_web_vitals"] = {"url": assess(url_field), "origin": assess(origin_field[0])}
+    metrics = combine(url_field, origin_field[0], results["lab"])
+
+    if not metrics:
+        # Neither CrUX nor PSI had numbers for this page: measure what we can ourselves
+        results["fallback"] = True
+        results["fallback_reason"] = "; ".join(
+            f"{name}: {error}" for name, error in results["upstream_errors"].items()
+        ) or ("No CrUX field data for this page or origin" + ("" if include_lab else "; lab run skipped"))
+        try:
+            metrics = await local_performance(url)
+        except SnapshotError as e:
+            return {**snapshot_error(url, e), "fallback": True, "fallback_reason": results["fallback_reason"]}
+        results["warnings"].append("⚠️ CrUX/PageSpeed unavailable - showing locally measured TTFB and transfer size")
+
+    results["metrics"] = metrics
+    results["sources"] = sorted({metric["source"] for metric in metrics.values()})
+
+    for name, metric in metrics.items():
+        if metric["rating"] == "poor":
+            results["issues"].append(f"❌ {format_metric(name, metric)}")
+        elif metric["rating"] == "needs-improvement":
+            results["warnings"].append(f"⚠️ {format_metric(name, metric)}")
+        if metric["rating"] != "good" and name in METRIC_RECOMMENDATIONS:
+            results["recommendations"].append(METRIC_RECOMMENDATIONS[name])
+    if results["core_web_vitals"]["url"] == "failed" or (
+            results["core_web_vitals"]["url"] == "no-data" and results["core_web_vitals"]["origin"] == "failed"):
+        results["issues"].append("❌ Fails the Core Web Vitals assessment (LCP, INP, CLS at p75)")
+
+    for opportunity in (results["lab"] or {}).get("opportunities", []):
+        results["recommendations"].append(f"{opportunity['title']} (saves ~{opportunity['savings_ms']} ms)")
+
+    results["score"] = score_metrics(metrics)
     results["grade"] = get_grade(results["score"])
+    return results
 
-    # Generate recommendations
-    if results["metrics"]["lcp"]["rating"] != "good":
-        results["recommendations"].append("Optimize LCP: Compress images, use CDN, implement lazy loading")
 
-    if results["metrics"]["fid"]["rating"] != "good":
-        results["recommendations"].append("Improve FID: Minimize JavaScript, use code splitting, defer non-critical scripts")
+@mcp.tool()
+async def performance_audit(
+    url: str,
+    device: str = "desktop",
+    include_lab: bool = True
+) -> Dict[str, Any]:
+    """
+    Analyze page speed and Core Web Vitals.
+
+    Field data (p75 of real Chrome users) comes from the Chrome UX Report for
+    the page and its origin; lab data comes from a PageSpeed Insights run.
+    Both are cached, so repeat audits cost no upstream calls. When neither is
+    reachable, locally measured TTFB and transfer size are reported instead
+    with ``fallback`` set.
 
-    if results["metrics"]["cls"]["rating"] != "good":
-        results["recommendations"].append("Fix CLS: Set image/video dimensions, avoid injecting content above existing content")
+    Args:
+        url: Website URL to test
+        device: Device type ('desktop' or 'mobile')
+        include_lab: Run (or reuse) a PageSpeed Insights lab test (default: true)
 
-    if results["metrics"]["ttfb"]["rating"] != "good":
-        results["recommendations"].append("Reduce TTFB: Optimize server configuration, use caching, consider CDN")
+    Returns:
+        Dict with performance metrics, their sources, the Core Web Vitals assessment and optimization suggestions
+    """
+    url = normalize_url(url)
+    device = device.lower()
+    results = await analyze_performance(url, device, await load_origin_field(url_origin(url), device), include_lab)
 
     # Additional recommendations
     results["recommendations"].extend([
@@ -209,25 +816,113 @@ async def performance_audit(
         "Use modern image formats (WebP, AVIF)",
         "Implement critical CSS inlining"
     ])
-
+    results["cache"] = web_vitals.stats()
     return results
 
 
 @mcp.tool()
-async def mobile_audit(url: str) -> Dict[str, Any]:
+async def performance_audit_batch(
+    urls: List[str],
+    device: str = "desktop",
+    include_lab: bool = False,
+    concurrency: int = VITALS_CONCURRENCY
+) -> Dict[str, Any]:
     """
-    Check mobile-friendliness and responsive design.
+    Core Web Vitals for many URLs, fetching each origin's field data once.
+
+    Origin-level CrUX records are looked up once per distinct origin and
+    shared by that origin's URLs; URL-level lookups (and PSI runs, when
+    include_lab is set) run ``concurrency`` at a time. Results are cached
+    exactly as in performance_audit.
 
     Args:
-        url: Website URL to test
+        urls: URLs to test (any number of origins)
+        device: Device type ('desktop' or 'mobile')
+        include_lab: Also run PageSpeed Insights per URL (slow: 10-30 s each) (default: false)
+        concurrency: URLs processed at once (default: 4)
 
     Returns:
-        Dict with mobile optimization results
+        Dict with per-URL metrics and scores, each origin's field data, assessment counts, fallbacks
+        and the URLs that could not be audited
     """
+    started = time.perf_counter()
+    device = device.lower()
+    urls = list(dict.fromkeys(normalize_url(url) for url in urls if url and url.strip()))
+    origins = list(dict.fromkeys(url_origin(url) for url in urls))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def origin_task(origin: str):
+        async with semaphore:
+            try:
+                return origin, await load_origin_field(origin, device)
+            except Exception as e:  # one bad origin must not abort the batch
+                return origin, (None, f"{e.__class__.__name__} {e}".strip())
+
+    origin_fields = dict(await asyncio.gather(*(origin_task(origin) for origin in origins)))
+
+    async def url_task(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await analyze_performance(url, device, origin_fields[url_origin(url)], include_lab)
+            except Exception as e:  # recorded per URL so the other pages still report
+                return snapshot_error(url, e)
+        result["field_url"] = (result.pop("field", None) or {}).get("url")
+        return result
+
+    pages = await asyncio.gather(*(url_task(url) for url in urls))
+    failed = [{"url": page["url"], "error": page["error"]} for page in pages if "error" in page]
+
+    assessments: Dict[str, int] = {}
+    for page in pages:
+        verdict = (page.get("core_web_vitals") or {}).get("url", "no-data")
+        assessments[verdict] = assessments.get(verdict, 0) + 1
+    scored = [page["score"] for page in pages if "error" not in page]
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "device": device,
+        "total": len(pages),
+        "average_score": round(sum(scored) / len(scored)) if scored else 0,
+        "assessments": assessments,
+        "fallbacks": sum(1 for page in pages if page.get("fallback")),
+        "failed": failed,
+        "origins": {
+            origin: {"core_web_vitals": assess(field), "field": field, **({"error": error} if error else {})}
+            for origin, (field, error) in origin_fields.items()
+        },
+        "pages": pages,
+        "cache": web_vitals.stats(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def score_checks(checks: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Percentage of the evaluated checks' weight that passed.
+
+    Checks with ``passed`` set to None need a rendered page to decide and are
+    left out of the score rather than guessed.
+    """
+    evaluated = [check for check in checks.values() if check["passed"] is not None]
+    total = sum(check["weight"] for check in evaluated)
+    if not total:
+        return 0
+    return round(100 * sum(check["weight"] for check in evaluated if check["passed"]) / total)
+
+
+def parse_viewport(content: str) -> Dict[str, str]:
+    """Split a viewport meta content string into lowercase key/value pairs."""
+    pairs = (part.split("=", 1) for part in re.split(r"[,;]", content) if "=" in part)
+    return {key.strip().lower(): value.strip().lower() for key, value in pairs}
+
+
+async def analyze_mobile(snapshot: PageSnapshot) -> Dict[str, Any]:
+    """Mobile-friendliness checks on a page snapshot (see mobile_audit)."""
 
     results = {
-        "url": url,
+        "url": snapshot.url,
         "timestamp": datetime.now().isoformat(),
+        "snapshot": snapshot.summary(),
         "checks": {},
         "issues": [],
         "successes": [],
@@ -235,40 +930,46 @@ async def mobile_audit(url: str) -> Dict[str, Any]:
         "score": 0
     }
 
-    # Simulated mobile checks
+    html = snapshot.html
+    viewport = parse_viewport(html["meta"].get("viewport", "")) if "viewport" in html["meta"] else None
+    try:
+        max_scale = float(viewport.get("maximum-scale", "10")) if viewport else 10.0
+    except ValueError:
+        max_scale = 10.0
+
     checks = {
         "viewport_meta": {
-            "passed": True,
+            "passed": bool(viewport) and viewport.get("width") == "device-width",
             "description": "Viewport meta tag configured",
             "weight": 20
         },
         "text_readable": {
-            "passed": True,
+            "passed": bool(viewport) and viewport.get("user-scalable") not in ("no", "0") and max_scale >= 2,
             "description": "Text is readable without zooming",
             "weight": 15
         },
         "tap_targets": {
-            "passed": True,
+            "passed": None,  # needs layout from a rendered page
             "description": "Tap targets are appropriately sized",
             "weight": 15
         },
         "no_horizontal_scroll": {
-            "passed": True,
+            "passed": bool(viewport) and not viewport.get("width", "").isdigit(),
             "description": "Content fits screen width",
             "weight": 15
         },
         "touch_friendly": {
-            "passed": True,
+            "passed": None,  # needs layout from a rendered page
             "description": "Touch-friendly navigation",
             "weight": 10
         },
         "fast_loading": {
-            "passed": False,
+            "passed": snapshot.ttfb_ms <= 800 and len(snapshot.body) <= 500 * 1024,
             "description": "Mobile page load speed",
             "weight": 15
         },
         "no_flash": {
-            "passed": True,
+            "passed": html["plugins"] == 0,
             "description": "No Flash or unsupported plugins",
             "weight": 10
         }
@@ -279,15 +980,15 @@ async def mobile_audit(url: str) -> Dict[str, Any]:
     # Calculate score
     for check_name, check in checks.items():
         if check["passed"]:
-            results["score"] += check["weight"]
             results["successes"].append(f"✅ {check['description']}")
-        else:
+        elif check["passed"] is False:
             results["issues"].append(f"❌ {check['description']}")
 
             if check_name == "fast_loading":
                 results["recommendations"].append("Optimize images for mobile")
                 results["recommendations"].append("Reduce JavaScript execution time")
 
+    results["score"] = score_checks(checks)
     results["grade"] = get_grade(results["score"])
 
     # Mobile-specific recommendations
@@ -302,6 +1003,24 @@ async def mobile_audit(url: str) -> Dict[str, Any]:
     return results
 
 
+@mcp.tool()
+async def mobile_audit(url: str) -> Dict[str, Any]:
+    """
+    Check mobile-friendliness and responsive design.
+
+    Args:
+        url: Website URL to test
+
+    Returns:
+        Dict with mobile optimization results
+    """
+    try:
+        snapshot = await get_page_snapshot(url)
+    except SnapshotError as e:
+        return snapshot_error(url, e)
+    return await analyze_mobile(snapshot)
+
+
 @mcp.tool()
 async def eeat_score(
     url: str,
@@ -330,91 +1049,30 @@ async def eeat_score(
         Dict with E-E-A-T score and breakdown
     """
 
+    features = {
+        "has_author_bio": has_author_bio,
+        "has_citations": has_citations,
+        "https_enabled": https_enabled,
+        "has_contact_page": has_contact_page,
+        "has_privacy_policy": has_privacy_policy,
+        "domain_age_years": domain_age_years,
+        "has_about_page": has_about_page,
+    }
+    batch = score_pages([features], "site")
+    scores = batch.page(0)
+    passed = set(batch.passed(0))
+
+    report = eeat_report(features, scores, passed)
+
     results = {
         "url": url,
         "timestamp": datetime.now().isoformat(),
-        "breakdown": {},
-        "total_score": 0,
-        "grade": "",
-        "recommendations": []
+        "breakdown": report["breakdown"],
+        "total_score": scores["overall"],
+        "grade": get_grade(scores["overall"]),
+        "recommendations": report["recommendations"]
     }
 
-    # Experience (25 points)
-    experience_score = 0
-    if has_author_bio:
-        experience_score += 15
-        results["breakdown"]["author_bio"] = "✅ Author credentials displayed"
-    else:
-        results["breakdown"]["author_bio"] = "❌ No author bio/credentials"
-        results["recommendations"].append("Add author bios showcasing expertise and experience")
-
-    if domain_age_years >= 5:
-        experience_score += 10
-        results["breakdown"]["domain_age"] = f"✅ Established domain ({domain_age_years} years)"
-    elif domain_age_years >= 2:
-        experience_score += 5
-        results["breakdown"]["domain_age"] = f"⚠️ Moderate domain age ({domain_age_years} years)"
-    else:
-        results["breakdown"]["domain_age"] = f"❌ New domain ({domain_age_years} years)"
-        results["recommendations"].append("Build domain authority over time")
-
-    results["breakdown"]["experience_score"] = f"{experience_score}/25"
-
-    # Expertise (25 points)
-    expertise_score = 0
-    if has_citations:
-        expertise_score += 15
-        results["breakdown"]["citations"] = "✅ External citations/references present"
-    else:
-        results["breakdown"]["citations"] = "❌ No citations or references"
-        results["recommendations"].append("Add citations to authoritative sources")
-
-    if has_about_page:
-        expertise_score += 10
-        results["breakdown"]["about_page"] = "✅ About page exists"
-    else:
-        results["breakdown"]["about_page"] = "❌ No about page"
-        results["recommendations"].append("Create comprehensive About page")
-
-    results["breakdown"]["expertise_score"] = f"{expertise_score}/25"
-
-    # Authoritativeness (25 points)
-    # Simulated - in real implementation, check backlinks, mentions, etc.
-    authoritativeness_score = 15  # Moderate baseline
-    results["breakdown"]["authoritativeness"] = "⚠️ Moderate authority (requires backlink analysis)"
-    results["breakdown"]["authoritativeness_score"] = f"{authoritativeness_score}/25"
-    results["recommendations"].append("Build high-quality backlinks from authoritative sites")
-    results["recommendations"].append("Get mentioned in industry publications")
-
-    # Trust (25 points)
-    trust_score = 0
-    if https_enabled:
-        trust_score += 10
-        results["breakdown"]["https"] = "✅ HTTPS enabled"
-    else:
-        results["breakdown"]["https"] = "❌ No HTTPS"
-        results["recommendations"].append("CRITICAL: Implement SSL certificate")
-
-    if has_contact_page:
-        trust_score += 8
-        results["breakdown"]["contact"] = "✅ Contact page present"
-    else:
-        results["breakdown"]["contact"] = "❌ No contact information"
-        results["recommendations"].append("Add contact page with multiple contact methods")
-
-    if has_privacy_policy:
-        trust_score += 7
-        results["breakdown"]["privacy"] = "✅ Privacy policy present"
-    else:
-        results["breakdown"]["privacy"] = "❌ No privacy policy"
-        results["recommendations"].append("Add privacy policy (required for GDPR compliance)")
-
-    results["breakdown"]["trust_score"] = f"{trust_score}/25"
-
-    # Calculate total
-    results["total_score"] = experience_score + expertise_score + authoritativeness_score + trust_score
-    results["grade"] = get_grade(results["total_score"])
-
     # Overall assessment
     if results["total_score"] >= 80:
         results["assessment"] = "Excellent E-E-A-T signals - strong foundation for rankings"
@@ -428,25 +1086,151 @@ async def eeat_score(
     return results
 
 
+# "site" profile rules: (breakdown when passed, breakdown when missed, recommendation when missed)
+EEAT_SIGNALS = {
+    "author_bio": ("✅ Author credentials displayed", "❌ No author bio/credentials",
+                   "Add author bios showcasing expertise and experience"),
+    "citations": ("✅ External citations/references present", "❌ No citations or references",
+                  "Add citations to authoritative sources"),
+    "about_page": ("✅ About page exists", "❌ No about page", "Create comprehensive About page"),
+    "https": ("✅ HTTPS enabled", "❌ No HTTPS", "CRITICAL: Implement SSL certificate"),
+    "contact_page": ("✅ Contact page present", "❌ No contact information",
+                     "Add contact page with multiple contact methods"),
+    "privacy_policy": ("✅ Privacy policy present", "❌ No privacy policy",
+                       "Add privacy policy (required for GDPR compliance)"),
+}
+
+
+def eeat_report(features: Dict[str, Any], scores: Dict[str, int], passed: set) -> Dict[str, Any]:
+    """Breakdown and recommendations for one "site" profile E-E-A-T result."""
+    recommendations = []
+
+    def signal(rule: str) -> str:
+        if rule in passed:
+            return EEAT_SIGNALS[rule][0]
+        recommendations.append(EEAT_SIGNALS[rule][2])
+        return EEAT_SIGNALS[rule][1]
+
+    age = features.get("domain_age_years") or 0
+    breakdown = {"author_bio": signal("author_bio")}
+    if "domain_age_established" in passed:
+        breakdown["domain_age"] = f"✅ Established domain ({age} years)"
+    elif "domain_age_moderate" in passed:
+        breakdown["domain_age"] = f"⚠️ Moderate domain age ({age} years)"
+    else:
+        breakdown["domain_age"] = f"❌ New domain ({age} years)"
+        recommendations.append("Build domain authority over time")
+    breakdown["experience_score"] = f"{scores['experience']}/25"
+
+    breakdown["citations"] = signal("citations")
+    breakdown["about_page"] = signal("about_page")
+    breakdown["expertise_score"] = f"{scores['expertise']}/25"
+
+    # No rules feed authoritativeness - it needs backlink data
+    breakdown["authoritativeness"] = "⚠️ Moderate authority (requires backlink analysis)"
+    breakdown["authoritativeness_score"] = f"{scores['authoritativeness']}/25"
+    recommendations.append("Build high-quality backlinks from authoritative sites")
+    recommendations.append("Get mentioned in industry publications")
+
+    breakdown["https"] = signal("https")
+    breakdown["contact"] = signal("contact_page")
+    breakdown["privacy"] = signal("privacy_policy")
+    breakdown["trust_score"] = f"{scores['trustworthiness']}/25"
+
+    return {"breakdown": breakdown, "recommendations": recommendations}
+
+
 @mcp.tool()
-async def schema_validator(
-    url: str,
-    schema_type: Optional[str] = None
+async def eeat_score_batch(
+    pages: List[Dict[str, Any]],
+    profile: str = "site",
+    weights: Optional[Dict[str, float]] = None,
+    limit: int = 20
 ) -> Dict[str, Any]:
     """
-    Validate structured data markup (Schema.org).
+    Calculate E-E-A-T scores for many sites or pages in one call.
+
+    Uses the same batch engine as eeat_score and seo-toolkit's
+    calculate_eeat_scores, so sitewide reports over crawled pages take
+    milliseconds.
 
     Args:
-        url: Website URL to check
-        schema_type: Specific schema type to validate (Organization, LocalBusiness, etc.)
+        pages: Feature records, one per site or page, with a "url" key plus the profile's
+               features ("site": has_author_bio, has_citations, https_enabled, has_contact_page,
+               has_privacy_policy, domain_age_years, has_about_page)
+        profile: "site" (0-25 per dimension, eeat_score's weights) or "content" (0-100 per dimension)
+        weights: Optional overall weight per dimension, e.g. {"trustworthiness": 2}
+        limit: Number of lowest-scoring pages to return in full (default: 20)
 
     Returns:
-        Dict with schema validation results
+        Dict with sitewide averages, grade distribution and the lowest-scoring pages
     """
 
+    try:
+        batch = score_pages(pages, profile, weights)
+    except (ValueError, TypeError, AttributeError) as e:
+        return {"error": str(e)}
+
+    grades: Dict[str, int] = {}
+    for score in batch.overall:
+        grade = get_grade(score)
+        grades[grade] = grades.get(grade, 0) + 1
+
+    weakest = sorted(range(len(batch)), key=lambda i: batch.overall[i])[:max(0, limit)]
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "profile": batch.profile.describe(),
+        "summary": batch.summary(),
+        "grades": grades,
+        "lowest_scoring": [
+            {
+                "url": pages[i].get("url"),
+                "scores": batch.page(i),
+                "grade": get_grade(batch.overall[i]),
+                "passed": batch.passed(i),
+            }
+            for i in weakest
+        ],
+    }
+
+
+# Schema.org types: (required properties, recommended properties)
+SCHEMA_PROPERTIES = {
+    "Organization": (("name", "url"), ("logo", "sameAs", "contactPoint")),
+    "LocalBusiness": (("name", "address"), ("telephone", "openingHours", "geo", "url")),
+    "WebSite": (("name", "url"), ("potentialAction",)),
+    "WebPage": (("name",), ("description", "url")),
+    "Article": (("headline",), ("author", "datePublished", "dateModified", "image")),
+    "BlogPosting": (("headline",), ("author", "datePublished", "dateModified", "image")),
+    "NewsArticle": (("headline",), ("author", "datePublished", "dateModified", "image")),
+    "BreadcrumbList": (("itemListElement",), ()),
+    "FAQPage": (("mainEntity",), ()),
+    "Product": (("name",), ("offers", "aggregateRating", "image", "description")),
+    "Service": (("name",), ("provider", "areaServed", "description")),
+    "Person": (("name",), ("jobTitle", "sameAs", "url")),
+}
+
+
+def iter_schema_items(data: Any):
+    """Yield every typed item in a JSON-LD document (lists, @graph and nesting at the top)."""
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_schema_items(item)
+    elif isinstance(data, dict):
+        if "@graph" in data:
+            yield from iter_schema_items(data["@graph"])
+        if "@type" in data:
+            yield data
+
+
+async def analyze_schema(snapshot: PageSnapshot, schema_type: Optional[str] = None) -> Dict[str, Any]:
+    """Structured data checks on a page snapshot (see schema_validator)."""
+
     results = {
-        "url": url,
+        "url": snapshot.url,
         "timestamp": datetime.now().isoformat(),
+        "snapshot": snapshot.summary(),
         "found_schemas": [],
         "errors": [],
         "warnings": [],
@@ -454,29 +1238,45 @@ async def schema_validator(
         "valid": False
     }
 
-    # Simulated schema detection
-    # In real implementation, fetch page and parse JSON-LD, Microdata, RDFa
-
-    common_schemas = [
-        {
-            "type": "Organization",
-            "valid": True,
-            "properties": ["name", "url", "logo"],
-            "missing": ["sameAs", "contactPoint"]
-        },
-        {
-            "type": "WebSite",
-            "valid": True,
-            "properties": ["name", "url"],
-            "missing": ["potentialAction"]  # For sitelinks searchbox
-        }
-    ]
-
-    results["found_schemas"] = common_schemas
-    results["valid"] = all(schema["valid"] for schema in common_schemas)
+    html = snapshot.html
+    schemas = []
+    for index, block in enumerate(html["json_ld"], 1):
+        try:
+            document = json.loads(block)
+        except ValueError as e:
+            results["errors"].append(f"❌ JSON-LD block {index} is not valid JSON: {e}")
+            continue
+        for item in iter_schema_items(document):
+            types = item["@type"] if isinstance(item["@type"], list) else [item["@type"]]
+            for type_name in types:
+                required, recommended = SCHEMA_PROPERTIES.get(type_name, ((), ()))
+                missing_required = [prop for prop in required if not item.get(prop)]
+                schemas.append({
+                    "type": type_name,
+                    "format": "json-ld",
+                    "valid": not missing_required,
+                    "properties": sorted(key for key in item if not key.startswith("@")),
+                    "missing_required": missing_required,
+                    "missing": [prop for prop in recommended if not item.get(prop)]
+                })
+
+    for type_name in dict.fromkeys(html["microdata_types"]):
+        schemas.append({"type": type_name, "format": "microdata", "valid": True, "properties": [],
+                        "missing_required": [], "missing": []})
+
+    results["found_schemas"] = schemas
+    if schema_type and not any(schema["type"].lower() == schema_type.lower() for schema in schemas):
+        results["errors"].append(f"❌ No {schema_type} schema found on the page")
+    if not schemas:
+        results["errors"].append("❌ No structured data found (JSON-LD or microdata)")
+    results["valid"] = bool(schemas) and not results["errors"] and all(schema["valid"] for schema in schemas)
 
     # Generate recommendations
-    for schema in common_schemas:
+    for schema in schemas:
+        if schema["missing_required"]:
+            results["errors"].append(
+                f"❌ {schema['type']}: Missing required properties: {', '.join(schema['missing_required'])}"
+            )
         if schema["missing"]:
             results["warnings"].append(
                 f"⚠️ {schema['type']}: Missing optional properties: {', '.join(schema['missing'])}"
@@ -495,20 +1295,37 @@ async def schema_validator(
 
 
 @mcp.tool()
-async def accessibility_audit(url: str) -> Dict[str, Any]:
+async def schema_validator(
+    url: str,
+    schema_type: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    Check WCAG (Web Content Accessibility Guidelines) compliance.
+    Validate structured data markup (Schema.org).
 
     Args:
-        url: Website URL to audit
+        url: Website URL to check
+        schema_type: Specific schema type to validate (Organization, LocalBusiness, etc.)
 
     Returns:
-        Dict with accessibility audit results
+        Dict with schema validation results
     """
+    try:
+        snapshot = await get_page_snapshot(url)
+    except SnapshotError as e:
+        return snapshot_error(url, e)
+    return await analyze_schema(snapshot, schema_type)
+
+
+GENERIC_LINK_TEXT = {"click here", "here", "read more", "more", "learn more", "link", "this"}
+
+
+async def analyze_accessibility(snapshot: PageSnapshot) -> Dict[str, Any]:
+    """WCAG checks that can be decided from the page HTML (see accessibility_audit)."""
 
     results = {
-        "url": url,
+        "url": snapshot.url,
         "timestamp": datetime.now().isoformat(),
+        "snapshot": snapshot.summary(),
         "wcag_level": "AA",
         "checks": {},
         "issues": [],
@@ -517,45 +1334,50 @@ async def accessibility_audit(url: str) -> Dict[str, Any]:
         "recommendations": []
     }
 
-    # Simulated accessibility checks
+    html = snapshot.html
+    headings = html["headings"]
+    skipped_level = any(later - earlier > 1 for earlier, later in pairwise(headings))
+    links = html["links"]
+    poor_links = [link for link in links if not link["text"] or link["text"].lower() in GENERIC_LINK_TEXT]
+
     checks = {
         "alt_text": {
-            "passed": True,
+            "passed": html["images_missing_alt"] == 0,
             "description": "Images have alt text",
             "weight": 15
         },
         "heading_structure": {
-            "passed": True,
+            "passed": headings.count(1) == 1 and not skipped_level,
             "description": "Proper heading hierarchy (H1-H6)",
             "weight": 10
         },
         "color_contrast": {
-            "passed": False,
+            "passed": None,  # needs computed styles from a rendered page
             "description": "Sufficient color contrast (4.5:1)",
             "weight": 15
         },
         "keyboard_navigation": {
-            "passed": True,
+            "passed": html["positive_tabindex"] == 0,
             "description": "Keyboard accessible",
             "weight": 15
         },
         "form_labels": {
-            "passed": True,
+            "passed": html["unlabelled_fields"] == 0,
             "description": "Form inputs have labels",
             "weight": 10
         },
         "aria_landmarks": {
-            "passed": False,
+            "passed": "main" in html["landmarks"],
             "description": "ARIA landmarks present",
             "weight": 10
         },
         "link_text": {
-            "passed": True,
+            "passed": not poor_links,
             "description": "Descriptive link text",
             "weight": 10
         },
         "skip_links": {
-            "passed": False,
+            "passed": any(link["href"].startswith("#") and "skip" in link["text"].lower() for link in links),
             "description": "Skip to content link",
             "weight": 5
         }
@@ -565,19 +1387,31 @@ async def accessibility_audit(url: str) -> Dict[str, Any]:
 
     # Calculate score
     for check_name, check in checks.items():
-        if check["passed"]:
-            results["score"] += check["weight"]
-        else:
+        if check["passed"] is None:
+            results["warnings"].append(f"⚠️ {check['description']}: needs a rendered page to verify")
+        elif not check["passed"]:
             results["issues"].append(f"❌ {check['description']}")
 
             # Specific recommendations
-            if check_name == "color_contrast":
-                results["recommendations"].append("Increase color contrast for text to meet WCAG AA standards")
+            if check_name == "alt_text":
+                results["recommendations"].append(f"Add alt attributes to {html['images_missing_alt']} images")
+            elif check_name == "heading_structure":
+                results["recommendations"].append("Use exactly one H1 and don't skip heading levels")
+            elif check_name == "keyboard_navigation":
+                results["recommendations"].append("Remove positive tabindex values so focus follows the page order")
+            elif check_name == "form_labels":
+                results["recommendations"].append(f"Label {html['unlabelled_fields']} form fields (label or aria-label)")
             elif check_name == "aria_landmarks":
                 results["recommendations"].append("Add ARIA landmarks (main, navigation, complementary)")
+            elif check_name == "link_text":
+                results["recommendations"].append(f"Give {len(poor_links)} links descriptive text")
             elif check_name == "skip_links":
                 results["recommendations"].append("Add skip to main content link for keyboard users")
 
+    if not html["lang"]:
+        results["warnings"].append("⚠️ No lang attribute on <html>")
+
+    results["score"] = score_checks(checks)
     results["grade"] = get_grade(results["score"])
 
     # General recommendations
@@ -593,83 +1427,142 @@ async def accessibility_audit(url: str) -> Dict[str, Any]:
 
 
 @mcp.tool()
-async def security_audit(url: str) -> Dict[str, Any]:
+async def accessibility_audit(url: str) -> Dict[str, Any]:
     """
-    Analyze HTTPS, security headers, and security best practices.
+    Check WCAG (Web Content Accessibility Guidelines) compliance.
 
     Args:
         url: Website URL to audit
 
     Returns:
-        Dict with security audit results
+        Dict with accessibility audit results
     """
+    try:
+        snapshot = await get_page_snapshot(url)
+    except SnapshotError as e:
+        return snapshot_error(url, e)
+    return await analyze_accessibility(snapshot)
 
-    results = {
-        "url": url,
-        "timestamp": datetime.now().isoformat(),
-        "checks": {},
-        "critical_issues": [],
-        "warnings": [],
-        "score": 0,
-        "recommendations": []
-    }
 
-    parsed = urlparse(url)
+# Security sweeps: domains audited at once and the per-host time limit (seconds)
+SECURITY_CONCURRENCY = int(os.getenv("SEO_AUDIT_SECURITY_CONCURRENCY", "50"))
+SECURITY_TIMEOUT = float(os.getenv("SEO_AUDIT_SECURITY_TIMEOUT", "10"))
+CERT_EXPIRY_WARNING_DAYS = 30
+HSTS_MIN_MAX_AGE = 180 * 24 * 3600
+MODERN_TLS = {"TLSv1.2", "TLSv1.3"}
+
+
+def hsts_max_age(value: str) -> Optional[int]:
+    match = re.search(r"max-age\s*=\s*\"?(\d+)", value, re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+def security_checks(url: str, headers: Optional[httpx.Headers], tls: Optional[Dict[str, Any]],
+                    tls_error: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Weighted HTTPS, TLS and header checks.
+
+    ``headers`` is None when the page could not be fetched (header checks are
+    then left undecided), and ``tls_error`` is the reason a handshake was rejected.
+    """
+    https = urlparse(url).scheme == "https"
+    certificate = (tls or {}).get("certificate")
+    protocol = (tls or {}).get("protocol")
+
+    fetched = headers is not None
+    headers = headers if fetched else httpx.Headers()
+    csp = headers.get("content-security-policy", "").lower()
+    max_age = hsts_max_age(headers.get("strict-transport-security", ""))
+
+    def header_check(passed) -> Optional[bool]:
+        return bool(passed) if fetched else None
 
-    # Security checks
     checks = {
         "https": {
-            "passed": parsed.scheme == "https",
+            "passed": https and not tls_error,
             "description": "HTTPS enabled",
+            "detail": "but the certificate is rejected by browsers" if tls_error else None,
             "weight": 25,
             "critical": True
         },
+        "certificate": {
+            "passed": False if tls_error else (certificate["days_remaining"] >= 0 if https and certificate else None),
+            "description": "Valid TLS certificate",
+            "detail": f"failed verification: {tls_error}" if tls_error else None,
+            "weight": 15,
+            "critical": True
+        },
+        "tls_protocol": {
+            "passed": protocol in MODERN_TLS if protocol else None,
+            "description": "Modern TLS protocol (TLS 1.2+)",
+            "detail": f"missing ({protocol} negotiated)" if protocol else None,
+            "weight": 10,
+            "critical": False
+        },
         "hsts": {
-            "passed": False,  # Simulated
+            "passed": header_check(max_age is not None and max_age >= HSTS_MIN_MAX_AGE),
             "description": "HTTP Strict Transport Security (HSTS)",
+            "detail": f"max-age={max_age} is under 180 days" if max_age is not None else None,
             "weight": 15,
             "critical": False
         },
         "csp": {
-            "passed": False,  # Simulated
+            "passed": header_check(csp),
             "description": "Content Security Policy (CSP)",
             "weight": 15,
             "critical": False
         },
         "x_frame_options": {
-            "passed": True,  # Simulated
+            "passed": header_check("x-frame-options" in headers or "frame-ancestors" in csp),
             "description": "X-Frame-Options header",
             "weight": 10,
             "critical": False
         },
         "x_content_type": {
-            "passed": True,  # Simulated
+            "passed": header_check(headers.get("x-content-type-options", "").lower() == "nosniff"),
             "description": "X-Content-Type-Options header",
             "weight": 10,
             "critical": False
         },
         "referrer_policy": {
-            "passed": False,  # Simulated
+            "passed": header_check("referrer-policy" in headers),
             "description": "Referrer-Policy header",
             "weight": 5,
             "critical": False
         },
         "permissions_policy": {
-            "passed": False,  # Simulated
+            "passed": header_check("permissions-policy" in headers),
             "description": "Permissions-Policy header",
             "weight": 5,
             "critical": False
         }
     }
+    if certificate and certificate["days_remaining"] < 0:
+        checks["certificate"]["detail"] = f"expired {-certificate['days_remaining']} days ago"
+    return checks
+
+
+SECURITY_RECOMMENDATIONS = {
+    "https": "URGENT: Implement SSL/TLS certificate",
+    "certificate": "URGENT: Install a valid certificate with its full intermediate chain",
+    "tls_protocol": "Disable TLS 1.0/1.1 and serve TLS 1.2 or 1.3",
+    "hsts": "Add HSTS header: Strict-Transport-Security: max-age=31536000",
+    "csp": "Implement Content Security Policy to prevent XSS attacks",
+    "referrer_policy": "Set Referrer-Policy: strict-origin-when-cross-origin",
+    "permissions_policy": "Add Permissions-Policy header to control browser features",
+}
+
 
+def security_report(results: Dict[str, Any], checks: Dict[str, Dict[str, Any]],
+                    headers: Optional[httpx.Headers]) -> Dict[str, Any]:
+    """Fill in issues, warnings, recommendations, score and grade from evaluated security checks."""
     results["checks"] = checks
 
     # Calculate score and categorize issues
     for check_name, check in checks.items():
-        if check["passed"]:
-            results["score"] += check["weight"]
-        else:
-            issue_msg = f"{'❌ CRITICAL' if check['critical'] else '⚠️'}: {check['description']} missing"
+        if check["passed"] is False:
+            issue_msg = (f"{'❌ CRITICAL' if check['critical'] else '⚠️'}: {check['description']} "
+                         f"{check.get('detail') or 'missing'}")
 
             if check["critical"]:
                 results["critical_issues"].append(issue_msg)
@@ -677,18 +1570,47 @@ async def security_audit(url: str) -> Dict[str, Any]:
                 results["warnings"].append(issue_msg)
 
             # Specific recommendations
-            if check_name == "https":
-                results["recommendations"].append("URGENT: Implement SSL/TLS certificate")
-            elif check_name == "hsts":
-                results["recommendations"].append("Add HSTS header: Strict-Transport-Security: max-age=31536000")
-            elif check_name == "csp":
-                results["recommendations"].append("Implement Content Security Policy to prevent XSS attacks")
-            elif check_name == "referrer_policy":
-                results["recommendations"].append("Set Referrer-Policy: strict-origin-when-cross-origin")
-            elif check_name == "permissions_policy":
-                results["recommendations"].append("Add Permissions-Policy header to control browser features")
-
+            if check_name in SECURITY_RECOMMENDATIONS:
+                results["recommendations"].append(SECURITY_RECOMMENDATIONS[check_name])
+
+    certificate = (results.get("tls") or {}).get("certificate")
+    if certificate and 0 <= certificate["days_remaining"] < CERT_EXPIRY_WARNING_DAYS:
+        results["warnings"].append(f"⚠️: TLS certificate expires in {certificate['days_remaining']} days")
+        results["recommendations"].append("Renew the TLS certificate (or check that auto-renewal works)")
+
+    if headers is not None:
+        insecure_cookies = [cookie.split("=", 1)[0] for cookie in headers.get_list("set-cookie")
+                            if not {"secure", "httponly"} <= {part.strip().split("=")[0].lower()
+                                                              for part in cookie.split(";")[1:]}]
+        if insecure_cookies:
+            results["warnings"].append(f"⚠️: Cookies without Secure/HttpOnly: {', '.join(insecure_cookies[:5])}")
+        disclosed = [f"{name}: {headers[name]}" for name in ("server", "x-powered-by")
+                     if re.search(r"\d", headers.get(name, ""))]
+        if disclosed:
+            results["warnings"].append(f"⚠️: Software versions disclosed ({'; '.join(disclosed)})")
+
+    results["score"] = score_checks(checks)
     results["grade"] = get_grade(results["score"])
+    return results
+
+
+async def analyze_security(snapshot: PageSnapshot) -> Dict[str, Any]:
+    """Security header, HTTPS and TLS checks on a page snapshot (see security_audit)."""
+
+    results = {
+        "url": snapshot.url,
+        "timestamp": datetime.now().isoformat(),
+        "snapshot": snapshot.summary(),
+        "tls": snapshot.tls,
+        "checks": {},
+        "critical_issues": [],
+        "warnings": [],
+        "score": 0,
+        "recommendations": []
+    }
+
+    checks = security_checks(snapshot.final_url, snapshot.headers, snapshot.tls)
+    security_report(results, checks, snapshot.headers)
 
     # Additional security recommendations
     results["recommendations"].extend([
@@ -704,6 +1626,291 @@ async def security_audit(url: str) -> Dict[str, Any]:
     return results
 
 
+async def audit_security(url: str, timeout: float = SECURITY_TIMEOUT, headers_only: bool = False) -> Dict[str, Any]:
+    """
+    Security audit of one URL within ``timeout`` seconds.
+
+    ``headers_only`` skips the body and the snapshot cache (for sweeps). When
+    the certificate is rejected, the server is re-probed without verification
+    so the report still shows the protocol, cipher and the rejection reason.
+    """
+    url = normalize_url(url)
+    try:
+        if headers_only:
+            snapshot = await fetch_page_snapshot(url, max_bytes=0, timeout=timeout)
+        else:
+            snapshot = await get_page_snapshot(url, timeout=timeout)
+    except SnapshotError as e:
+        ssl_error = find_ssl_error(e)
+        if ssl_error is None:
+            return snapshot_error(url, e)
+        reason = getattr(ssl_error, "verify_message", None) or ssl_error.reason or str(ssl_error)
+        parsed = urlparse(url)
+        tls = await probe_tls(parsed.hostname, parsed.port or 443, timeout)
+        results = {
+            "url": url,
+            "timestamp": datetime.now().isoformat(),
+            "error": str(e),
+            "tls": tls,
+            "tls_error": reason,
+            "checks": {},
+            "critical_issues": [],
+            "warnings": [],
+            "score": 0,
+            "recommendations": []
+        }
+        return security_report(results, security_checks(url, None, tls, reason), None)
+    return await analyze_security(snapshot)
+
+
+@mcp.tool()
+async def security_audit(url: str, timeout: float = SECURITY_TIMEOUT) -> Dict[str, Any]:
+    """
+    Analyze HTTPS, TLS, security headers, and security best practices.
+
+    Headers come from one GET of the page (shared with the other audits
+    through the snapshot cache) and TLS details from that request's
+    handshake: protocol, cipher, certificate expiry and chain.
+
+    Args:
+        url: Website URL to audit
+        timeout: Seconds allowed for the fetch, redirects included (default: 10)
+
+    Returns:
+        Dict with security audit results
+    """
+    return await audit_security(url, timeout)
+
+
+@mcp.tool()
+async def security_audit_batch(
+    urls: List[str],
+    concurrency: int = SECURITY_CONCURRENCY,
+    timeout: float = SECURITY_TIMEOUT,
+    limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Security audit of many domains at once, e.g. a weekly sweep of every client site.
+
+    Each domain costs one GET that stops after the headers (no body, no
+    snapshot cache), ``concurrency`` domains at a time, each capped at
+    ``timeout`` seconds, so a few thousand domains finish in minutes.
+
+    Args:
+        urls: Domains or URLs to audit (bare domains are audited over https)
+        concurrency: Domains audited at once (default: 50, capped at the connection pool size)
+        timeout: Seconds allowed per domain (default: 10)
+        limit: Lowest-scoring domains and certificate findings to list (default: 100)
+
+    Returns:
+        Dict with score and grade distribution, TLS protocol counts, failing checks,
+        expired/expiring/untrusted certificates, unreachable domains and the lowest scorers
+    """
+    started = time.perf_counter()
+    urls = list(dict.fromkeys(normalize_url(url) for url in urls if url and url.strip()))
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, MAX_CONNECTIONS)))
+
+    async def audit(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await audit_security(url, timeout, headers_only=True)
+
+    outcomes = await asyncio.gather(*(audit(url) for url in urls))
+
+    rows = []
+    grades: Dict[str, int] = {}
+    protocols: Dict[str, int] = {}
+    failing: Dict[str, int] = {}
+    expired, expiring, untrusted, unreachable = [], [], [], []
+    for result in outcomes:
+        tls = result.get("tls") or {}
+        certificate = tls.get("certificate") or {}
+        if "tls_error" in result:
+            untrusted.append({"url": result["url"], "reason": result["tls_error"]})
+        elif "error" in result:
+            unreachable.append({"url": result["url"], "error": result["error"]})
+            continue
+        if certificate.get("days_remaining") is not None:
+            days = certificate["days_remaining"]
+            if days < 0:
+                expired.append({"url": result["url"], "not_after": certificate["not_after"]})
+            elif days < CERT_EXPIRY_WARNING_DAYS:
+                expiring.append({"url": result["url"], "days_remaining": days})
+        if tls.get("protocol"):
+            protocols[tls["protocol"]] = protocols.get(tls["protocol"], 0) + 1
+        grades[result["grade"]] = grades.get(result["grade"], 0) + 1
+        failed = [name for name, check in result["checks"].items() if check["passed"] is False]
+        for name in failed:
+            failing[name] = failing.get(name, 0) + 1
+        rows.append({
+            "url": result["url"],
+            "final_url": (result.get("snapshot") or {}).get("final_url"),
+            "score": result["score"],
+            "grade": result["grade"],
+            "failed": failed,
+            "tls": {"protocol": tls.get("protocol"), "cipher": tls.get("cipher"),
+                    "days_remaining": certificate.get("days_remaining"), "issuer": certificate.get("issuer")},
+        })
+
+    rows.sort(key=lambda row: row["score"])
+    expiring.sort(key=lambda row: row["days_remaining"])
+    limit = max(0, limit)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "total": len(urls),
+        "audited": len(rows),
+        "average_score": round(sum(row["score"] for row in rows) / len(rows)) if rows else 0,
+        "grades": grades,
+        "tls_protocols": protocols,
+        "failing_checks": dict(sorted(failing.items(), key=lambda item: -item[1])),
+        "certificates": {
+            "expired": expired[:limit],
+            "expiring_soon": expiring[:limit],
+            "untrusted": untrusted[:limit],
+        },
+        "unreachable": {"count": len(unreachable), "domains": unreachable[:limit]},
+        "lowest_scoring": rows[:limit],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+# Analyzers run by full_audit, in report order
+ANALYZERS = {
+    "technical": analyze_technical,
+    "mobile": analyze_mobile,
+    "schema": analyze_schema,
+    "accessibility": analyze_accessibility,
+    "security": analyze_security,
+}
+
+
+@mcp.tool()
+async def full_audit(url: str, audits: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run every page analyzer on one fetch of the page and combine the results.
+
+    The page is fetched once (or served from the snapshot cache) and the
+    technical, mobile, schema, accessibility and security analyzers run on
+    that snapshot concurrently.
+
+    Args:
+        url: Website URL to audit
+        audits: Subset of analyzers to run (default: all of technical, mobile, schema,
+                accessibility, security)
+
+    Returns:
+        Dict with each analyzer's result, an average score and grade, and the snapshot details
+    """
+    names = list(dict.fromkeys(audits or ANALYZERS))
+    unknown = [name for name in names if name not in ANALYZERS]
+    if unknown:
+        return {"url": url, "error": f"Unknown audits: {', '.join(unknown)} (use {', '.join(ANALYZERS)})"}
+
+    try:
+        snapshot = await get_page_snapshot(url)
+    except SnapshotError as e:
+        return snapshot_error(url, e)
+
+    snapshot.parse()  # once, before the analyzers share it
+    outcomes = await asyncio.gather(*(ANALYZERS[name](snapshot) for name in names), return_exceptions=True)
+
+    results = {
+        "url": url,
+        "timestamp": datetime.now().isoformat(),
+        "snapshot": snapshot.summary(),
+        "audits": {},
+        "errors": {},
+    }
+    for name, outcome in zip(names, outcomes, strict=True):
+        if isinstance(outcome, Exception):
+            logger.error(f"{name} analyzer failed for {url}: {outcome}")
+            results["errors"][name] = str(outcome)
+        else:
+            outcome.pop("snapshot", None)
+            results["audits"][name] = outcome
+
+    scores = [audit["score"] for audit in results["audits"].values() if "score" in audit]
+    results["score"] = round(sum(scores) / len(scores)) if scores else 0
+    results["grade"] = get_grade(results["score"])
+    return results
+
+
+@mcp.tool()
+async def sitemap_audit(
+    url: str,
+    concurrency: int = SITEMAP_CONCURRENCY,
+    max_sitemaps: int = 1000,
+    sample_size: int = 20
+) -> Dict[str, Any]:
+    """
+    Validate a sitemap or sitemap index, streaming every child sitemap.
+
+    Sitemaps are parsed while they download (gzip included) and each URL is
+    dropped once counted, so memory stays flat for indexes with millions of
+    URLs; only a compact duplicate-detection table grows with the site.
+
+    Args:
+        url: Sitemap or sitemap index URL, or a site URL to use the sitemaps declared
+             in its robots.txt (falling back to /sitemap.xml)
+        concurrency: Child sitemaps fetched at once (default: 8)
+        max_sitemaps: Maximum sitemap files to read (default: 1000)
+        sample_size: Examples kept per problem type (default: 20)
+
+    Returns:
+        Dict with file and URL counts, duplicates, invalid URLs, lastmod distribution and per-file errors
+    """
+    url = normalize_url(url)
+    path = urlparse(url).path.lower()
+    sitemap_urls = [url] if path.endswith((".xml", ".gz")) else await find_sitemaps(url)
+    report = await validate_sitemap(sitemap_urls, get_http_client, concurrency=concurrency,
+                                    max_sitemaps=max_sitemaps, sample_size=sample_size)
+    report["timestamp"] = datetime.now().isoformat()
+    return report
+
+
+@mcp.tool()
+async def robots_check(
+    urls: List[str],
+    user_agent: str = "Googlebot",
+    limit: int = 100
+) -> Dict[str, Any]:
+    """
+    Check which URLs a crawler may fetch according to their hosts' robots.txt.
+
+    Each host's robots.txt is fetched once and cached (honouring its HTTP
+    cache headers), so thousands of URLs are checked in milliseconds and
+    later audits of the same site reuse the file.
+
+    Args:
+        urls: URLs to check (any number of hosts)
+        user_agent: Crawler to check for, e.g. "Googlebot", "Bingbot" or "*" (default: "Googlebot")
+        limit: Maximum number of blocked URLs to list (default: 100)
+
+    Returns:
+        Dict with allowed/blocked counts, blocked URLs with the deciding rule, and each host's robots.txt status
+    """
+    started = time.perf_counter()
+    urls = [normalize_url(url) for url in urls if url and url.strip()]
+    checked = await robots_cache.check_many(urls, user_agent)
+    blocked = [{"url": url, "rule": rule} for url, allowed, rule in checked if not allowed]
+
+    hosts = []
+    for origin in dict.fromkeys(url_origin(url) for url in urls):
+        robots = await robots_cache.get(origin)
+        hosts.append({**robots.summary(), "crawl_delay": robots.crawl_delay(user_agent)})
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "user_agent": user_agent,
+        "total": len(checked),
+        "allowed": len(checked) - len(blocked),
+        "blocked": len(blocked),
+        "blocked_urls": blocked[:max(0, limit)],
+        "hosts": hosts,
+        "cache": robots_cache.stats(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
 def get_grade(score: int) -> str:
     """Convert numeric score to letter grade."""
     if score >= 90:
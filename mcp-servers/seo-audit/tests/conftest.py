@@ -0,0 +1,58 @@
+"""
+Shared pytest setup: put the server module and mcp-servers/shared on sys.path,
+the same way server.py imports the shared engines, and serve its HTTP
+requests from an in-memory site.
+"""
+
+import os
+import sys
+
+import httpx
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "shared"))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+
+class Site:
+    """Routes (URL without query -> response, exception or handler) with a log of every request; the rest 404."""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        route = self.routes.get(str(request.url.copy_with(query=None)))
+        if route is None:
+            return httpx.Response(404)
+        if isinstance(route, Exception):
+            raise route
+        if callable(route):
+            return route(request)
+        return route
+
+    def page(self, url: str, html: str, **headers: str):
+        self.routes[url] = httpx.Response(200, html=html, headers={k.replace("_", "-"): v for k, v in headers.items()})
+
+    def count(self, url: str) -> int:
+        return sum(1 for request in self.requests if str(request.url.copy_with(query=None)) == url)
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """The server's HTTP client, snapshot cache, robots.txt cache and Web Vitals client, reset onto a mock site."""
+    from robots_txt import RobotsCache
+    from web_vitals import WebVitalsClient
+
+    import server
+
+    site = Site()
+    monkeypatch.setattr(server, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(site.handle),
+                                                                  follow_redirects=True))
+    monkeypatch.setattr(server, "_snapshots", type(server._snapshots)())
+    monkeypatch.setattr(server, "_snapshot_fetches", {})
+    monkeypatch.setattr(server, "robots_cache", RobotsCache(server.get_http_client, server.USER_AGENT))
+    monkeypatch.setattr(server, "web_vitals", WebVitalsClient(server.get_http_client, api_key="test-key"))
+    return site
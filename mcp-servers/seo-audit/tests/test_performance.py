@@ -0,0 +1,99 @@
+"""Tests for performance_audit's CrUX/PSI lookups and its local fallback."""
+
+import json
+
+import httpx
+import pytest
+from web_vitals import CRUX_API_URL, PSI_API_URL
+
+import server
+
+pytestmark = pytest.mark.asyncio
+
+PAGE = "https://example.com/"
+HTML = "<html><head><title>Example</title></head><body><h1>Example</h1></body></html>"
+
+
+def crux(records):
+    """CrUX handler answering from ``records`` (url or origin -> p75 values); unknown targets get a 404."""
+    def handle(request):
+        query = json.loads(request.content)
+        p75 = records.get(query.get("url") or query.get("origin"))
+        if p75 is None:
+            return httpx.Response(404, json={"error": {"message": "chrome ux report data not found"}})
+        return httpx.Response(200, json={"record": {
+            "metrics": {name: {"percentiles": {"p75": value}} for name, value in p75.items()},
+            "collectionPeriod": {"firstDate": {"year": 2026, "month": 9, "day": 1},
+                                 "lastDate": {"year": 2026, "month": 9, "day": 28}},
+        }})
+    return handle
+
+
+GOOD = {"largest_contentful_paint": 1800, "interaction_to_next_paint": 120, "cumulative_layout_shift": "0.02"}
+
+
+async def test_field_data_is_used_and_cached(site):
+    site.routes[CRUX_API_URL] = crux({PAGE: GOOD, "https://example.com": GOOD})
+
+    first = await server.performance_audit(PAGE, include_lab=False)
+    second = await server.performance_audit(PAGE, include_lab=False)
+
+    assert first["fallback"] is False
+    assert first["core_web_vitals"] == {"url": "passed", "origin": "passed"}
+    assert first["metrics"]["lcp"] == {**first["metrics"]["lcp"], "value": 1800, "source": "field_url"}
+    assert second["metrics"] == first["metrics"]
+    assert site.count(CRUX_API_URL) == 2  # one URL record, one origin record
+    assert site.count(PAGE) == 0
+
+
+async def test_unavailable_upstreams_fall_back_to_local_timings(site):
+    site.page(PAGE, HTML)
+    site.routes[CRUX_API_URL] = httpx.Response(500, json={"error": {"message": "backend error"}})
+    site.routes[PSI_API_URL] = httpx.Response(200, html="<html>Service temporarily unavailable</html>")
+
+    result = await server.performance_audit(PAGE)
+
+    assert result["fallback"] is True
+    assert set(result["metrics"]) == {"ttfb", "html_transfer_size"}
+    assert result["sources"] == ["local"]
+    assert set(result["upstream_errors"]) == {"field_origin", "field_url", "lab"}
+    assert "HTTP 500 backend error" in result["fallback_reason"]
+    assert "Unreadable PageSpeed Insights response" in result["upstream_errors"]["lab"]
+
+    # Failures are not cached
+    await server.performance_audit(PAGE)
+    assert site.count(PSI_API_URL) == 2
+
+
+async def test_no_field_data_without_lab_falls_back(site):
+    site.page(PAGE, HTML)
+    site.routes[CRUX_API_URL] = crux({})
+
+    result = await server.performance_audit(PAGE, include_lab=False)
+
+    assert result["fallback"] is True
+    assert result["fallback_reason"] == "No CrUX field data for this page or origin; lab run skipped"
+    assert result["upstream_errors"] == {}
+
+
+async def test_batch_shares_origin_records_and_lists_failures(site):
+    site.page(PAGE, HTML)
+    site.routes[CRUX_API_URL] = crux({"https://example.com": GOOD})
+    site.routes["https://example.com/down"] = httpx.ConnectError("connection reset")
+
+    result = await server.performance_audit_batch([PAGE, "https://example.com/down", PAGE])
+
+    assert result["total"] == 2
+    assert result["origins"]["https://example.com"]["core_web_vitals"] == "passed"
+    # Origin data exists, so neither page needs the local fallback
+    assert result["fallbacks"] == 0 and result["failed"] == []
+    assert site.count(CRUX_API_URL) == 3  # the origin once, each page URL once
+
+    # Without any field data each page falls back to a local fetch, and one of them cannot be fetched
+    site.routes[CRUX_API_URL] = httpx.Response(500)
+    site.page("https://shop.example/", HTML)
+    site.routes["https://shop.example/down"] = httpx.ConnectError("connection reset")
+    degraded = await server.performance_audit_batch(["https://shop.example/", "https://shop.example/down"])
+    assert degraded["fallbacks"] == 2
+    assert [row["url"] for row in degraded["failed"]] == ["https://shop.example/down"]
+    assert degraded["average_score"] == degraded["pages"][0]["score"]
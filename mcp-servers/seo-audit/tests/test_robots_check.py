@@ -0,0 +1,81 @@
+"""Tests for robots_check and the robots.txt check in technical_audit."""
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.asyncio
+
+ROBOTS = """User-agent: *
+Disallow: /private/
+Crawl-delay: 2
+
+User-agent: Googlebot
+Disallow: /search
+
+Sitemap: https://example.com/sitemap.xml
+"""
+HTML = "<html><head><title>Example</title></head><body><h1>Example</h1></body></html>"
+
+
+async def test_each_host_is_fetched_once(site):
+    site.routes["https://example.com/robots.txt"] = httpx.Response(200, text=ROBOTS)
+    urls = [f"https://example.com/search?q={i}" for i in range(50)] + [
+        "https://example.com/private/a", "example.com/blog", "https://other.example/anything"]
+
+    result = await server.robots_check(urls)
+
+    assert (result["total"], result["allowed"], result["blocked"]) == (53, 3, 50)
+    assert {row["rule"] for row in result["blocked_urls"]} == {"/search"}
+    assert site.count("https://example.com/robots.txt") == 1
+    assert site.count("https://other.example/robots.txt") == 1
+    hosts = {host["url"]: host for host in result["hosts"]}
+    assert hosts["https://example.com/robots.txt"]["sitemaps"] == ["https://example.com/sitemap.xml"]
+    assert hosts["https://other.example/robots.txt"]["status"] == "missing"
+
+
+async def test_user_agent_picks_its_group(site):
+    site.routes["https://example.com/robots.txt"] = httpx.Response(200, text=ROBOTS)
+
+    result = await server.robots_check(["https://example.com/private/a", "https://example.com/search"],
+                                       user_agent="Bingbot", limit=1)
+
+    assert result["blocked"] == 1 and result["blocked_urls"] == [
+        {"url": "https://example.com/private/a", "rule": "/private/"}]
+    assert result["hosts"][0]["crawl_delay"] == 2
+
+
+async def test_later_checks_reuse_the_cached_file(site):
+    site.routes["https://example.com/robots.txt"] = httpx.Response(
+        200, text=ROBOTS, headers={"cache-control": "max-age=3600"})
+
+    await server.robots_check(["https://example.com/"])
+    second = await server.robots_check(["https://example.com/search"])
+
+    assert second["blocked"] == 1
+    assert site.count("https://example.com/robots.txt") == 1
+    assert second["cache"]["hits"] >= 1
+
+
+async def test_unreachable_robots_blocks_everything(site):
+    site.routes["https://example.com/robots.txt"] = httpx.Response(503)
+
+    result = await server.robots_check(["https://example.com/", "https://example.com/blog"])
+
+    assert result["blocked"] == 2
+    assert result["hosts"][0]["status"] == "unreachable"
+
+
+async def test_technical_audit_reports_a_blocked_page(site):
+    site.page("https://example.com/search", HTML)
+    site.routes["https://example.com/robots.txt"] = httpx.Response(200, text=ROBOTS)
+
+    result = await server.technical_audit("https://example.com/search", check_sitemap=False)
+
+    assert "❌ Robots.txt blocks Googlebot from this page (rule: /search)" in result["issues"]
+    assert result["robots"]["status"] == "ok"
+
+    # robots_check reuses the file the audit fetched
+    await server.robots_check(["https://example.com/search"])
+    assert site.count("https://example.com/robots.txt") == 1
@@ -0,0 +1,136 @@
+"""Tests for the security checks, TLS details and security_audit_batch."""
+
+import ssl
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.asyncio
+
+SECURE_HEADERS = {
+    "strict-transport-security": "max-age=31536000; includeSubDomains",
+    "content-security-policy": "default-src 'self'; frame-ancestors 'none'",
+    "x-content-type-options": "nosniff",
+    "referrer-policy": "strict-origin-when-cross-origin",
+    "permissions-policy": "geolocation=()",
+}
+
+
+def tls(protocol="TLSv1.3", days_remaining=200):
+    return {"protocol": protocol, "cipher": "TLS_AES_128_GCM_SHA256", "cipher_bits": 128,
+            "certificate": {"days_remaining": days_remaining, "not_after": "2027-05-01T00:00:00+00:00"}}
+
+
+def failed(checks):
+    return sorted(name for name, check in checks.items() if check["passed"] is False)
+
+
+def test_secure_site_passes_every_check():
+    checks = server.security_checks("https://example.com/", httpx.Headers(SECURE_HEADERS), tls())
+    assert failed(checks) == []
+    assert server.score_checks(checks) == 100
+
+
+def test_certificate_and_protocol_problems():
+    checks = server.security_checks("https://example.com/", httpx.Headers(SECURE_HEADERS), tls("TLSv1", -3))
+    assert failed(checks) == ["certificate", "tls_protocol"]
+    assert checks["certificate"]["detail"] == "expired 3 days ago"
+    assert checks["tls_protocol"]["detail"] == "missing (TLSv1 negotiated)"
+
+
+def test_weak_hsts_and_missing_headers():
+    checks = server.security_checks("https://example.com/", httpx.Headers({
+        "strict-transport-security": "max-age=300", "x-frame-options": "DENY"}), tls())
+    assert failed(checks) == ["csp", "hsts", "permissions_policy", "referrer_policy", "x_content_type"]
+    assert checks["hsts"]["detail"] == "max-age=300 is under 180 days"
+
+
+def test_unfetched_page_leaves_header_checks_undecided():
+    checks = server.security_checks("https://example.com/", None, {"protocol": "TLSv1.2"},
+                                    tls_error="certificate has expired")
+    assert failed(checks) == ["certificate", "https"]
+    assert checks["hsts"]["passed"] is None and checks["csp"]["passed"] is None
+    assert checks["tls_protocol"]["passed"] is True
+
+
+class FakeSSLObject:
+    def __init__(self, not_after):
+        self.not_after = not_after
+
+    def version(self):
+        return "TLSv1.3"
+
+    def cipher(self):
+        return ("TLS_AES_256_GCM_SHA384", "TLSv1.3", 256)
+
+    def getpeercert(self):
+        return {
+            "subject": ((("commonName", "example.com"),),),
+            "issuer": ((("commonName", "Example CA"),),),
+            "notAfter": self.not_after,
+            "subjectAltName": (("DNS", "example.com"), ("DNS", "www.example.com")),
+        }
+
+
+def test_describe_tls_reads_the_leaf_certificate():
+    expires = datetime.now(timezone.utc) + timedelta(days=10, hours=12)
+    details = server.describe_tls(FakeSSLObject(expires.strftime("%b %d %H:%M:%S %Y GMT")))
+
+    assert (details["protocol"], details["cipher_bits"]) == ("TLSv1.3", 256)
+    certificate = details["certificate"]
+    assert certificate["days_remaining"] == 10
+    assert (certificate["subject"], certificate["issuer"], certificate["self_signed"]) == (
+        "example.com", "Example CA", False)
+    assert certificate["san"] == ["example.com", "www.example.com"]
+    assert server.describe_tls(None) is None
+
+
+def rejected_certificate(reason):
+    error = ssl.SSLCertVerificationError(1, reason)
+    error.verify_message = reason
+    wrapped = httpx.ConnectError("[SSL: CERTIFICATE_VERIFY_FAILED]")
+    wrapped.__cause__ = error
+    return wrapped
+
+
+async def test_rejected_certificate_is_reported_with_the_probed_tls(site, monkeypatch):
+    site.routes["https://expired.example/"] = rejected_certificate("certificate has expired")
+
+    async def probe_tls(host, port=443, timeout=10.0):
+        assert (host, port) == ("expired.example", 443)
+        return {"protocol": "TLSv1.2", "cipher": "ECDHE-RSA-AES128-GCM-SHA256", "cipher_bits": 128}
+
+    monkeypatch.setattr(server, "probe_tls", probe_tls)
+    result = await server.security_audit("expired.example")
+
+    assert result["tls_error"] == "certificate has expired"
+    assert result["tls"]["protocol"] == "TLSv1.2"
+    assert failed(result["checks"]) == ["certificate", "https"]
+    assert any("certificate has expired" in issue for issue in result["critical_issues"])
+
+
+async def test_batch_sweep_summarises_every_domain(site, monkeypatch):
+    site.routes["https://good.example/"] = httpx.Response(200, headers=SECURE_HEADERS)
+    site.routes["https://bare.example/"] = httpx.Response(200, headers={"server": "nginx/1.18.0",
+                                                                        "set-cookie": "sid=1; Path=/"})
+    site.routes["https://down.example/"] = httpx.ConnectError("connection refused")
+    site.routes["https://expired.example/"] = rejected_certificate("certificate has expired")
+
+    async def probe_tls(host, port=443, timeout=10.0):
+        return None
+
+    monkeypatch.setattr(server, "probe_tls", probe_tls)
+    result = await server.security_audit_batch(
+        ["good.example", "https://bare.example", "down.example", "expired.example", "good.example"])
+
+    assert (result["total"], result["audited"]) == (4, 3)
+    assert result["unreachable"]["count"] == 1
+    assert result["certificates"]["untrusted"] == [{"url": "https://expired.example/",
+                                                    "reason": "certificate has expired"}]
+    assert [row["url"] for row in result["lowest_scoring"]][-1] == "https://good.example/"
+    assert result["failing_checks"]["csp"] == 1
+    # Sweeps read headers only and leave the snapshot cache alone
+    assert server._snapshots == {}
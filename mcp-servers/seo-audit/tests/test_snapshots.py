@@ -0,0 +1,93 @@
+"""Tests for the shared page snapshot cache and full_audit."""
+
+import asyncio
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.asyncio
+
+PAGE = "https://example.com/"
+HTML = """<!doctype html><html lang="en"><head><title>Example Plumbing - Brisbane plumbers</title>
+<meta name="description" content="Licensed Brisbane plumbers for blocked drains, hot water and leaks.">
+<meta name="viewport" content="width=device-width, initial-scale=1"></head>
+<body><h1>Example Plumbing</h1><p>We fix things.</p></body></html>"""
+
+
+async def test_snapshot_is_fetched_once_while_fresh(site):
+    site.page(PAGE, HTML)
+
+    first = await server.get_page_snapshot("https://EXAMPLE.com")
+    second = await server.get_page_snapshot(PAGE)
+    assert first is second
+    assert site.count(PAGE) == 1
+
+    await server.get_page_snapshot(PAGE, max_age=0)
+    assert site.count(PAGE) == 2
+
+
+async def test_concurrent_callers_share_one_fetch(site):
+    site.page(PAGE, HTML)
+
+    snapshots = await asyncio.gather(*(server.get_page_snapshot(PAGE) for _ in range(5)))
+
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert site.count(PAGE) == 1
+
+
+async def test_failed_fetch_is_not_cached(site):
+    site.routes[PAGE] = httpx.ConnectError("connection refused")
+    with pytest.raises(server.SnapshotError, match="ConnectError"):
+        await server.get_page_snapshot(PAGE)
+
+    site.page(PAGE, HTML)
+    snapshot = await server.get_page_snapshot(PAGE)
+    assert snapshot.status_code == 200
+    assert snapshot.parse()["title"].startswith("Example Plumbing")
+
+
+async def test_cache_is_bounded(site, monkeypatch):
+    monkeypatch.setattr(server, "SNAPSHOT_CACHE_SIZE", 2)
+    for path in ("a", "b", "c"):
+        site.page(f"{PAGE}{path}", HTML)
+        await server.get_page_snapshot(f"{PAGE}{path}")
+
+    assert list(server._snapshots) == [f"{PAGE}b", f"{PAGE}c"]
+
+
+async def test_full_audit_runs_every_analyzer_on_one_fetch(site):
+    site.page(PAGE, HTML, strict_transport_security="max-age=31536000")
+
+    result = await server.full_audit(PAGE)
+
+    assert set(result["audits"]) == set(server.ANALYZERS)
+    assert result["errors"] == {}
+    assert site.count(PAGE) == 1
+    scores = [audit["score"] for audit in result["audits"].values() if "score" in audit]
+    assert result["score"] == round(sum(scores) / len(scores))
+    assert "snapshot" not in result["audits"]["security"]
+
+    # The other tools reuse the same snapshot
+    await server.mobile_audit(PAGE)
+    assert site.count(PAGE) == 1
+
+
+async def test_full_audit_subset_and_unknown_names(site):
+    site.page(PAGE, HTML)
+
+    subset = await server.full_audit(PAGE, audits=["schema", "mobile", "schema"])
+    assert list(subset["audits"]) == ["schema", "mobile"]
+
+    unknown = await server.full_audit(PAGE, audits=["mobile", "speed"])
+    assert unknown["error"].startswith("Unknown audits: speed")
+
+
+async def test_full_audit_reports_an_unreachable_page(site):
+    site.routes[PAGE] = httpx.ConnectTimeout("timed out")
+
+    result = await server.full_audit(PAGE)
+
+    assert result["score"] == 0 and result["grade"] == "F"
+    assert "ConnectTimeout" in result["error"]
@@ -15,16 +15,55 @@ Features:
 """
 
 import os
+import re
+import sys
 import json
+import time
+import zlib
+import gzip
+import csv
+import math
+import base64
+import asyncio
+import hashlib
 import logging
-from typing import Any, Optional, Dict, List
-from datetime import datetime
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Tuple, Union
+from datetime import date, datetime, timedelta, timezone
+from html.parser import HTMLParser
+from itertools import pairwise
+from urllib.parse import urljoin, urlparse, urlsplit
 
 import httpx
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+
+# Scoring engines shared with the seo-audit server live in mcp-servers/shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from eeat_engine import DIMENSIONS as EEAT_DIMENSIONS  # noqa: E402
+from eeat_engine import score_pages  # noqa: E402
+from robots_txt import RobotsCache  # noqa: E402
+
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP):
+    """Open shared HTTP clients at startup; release clients, caches and database pools at shutdown."""
+    open_http_clients()
+    try:
+        yield
+    finally:
+        await close_http_clients()
+        close_caches()
+        await close_async_db()
+        close_db_pool()
+
 
 # Initialize FastMCP server
-mcp = FastMCP("seo-toolkit")
+mcp = FastMCP("seo-toolkit", lifespan=server_lifespan)
 
 # Configure logging (stderr only - never use print() in STDIO mode)
 logging.basicConfig(
@@ -54,790 +93,3460 @@ FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
 # Database Utilities
 # ============================================================================
 
-def get_db_connection():
-    """Get database connection (PostgreSQL or SQLite)."""
-    if DATABASE_URL:
-        import psycopg2
-        from psycopg2.extras import RealDictCursor
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn, True  # Return connection and is_postgres flag
-    else:
+# Connection pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+class DatabasePool:
+    """
+    Process-wide database connection pool (PostgreSQL or SQLite).
+
+    PostgreSQL connections are opened lazily up to ``max_size`` and reused
+    across queries; callers block for up to ``timeout`` seconds when every
+    connection is checked out. SQLite uses a single long-lived connection in
+    WAL mode, serialized by the same checkout mechanism.
+
+    Connections that fail with a connection-level error (e.g. after a backend
+    restart) are discarded instead of being returned to the pool.
+    """
+
+    def __init__(self, database_url: Optional[str], sqlite_path: str,
+                 min_size: int = 1, max_size: int = 10, timeout: float = 30.0):
+        self.database_url = database_url
+        self.sqlite_path = sqlite_path
+        self.is_postgres = bool(database_url)
+        self.max_size = max(1, max_size) if self.is_postgres else 1
+        self.min_size = min(max(0, min_size), self.max_size)
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle: List[Any] = []
+        self._open = 0
+        self._closed = False
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._reconnects = 0
+
+        for _ in range(self.min_size):
+            self._idle.append(self._connect())
+            self._open += 1
+
+    def _connect(self):
+        """Open a new raw connection."""
+        if self.is_postgres:
+            import psycopg2
+            from psycopg2.extras import RealDictCursor
+            return psycopg2.connect(self.database_url, cursor_factory=RealDictCursor)
+
         import sqlite3
-        conn = sqlite3.connect(SQLITE_PATH)
+        conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row
-        return conn, False
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    @staticmethod
+    def _is_usable(conn) -> bool:
+        """Cheap liveness check that does not hit the network."""
+        return not getattr(conn, "closed", False)
+
+    def is_disconnect(self, error: Exception, conn: Any = None) -> bool:
+        """
+        Return True if the error means the connection itself is gone.
+
+        Only a closed connection or an InterfaceError counts. Other
+        OperationalErrors (e.g. QueryCanceled from a statement timeout) leave
+        the connection usable, and retrying them would re-run writes.
+        """
+        if conn is not None and not self._is_usable(conn):
+            return True
+        if self.is_postgres:
+            import psycopg2
+            return isinstance(error, psycopg2.InterfaceError)
+
+        import sqlite3
+        return isinstance(error, sqlite3.ProgrammingError) and "closed" in str(error).lower()
+
+    def acquire(self):
+        """Check out a connection, waiting up to ``timeout`` seconds."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Database pool is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    if not self._is_usable(conn):
+                        self._open -= 1
+                        self._reconnects += 1
+                        continue
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    conn = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a database connection "
+                        f"(pool size {self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            wait = time.monotonic() - start
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool, or close it if it is broken."""
+        with self._cond:
+            if discard or self._closed or not self._is_usable(conn):
+                self._open -= 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection."""
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception as e:
+            if self.is_disconnect(e, conn):
+                with self._cond:
+                    self._reconnects += 1
+                self.release(conn, discard=True)
+            else:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool size, wait time and checkout counters."""
+        with self._cond:
+            return {
+                "backend": "postgresql" if self.is_postgres else "sqlite",
+                "max_size": self.max_size,
+                "open_connections": self._open,
+                "idle_connections": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "avg_wait_ms": round(self._total_wait / self._checkouts * 1000, 2) if self._checkouts else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+                "reconnects": self._reconnects,
+            }
+
+    def close(self):
+        """Close all idle connections and refuse new checkouts."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn = self._idle.pop()
+                self._open -= 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._cond.notify_all()
+
+
+_db_pool: Optional[DatabasePool] = None
+_db_pool_lock = threading.Lock()
+
+
+def get_db_pool() -> DatabasePool:
+    """Get (or lazily create) the process-wide database pool."""
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = DatabasePool(
+                    DATABASE_URL,
+                    SQLITE_PATH,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                )
+                logger.info(
+                    f"Database pool initialized ({'PostgreSQL' if _db_pool.is_postgres else 'SQLite WAL'}, "
+                    f"max {_db_pool.max_size} connections)"
+                )
+    return _db_pool
+
+
+def close_db_pool():
+    """Close the process-wide database pool, if it was created."""
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is not None:
+            logger.info(f"Closing database pool: {_db_pool.stats()}")
+            _db_pool.close()
+            _db_pool = None
+
+
+def _adapt_placeholders(query: str, is_postgres: bool) -> Tuple[str, Optional[List[int]]]:
+    """
+    Convert $1-style placeholders to the driver's paramstyle.
 
+    SQLite keeps the numbering (?1). psycopg2 only has positional %s, so the
+    returned order maps each placeholder, in text order, to its parameter
+    index; placeholders may then be reused or appear out of order.
+    """
+    if not is_postgres:
+        return re.sub(r"\$(\d+)", r"?\1", query), None
+    order = [int(n) - 1 for n in re.findall(r"\$(\d+)", query)]
+    # psycopg2 treats a bare % as a format character (e.g. pg_trgm's % operator)
+    return re.sub(r"\$\d+", "%s", query.replace("%", "%%")), order
 
-def execute_query(query: str, params: tuple = (), fetch_one: bool = False):
-    """Execute database query with proper error handling."""
-    try:
-        conn, is_postgres = get_db_connection()
-        cursor = conn.cursor()
 
-        # Adjust query for SQLite vs PostgreSQL
-        if not is_postgres:
-            query = query.replace("$1", "?").replace("$2", "?").replace("$3", "?").replace("$4", "?")
+def _order_params(params: tuple, order: Optional[List[int]]) -> tuple:
+    """Apply the placeholder order returned by _adapt_placeholders."""
+    return tuple(params) if order is None else tuple(params[i] for i in order)
 
-        cursor.execute(query, params)
 
-        if fetch_one:
-            result = cursor.fetchone()
-            conn.close()
-            return dict(result) if result else None
-        else:
-            results = cursor.fetchall()
-            conn.close()
-            return [dict(row) for row in results]
+def execute_query(query: str, params: tuple = (), fetch_one: bool = False):
+    """Execute database query with proper error handling."""
+    try:
+        pool = get_db_pool()
     except Exception as e:
         logger.error(f"Database error: {e}")
         return None
 
+    query, order = _adapt_placeholders(query, pool.is_postgres)
+    params = _order_params(params, order)
 
-# ============================================================================
-# Helper Functions
-# ============================================================================
-
-async def make_api_request(url: str, params: Dict = None, headers: Dict = None) -> Optional[Dict]:
-    """Make HTTP API request with error handling."""
-    async with httpx.AsyncClient() as client:
+    # A connection that died (e.g. database restart) is discarded by the pool;
+    # retry once on a fresh connection before giving up.
+    for attempt in range(2):
+        conn = None
         try:
-            response = await client.get(url, params=params, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error: {e}")
-            return None
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+
+                if cursor.description is None:
+                    result = None
+                elif fetch_one:
+                    row = cursor.fetchone()
+                    result = dict(row) if row else None
+                else:
+                    result = [dict(row) for row in cursor.fetchall()]
+
+                cursor.close()
+                conn.commit()
+                return result
         except Exception as e:
-            logger.error(f"Request error: {e}")
+            if attempt == 0 and pool.is_disconnect(e, conn):
+                logger.warning(f"Database connection lost ({e}), reconnecting")
+                continue
+            logger.error(f"Database error: {e}")
             return None
 
 
-def parse_semrush_csv(csv_data: str) -> List[Dict]:
-    """Parse SEMrush CSV response into list of dictionaries."""
-    lines = csv_data.strip().split('\n')
-    if len(lines) < 2:
-        return []
+def execute_many(query: str, params_seq: List[tuple]) -> bool:
+    """Execute a write statement for every parameter tuple in one transaction."""
+    if not params_seq:
+        return True
 
-    headers = lines[0].split(';')
-    results = []
+    try:
+        pool = get_db_pool()
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return False
 
-    for line in lines[1:]:
-        values = line.split(';')
-        row = {headers[i]: values[i] if i < len(values) else '' for i in range(len(headers))}
-        results.append(row)
+    query, order = _adapt_placeholders(query, pool.is_postgres)
+    params_seq = [_order_params(params, order) for params in params_seq]
 
-    return results
+    for attempt in range(2):
+        conn = None
+        try:
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(query, params_seq)
+                cursor.close()
+                conn.commit()
+                return True
+        except Exception as e:
+            if attempt == 0 and pool.is_disconnect(e, conn):
+                logger.warning(f"Database connection lost ({e}), reconnecting")
+                continue
+            logger.error(f"Database error: {e}")
+            return False
 
 
-def calculate_eeat_score(content: Dict) -> Dict[str, int]:
+class AsyncDatabase:
     """
-    Calculate E-E-A-T scores based on content analysis.
+    Non-blocking database access for the async MCP tools.
 
-    Returns scores for:
-    - Experience (first-hand knowledge, case studies)
-    - Expertise (credentials, depth of knowledge)
-    - Authoritativeness (citations, references)
-    - Trustworthiness (accuracy, transparency)
+    PostgreSQL uses an asyncpg pool when asyncpg is installed, so queries never
+    touch the event loop thread. Without asyncpg, the psycopg2 DatabasePool is
+    driven from a thread pool. SQLite calls run on a dedicated single worker
+    thread, which matches the single long-lived SQLite connection.
     """
-    scores = {
-        "experience": 50,
-        "expertise": 50,
-        "authoritativeness": 50,
-        "trustworthiness": 50
-    }
 
-    # Experience indicators
-    if content.get("has_case_studies"):
-        scores["experience"] += 15
-    if content.get("has_testimonials"):
-        scores["experience"] += 10
-    if content.get("word_count", 0) > 1500:
-        scores["experience"] += 10
-
-    # Expertise indicators
-    if content.get("has_author_bio"):
-        scores["expertise"] += 15
-    if content.get("author_credentials"):
-        scores["expertise"] += 20
-    if content.get("technical_depth", "low") == "high":
-        scores["expertise"] += 10
-
-    # Authoritativeness indicators
-    if content.get("external_citations", 0) > 5:
-        scores["authoritativeness"] += 15
-    if content.get("has_schema_markup"):
-        scores["authoritativeness"] += 10
-    if content.get("domain_authority", 0) > 50:
-        scores["authoritativeness"] += 10
-
-    # Trustworthiness indicators
-    if content.get("has_https"):
-        scores["trustworthiness"] += 10
-    if content.get("has_privacy_policy"):
-        scores["trustworthiness"] += 10
-    if content.get("has_contact_info"):
-        scores["trustworthiness"] += 15
-    if content.get("last_updated"):
-        scores["trustworthiness"] += 10
-
-    # Cap at 100
-    for key in scores:
-        scores[key] = min(100, scores[key])
-
-    return scores
+    def __init__(self, sync_pool: DatabasePool):
+        self.sync_pool = sync_pool
+        self.is_postgres = sync_pool.is_postgres
+        self._pg_pool = None
+        self._pg_lock = asyncio.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # asyncpg metrics
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._reconnects = 0
+
+        self.driver = "sqlite3 (worker thread)"
+        if self.is_postgres:
+            try:
+                import asyncpg  # noqa: F401
+                self.driver = "asyncpg"
+            except ImportError:
+                logger.warning("asyncpg not installed - running psycopg2 queries in worker threads")
+                self.driver = "psycopg2 (worker threads)"
+
+    async def _get_pg_pool(self):
+        """Create the asyncpg pool on first use (must run inside the event loop)."""
+        if self._pg_pool is None:
+            async with self._pg_lock:
+                if self._pg_pool is None:
+                    import asyncpg
+                    self._pg_pool = await asyncpg.create_pool(
+                        self.sync_pool.database_url,
+                        min_size=self.sync_pool.min_size,
+                        max_size=self.sync_pool.max_size,
+                        timeout=self.sync_pool.timeout,
+                    )
+        return self._pg_pool
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            workers = 1 if not self.is_postgres else self.sync_pool.max_size
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seo-toolkit-db")
+        return self._executor
+
+    async def _asyncpg_query(self, query: str, params: tuple, fetch_one: bool):
+        import asyncpg
+
+        pool = await self._get_pg_pool()
+
+        for attempt in range(2):
+            start = time.monotonic()
+            try:
+                async with pool.acquire(timeout=self.sync_pool.timeout) as conn:
+                    wait = time.monotonic() - start
+                    self._checkouts += 1
+                    self._total_wait += wait
+                    self._max_wait = max(self._max_wait, wait)
+
+                    if fetch_one:
+                        row = await conn.fetchrow(query, *params)
+                        return dict(row) if row else None
+                    rows = await conn.fetch(query, *params)
+                    return [dict(row) for row in rows]
+            except (asyncpg.exceptions.ConnectionDoesNotExistError,
+                    asyncpg.exceptions.InterfaceError,
+                    asyncpg.exceptions.PostgresConnectionError,
+                    ConnectionError) as e:
+                # The pool replaces closed connections on release; retry once
+                if attempt == 0:
+                    self._reconnects += 1
+                    logger.warning(f"Database connection lost ({e}), reconnecting")
+                    continue
+                logger.error(f"Database error: {e}")
+                return None
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+                return None
+
+    async def query(self, query: str, params: tuple = (), fetch_one: bool = False):
+        """Run a query without blocking the event loop."""
+        if self.driver == "asyncpg":
+            return await self._asyncpg_query(query, params, fetch_one)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), partial(execute_query, query, params, fetch_one)
+        )
+
+    async def execute_many(self, query: str, params_seq: List[tuple]) -> bool:
+        """Run a batched write without blocking the event loop."""
+        if self.driver != "asyncpg":
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(execute_many, query, params_seq))
+
+        if not params_seq:
+            return True
+
+        pool = await self._get_pg_pool()
+        try:
+            async with pool.acquire(timeout=self.sync_pool.timeout) as conn:
+                self._checkouts += 1
+                async with conn.transaction():
+                    await conn.executemany(query, params_seq)
+            return True
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for whichever driver is active."""
+        if self.driver != "asyncpg":
+            stats = self.sync_pool.stats()
+            stats["driver"] = self.driver
+            return stats
+
+        pool = self._pg_pool
+        size = pool.get_size() if pool else 0
+        idle = pool.get_idle_size() if pool else 0
+        return {
+            "backend": "postgresql",
+            "driver": self.driver,
+            "max_size": self.sync_pool.max_size,
+            "open_connections": size,
+            "idle_connections": idle,
+            "in_use": size - idle,
+            "checkouts": self._checkouts,
+            "waits": None,
+            "avg_wait_ms": round(self._total_wait / self._checkouts * 1000, 2) if self._checkouts else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+            "reconnects": self._reconnects,
+        }
+
+    async def close(self):
+        """Close the asyncpg pool and worker threads."""
+        if self._pg_pool is not None:
+            await self._pg_pool.close()
+            self._pg_pool = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_async_db: Optional[AsyncDatabase] = None
+
+
+def get_async_db() -> AsyncDatabase:
+    """Get (or lazily create) the process-wide async database front-end."""
+    global _async_db
+    if _async_db is None:
+        _async_db = AsyncDatabase(get_db_pool())
+        logger.info(f"Async database driver: {_async_db.driver}")
+    return _async_db
+
+
+async def close_async_db():
+    """Close the async database front-end, if it was created."""
+    global _async_db
+    if _async_db is not None:
+        logger.info(f"Closing async database: {_async_db.stats()}")
+        await _async_db.close()
+        _async_db = None
+
+
+async def execute_query_async(query: str, params: tuple = (), fetch_one: bool = False):
+    """Async version of execute_query for use inside MCP tools."""
+    try:
+        db = get_async_db()
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return None
+    return await db.query(query, params, fetch_one)
+
+
+async def execute_many_async(query: str, params_seq: List[tuple]) -> bool:
+    """Async version of execute_many for use inside MCP tools."""
+    try:
+        db = get_async_db()
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return False
+    return await db.execute_many(query, params_seq)
+
+
+# Optional summary tables and indexes (e.g. company_stats) are probed once and the answer
+# kept for a while, so a database migrated while the server runs is picked up.
+TABLE_PROBE_TTL = 300
+_table_probes: Dict[str, Tuple[bool, float]] = {}
+
+
+async def has_table(name: str) -> bool:
+    """Return True if a table, view or index called ``name`` exists in the database."""
+    probe = _table_probes.get(name)
+    if probe and time.monotonic() - probe[1] < TABLE_PROBE_TTL:
+        return probe[0]
+
+    try:
+        is_postgres = get_db_pool().is_postgres
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return False
+
+    if is_postgres:
+        query = "SELECT to_regclass($1) IS NOT NULL AS present"
+    else:
+        query = "SELECT COUNT(*) AS present FROM sqlite_master WHERE type IN ('table', 'view', 'index') AND name = $1"
+    row = await execute_query_async(query, (name,), fetch_one=True)
+    present = bool(row and row.get('present'))
+    _table_probes[name] = (present, time.monotonic())
+    return present
 
 
 # ============================================================================
-# MCP Tools - Technical SEO Audit
+# HTTP Clients
 # ============================================================================
 
-@mcp.tool()
-async def run_lighthouse_audit(url: str, strategy: str = "mobile") -> str:
+# Connection limits shared by every upstream client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One long-lived client per upstream host, with its own timeout
+HTTP_UPSTREAMS = {
+    "google": {"hosts": ("www.googleapis.com", "chromeuxreport.googleapis.com"), "timeout": 60.0},
+    "semrush": {"hosts": ("api.semrush.com",), "timeout": 30.0},
+    "firecrawl": {"hosts": ("api.firecrawl.dev",), "timeout": 30.0},
+    "anthropic": {"hosts": ("api.anthropic.com",), "timeout": 60.0},
+    "default": {"hosts": (), "timeout": 30.0},
+}
+
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _create_http_client(upstream: str) -> httpx.AsyncClient:
+    """Build a keep-alive client for one upstream."""
+    config = HTTP_UPSTREAMS[upstream]
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(config["timeout"], connect=10.0),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+    )
+
+
+def get_http_client(upstream: str = "default") -> httpx.AsyncClient:
     """
-    Run a comprehensive Lighthouse audit using Google PageSpeed Insights API.
-
-    Args:
-        url: Website URL to audit
-        strategy: "mobile" or "desktop" (default: "mobile")
-
-    Returns:
-        Detailed audit results with scores and recommendations
+    Get the shared client for an upstream ("google", "semrush", "firecrawl",
+    "anthropic" or "default"). Clients are normally opened at server start,
+    but are created on demand if a tool runs outside the server lifespan.
     """
-    if not GOOGLE_API_KEY:
-        return "Error: GOOGLE_API_KEY not configured in environment variables"
+    if upstream not in HTTP_UPSTREAMS:
+        upstream = "default"
+    client = _http_clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _create_http_client(upstream)
+        _http_clients[upstream] = client
+    return client
+
+
+def get_http_client_for_url(url: str) -> httpx.AsyncClient:
+    """Pick the shared client whose upstream serves this URL's host."""
+    host = urlparse(url).hostname or ""
+    for upstream, config in HTTP_UPSTREAMS.items():
+        if host in config["hosts"]:
+            return get_http_client(upstream)
+    return get_http_client("default")
+
+
+def open_http_clients():
+    """Create every upstream client (called at server start)."""
+    for upstream in HTTP_UPSTREAMS:
+        get_http_client(upstream)
+    logger.info(
+        f"HTTP clients ready for {', '.join(HTTP_UPSTREAMS)} "
+        f"(HTTP/2 {'enabled' if HTTP2_AVAILABLE else 'unavailable - install httpx[http2]'})"
+    )
+
+
+async def close_http_clients():
+    """Close every upstream client (called at server shutdown)."""
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        await client.aclose()
 
-    logger.info(f"Running Lighthouse audit for {url} ({strategy})")
 
-    params = {
-        "url": url,
-        "key": GOOGLE_API_KEY,
-        "strategy": strategy,
-        "category": ["performance", "accessibility", "best-practices", "seo"]
-    }
+# ============================================================================
+# Rate Limiting
+# ============================================================================
 
-    data = await make_api_request(GOOGLE_PSI_API_BASE, params=params)
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
 
-    if not data or "lighthouseResult" not in data:
-        return "Failed to retrieve Lighthouse audit data"
+    Tokens refill continuously at ``rate`` per second up to ``capacity``;
+    ``acquire`` waits until enough tokens are available. Waiters are served
+    in arrival order.
+    """
 
-    result = data["lighthouseResult"]
-    categories = result.get("categories", {})
-    audits = result.get("audits", {})
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
 
-    # Extract scores
-    scores = {
-        "performance": round(categories.get("performance", {}).get("score", 0) * 100),
-        "accessibility": round(categories.get("accessibility", {}).get("score", 0) * 100),
-        "best_practices": round(categories.get("best-practices", {}).get("score", 0) * 100),
-        "seo": round(categories.get("seo", {}).get("score", 0) * 100)
-    }
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
 
-    # Extract key metrics
-    metrics = {
-        "First Contentful Paint": audits.get("first-contentful-paint", {}).get("displayValue", "N/A"),
-        "Largest Contentful Paint": audits.get("largest-contentful-paint", {}).get("displayValue", "N/A"),
-        "Total Blocking Time": audits.get("total-blocking-time", {}).get("displayValue", "N/A"),
-        "Cumulative Layout Shift": audits.get("cumulative-layout-shift", {}).get("displayValue", "N/A"),
-        "Speed Index": audits.get("speed-index", {}).get("displayValue", "N/A")
-    }
 
-    # Find opportunities for improvement
-    opportunities = []
-    for audit_id, audit in audits.items():
-        if audit.get("score") is not None and audit.get("score") < 0.9:
-            opportunities.append({
-                "title": audit.get("title", ""),
-                "description": audit.get("description", ""),
-                "score": audit.get("score", 0)
-            })
+# PageSpeed Insights quota: 400 queries per 100 seconds by default
+PSI_RATE_LIMIT_PER_SECOND = float(os.getenv("PSI_RATE_LIMIT_PER_SECOND", "4"))
+PSI_RATE_LIMIT_BURST = float(os.getenv("PSI_RATE_LIMIT_BURST", "10"))
+PSI_BATCH_CONCURRENCY = int(os.getenv("PSI_BATCH_CONCURRENCY", "8"))
 
-    # Format response
-    response = f"""
-Lighthouse Audit Results for {url} ({strategy})
-{'=' * 60}
+psi_rate_limiter = TokenBucket(PSI_RATE_LIMIT_PER_SECOND, PSI_RATE_LIMIT_BURST)
 
-SCORES:
-- Performance: {scores['performance']}/100
-- Accessibility: {scores['accessibility']}/100
-- Best Practices: {scores['best_practices']}/100
-- SEO: {scores['seo']}/100
+# SEMrush allows 10 requests per second per account
+SEMRUSH_RATE_LIMIT_PER_SECOND = float(os.getenv("SEMRUSH_RATE_LIMIT_PER_SECOND", "10"))
+SEMRUSH_BATCH_CONCURRENCY = int(os.getenv("SEMRUSH_BATCH_CONCURRENCY", "4"))
 
-KEY METRICS:
-- First Contentful Paint: {metrics['First Contentful Paint']}
-- Largest Contentful Paint: {metrics['Largest Contentful Paint']}
-- Total Blocking Time: {metrics['Total Blocking Time']}
-- Cumulative Layout Shift: {metrics['Cumulative Layout Shift']}
-- Speed Index: {metrics['Speed Index']}
+semrush_rate_limiter = TokenBucket(SEMRUSH_RATE_LIMIT_PER_SECOND, SEMRUSH_RATE_LIMIT_PER_SECOND)
 
-TOP OPPORTUNITIES ({len(opportunities[:5])} shown):
-"""
 
-    for i, opp in enumerate(opportunities[:5], 1):
-        response += f"\n{i}. {opp['title']} (Score: {round(opp['score'] * 100)}%)"
-        response += f"\n   {opp['description']}\n"
+# ============================================================================
+# Result Cache
+# ============================================================================
 
-    return response
+# Shared on-disk cache file (separate from the application database)
+CACHE_PATH = os.getenv("SEO_TOOLKIT_CACHE_PATH", "./data/seo-toolkit-cache.db")
 
+# PageSpeed Insights cache settings
+PSI_CACHE_TTL = int(os.getenv("PSI_CACHE_TTL", "21600"))  # 6 hours
+PSI_CACHE_MEMORY_ENTRIES = int(os.getenv("PSI_CACHE_MEMORY_ENTRIES", "64"))
 
-@mcp.tool()
-async def analyze_technical_seo(url: str) -> str:
+
+class ResultCache:
+    """
+    Two-tier TTL cache for expensive upstream results.
+
+    Tier 1 is a bounded in-memory LRU; tier 2 is a table in a shared SQLite
+    file so entries survive restarts. Values must be JSON-serializable and are
+    stored zlib-compressed on disk. Keys are content hashes built with
+    ``make_key`` so equivalent requests map to the same entry. When
+    ``max_disk_entries`` is set, the oldest disk entries of the namespace are
+    evicted on write once it is exceeded.
     """
-    Perform comprehensive technical SEO analysis using web scraping.
 
-    Args:
-        url: Website URL to analyze
+    def __init__(self, namespace: str, ttl: int, max_memory_entries: int = 128,
+                 db_path: Optional[str] = CACHE_PATH, max_disk_entries: Optional[int] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.db_path = db_path
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash the request parts into a stable cache key."""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _get_db(self):
+        if self._db is None and self.db_path:
+            import sqlite3
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries(expires_at)")
+            conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+            self._db = conn
+        return self._db
+
+    def _disk_get(self, key: str):
+        with self._db_lock:
+            db = self._get_db()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                db.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+                db.commit()
+                return None
+            return json.loads(zlib.decompress(row[0])), row[1]
+
+    def _disk_set(self, key: str, value: Any, expires_at: float):
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        with self._db_lock:
+            db = self._get_db()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, blob, time.time(), expires_at)
+            )
+            if self.max_disk_entries:
+                evicted = db.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                    "SELECT key FROM cache_entries WHERE namespace = ? "
+                    "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.namespace, self.max_disk_entries)
+                ).rowcount
+                self.evictions += max(0, evicted)
+            db.commit()
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None on miss/expiry."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] >= time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            del self._memory[key]
 
-    Returns:
-        Technical SEO analysis with issues and recommendations
-    """
-    if not FIRECRAWL_API_KEY:
-        return "Error: FIRECRAWL_API_KEY not configured. Using basic analysis."
+        try:
+            found = await asyncio.to_thread(self._disk_get, key)
+        except Exception as e:
+            logger.warning(f"Cache read failed ({self.namespace}): {e}")
+            found = None
 
-    logger.info(f"Analyzing technical SEO for {url}")
+        if found is None:
+            self.misses += 1
+            return None
 
-    # Use Firecrawl API to scrape the page
-    headers = {
-        "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
-        "Content-Type": "application/json"
-    }
+        value, expires_at = found
+        self._remember(key, value, expires_at)
+        self.disk_hits += 1
+        return value
 
-    async with httpx.AsyncClient() as client:
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Store a value in both tiers."""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, value, expires_at)
+        self.writes += 1
         try:
-            response = await client.post(
-                "https://api.firecrawl.dev/v1/scrape",
-                headers=headers,
-                json={
-                    "url": url,
-                    "formats": ["markdown", "html", "links"],
-                    "onlyMainContent": False
-                },
-                timeout=30.0
-            )
-            data = response.json()
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
         except Exception as e:
-            return f"Error scraping URL: {e}"
+            logger.warning(f"Cache write failed ({self.namespace}): {e}")
+
+    async def get_or_fetch(self, key: str, fetch, ttl: Optional[int] = None, force_refresh: bool = False,
+                           should_cache=None) -> tuple:
+        """
+        Return ``(value, source)`` where source is "cache", "inflight" or "fetched".
+
+        Concurrent callers asking for the same key while a fetch is running
+        share that single in-flight call instead of issuing their own.
+        ``should_cache`` can reject values (e.g. upstream error payloads).
+        """
+        if not force_refresh:
+            value = await self.get(key)
+            if value is not None:
+                return value, "cache"
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight), "inflight"
+
+        future = asyncio.ensure_future(fetch())
+        self._inflight[key] = future
+        try:
+            value = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+
+        if value is not None and (should_cache is None or should_cache(value)):
+            await self.set(key, value, ttl)
+        return value, "fetched"
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this cache."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "ttl_seconds": self.ttl,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_caches: Dict[str, ResultCache] = {}
+
+
+def get_cache(namespace: str, ttl: int, max_memory_entries: int = 128,
+              max_disk_entries: Optional[int] = None) -> ResultCache:
+    """Get (or create) the named process-wide cache."""
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = ResultCache(namespace, ttl, max_memory_entries, max_disk_entries=max_disk_entries)
+        _caches[namespace] = cache
+    return cache
+
+
+def close_caches():
+    """Log final counters and close the cache database."""
+    for cache in _caches.values():
+        logger.info(f"Cache stats: {cache.stats()}")
+        cache.close()
+    _caches.clear()
+    close_checkpoints()
 
-    if not data.get("success"):
-        return f"Failed to scrape {url}"
 
-    metadata = data.get("metadata", {})
-    html = data.get("html", "")
-    links = data.get("links", [])
+# ============================================================================
+# Job Checkpoints
+# ============================================================================
 
-    # Analyze metadata
-    issues = []
-    score = 100
+_checkpoint_db = None
+_checkpoint_lock = threading.Lock()
 
-    title = metadata.get("title", "")
-    description = metadata.get("description", "")
 
-    # Title analysis
-    if not title:
-        issues.append("❌ Missing page title (High Impact)")
-        score -= 15
-    elif len(title) < 30 or len(title) > 60:
-        issues.append(f"⚠️ Title length ({len(title)}) should be 30-60 characters (Medium Impact)")
-        score -= 5
+def _get_checkpoint_db():
+    """Open the checkpoint table (stored alongside the result cache)."""
+    global _checkpoint_db
+    if _checkpoint_db is None:
+        import sqlite3
+        directory = os.path.dirname(CACHE_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_checkpoints (
+                job_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        _checkpoint_db = conn
+    return _checkpoint_db
 
-    # Meta description analysis
-    if not description:
-        issues.append("❌ Missing meta description (High Impact)")
-        score -= 15
-    elif len(description) < 120 or len(description) > 160:
-        issues.append(f"⚠️ Description length ({len(description)}) should be 120-160 characters (Medium Impact)")
-        score -= 5
 
-    # Check for Open Graph tags
-    og_title = metadata.get("ogTitle")
-    og_description = metadata.get("ogDescription")
-    og_image = metadata.get("ogImage")
+def load_checkpoint(job_id: str) -> Optional[Dict]:
+    """Load the saved state of a resumable batch job, if any."""
+    with _checkpoint_lock:
+        row = _get_checkpoint_db().execute(
+            "SELECT state FROM job_checkpoints WHERE job_id = ?", (job_id,)
+        ).fetchone()
+    return json.loads(row[0]) if row else None
 
-    if not og_title or not og_description or not og_image:
-        issues.append("⚠️ Incomplete Open Graph tags for social sharing (Low Impact)")
-        score -= 3
 
-    # Analyze content structure
-    markdown = data.get("markdown", "")
-    h1_count = markdown.count("\n# ")
+def save_checkpoint(job_id: str, state: Dict):
+    """Persist the progress of a resumable batch job."""
+    with _checkpoint_lock:
+        db = _get_checkpoint_db()
+        db.execute(
+            "INSERT OR REPLACE INTO job_checkpoints (job_id, state, updated_at) VALUES (?, ?, ?)",
+            (job_id, json.dumps(state), time.time())
+        )
+        db.commit()
 
-    if h1_count == 0:
-        issues.append("❌ No H1 tag found (High Impact)")
-        score -= 15
-    elif h1_count > 1:
-        issues.append(f"⚠️ Multiple H1 tags ({h1_count}) - recommend 1 (Medium Impact)")
-        score -= 5
 
-    # Calculate word count
-    word_count = len(markdown.split())
+def clear_checkpoint(job_id: str):
+    """Forget a job's checkpoint once it has finished."""
+    with _checkpoint_lock:
+        db = _get_checkpoint_db()
+        db.execute("DELETE FROM job_checkpoints WHERE job_id = ?", (job_id,))
+        db.commit()
 
-    # Link analysis
-    internal_links = [l for l in links if url.split('/')[2] in l]
-    external_links = [l for l in links if url.split('/')[2] not in l]
 
-    # Format response
-    response = f"""
-Technical SEO Analysis for {url}
-{'=' * 60}
+def close_checkpoints():
+    global _checkpoint_db
+    with _checkpoint_lock:
+        if _checkpoint_db is not None:
+            _checkpoint_db.close()
+            _checkpoint_db = None
 
-OVERALL SEO SCORE: {max(0, score)}/100
 
-METADATA:
-- Title: {title or 'Missing'} ({len(title)} characters)
-- Description: {description or 'Missing'} ({len(description)} characters)
-- Open Graph: {'Complete' if og_title and og_description and og_image else 'Incomplete'}
+# ============================================================================
+# Helper Functions
+# ============================================================================
 
-CONTENT STRUCTURE:
-- H1 Tags: {h1_count}
-- Word Count: {word_count}
-- Internal Links: {len(internal_links)}
-- External Links: {len(external_links)}
+async def make_api_request(url: str, params: Dict = None, headers: Dict = None) -> Optional[Dict]:
+    """Make HTTP API request with error handling."""
+    client = get_http_client_for_url(url)
+    try:
+        response = await client.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.error(f"HTTP error: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Request error: {e}")
+        return None
 
-ISSUES FOUND ({len(issues)}):
-"""
 
-    for issue in issues:
-        response += f"\n{issue}"
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for use in cache keys.
 
-    if not issues:
-        response += "\n✅ No major issues found!"
+    Adds a missing scheme, lowercases scheme and host, drops default ports
+    and fragments, and gives an empty path a trailing slash.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
 
-    response += "\n\nRECOMMENDATIONS:\n"
-    if score < 80:
-        response += "- Fix high-impact issues first (marked with ❌)\n"
-        response += "- Address medium-impact issues (marked with ⚠️)\n"
-    if word_count < 500:
-        response += "- Consider adding more content (aim for 1000+ words)\n"
-    if len(internal_links) < 3:
-        response += "- Add more internal links to improve site structure\n"
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    path = parsed.path or "/"
+    query = f"?{parsed.query}" if parsed.query else ""
 
-    return response
+    return f"{scheme}://{netloc}{path}{query}"
 
 
-# ============================================================================
-# MCP Tools - Keyword Research
-# ============================================================================
+def _json_value(value: Any) -> Any:
+    """Make a database value JSON-friendly (datetimes, UUIDs, decimals)."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value) if not hasattr(value, "__float__") else float(value)
 
-@mcp.tool()
-async def get_keyword_data(keyword: str, database: str = "us") -> str:
+
+OUTPUT_FORMATS = ("text", "json")
+
+ToolResult = Union[str, Dict[str, Any]]
+
+
+def tool_output(data: Dict[str, Any], format: str, render: Callable[[Dict[str, Any]], str]) -> ToolResult:
     """
-    Get comprehensive keyword data from SEMrush API.
+    Return a tool result as structured data or as rendered text.
 
-    Args:
-        keyword: Keyword to analyze
-        database: Country database code (default: "us")
+    Tools build one result dict and hand it here with their text renderer.
+    ``format="json"`` returns the dict untouched, so bulk callers skip string
+    formatting entirely; ``"text"`` renders it. A dict with an ``error`` key
+    renders as ``"Error: <message>"``.
+    """
+    if format == "json":
+        return data
+    if format != "text":
+        return f"Error: format must be one of {', '.join(OUTPUT_FORMATS)}"
+    if "error" in data:
+        return f"Error: {data['error']}"
+    return render(data)
+
+
+def tool_error(message: str, format: str) -> ToolResult:
+    """Shorthand for returning ``{"error": message}`` through ``tool_output``."""
+    return tool_output({"error": message}, format, str)
+
+
+# Numeric SEMrush columns and the type each is coerced to
+SEMRUSH_NUMERIC_COLUMNS = {
+    "Nq": int,    # search volume
+    "Po": int,    # position
+    "Nr": int,    # number of results
+    "Np": int,    # common keywords
+    "Or": int,    # organic keywords
+    "Ot": int,    # organic traffic
+    "Ad": int,    # adwords keywords
+    "Cp": float,  # CPC
+    "Co": float,  # competition
+    "Tr": float,  # traffic share
+    "Kd": float,  # keyword difficulty
+    "Cr": float,  # competition level
+    "Oc": float,  # organic traffic cost
+}
+
+# Field names used for SEMrush columns in structured (format="json") output
+SEMRUSH_FIELD_NAMES = {
+    "Ph": "keyword",
+    "Po": "position",
+    "Nq": "search_volume",
+    "Cp": "cpc",
+    "Co": "competition",
+    "Nr": "results",
+    "Td": "trend",
+    "Tr": "traffic_percent",
+    "Kd": "difficulty",
+    "Dn": "domain",
+    "Cr": "competition_level",
+    "Np": "common_keywords",
+    "Or": "organic_keywords",
+    "Ot": "organic_traffic",
+    "Oc": "organic_cost",
+    "Ad": "adwords_keywords",
+}
+
+
+class SemrushTable:
+    """
+    Columnar SEMrush report.
 
-    Returns:
-        Keyword metrics including search volume, difficulty, CPC, and trends
+    Each column is stored once: numeric columns as ``array('d')`` (NaN for
+    missing values), text columns as lists of strings. Rows are only turned
+    into dicts on demand, so large exports stay compact.
     """
-    if not SEMRUSH_API_KEY:
-        return "Error: SEMRUSH_API_KEY not configured in environment variables"
 
-    logger.info(f"Fetching keyword data for '{keyword}' in {database} database")
+    __slots__ = ("columns", "data", "error", "_slots")
+
+    def __init__(self, columns: List[str], error: Optional[str] = None):
+        self.columns = columns
+        self.data: Dict[str, Any] = {
+            name: array("d") if name in SEMRUSH_NUMERIC_COLUMNS else [] for name in columns
+        }
+        self.error = error
+        self._slots = None
+
+    def __len__(self) -> int:
+        return len(self.data[self.columns[0]]) if self.columns else 0
+
+    def append(self, values: List[str]):
+        if self._slots is None:
+            self._slots = [(self.data[name], name in SEMRUSH_NUMERIC_COLUMNS) for name in self.columns]
+        width = len(self._slots)
+        if len(values) != width:
+            values = values[:width] + [""] * (width - len(values))
+
+        for (column, numeric), value in zip(self._slots, values, strict=True):
+            if numeric:
+                try:
+                    column.append(float(value))
+                except ValueError:
+                    column.append(math.nan)
+            else:
+                column.append(value)
+
+    def column(self, name: str) -> List[Any]:
+        """All values of one column (missing numeric values as None)."""
+        values = self.data.get(name)
+        if values is None:
+            return []
+        if name not in SEMRUSH_NUMERIC_COLUMNS:
+            return values
+        cast = SEMRUSH_NUMERIC_COLUMNS[name]
+        return [None if math.isnan(v) else cast(v) for v in values]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """One row as a dict; missing numeric values are omitted."""
+        row = {}
+        for name in self.columns:
+            value = self.data[name][index]
+            if name in SEMRUSH_NUMERIC_COLUMNS:
+                if math.isnan(value):
+                    continue
+                value = SEMRUSH_NUMERIC_COLUMNS[name](value)
+            row[name] = value
+        return row
+
+    def iter_rows(self, limit: Optional[int] = None):
+        """Yield rows as dicts, one at a time."""
+        count = len(self) if limit is None else min(limit, len(self))
+        for i in range(count):
+            yield self.row(i)
+
+    def records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows keyed by ``SEMRUSH_FIELD_NAMES`` (missing values as None)."""
+        names = [(code, SEMRUSH_FIELD_NAMES.get(code, code)) for code in self.columns]
+        return [{name: row.get(code) for code, name in names} for row in self.iter_rows(limit)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON-serializable form used by the result cache.
+
+        Numeric columns are kept as base64 of the raw ``array('d')`` bytes
+        (about 11 characters per value), not as lists of Python floats, so the
+        cached copy stays close to the table's own size.
+        """
+        return {
+            "columns": self.columns,
+            "data": {
+                name: base64.b64encode(values.tobytes()).decode("ascii") if isinstance(values, array) else values
+                for name, values in self.data.items()
+            },
+            "byteorder": sys.byteorder,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "SemrushTable":
+        table = cls(payload["columns"], payload.get("error"))
+        swap = payload.get("byteorder", sys.byteorder) != sys.byteorder
+        for name, values in payload["data"].items():
+            if name in SEMRUSH_NUMERIC_COLUMNS:
+                column = array("d")
+                if isinstance(values, str):
+                    column.frombytes(base64.b64decode(values))
+                    if swap:
+                        column.byteswap()
+                else:
+                    column.extend(values)  # entries cached as plain lists
+                table.data[name] = column
+            else:
+                table.data[name] = values
+        return table
+
+
+class SemrushCsvParser:
+    """
+    Incremental parser for SEMrush's semicolon-separated exports.
 
-    params = {
-        "type": "phrase_this",
-        "key": SEMRUSH_API_KEY,
-        "export_columns": "Ph,Nq,Cp,Co,Nr,Td",
-        "phrase": keyword,
-        "database": database
-    }
+    Text is fed in arbitrary chunks (e.g. straight from an HTTP stream).
+    Unquoted lines take a fast split path; lines containing quotes are
+    buffered until their quotes balance and then parsed with the csv module,
+    so quoted semicolons, escaped quotes and embedded newlines are handled.
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(SEMRUSH_API_BASE, params=params, timeout=30.0)
-            data = response.text
-        except Exception as e:
-            return f"Error fetching keyword data: {e}"
+    When ``columns`` (the requested export_columns codes) is given, the table
+    is keyed by those codes, since SEMrush headers use display names
+    ("Search Volume") rather than codes ("Nq").
+    """
 
-    results = parse_semrush_csv(data)
+    def __init__(self, columns: Optional[List[str]] = None):
+        self.requested_columns = columns
+        self.table: Optional[SemrushTable] = None
+        self._buffer = ""
+        self._pending = ""
+        self._error_text: Optional[str] = None
+
+    def feed(self, text: str):
+        if self._error_text is not None:
+            self._error_text += text
+            return
+
+        self._buffer += text
+        cut = self._buffer.rfind("\n")
+        if cut == -1:
+            return
+        complete, self._buffer = self._buffer[:cut + 1], self._buffer[cut + 1:]
+
+        if self.table is not None and not self._pending and '"' not in complete:
+            # Fast path: no quoting anywhere in this chunk
+            append = self.table.append
+            for line in complete.splitlines():
+                if line:
+                    append(line.split(";"))
+            return
+
+        for line in complete.splitlines(keepends=True):
+            self._line(line)
+
+    def _line(self, line: str):
+        if self._pending or '"' in line:
+            self._pending += line
+            if self._pending.count('"') % 2:
+                return  # quoted field continues on the next line
+            record = next(csv.reader([self._pending], delimiter=";"), [])
+            self._pending = ""
+            self._record(record)
+        else:
+            stripped = line.rstrip("\r\n")
+            if stripped:
+                self._record(stripped.split(";"))
+
+    def _record(self, values: List[str]):
+        if self.table is not None:
+            self.table.append(values)
+            return
+
+        # First record is the header (or an error message)
+        if values and values[0].startswith("ERROR"):
+            self._error_text = ";".join(values)
+            return
+
+        header = [v.strip() for v in values]
+        if self.requested_columns and len(self.requested_columns) == len(header):
+            header = list(self.requested_columns)
+        self.table = SemrushTable(header)
+
+    def close(self) -> SemrushTable:
+        """Flush buffered input and return the finished table."""
+        if self._error_text is None:
+            if self._buffer:
+                self._line(self._buffer)
+                self._buffer = ""
+            if self._pending:
+                # Unbalanced quotes at EOF: parse what we have
+                self._pending += '"'
+                self._line("")
+        if self._error_text is not None:
+            return SemrushTable([], error=self._error_text.strip())
+        return self.table or SemrushTable([])
+
+
+def parse_semrush_csv(csv_data: str, columns: Optional[List[str]] = None) -> SemrushTable:
+    """Parse a complete SEMrush CSV response into a columnar table."""
+    parser = SemrushCsvParser(columns)
+    parser.feed(csv_data)
+    return parser.close()
+
+
+# SEMrush cache lifetimes per report type (seconds)
+SEMRUSH_CACHE_TTL_KEYWORDS = int(os.getenv("SEMRUSH_CACHE_TTL_KEYWORDS", "86400"))  # daily
+SEMRUSH_CACHE_TTL_BACKLINKS = int(os.getenv("SEMRUSH_CACHE_TTL_BACKLINKS", "604800"))  # weekly
+
+SEMRUSH_REPORT_TTLS = {
+    "phrase_this": SEMRUSH_CACHE_TTL_KEYWORDS,
+    "phrase_these": SEMRUSH_CACHE_TTL_KEYWORDS,
+    "domain_organic": SEMRUSH_CACHE_TTL_KEYWORDS,
+    "domain_organic_organic": SEMRUSH_CACHE_TTL_BACKLINKS,
+    "backlinks": SEMRUSH_CACHE_TTL_BACKLINKS,
+}
+
+# Approximate API units charged per returned line, by report type
+SEMRUSH_UNITS_PER_LINE = {
+    "phrase_this": 10,
+    "phrase_these": 10,
+    "domain_organic": 10,
+    "domain_organic_organic": 40,
+    "backlinks": 40,
+}
+
+_semrush_units = {"spent": 0, "saved": 0, "shared": 0}
+
+
+async def fetch_semrush_report(params: Dict) -> SemrushTable:
+    """
+    Fetch a SEMrush report, reusing cached and in-flight responses.
+
+    The response body is parsed incrementally as it streams in, so large
+    exports never exist as one big string. The cache key covers every request
+    parameter except the API key (report type, export_columns, target,
+    database, display_limit, ...). Error responses ("ERROR ...") come back as
+    a table with ``error`` set and are never cached. Raises on transport errors
+    and on any other non-2xx response (e.g. a proxy's HTML error page), which
+    is never parsed, cached or counted as spent units.
+    """
+    report_type = params["type"]
+    ttl = SEMRUSH_REPORT_TTLS.get(report_type, SEMRUSH_CACHE_TTL_KEYWORDS)
+    cache = get_cache("semrush", SEMRUSH_CACHE_TTL_KEYWORDS)
+    key = cache.make_key(report_type, {k: v for k, v in params.items() if k != "key"})
+
+    async def fetch():
+        await semrush_rate_limiter.acquire()
+        columns = params["export_columns"].split(",") if params.get("export_columns") else None
+        parser = SemrushCsvParser(columns)
+        async with get_http_client("semrush").stream("GET", SEMRUSH_API_BASE, params=params) as response:
+            if not response.is_success:
+                body = (await response.aread()).decode("utf-8", errors="replace").strip()
+                if body.startswith("ERROR"):
+                    return SemrushTable([], error=body.splitlines()[0]).to_dict()
+                # Not raise_for_status(): its message carries the request URL, API key included
+                raise RuntimeError(f"SEMrush returned HTTP {response.status_code}")
+            async for chunk in response.aiter_text():
+                parser.feed(chunk)
+        return parser.close().to_dict()
+
+    payload, source = await cache.get_or_fetch(
+        key, fetch, ttl=ttl, should_cache=lambda table: not table.get("error")
+    )
+    table = SemrushTable.from_dict(payload)
+
+    # Header line is free; each returned line is charged
+    units = len(table) * SEMRUSH_UNITS_PER_LINE.get(report_type, 10)
+    if source == "fetched":
+        _semrush_units["spent"] += units
+    elif source == "cache":
+        _semrush_units["saved"] += units
+    else:
+        _semrush_units["shared"] += units
 
-    if not results:
-        return f"No data found for keyword '{keyword}' in {database} database"
+    logger.info(f"SEMrush {report_type}: {source} ({len(table)} rows, {units} units)")
+    return table
 
-    row = results[0]
 
-    return f"""
-Keyword Analysis: "{keyword}" ({database.upper()})
-{'=' * 60}
+def calculate_eeat_score(content: Dict, profile: str = "content") -> Dict[str, int]:
+    """
+    Calculate E-E-A-T scores based on content analysis.
 
-METRICS:
-- Search Volume: {row.get('Nq', 'N/A')} searches/month
-- Cost Per Click (CPC): ${row.get('Cp', 'N/A')}
-- Competition: {row.get('Co', 'N/A')}
-- Number of Results: {row.get('Nr', 'N/A')}
-- Trend: {row.get('Td', 'N/A')}
+    Returns scores for:
+    - Experience (first-hand knowledge, case studies)
+    - Expertise (credentials, depth of knowledge)
+    - Authoritativeness (citations, references)
+    - Trustworthiness (accuracy, transparency)
+
+    A one-page call into the shared batch engine; use score_pages directly
+    (or the calculate_eeat_scores tool) for many pages.
+    """
+    batch = score_pages([content], profile)
+    return {dim: batch.dimensions[dim][0] for dim in EEAT_DIMENSIONS}
 
-RECOMMENDATION:
-{_generate_keyword_recommendation(row)}
-"""
 
+# ============================================================================
+# Company Lookup
+# ============================================================================
 
-def _generate_keyword_recommendation(data: Dict) -> str:
-    """Generate keyword recommendation based on metrics."""
+# Candidates scoring below this trigram similarity are dropped (pg_trgm's default)
+COMPANY_MATCH_THRESHOLD = float(os.getenv("COMPANY_MATCH_THRESHOLD", "0.3"))
+# A fuzzy (non-exact, non-substring) match only resolves above this score and this far ahead of the runner-up
+COMPANY_AUTO_RESOLVE_SCORE = float(os.getenv("COMPANY_AUTO_RESOLVE_SCORE", "0.8"))
+COMPANY_AUTO_RESOLVE_MARGIN = 0.1
+COMPANY_LOOKUP_CACHE_TTL = int(os.getenv("COMPANY_LOOKUP_CACHE_TTL", "600"))
+# Rows pulled from the index before re-ranking in Python
+COMPANY_CANDIDATE_POOL = 50
+
+
+def _trigrams(text: str) -> set:
+    """pg_trgm-style trigrams: each lowercased word padded with two leading and one trailing space."""
+    grams = set()
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def company_match_score(query: str, name: str) -> float:
+    """Score a company name against a lookup string (1.0 = exact match)."""
+    q, n = query.lower().strip(), (name or "").lower().strip()
+    if not q or not n:
+        return 0.0
+    if q == n:
+        return 1.0
+    a, b = _trigrams(q), _trigrams(n)
+    score = len(a & b) / len(a | b) if a and b else 0.0
+    if q in n:
+        # Substring hits always qualify, and rank higher the more of the name they cover
+        score = max(score, 0.6 + 0.35 * len(q) / len(n))
+    return round(score, 3)
+
+
+def _fts_trigram_query(text: str) -> str:
+    """OR of the quoted raw trigrams in ``text``, for an FTS5 trigram MATCH."""
+    text = text.lower().strip()
+    grams = dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2))
+    return " OR ".join('"' + g.replace('"', '""') + '"' for g in list(grams)[:64])
+
+
+async def _company_search_backend() -> str:
+    """Pick the indexed search strategy available in this database."""
     try:
-        volume = int(data.get('Nq', '0'))
-        competition = float(data.get('Co', '0'))
-    except (ValueError, TypeError):
-        return "Insufficient data for recommendation"
+        is_postgres = get_db_pool().is_postgres
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return "scan"
+    if is_postgres:
+        return "trigram" if await has_table("idx_companies_name_trgm") else "scan"
+    return "fts5" if await has_table("companies_fts") else "scan"
 
-    if volume > 10000 and competition < 0.5:
-        return "⭐ Excellent opportunity - High volume with low competition"
-    elif volume > 1000 and competition < 0.7:
-        return "✅ Good target - Decent volume with manageable competition"
-    elif volume < 100:
-        return "⚠️ Low search volume - Consider for long-tail strategy only"
-    elif competition > 0.8:
-        return "⚠️ High competition - May require significant resources"
+
+async def find_companies(name: str, limit: int = 5) -> List[Dict]:
+    """
+    Return companies matching ``name`` as ranked candidates.
+
+    Uses the pg_trgm index on PostgreSQL and the FTS5 trigram index on SQLite
+    (see database/company-search-schema*.sql); without them it falls back to a
+    LIKE scan. Candidates are re-ranked with company_match_score.
+    """
+    name = name.strip()
+    if not name:
+        return []
+
+    backend = await _company_search_backend()
+    pattern = f"%{name.lower()}%"
+    if backend == "trigram":
+        query = """
+        SELECT id, name, city, state FROM companies
+        WHERE LOWER(name) LIKE $1 OR LOWER(name) % $2
+        ORDER BY similarity(LOWER(name), $2) DESC
+        LIMIT $3
+        """
+        params = (pattern, name.lower(), COMPANY_CANDIDATE_POOL)
+    elif backend == "fts5" and len(name) >= 3:
+        query = """
+        SELECT c.id, c.name, c.city, c.state
+        FROM companies_fts
+        JOIN companies c ON c.id = companies_fts.rowid
+        WHERE companies_fts MATCH $1
+        ORDER BY bm25(companies_fts)
+        LIMIT $2
+        """
+        params = (_fts_trigram_query(name), COMPANY_CANDIDATE_POOL)
     else:
-        return "📊 Average opportunity - Monitor and consider for content strategy"
+        query = "SELECT id, name, city, state FROM companies WHERE LOWER(name) LIKE $1 LIMIT $2"
+        params = (pattern, COMPANY_CANDIDATE_POOL)
+
+    rows = await execute_query_async(query, params) or []
+
+    candidates = []
+    for row in rows:
+        score = company_match_score(name, row.get('name'))
+        if score >= COMPANY_MATCH_THRESHOLD:
+            company_id = row['id']
+            candidates.append({
+                "id": company_id if isinstance(company_id, int) else str(company_id),
+                "name": row.get('name'),
+                "city": row.get('city'),
+                "state": row.get('state'),
+                "score": score,
+            })
+    candidates.sort(key=lambda c: (-c["score"], c["name"] or ""))
+    return candidates[:limit]
 
 
-@mcp.tool()
-async def find_keyword_opportunities(domain: str, database: str = "us", limit: int = 20) -> str:
+def pick_company(name: str, candidates: List[Dict]) -> Optional[Dict]:
     """
-    Find keyword opportunities for a domain using SEMrush organic keywords data.
+    The candidate ``name`` unambiguously refers to, or None.
 
-    Args:
-        domain: Domain to analyze
-        database: Country database code (default: "us")
-        limit: Maximum number of keywords to return (default: 20)
+    Resolves on a single exact (case-insensitive) name match, a single
+    candidate containing ``name``, or a fuzzy score of at least
+    COMPANY_AUTO_RESOLVE_SCORE that leads the runner-up by
+    COMPANY_AUTO_RESOLVE_MARGIN. Anything else is left to the caller.
+    """
+    query = name.lower().strip()
+    if not query or not candidates:
+        return None
+    for matches in ([c for c in candidates if (c["name"] or "").lower().strip() == query],
+                    [c for c in candidates if query in (c["name"] or "").lower()]):
+        if matches:
+            return matches[0] if len(matches) == 1 else None
 
-    Returns:
-        List of keyword opportunities with rankings and metrics
+    ranked = sorted(candidates, key=lambda c: -c["score"])
+    runner_up = ranked[1]["score"] if len(ranked) > 1 else 0.0
+    if ranked[0]["score"] >= COMPANY_AUTO_RESOLVE_SCORE and ranked[0]["score"] - runner_up >= COMPANY_AUTO_RESOLVE_MARGIN:
+        return ranked[0]
+    return None
+
+
+async def resolve_company(name: str, city: str = "") -> Tuple[Optional[Dict], List[Dict]]:
     """
-    if not SEMRUSH_API_KEY:
-        return "Error: SEMRUSH_API_KEY not configured in environment variables"
+    Resolve a company name (optionally within a city) to one company.
 
-    logger.info(f"Finding keyword opportunities for {domain}")
+    Returns ``(company, candidates)``: ``company`` is None unless the name
+    picks out one company (see pick_company), and ``candidates`` are the best
+    matches to suggest instead. Only successful resolutions are cached, by
+    (name, city), so repeat lookups skip the search and tools can query child
+    tables by primary key.
+    """
+    cache = get_cache("company_lookup", COMPANY_LOOKUP_CACHE_TTL, 512)
+    key = cache.make_key("resolve", name.lower().strip(), city.lower().strip())
+
+    async def fetch():
+        candidates = await find_companies(name, limit=COMPANY_CANDIDATE_POOL)
+        if city:
+            candidates = [c for c in candidates if city.lower().strip() in (c["city"] or "").lower()]
+        return {"company": pick_company(name, candidates), "candidates": candidates[:5]}
+
+    result, source = await cache.get_or_fetch(key, fetch, should_cache=lambda value: value["company"] is not None)
+    company = result["company"]
+    if company:
+        logger.info(f"Resolved '{name}' to company {company['id']} ({company['name']}) via {source}")
+    return company, result["candidates"]
+
+
+def company_not_found(name: str, candidates: List[Dict], format: str, city: str = "") -> ToolResult:
+    """tool_error for a name resolve_company could not pin down, listing the closest companies."""
+    where = f" in {city}" if city else ""
+    if not candidates:
+        message = (f"No company found matching '{name}'{where}. "
+                   "Please check the name or add the company to the database.")
+    else:
+        suggestions = "; ".join(f"{c['name']} ({c['city'] or 'no city'})" for c in candidates)
+        message = f"'{name}'{where} does not match one company. Did you mean: {suggestions}?"
+    return tool_output({"error": message, "candidates": candidates}, format, str)
 
-    params = {
-        "type": "domain_organic",
-        "key": SEMRUSH_API_KEY,
-        "export_columns": "Ph,Po,Nq,Cp,Co,Tr",
-        "domain": domain,
-        "database": database,
-        "display_limit": limit,
-        "display_sort": "tr_desc"  # Sort by traffic
-    }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(SEMRUSH_API_BASE, params=params, timeout=30.0)
-            data = response.text
-        except Exception as e:
-            return f"Error fetching keyword opportunities: {e}"
+# ============================================================================
+# HTML Analysis
+# ============================================================================
 
-    results = parse_semrush_csv(data)
+# Pages are parsed in-process; Firecrawl is only used for JS-rendered pages
+HTML_MAX_BYTES = int(os.getenv("HTML_MAX_BYTES", str(5 * 1024 * 1024)))
+HTML_USER_AGENT = os.getenv("HTML_USER_AGENT", "Mozilla/5.0 (compatible; SEO-Toolkit/1.0)")
+# Fewer visible words than this on a page that ships scripts means it renders client-side
+HTML_JS_MIN_WORDS = int(os.getenv("HTML_JS_MIN_WORDS", "50"))
 
-    if not results:
-        return f"No keyword data found for {domain}"
+_HTML_SKIP_TEXT = {"script", "style", "noscript", "template", "svg"}
+_SPA_ROOT_IDS = {"root", "app", "__next", "__nuxt", "___gatsby", "svelte"}
 
-    response = f"""
-Keyword Opportunities for {domain} ({database.upper()})
-{'=' * 60}
 
-Top {len(results)} Keywords by Traffic:
+class PageSignalParser(HTMLParser):
+    """
+    Streaming extractor for the on-page SEO signals of one HTML document.
 
-"""
+    Feed decoded chunks as they arrive; nothing is buffered beyond the text
+    of the element currently open (title, h1, a).
+    """
 
-    for i, row in enumerate(results, 1):
-        response += f"{i}. {row.get('Ph', 'N/A')}\n"
-        response += f"   Position: #{row.get('Po', 'N/A')} | "
-        response += f"Volume: {row.get('Nq', 'N/A')} | "
-        response += f"Traffic: {row.get('Tr', 'N/A')}%\n"
-        response += f"   CPC: ${row.get('Cp', 'N/A')} | "
-        response += f"Competition: {row.get('Co', 'N/A')}\n\n"
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ""
+        self.meta: Dict[str, str] = {}
+        self.canonical = ""
+        self.lang = ""
+        self.h1: List[str] = []
+        self.headings = Counter()
+        self.links: List[Dict[str, str]] = []
+        self.images = 0
+        self.images_missing_alt = 0
+        self.scripts = 0
+        self.word_count = 0
+        self.noscript_text = ""
+        self.spa_root = False
+        self._skip_depth = 0
+        self._in_title = False
+        self._capture: List[Tuple[str, List[str], Optional[Dict[str, str]]]] = []
+
+    def handle_starttag(self, tag: str, attrs):
+        attrs = {name: (value or "") for name, value in attrs}
+        if tag in _HTML_SKIP_TEXT:
+            if tag == "script":
+                self.scripts += 1
+            self._skip_depth += 1
+            if tag == "noscript":
+                self._capture.append((tag, [], None))
+            return
+
+        if tag == "html":
+            self.lang = attrs.get("lang", "")
+        elif tag == "base" and attrs.get("href"):
+            self.base_url = urljoin(self.base_url, attrs["href"])
+        elif tag == "title" and not self._skip_depth and not self.title:
+            self._in_title = True
+        elif tag == "meta":
+            key = (attrs.get("name") or attrs.get("property") or "").lower()
+            if key and key not in self.meta:
+                self.meta[key] = attrs.get("content", "").strip()
+        elif tag == "link":
+            if "canonical" in attrs.get("rel", "").lower().split() and not self.canonical:
+                self.canonical = urljoin(self.base_url, attrs.get("href", ""))
+        elif tag == "img":
+            self.images += 1
+            if not attrs.get("alt", "").strip():
+                self.images_missing_alt += 1
+        elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.headings[tag] += 1
+            if tag == "h1":
+                self._capture.append((tag, [], None))
+        elif tag == "a" and "href" in attrs:
+            # Anchors cannot nest; an unclosed one ends where the next begins
+            self._close("a")
+            link = {"href": urljoin(self.base_url, attrs["href"].strip()), "rel": attrs.get("rel", "").lower(), "text": ""}
+            self.links.append(link)
+            self._capture.append((tag, [], link))
+        elif tag == "div" and attrs.get("id", "").lower() in _SPA_ROOT_IDS:
+            self.spa_root = True
+
+    def _close(self, tag: str):
+        """Finish the innermost open capture for ``tag`` and any left open inside it."""
+        for index in range(len(self._capture) - 1, -1, -1):
+            if self._capture[index][0] == tag:
+                break
+        else:
+            return
+        while len(self._capture) > index:
+            name, parts, link = self._capture.pop()
+            text = " ".join("".join(parts).split())
+            if name == "h1":
+                self.h1.append(text)
+            elif name == "a":
+                link["text"] = text[:200]
+            elif name == "noscript":
+                self.noscript_text += text
+
+    def handle_endtag(self, tag: str):
+        if tag in _HTML_SKIP_TEXT:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        if tag == "title":
+            self._in_title = False
+        self._close(tag)
+
+    def handle_data(self, data: str):
+        if self._in_title:
+            self.title += data
+            return
+        for name, parts, _ in self._capture:
+            if not self._skip_depth or name == "noscript":
+                parts.append(data)
+        if not self._skip_depth:
+            self.word_count += len(data.split())
+
+    def close(self):
+        super().close()
+        while self._capture:
+            self._close(self._capture[-1][0])
+
+    def signals(self) -> Dict[str, Any]:
+        """Collected signals, in the shape analyze_technical_seo consumes."""
+        return {
+            "title": " ".join(self.title.split()),
+            "description": self.meta.get("description", ""),
+            "og_title": self.meta.get("og:title", ""),
+            "og_description": self.meta.get("og:description", ""),
+            "og_image": self.meta.get("og:image", ""),
+            "robots": self.meta.get("robots", ""),
+            "canonical": self.canonical,
+            "lang": self.lang,
+            "h1": self.h1,
+            "h1_count": len(self.h1),
+            "headings": dict(self.headings),
+            "word_count": self.word_count,
+            "links": self.links,
+            "images": self.images,
+            "images_missing_alt": self.images_missing_alt,
+            "scripts": self.scripts,
+            "spa_root": self.spa_root,
+            "noscript_text": self.noscript_text[:200],
+        }
+
+
+def parse_html_signals(html: str, base_url: str) -> Dict[str, Any]:
+    """Parse a complete HTML document into page signals."""
+    parser = PageSignalParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.signals()
+
+
+def needs_js_rendering(signals: Dict[str, Any]) -> bool:
+    """Heuristic: does the raw HTML look like a client-rendered shell?"""
+    if signals["word_count"] >= HTML_JS_MIN_WORDS:
+        return False
+    return bool(signals["scripts"]) and (
+        signals["spa_root"]
+        or "javascript" in signals["noscript_text"].lower()
+        or not signals["h1_count"]
+    )
+
+
+async def fetch_page_signals(url: str) -> Dict[str, Any]:
+    """
+    Fetch a page with the shared HTTP client and parse it while streaming.
+
+    Raises httpx.HTTPError on network failures and ValueError for non-HTML
+    responses. Bodies beyond HTML_MAX_BYTES characters are not parsed.
+    """
+    started = time.perf_counter()
+    client = get_http_client_for_url(url)
+    async with client.stream("GET", url, headers={"User-Agent": HTML_USER_AGENT,
+                                                  "Accept": "text/html,application/xhtml+xml"}) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if content_type and "html" not in content_type.lower():
+            raise ValueError(f"not an HTML page ({content_type.split(';')[0]})")
+
+        parser = PageSignalParser(str(response.url))
+        received = 0
+        async for chunk in response.aiter_text():
+            parser.feed(chunk)
+            received += len(chunk)
+            if received >= HTML_MAX_BYTES:
+                break
+        parser.close()
+
+    signals = parser.signals()
+    signals.update({
+        "source": "local",
+        "final_url": str(response.url),
+        "status_code": response.status_code,
+        "bytes": received,
+        "truncated": received >= HTML_MAX_BYTES,
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    })
+    return signals
+
+
+async def fetch_page_signals_firecrawl(url: str) -> Dict[str, Any]:
+    """Scrape a page through Firecrawl (renders JavaScript) into page signals."""
+    started = time.perf_counter()
+    response = await get_http_client("firecrawl").post(
+        "https://api.firecrawl.dev/v1/scrape",
+        headers={
+            "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "url": url,
+            "formats": ["markdown", "html", "links"],
+            "onlyMainContent": False
+        }
+    )
+    data = response.json()
+    if not data.get("success"):
+        raise ValueError(f"Firecrawl could not scrape {url}")
+
+    payload = data.get("data", data)
+    html = payload.get("html") or ""
+    if html:
+        signals = parse_html_signals(html, url)
+    else:
+        markdown = payload.get("markdown", "")
+        signals = {
+            "h1": [], "h1_count": markdown.count("\n# "), "word_count": len(markdown.split()),
+            "links": [{"href": link, "rel": "", "text": ""} for link in payload.get("links", [])],
+        }
+
+    metadata = payload.get("metadata", {})
+    for key, field in (("title", "title"), ("description", "description"), ("og_title", "ogTitle"),
+                       ("og_description", "ogDescription"), ("og_image", "ogImage")):
+        if metadata.get(field) and not signals.get(key):
+            signals[key] = metadata[field]
+    for key in ("title", "description", "og_title", "og_description", "og_image"):
+        signals.setdefault(key, "")
+
+    signals.update({
+        "source": "firecrawl",
+        "final_url": metadata.get("sourceURL", url),
+        "status_code": metadata.get("statusCode"),
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    })
+    return signals
+
+
+async def get_page_signals(url: str) -> Dict[str, Any]:
+    """
+    Page signals from the local parser, falling back to Firecrawl when the
+    page cannot be fetched directly or only renders with JavaScript.
+    """
+    local_error = None
+    try:
+        signals = await fetch_page_signals(url)
+        if not needs_js_rendering(signals):
+            return signals
+        local_error = "page appears to render client-side"
+    except (httpx.HTTPError, ValueError) as e:
+        signals = None
+        local_error = str(e) or e.__class__.__name__
+
+    if not FIRECRAWL_API_KEY:
+        if signals is not None:
+            signals["warning"] = f"{local_error}; set FIRECRAWL_API_KEY to analyze the rendered page"
+            return signals
+        raise ValueError(local_error)
+
+    logger.info(f"Falling back to Firecrawl for {url}: {local_error}")
+    signals = await fetch_page_signals_firecrawl(url)
+    signals["fallback_reason"] = local_error
+    return signals
 
-    return response
+
+# One robots.txt per host (cached per its HTTP cache headers) for every page fetch
+robots_cache = RobotsCache(lambda: get_http_client("default"), HTML_USER_AGENT)
 
 
 # ============================================================================
-# MCP Tools - Competitor Analysis
+# Link Analysis
 # ============================================================================
 
-@mcp.tool()
-async def analyze_competitors(domain: str, database: str = "us", limit: int = 10) -> str:
+# Optional path to Mozilla's public_suffix_list.dat; without it a built-in
+# list of common multi-label suffixes is used on top of the single-label TLD rule
+PUBLIC_SUFFIX_LIST_PATH = os.getenv("PUBLIC_SUFFIX_LIST_PATH", "")
+
+_BUILTIN_PUBLIC_SUFFIXES = """
+ac.uk co.uk gov.uk ltd.uk me.uk net.uk nhs.uk org.uk plc.uk sch.uk
+asn.au com.au edu.au gov.au id.au net.au org.au
+ac.nz co.nz geek.nz govt.nz net.nz org.nz school.nz
+ac.jp co.jp go.jp ne.jp or.jp
+ac.za co.za gov.za org.za
+com.br gov.br net.br org.br
+com.cn gov.cn net.cn org.cn
+com.mx gob.mx org.mx
+co.in firm.in gov.in net.in org.in
+com.sg edu.sg gov.sg
+com.hk org.hk
+co.kr or.kr
+com.tw org.tw
+com.ar com.co com.eg com.my com.ng com.pe com.ph com.pk com.sa com.tr com.vn
+co.id co.il co.th
+appspot.com azurewebsites.net blogspot.com cloudfront.net firebaseapp.com github.io
+gitlab.io herokuapp.com myshopify.com netlify.app pages.dev vercel.app web.app wordpress.com
+""".split()
+
+_NOFOLLOW_RELS = {"nofollow", "ugc", "sponsored"}
+_GENERIC_ANCHORS = {"click here", "here", "read more", "learn more", "more", "this", "link",
+                    "this page", "continue", "details", "more info", "go"}
+
+
+class PublicSuffixIndex:
     """
-    Identify and analyze top organic competitors for a domain.
+    Registrable-domain lookup over public suffix rules.
 
-    Args:
-        domain: Domain to analyze
-        database: Country database code (default: "us")
-        limit: Number of competitors to return (default: 10)
+    Rules are parsed once into three sets (plain, wildcard, exception);
+    a lookup walks the host's labels from the longest candidate suffix down,
+    and results are memoized per host.
+    """
 
-    Returns:
-        List of competitors with competitive metrics
+    def __init__(self, rules: List[str]):
+        self.rules = set()
+        self.wildcards = set()
+        self.exceptions = set()
+        for rule in rules:
+            rule = rule.strip().lower()
+            if not rule or rule.startswith("//"):
+                continue
+            rule = rule.split()[0]
+            if rule.startswith("!"):
+                self.exceptions.add(rule[1:])
+            elif rule.startswith("*."):
+                self.wildcards.add(rule[2:])
+            else:
+                self.rules.add(rule)
+        self._cache: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str = "") -> "PublicSuffixIndex":
+        """Build from a public_suffix_list.dat file, or the built-in list."""
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    return cls(f.read().splitlines())
+            except OSError as e:
+                logger.warning(f"Could not read public suffix list {path}: {e}; using built-in list")
+        return cls(_BUILTIN_PUBLIC_SUFFIXES)
+
+    def registrable_domain(self, host: str) -> str:
+        """eTLD+1 of ``host`` (e.g. "blog.example.co.uk" -> "example.co.uk")."""
+        cached = self._cache.get(host)
+        if cached is not None:
+            return cached
+
+        labels = host.rstrip(".").split(".")
+        result = host
+        if len(labels) > 1 and not labels[-1].isdigit():
+            suffix_labels = 1  # implicit "*" rule: the TLD itself
+            for i in range(len(labels) - 1, 0, -1):
+                candidate = ".".join(labels[i:])
+                parent = ".".join(labels[i + 1:])
+                if candidate in self.exceptions:
+                    suffix_labels = len(labels) - i - 1
+                    break
+                if candidate in self.rules or parent in self.wildcards:
+                    suffix_labels = len(labels) - i
+            if suffix_labels < len(labels):
+                result = ".".join(labels[-(suffix_labels + 1):])
+
+        if len(self._cache) < 65536:
+            self._cache[host] = result
+        return result
+
+
+_public_suffixes: Optional[PublicSuffixIndex] = None
+
+
+def get_public_suffixes() -> PublicSuffixIndex:
+    """Get (or lazily build) the process-wide public suffix index."""
+    global _public_suffixes
+    if _public_suffixes is None:
+        _public_suffixes = PublicSuffixIndex.load(PUBLIC_SUFFIX_LIST_PATH)
+    return _public_suffixes
+
+
+def analyze_links(links: List[Dict[str, str]], page_url: str) -> Dict[str, Any]:
     """
-    if not SEMRUSH_API_KEY:
-        return "Error: SEMRUSH_API_KEY not configured in environment variables"
+    Classify a page's links in one pass.
 
-    logger.info(f"Analyzing competitors for {domain}")
+    Each href is split once (urlsplit, i.e. urlparse without ;params); a
+    link is internal when its host shares the page's registrable domain, so
+    subdomains count as internal and a host name appearing in a query string
+    does not. Non-HTTP links (mailto:, tel:, javascript:) are counted apart.
+    """
+    suffixes = get_public_suffixes()
+    page_host = (urlparse(page_url).hostname or "").lower()
+    page_site = suffixes.registrable_domain(page_host) if page_host else ""
+
+    counts = Counter()
+    anchors = Counter()
+    external_domains = Counter()
+    internal_urls = set()
+    external_urls = set()
+
+    for link in links:
+        parsed = urlsplit(link.get("href", ""))
+        rel = link.get("rel", "")
+        nofollow = bool(rel) and not _NOFOLLOW_RELS.isdisjoint(rel.split())
+        text = link.get("text", "")
+
+        if parsed.scheme not in ("http", "https"):
+            counts["other"] += 1
+            continue
+
+        host = (parsed.hostname or "").lower()
+        if host == page_host:
+            kind = "internal"
+        elif host and suffixes.registrable_domain(host) == page_site:
+            kind = "internal"
+            counts["subdomain"] += 1
+        else:
+            kind = "external"
+            external_domains[suffixes.registrable_domain(host) if host else ""] += 1
+
+        counts[kind] += 1
+        if nofollow:
+            counts[f"{kind}_nofollow"] += 1
+        # Fragment, port and host case do not make a different target
+        (internal_urls if kind == "internal" else external_urls).add((host, parsed.path or "/", parsed.query))
+
+        anchor = text.lower()
+        if not anchor:
+            counts["empty_anchor"] += 1
+        elif anchor in _GENERIC_ANCHORS:
+            counts["generic_anchor"] += 1
+        if anchor:
+            anchors[anchor] += 1
+
+    return {
+        "total": len(links),
+        "internal": counts["internal"],
+        "internal_unique": len(internal_urls),
+        "internal_nofollow": counts["internal_nofollow"],
+        "subdomain": counts["subdomain"],
+        "external": counts["external"],
+        "external_unique": len(external_urls),
+        "external_nofollow": counts["external_nofollow"],
+        "external_domains": external_domains.most_common(10),
+        "external_domain_count": len(external_domains),
+        "other": counts["other"],
+        "empty_anchor": counts["empty_anchor"],
+        "generic_anchor": counts["generic_anchor"],
+        "top_anchors": anchors.most_common(10),
+    }
 
-    params = {
-        "type": "domain_organic_organic",
-        "key": SEMRUSH_API_KEY,
-        "export_columns": "Dn,Cr,Np,Or,Ot,Oc,Ad",
-        "domain": domain,
-        "database": database,
-        "display_limit": limit
+
+# ============================================================================
+# MCP Tools - Technical SEO Audit
+# ============================================================================
+
+LIGHTHOUSE_CATEGORIES = ["performance", "accessibility", "best-practices", "seo"]
+LIGHTHOUSE_METRICS = {
+    "first-contentful-paint": "First Contentful Paint",
+    "largest-contentful-paint": "Largest Contentful Paint",
+    "total-blocking-time": "Total Blocking Time",
+    "cumulative-layout-shift": "Cumulative Layout Shift",
+    "speed-index": "Speed Index",
+}
+
+
+async def fetch_lighthouse_result(url: str, strategy: str = "mobile",
+                                  force_refresh: bool = False) -> Optional[Dict]:
+    """
+    Fetch a PSI lighthouseResult, served from the PSI cache when possible.
+
+    Results are keyed by (normalized URL, strategy, categories), so the same
+    page audited by different agent steps only costs one PSI run per TTL.
+    Every real PSI run is also stored in the Lighthouse history.
+    """
+    strategy = strategy.lower()
+    cache = get_cache("pagespeed", PSI_CACHE_TTL, PSI_CACHE_MEMORY_ENTRIES)
+    key = cache.make_key(normalize_url(url), strategy, sorted(LIGHTHOUSE_CATEGORIES))
+
+    async def fetch():
+        params = {
+            "url": url,
+            "key": GOOGLE_API_KEY,
+            "strategy": strategy,
+            "category": LIGHTHOUSE_CATEGORIES
+        }
+        await psi_rate_limiter.acquire()
+        data = await make_api_request(GOOGLE_PSI_API_BASE, params=params)
+        if not data or "lighthouseResult" not in data:
+            return None
+        await store_lighthouse_run(url, strategy, data["lighthouseResult"])
+        return data["lighthouseResult"]
+
+    result, source = await cache.get_or_fetch(key, fetch, force_refresh=force_refresh)
+    logger.info(f"PSI {'cache miss' if source == 'fetched' else source + ' hit'} for {url} ({strategy}) - {cache.stats()}")
+    return result
+
+
+def extract_lighthouse_scores(result: Dict) -> Dict[str, int]:
+    """Extract 0-100 category scores from a lighthouseResult."""
+    categories = result.get("categories", {})
+    return {
+        "performance": round((categories.get("performance", {}).get("score") or 0) * 100),
+        "accessibility": round((categories.get("accessibility", {}).get("score") or 0) * 100),
+        "best_practices": round((categories.get("best-practices", {}).get("score") or 0) * 100),
+        "seo": round((categories.get("seo", {}).get("score") or 0) * 100)
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(SEMRUSH_API_BASE, params=params, timeout=30.0)
-            data = response.text
-        except Exception as e:
-            return f"Error fetching competitor data: {e}"
 
-    results = parse_semrush_csv(data)
+def build_lighthouse_report(url: str, strategy: str, result: Dict) -> Dict[str, Any]:
+    """Build the run_lighthouse_audit result dict (scores, key metrics, opportunities) from a lighthouseResult."""
+    audits = result.get("audits", {})
+
+    # Extract key metrics
+    metrics = {}
+    for audit_id, label in LIGHTHOUSE_METRICS.items():
+        audit = audits.get(audit_id, {})
+        metrics[audit_id.replace("-", "_")] = {
+            "label": label,
+            "display": audit.get("displayValue", "N/A"),
+            "value": audit.get("numericValue"),
+        }
+
+    # Find opportunities for improvement
+    opportunities = []
+    for audit_id, audit in audits.items():
+        if audit.get("score") is not None and audit.get("score") < 0.9:
+            opportunities.append({
+                "id": audit_id,
+                "title": audit.get("title", ""),
+                "description": audit.get("description", ""),
+                "score": audit.get("score", 0)
+            })
+
+    return {
+        "url": url,
+        "strategy": strategy,
+        "scores": extract_lighthouse_scores(result),
+        "metrics": metrics,
+        "opportunities": opportunities,
+    }
 
-    if not results:
-        return f"No competitor data found for {domain}"
 
+def _render_lighthouse_audit(data: Dict[str, Any]) -> str:
+    scores, metrics = data["scores"], data["metrics"]
+    shown = data["opportunities"][:5]
+    audited = f"AUDITED: {data['audited_at']} (stored run {data['audit_id']})\n\n" if data.get("audited_at") else ""
     response = f"""
-Competitor Analysis for {domain} ({database.upper()})
+Lighthouse Audit Results for {data['url']} ({data['strategy']})
 {'=' * 60}
 
-Top {len(results)} Organic Competitors:
+{audited}SCORES:
+- Performance: {scores['performance']}/100
+- Accessibility: {scores['accessibility']}/100
+- Best Practices: {scores['best_practices']}/100
+- SEO: {scores['seo']}/100
 
+KEY METRICS:
 """
+    response += "\n".join(f"- {metric['label']}: {metric['display']}" for metric in metrics.values())
+    response += f"\n\nTOP OPPORTUNITIES ({len(shown)} shown):\n"
 
-    for i, row in enumerate(results, 1):
-        response += f"{i}. {row.get('Dn', 'N/A')}\n"
-        response += f"   Competition Level: {row.get('Cr', 'N/A')}\n"
-        response += f"   Common Keywords: {row.get('Np', 'N/A')}\n"
-        response += f"   Organic Keywords: {row.get('Or', 'N/A')}\n"
-        response += f"   Organic Traffic: {row.get('Ot', 'N/A')}\n"
-        response += f"   Organic Cost: ${row.get('Oc', 'N/A')}\n"
-        response += f"   AdWords Keywords: {row.get('Ad', 'N/A')}\n\n"
+    for i, opp in enumerate(shown, 1):
+        response += f"\n{i}. {opp['title']} (Score: {round(opp['score'] * 100)}%)"
+        response += f"\n   {opp['description']}\n"
 
     return response
 
 
 @mcp.tool()
-async def get_backlink_profile(domain: str, limit: int = 50) -> str:
+async def run_lighthouse_audit(url: str, strategy: str = "mobile", force_refresh: bool = False,
+                               format: str = "text") -> ToolResult:
     """
-    Analyze backlink profile for a domain.
+    Run a comprehensive Lighthouse audit using Google PageSpeed Insights API.
 
     Args:
-        domain: Domain to analyze
-        limit: Number of backlinks to retrieve (default: 50)
+        url: Website URL to audit
+        strategy: "mobile" or "desktop" (default: "mobile")
+        force_refresh: Bypass the PSI result cache and run a fresh audit (default: False)
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
     Returns:
-        Backlink analysis with top referring domains and anchor text
+        Detailed audit results with scores and recommendations
     """
-    if not SEMRUSH_API_KEY:
-        return "Error: SEMRUSH_API_KEY not configured in environment variables"
-
-    logger.info(f"Analyzing backlinks for {domain}")
+    if not GOOGLE_API_KEY:
+        return tool_error("GOOGLE_API_KEY not configured in environment variables", format)
 
-    params = {
-        "type": "backlinks",
-        "key": SEMRUSH_API_KEY,
-        "target": domain,
-        "target_type": "root_domain",
-        "export_columns": "source_url,source_title,target_url,anchor,response_code",
-        "display_limit": limit
-    }
+    logger.info(f"Running Lighthouse audit for {url} ({strategy})")
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(SEMRUSH_API_BASE, params=params, timeout=30.0)
-            data = response.text
-        except Exception as e:
-            return f"Error fetching backlink data: {e}"
+    result = await fetch_lighthouse_result(url, strategy, force_refresh=force_refresh)
 
-    results = parse_semrush_csv(data)
+    if not result:
+        return tool_error("Failed to retrieve Lighthouse audit data", format)
 
-    if not results:
-        return f"No backlink data found for {domain}"
+    data = build_lighthouse_report(url, strategy, result)
+    return tool_output(data, format, _render_lighthouse_audit)
 
-    # Count anchor text distribution
-    anchor_counts = {}
-    for row in results:
-        anchor = row.get('anchor', 'N/A')
-        anchor_counts[anchor] = anchor_counts.get(anchor, 0) + 1
 
+def _render_lighthouse_batch(data: Dict[str, Any]) -> str:
     response = f"""
-Backlink Profile for {domain}
+Lighthouse Batch Audit Results
 {'=' * 60}
 
-Total Backlinks Analyzed: {len(results)}
+Audits Completed: {len(data['results'])}/{data['total']}
+Failures: {len(data['failures'])}
 
-TOP ANCHOR TEXT DISTRIBUTION:
+SCORES (Performance / Accessibility / Best Practices / SEO):
 """
 
-    sorted_anchors = sorted(anchor_counts.items(), key=lambda x: x[1], reverse=True)
-    for anchor, count in sorted_anchors[:10]:
-        response += f"\n- {anchor}: {count} backlinks"
-
-    response += f"\n\nTOP {min(15, len(results))} BACKLINKS:\n\n"
+    for row in data["results"]:
+        scores = row["scores"]
+        response += (f"\n- {row['url']} ({row['strategy']}): {scores['performance']} / {scores['accessibility']} / "
+                     f"{scores['best_practices']} / {scores['seo']}")
 
-    for i, row in enumerate(results[:15], 1):
-        response += f"{i}. {row.get('source_url', 'N/A')}\n"
-        response += f"   Title: {row.get('source_title', 'N/A')}\n"
-        response += f"   Anchor: {row.get('anchor', 'N/A')}\n"
-        response += f"   Status: {row.get('response_code', 'N/A')}\n\n"
+    if data["failures"]:
+        response += "\n\nFAILURES:\n"
+        for row in data["failures"]:
+            response += f"\n- {row['url']} ({row['strategy']}): {row['error']}"
 
     return response
 
 
-# ============================================================================
-# MCP Tools - Local SEO
-# ============================================================================
-
 @mcp.tool()
-async def analyze_local_seo(business_name: str, location: str) -> str:
+async def run_lighthouse_audit_batch(
+    urls: List[str],
+    strategies: Optional[List[str]] = None,
+    concurrency: int = PSI_BATCH_CONCURRENCY,
+    force_refresh: bool = False,
+    format: str = "text",
+    ctx: Context = None
+) -> ToolResult:
     """
-    Analyze local SEO factors for a business.
+    Run Lighthouse audits for many URLs and strategies concurrently.
+
+    Audits run under a concurrency limit and the shared PSI rate limiter.
+    Each result is streamed to the client as a log message as soon as it
+    completes; failures are reported per URL without aborting the batch.
 
     Args:
-        business_name: Name of the business
-        location: City and state (e.g., "San Francisco, CA")
+        urls: Website URLs to audit
+        strategies: Strategies to run for each URL (default: ["mobile"])
+        concurrency: Maximum audits in flight at once (default: PSI_BATCH_CONCURRENCY)
+        force_refresh: Bypass the PSI result cache (default: False)
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
     Returns:
-        Local SEO analysis with recommendations
+        Score table for every URL/strategy plus a list of failures
     """
-    logger.info(f"Analyzing local SEO for {business_name} in {location}")
+    if not GOOGLE_API_KEY:
+        return tool_error("GOOGLE_API_KEY not configured in environment variables", format)
 
-    # Query database for company data
-    query = """
-    SELECT c.*, COUNT(DISTINCT cit.id) as citation_count,
-           COUNT(DISTINCT k.id) as keyword_count,
-           AVG(comp.avg_rating) as avg_competitor_rating
-    FROM companies c
-    LEFT JOIN citations cit ON c.id = cit.company_id
-    LEFT JOIN keywords k ON c.id = k.company_id
-    LEFT JOIN competitors comp ON c.id = comp.company_id
-    WHERE LOWER(c.name) LIKE LOWER($1)
-      AND LOWER(c.city) LIKE LOWER($2)
-    GROUP BY c.id
-    """
+    strategies = strategies or ["mobile"]
+    jobs = [(url, strategy) for url in dict.fromkeys(urls) for strategy in dict.fromkeys(strategies)]
+    if not jobs:
+        return tool_error("No URLs provided", format)
 
-    result = execute_query(query, (f"%{business_name}%", f"%{location.split(',')[0]}%"), fetch_one=True)
+    logger.info(f"Running {len(jobs)} Lighthouse audits (concurrency {concurrency})")
 
-    if not result:
-        return f"No data found for {business_name} in {location}. Please add the business to the database first."
+    semaphore = asyncio.Semaphore(max(1, concurrency))
 
-    # Calculate local SEO score
-    score = 0
-    recommendations = []
+    async def audit(url: str, strategy: str):
+        async with semaphore:
+            try:
+                result = await fetch_lighthouse_result(url, strategy, force_refresh=force_refresh)
+            except Exception as e:
+                return url, strategy, None, str(e)
+        if not result:
+            return url, strategy, None, "Failed to retrieve Lighthouse audit data"
+        return url, strategy, extract_lighthouse_scores(result), None
 
-    # GBP Profile (20 points)
-    if result.get('gbp_url'):
-        score += 20
-    else:
-        recommendations.append("❌ Set up Google Business Profile (High Priority)")
+    completed = []
+    failures = []
 
-    # Citations (25 points)
-    citation_count = result.get('citation_count', 0)
-    if citation_count >= 50:
-        score += 25
-    elif citation_count >= 20:
-        score += 15
-        recommendations.append("⚠️ Build more local citations (Target: 50+)")
-    else:
-        score += 5
-        recommendations.append("❌ Build local citations across directories (High Priority)")
+    for done, next_result in enumerate(asyncio.as_completed([audit(u, s) for u, s in jobs]), 1):
+        url, strategy, scores, error = await next_result
 
-    # Website (20 points)
-    if result.get('website'):
-        score += 20
-    else:
-        recommendations.append("❌ Add website URL")
+        if error:
+            failures.append((url, strategy, error))
+            line = f"✗ {url} ({strategy}): {error}"
+        else:
+            completed.append((url, strategy, scores))
+            line = (f"✓ {url} ({strategy}): perf {scores['performance']}, a11y {scores['accessibility']}, "
+                    f"bp {scores['best_practices']}, seo {scores['seo']}")
+
+        if ctx:
+            await ctx.info(line)
+            await ctx.report_progress(done, len(jobs))
+
+    data = {
+        "total": len(jobs),
+        "results": [{"url": url, "strategy": strategy, "scores": scores}
+                    for url, strategy, scores in sorted(completed)],
+        "failures": [{"url": url, "strategy": strategy, "error": error}
+                     for url, strategy, error in sorted(failures)],
+    }
+    return tool_output(data, format, _render_lighthouse_batch)
 
-    # Keywords (15 points)
-    keyword_count = result.get('keyword_count', 0)
-    if keyword_count >= 10:
-        score += 15
-    elif keyword_count >= 5:
-        score += 10
-        recommendations.append("⚠️ Track more local keywords (Target: 10+)")
-    else:
-        score += 5
-        recommendations.append("⚠️ Add local keyword tracking")
 
-    # Contact Info (20 points)
-    if result.get('phone'):
-        score += 10
+_ISSUE_ICONS = {"high": "❌", "medium": "⚠️", "low": "⚠️"}
+
+
+def _render_technical_seo(data: Dict[str, Any]) -> str:
+    metadata, content, link_stats = data["metadata"], data["content"], data["links"]
+    title, description = metadata["title"], metadata["description"]
+    issues = data["issues"]
+
+    fetch = data["fetch"]
+    if fetch["source"] == "local":
+        source = f"Direct fetch, HTTP {fetch['status_code']} ({fetch['elapsed_ms']} ms, {fetch['bytes']:,} chars)"
     else:
-        recommendations.append("❌ Add phone number")
+        source = f"Firecrawl rendered ({fetch['elapsed_ms']} ms; {fetch.get('fallback_reason') or 'fallback'})"
 
-    if result.get('address'):
-        score += 10
+    robots = data["robots"]
+    if robots["status"] == "unreachable":
+        robots_line = "Unreachable (crawlers treat the site as disallowed)"
+    elif robots["status"] == "missing":
+        robots_line = f"None (HTTP {robots['status_code']}) - all crawling allowed"
     else:
-        recommendations.append("❌ Add complete address")
+        robots_line = (f"{'Allows' if robots['crawlable'] else 'Blocks'} Googlebot"
+                       f"{' (' + robots['rule'] + ')' if robots['rule'] else ''}, {len(robots['sitemaps'])} sitemap(s)")
 
     response = f"""
-Local SEO Analysis: {result.get('name', business_name)}
+Technical SEO Analysis for {data['url']}
 {'=' * 60}
 
-LOCATION: {result.get('city', '')}, {result.get('state', '')}
-INDUSTRY: {result.get('industry', 'N/A')}
+OVERALL SEO SCORE: {data['score']}/100
+SOURCE: {source}
+
+METADATA:
+- Title: {title or 'Missing'} ({len(title)} characters)
+- Description: {description or 'Missing'} ({len(description)} characters)
+- Open Graph: {'Complete' if metadata['open_graph_complete'] else 'Incomplete'}
 
-LOCAL SEO SCORE: {score}/100
+ROBOTS.TXT: {robots_line}
 
-PROFILE COMPLETENESS:
-- Google Business Profile: {'✅ Connected' if result.get('gbp_url') else '❌ Not Set Up'}
-- Website: {'✅ ' + result.get('website', '') if result.get('website') else '❌ Missing'}
-- Phone: {'✅ ' + result.get('phone', '') if result.get('phone') else '❌ Missing'}
-- Address: {'✅ Complete' if result.get('address') else '❌ Incomplete'}
+CONTENT STRUCTURE:
+- H1 Tags: {content['h1_count']}
+- Word Count: {content['word_count']}
+- Internal Links: {link_stats['internal']} ({link_stats['internal_unique']} unique, {link_stats['subdomain']} to subdomains, {link_stats['internal_nofollow']} nofollow)
+- External Links: {link_stats['external']} ({link_stats['external_domain_count']} domains, {link_stats['external_nofollow']} nofollow)
+- Other Links (mailto/tel/js): {link_stats['other']}
+
+ANCHOR TEXT:
+- Empty Anchors: {link_stats['empty_anchor']}
+- Generic Anchors ("click here", "read more"...): {link_stats['generic_anchor']}
+"""
 
-LOCAL VISIBILITY METRICS:
-- Local Citations: {citation_count}
-- Tracked Keywords: {keyword_count}
-- Average Competitor Rating: {result.get('avg_competitor_rating', 'N/A')}
+    if link_stats['top_anchors']:
+        response += "- Most Used: " + ", ".join(f'"{text}" ({count})' for text, count in link_stats['top_anchors'][:5]) + "\n"
+    if link_stats['external_domains']:
+        response += "- Top External Domains: " + ", ".join(
+            f"{domain} ({count})" for domain, count in link_stats['external_domains'][:5]
+        ) + "\n"
 
-RECOMMENDATIONS ({len(recommendations)}):
+    response += f"""
+ISSUES FOUND ({len(issues)}):
 """
 
-    if recommendations:
-        for rec in recommendations:
-            response += f"\n{rec}"
-    else:
-        response += "\n✅ Local SEO profile is well-optimized!"
+    for issue in issues:
+        response += f"\n{_ISSUE_ICONS[issue['impact']]} {issue['message']} ({issue['impact'].title()} Impact)"
+
+    if not issues:
+        response += "\n✅ No major issues found!"
+
+    if fetch.get("warning"):
+        response += f"\n\n⚠️ {fetch['warning']}"
+
+    response += "\n\nRECOMMENDATIONS:\n"
+    response += "".join(f"- {rec}\n" for rec in data["recommendations"])
 
     return response
 
 
 @mcp.tool()
-async def find_citation_sources(industry: str, location: str) -> str:
+async def analyze_technical_seo(url: str, format: str = "text") -> ToolResult:
     """
-    Find recommended citation sources for a specific industry and location.
+    Perform comprehensive technical SEO analysis of a page.
+
+    The page is fetched and parsed in-process; Firecrawl is only used when
+    the page cannot be fetched directly or renders client-side.
 
     Args:
-        industry: Business industry/category
-        location: City and state
+        url: Website URL to analyze
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
     Returns:
-        List of recommended citation sources with priority levels
+        Technical SEO analysis with issues and recommendations
     """
-    logger.info(f"Finding citation sources for {industry} in {location}")
+    logger.info(f"Analyzing technical SEO for {url}")
 
-    # Universal citation sources (all industries)
-    universal_sources = [
-        {"name": "Google Business Profile", "priority": "Critical", "type": "Universal"},
-        {"name": "Bing Places", "priority": "High", "type": "Universal"},
-        {"name": "Apple Maps", "priority": "High", "type": "Universal"},
-        {"name": "Yelp", "priority": "High", "type": "Universal"},
-        {"name": "Facebook", "priority": "High", "type": "Universal"},
-        {"name": "Yellow Pages", "priority": "Medium", "type": "Universal"},
-        {"name": "Better Business Bureau", "priority": "High", "type": "Universal"},
-        {"name": "Chamber of Commerce", "priority": "Medium", "type": "Local"},
-    ]
+    try:
+        page = await get_page_signals(url)
+    except Exception as e:
+        return tool_error(f"Could not fetch URL: {e}", format)
 
-    # Industry-specific sources
-    industry_sources = {
-        "restaurant": [
-            {"name": "OpenTable", "priority": "High"},
-            {"name": "TripAdvisor", "priority": "High"},
-            {"name": "Zomato", "priority": "Medium"},
-            {"name": "Grubhub", "priority": "Medium"},
-        ],
-        "legal": [
-            {"name": "Avvo", "priority": "Critical"},
-            {"name": "Justia", "priority": "High"},
-            {"name": "FindLaw", "priority": "High"},
+    # Analyze metadata
+    issues = []
+    score = 100
+
+    title = page["title"]
+    description = page["description"]
+
+    # Title analysis
+    if not title:
+        issues.append({"impact": "high", "message": "Missing page title"})
+        score -= 15
+    elif len(title) < 30 or len(title) > 60:
+        issues.append({"impact": "medium", "message": f"Title length ({len(title)}) should be 30-60 characters"})
+        score -= 5
+
+    # Meta description analysis
+    if not description:
+        issues.append({"impact": "high", "message": "Missing meta description"})
+        score -= 15
+    elif len(description) < 120 or len(description) > 160:
+        issues.append({"impact": "medium",
+                       "message": f"Description length ({len(description)}) should be 120-160 characters"})
+        score -= 5
+
+    # Check for Open Graph tags
+    og_complete = bool(page["og_title"] and page["og_description"] and page["og_image"])
+
+    if not og_complete:
+        issues.append({"impact": "low", "message": "Incomplete Open Graph tags for social sharing"})
+        score -= 3
+
+    # Analyze content structure
+    h1_count = page["h1_count"]
+
+    if h1_count == 0:
+        issues.append({"impact": "high", "message": "No H1 tag found"})
+        score -= 15
+    elif h1_count > 1:
+        issues.append({"impact": "medium", "message": f"Multiple H1 tags ({h1_count}) - recommend 1"})
+        score -= 5
+
+    word_count = page["word_count"]
+
+    # robots.txt (fetched once per host and cached)
+    page_url = page.get("final_url") or url
+    robots = await robots_cache.get(page_url)
+    crawlable, robots_rule = robots.check(page_url, "Googlebot")
+    if robots.status == "unreachable":
+        issues.append({"impact": "high", "message": f"robots.txt unreachable ({robots.error}) - crawlers will back off"})
+        score -= 15
+    elif not crawlable:
+        issues.append({"impact": "high", "message": f"robots.txt blocks Googlebot from this page ({robots_rule})"})
+        score -= 15
+
+    # Link analysis
+    link_stats = analyze_links(page["links"], page_url)
+
+    recommendations = []
+    if score < 80:
+        recommendations.append("Fix high-impact issues first (marked with ❌)")
+        recommendations.append("Address medium-impact issues (marked with ⚠️)")
+    if word_count < 500:
+        recommendations.append("Consider adding more content (aim for 1000+ words)")
+    if link_stats['internal_unique'] < 3:
+        recommendations.append("Add more internal links to improve site structure")
+    if link_stats['empty_anchor'] or link_stats['generic_anchor']:
+        recommendations.append("Replace empty and generic anchor text with descriptive phrases")
+
+    data = {
+        "url": url,
+        "score": max(0, score),
+        "fetch": {key: page.get(key) for key in
+                  ("source", "final_url", "status_code", "elapsed_ms", "bytes", "fallback_reason", "warning")},
+        "metadata": {
+            "title": title,
+            "description": description,
+            "og_title": page["og_title"],
+            "og_description": page["og_description"],
+            "og_image": page["og_image"],
+            "open_graph_complete": og_complete,
+        },
+        "content": {"h1_count": h1_count, "word_count": word_count},
+        "robots": {"status": robots.status, "status_code": robots.status_code, "crawlable": crawlable,
+                   "rule": robots_rule, "sitemaps": robots.sitemaps},
+        "links": link_stats,
+        "issues": issues,
+        "recommendations": recommendations,
+    }
+    return tool_output(data, format, _render_technical_seo)
+
+
+# ============================================================================
+# MCP Tools - Keyword Research
+# ============================================================================
+
+# Keyword opportunity ratings: rating -> (icon, recommendation)
+_KEYWORD_RATINGS = {
+    "excellent": ("⭐", "Excellent opportunity - High volume with low competition"),
+    "good": ("✅", "Good target - Decent volume with manageable competition"),
+    "low_volume": ("⚠️", "Low search volume - Consider for long-tail strategy only"),
+    "high_competition": ("⚠️", "High competition - May require significant resources"),
+    "average": ("📊", "Average opportunity - Monitor and consider for content strategy"),
+    "insufficient_data": ("", "Insufficient data for recommendation"),
+}
+
+
+def _keyword_rating(data: Dict) -> str:
+    """Rate a keyword opportunity from its SEMrush metrics (a ``_KEYWORD_RATINGS`` key)."""
+    try:
+        volume = int(data.get('Nq', '0'))
+        competition = float(data.get('Co', '0'))
+    except (ValueError, TypeError):
+        return "insufficient_data"
+
+    if volume > 10000 and competition < 0.5:
+        return "excellent"
+    elif volume > 1000 and competition < 0.7:
+        return "good"
+    elif volume < 100:
+        return "low_volume"
+    elif competition > 0.8:
+        return "high_competition"
+    else:
+        return "average"
+
+
+def _render_keyword_data(data: Dict[str, Any]) -> str:
+    metrics = data["metrics"]
+    if metrics is None:
+        return f"No data found for keyword '{data['keyword']}' in {data['database']} database"
+
+    def show(field):
+        value = metrics.get(field)
+        return "N/A" if value is None else value
+
+    icon, message = _KEYWORD_RATINGS[data["rating"]]
+    return f"""
+Keyword Analysis: "{data['keyword']}" ({data['database'].upper()})
+{'=' * 60}
+
+METRICS:
+- Search Volume: {show('search_volume')} searches/month
+- Cost Per Click (CPC): ${show('cpc')}
+- Competition: {show('competition')}
+- Number of Results: {show('results')}
+- Trend: {show('trend')}
+
+RECOMMENDATION:
+{f'{icon} ' if icon else ''}{message}
+"""
+
+
+@mcp.tool()
+async def get_keyword_data(keyword: str, database: str = "us", format: str = "text") -> ToolResult:
+    """
+    Get comprehensive keyword data from SEMrush API.
+
+    Args:
+        keyword: Keyword to analyze
+        database: Country database code (default: "us")
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Keyword metrics including search volume, difficulty, CPC, and trends
+    """
+    if not SEMRUSH_API_KEY:
+        return tool_error("SEMRUSH_API_KEY not configured in environment variables", format)
+
+    logger.info(f"Fetching keyword data for '{keyword}' in {database} database")
+
+    params = {
+        "type": "phrase_this",
+        "key": SEMRUSH_API_KEY,
+        "export_columns": "Ph,Nq,Cp,Co,Nr,Td",
+        "phrase": keyword,
+        "database": database
+    }
+
+    try:
+        table = await fetch_semrush_report(params)
+    except Exception as e:
+        return tool_error(f"Could not fetch keyword data: {e}", format)
+
+    data = {"keyword": keyword, "database": database, "metrics": None, "rating": None}
+    if table:
+        data["metrics"] = table.records(1)[0]
+        data["rating"] = _keyword_rating(table.row(0))
+    return tool_output(data, format, _render_keyword_data)
+
+
+def _render_keyword_opportunities(data: Dict[str, Any]) -> str:
+    if not data["keywords"]:
+        return f"No keyword data found for {data['domain']}"
+
+    response = f"""
+Keyword Opportunities for {data['domain']} ({data['database'].upper()})
+{'=' * 60}
+
+Top {len(data['keywords'])} Keywords by Traffic:
+
+"""
+
+    for i, row in enumerate(data["keywords"], 1):
+        row = {k: "N/A" if v is None else v for k, v in row.items()}
+        response += f"{i}. {row['keyword']}\n"
+        response += f"   Position: #{row['position']} | "
+        response += f"Volume: {row['search_volume']} | "
+        response += f"Traffic: {row['traffic_percent']}%\n"
+        response += f"   CPC: ${row['cpc']} | "
+        response += f"Competition: {row['competition']}\n\n"
+
+    return response
+
+
+@mcp.tool()
+async def find_keyword_opportunities(domain: str, database: str = "us", limit: int = 20,
+                                     format: str = "text") -> ToolResult:
+    """
+    Find keyword opportunities for a domain using SEMrush organic keywords data.
+
+    Args:
+        domain: Domain to analyze
+        database: Country database code (default: "us")
+        limit: Maximum number of keywords to return (default: 20)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        List of keyword opportunities with rankings and metrics
+    """
+    if not SEMRUSH_API_KEY:
+        return tool_error("SEMRUSH_API_KEY not configured in environment variables", format)
+
+    logger.info(f"Finding keyword opportunities for {domain}")
+
+    params = {
+        "type": "domain_organic",
+        "key": SEMRUSH_API_KEY,
+        "export_columns": "Ph,Po,Nq,Cp,Co,Tr",
+        "domain": domain,
+        "database": database,
+        "display_limit": limit,
+        "display_sort": "tr_desc"  # Sort by traffic
+    }
+
+    try:
+        table = await fetch_semrush_report(params)
+    except Exception as e:
+        return tool_error(f"Could not fetch keyword opportunities: {e}", format)
+
+    data = {"domain": domain, "database": database, "keywords": table.records()}
+    return tool_output(data, format, _render_keyword_opportunities)
+
+
+# SEMrush accepts up to 100 phrases per phrase_these request
+SEMRUSH_PHRASES_PER_REQUEST = 100
+
+# SEMrush databases are per country. keywords.location values map to a database with
+# SEMRUSH_LOCATION_DATABASES ("Brisbane=au,Sydney=au,Austin=us", case-insensitive);
+# unlisted locations use SEMRUSH_DEFAULT_DATABASE.
+SEMRUSH_DEFAULT_DATABASE = os.getenv("SEMRUSH_DEFAULT_DATABASE", "us").lower()
+SEMRUSH_LOCATION_DATABASES = {
+    location.strip().lower(): code.strip().lower()
+    for location, _, code in (pair.partition("=") for pair in os.getenv("SEMRUSH_LOCATION_DATABASES", "").split(","))
+    if location.strip() and code.strip()
+}
+
+
+def location_database(location: Optional[str]) -> str:
+    """The SEMrush database code for a tracked keyword's location."""
+    return SEMRUSH_LOCATION_DATABASES.get((location or "").strip().lower(), SEMRUSH_DEFAULT_DATABASE)
+
+
+def _chunked(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def fetch_keyword_metrics_chunk(phrases: List[str], database: str = "us") -> Dict[str, Dict]:
+    """
+    Fetch metrics for up to 100 phrases with one SEMrush phrase_these request.
+
+    Returns a mapping of lowercased phrase to its metrics row. Phrases SEMrush
+    has no data for are simply absent. Raises on transport or API errors.
+    """
+    params = {
+        "type": "phrase_these",
+        "key": SEMRUSH_API_KEY,
+        "export_columns": "Ph,Nq,Cp,Co,Nr,Td,Kd",
+        "phrase": ";".join(phrases),
+        "database": database
+    }
+
+    table = await fetch_semrush_report(params)
+
+    if table.error:
+        if table.error.startswith("ERROR 50"):  # NOTHING FOUND
+            return {}
+        raise RuntimeError(table.error)
+
+    return {row.get("Ph", "").lower(): row for row in table.iter_rows()}
+
+
+def _keyword_difficulty(row: Dict) -> Optional[int]:
+    """Keyword difficulty (0-100), falling back to competition density."""
+    try:
+        return round(float(row["Kd"]))
+    except (KeyError, ValueError, TypeError):
+        pass
+    try:
+        return round(float(row["Co"]) * 100)
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def _search_volume(row: Dict) -> Optional[int]:
+    try:
+        return int(row["Nq"])
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def _render_bulk_keyword_metrics(data: Dict[str, Any]) -> str:
+    response = f"""
+Bulk Keyword Metrics ({data['database'].upper()})
+{'=' * 60}
+
+Keywords Requested: {data['requested']}
+Keywords With Data: {len(data['keywords'])}
+"""
+
+    for row in data["keywords"]:
+        row = {k: "N/A" if v is None else v for k, v in row.items()}
+        response += f"\n{row['index']}. {row['keyword']}\n"
+        response += f"   Volume: {row['search_volume']} | "
+        response += f"Difficulty: {row['difficulty']} | "
+        response += f"CPC: ${row['cpc']} | "
+        response += f"Competition: {row['competition']}\n"
+
+    failed = data["failed"]
+    if failed:
+        response += f"\nFAILED ({len(failed)} keywords): {', '.join(failed[:20])}{' ...' if len(failed) > 20 else ''}\n"
+
+    return response
+
+
+@mcp.tool()
+async def bulk_keyword_metrics(keywords: List[str], database: str = "us", format: str = "text") -> ToolResult:
+    """
+    Get SEMrush metrics for many keywords using multi-phrase requests.
+
+    Keywords are sent 100 at a time (phrase_these) and chunks run concurrently
+    under the SEMrush rate limiter.
+
+    Args:
+        keywords: Keywords to look up
+        database: Country database code (default: "us")
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Search volume, difficulty, CPC and competition for each keyword
+    """
+    if not SEMRUSH_API_KEY:
+        return tool_error("SEMRUSH_API_KEY not configured in environment variables", format)
+
+    phrases = list(dict.fromkeys(k.strip() for k in keywords if k.strip()))
+    if not phrases:
+        return tool_error("No keywords provided", format)
+
+    logger.info(f"Fetching bulk keyword metrics for {len(phrases)} keywords in {database} database")
+
+    semaphore = asyncio.Semaphore(SEMRUSH_BATCH_CONCURRENCY)
+
+    async def run_chunk(chunk: List[str]):
+        async with semaphore:
+            try:
+                return chunk, await fetch_keyword_metrics_chunk(chunk, database), None
+            except Exception as e:
+                return chunk, {}, str(e)
+
+    metrics: Dict[str, Dict] = {}
+    failed: List[str] = []
+    for chunk, rows, error in await asyncio.gather(*[run_chunk(c) for c in _chunked(phrases, SEMRUSH_PHRASES_PER_REQUEST)]):
+        metrics.update(rows)
+        if error:
+            logger.error(f"Bulk keyword chunk failed: {error}")
+            failed.extend(chunk)
+
+    rows = []
+    for i, phrase in enumerate(phrases, 1):
+        row = metrics.get(phrase.lower())
+        if row is None:
+            continue
+        rows.append({
+            "index": i,
+            "keyword": phrase,
+            "search_volume": _search_volume(row),
+            "difficulty": _keyword_difficulty(row),
+            "cpc": row.get("Cp"),
+            "competition": row.get("Co"),
+        })
+
+    data = {"database": database, "requested": len(phrases), "keywords": rows, "failed": failed}
+    return tool_output(data, format, _render_bulk_keyword_metrics)
+
+
+def _render_keyword_refresh(data: Dict[str, Any]) -> str:
+    if not data["processed"]:
+        after = data["resumed_after"]
+        response = f"No keywords left to refresh{' (resumed after ' + repr(after) + ')' if after else ''}"
+        if data["other_databases"]:
+            response += (f"; {data['other_databases']} keyword/location pairs are tracked in locations mapped to "
+                         "other databases (SEMRUSH_LOCATION_DATABASES)")
+        return response
+
+    response = f"""
+Keyword Metrics Refresh ({data['database'].upper()})
+{'=' * 60}
+
+Keywords Processed: {data['processed']}{' (resumed from checkpoint)' if data['resumed_after'] else ''}
+Keyword Rows Updated: {data['updated']}
+Skipped (other databases): {data['other_databases']} keyword/location pairs
+Requests: {data['requests']} ({SEMRUSH_PHRASES_PER_REQUEST} phrases each)
+Failed Chunks: {len(data['failures'])}
+"""
+
+    if data["failures"]:
+        response += "\nFAILURES (run again with resume=True to retry):\n"
+        for failure in data["failures"][:10]:
+            response += f"\n- Chunk starting '{failure['first_keyword']}': {failure['error']}"
+
+    return response
+
+
+@mcp.tool()
+async def refresh_keyword_metrics(database: str = "us", resume: bool = True, format: str = "text",
+                                  ctx: Context = None) -> ToolResult:
+    """
+    Refresh search_volume and difficulty for every keyword tracked in ``database``'s country.
+
+    Batch job for the weekly keyword refresh: reads distinct keywords from the
+    keywords table, fetches them in 100-phrase SEMrush requests (concurrently,
+    rate limited) and writes results back with batched updates. Only rows whose
+    location maps to ``database`` (see SEMRUSH_LOCATION_DATABASES) are read and
+    updated, so one country's metrics never overwrite another's. Progress is
+    checkpointed after each chunk, so an interrupted run resumes where it
+    stopped when called again with resume=True.
+
+    Args:
+        database: Country database code (default: "us")
+        resume: Continue from the last checkpoint if one exists (default: True)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Summary of keywords processed, updated and failed
+    """
+    if not SEMRUSH_API_KEY:
+        return tool_error("SEMRUSH_API_KEY not configured in environment variables", format)
+
+    database = database.lower()
+    job_id = f"refresh_keyword_metrics:{database}"
+    checkpoint = await asyncio.to_thread(load_checkpoint, job_id) if resume else None
+    after = checkpoint["last_keyword"] if checkpoint else ""
+
+    rows = await execute_query_async(
+        "SELECT DISTINCT keyword, location FROM keywords WHERE keyword > $1 ORDER BY keyword",
+        (after,)
+    )
+    if rows is None:
+        return tool_error("could not read keywords from the database", format)
+
+    # keyword -> the locations it is tracked in within this database's country
+    locations: Dict[str, List[str]] = {}
+    other_databases = 0
+    for row in rows:
+        if location_database(row["location"]) == database:
+            locations.setdefault(row["keyword"], []).append(row["location"] or "")
+        else:
+            other_databases += 1
+
+    keywords = list(locations)
+    data = {"database": database, "resumed_after": after, "processed": len(keywords),
+            "other_databases": other_databases, "updated": 0, "requests": 0, "failures": []}
+    if not keywords:
+        await asyncio.to_thread(clear_checkpoint, job_id)
+        return tool_output(data, format, _render_keyword_refresh)
+
+    logger.info(f"Refreshing metrics for {len(keywords)} keywords{' from checkpoint' if after else ''}")
+
+    chunks = _chunked(keywords, SEMRUSH_PHRASES_PER_REQUEST)
+    semaphore = asyncio.Semaphore(SEMRUSH_BATCH_CONCURRENCY)
+    update_query = ("UPDATE keywords SET search_volume = $1, difficulty = $2 "
+                    "WHERE keyword = $3 AND COALESCE(location, '') = $4")
+
+    async def run_chunk(index: int):
+        chunk = chunks[index]
+        async with semaphore:
+            try:
+                metrics = await fetch_keyword_metrics_chunk(chunk, database)
+            except Exception as e:
+                return index, 0, str(e)
+
+        updates = []
+        for keyword in chunk:
+            row = metrics.get(keyword.lower())
+            if row is not None:
+                updates.extend((_search_volume(row), _keyword_difficulty(row), keyword, location)
+                               for location in locations[keyword])
+
+        if not await execute_many_async(update_query, updates):
+            return index, 0, "database update failed"
+        return index, len(updates), None
+
+    # The checkpoint only advances over a contiguous prefix of finished chunks,
+    # so a failed chunk is retried on the next run.
+    done = [False] * len(chunks)
+    next_pending = 0
+    updated = 0
+    errors = []
+
+    for finished, next_result in enumerate(asyncio.as_completed([run_chunk(i) for i in range(len(chunks))]), 1):
+        index, count, error = await next_result
+        updated += count
+
+        if error:
+            errors.append((chunks[index][0], error))
+        else:
+            done[index] = True
+            advanced = False
+            while next_pending < len(chunks) and done[next_pending]:
+                next_pending += 1
+                advanced = True
+            if advanced:
+                await asyncio.to_thread(save_checkpoint, job_id, {"last_keyword": chunks[next_pending - 1][-1]})
+
+        if ctx:
+            await ctx.report_progress(finished, len(chunks))
+
+    if not errors:
+        await asyncio.to_thread(clear_checkpoint, job_id)
+
+    data.update({
+        "updated": updated,
+        "requests": len(chunks),
+        "failures": [{"first_keyword": first_keyword, "error": error} for first_keyword, error in errors],
+    })
+    return tool_output(data, format, _render_keyword_refresh)
+
+
+# ============================================================================
+# MCP Tools - Competitor Analysis
+# ============================================================================
+
+def _render_competitors(data: Dict[str, Any]) -> str:
+    if not data["competitors"]:
+        return f"No competitor data found for {data['domain']}"
+
+    response = f"""
+Competitor Analysis for {data['domain']} ({data['database'].upper()})
+{'=' * 60}
+
+Top {len(data['competitors'])} Organic Competitors:
+
+"""
+
+    for i, row in enumerate(data["competitors"], 1):
+        row = {k: "N/A" if v is None else v for k, v in row.items()}
+        response += f"{i}. {row['domain']}\n"
+        response += f"   Competition Level: {row['competition_level']}\n"
+        response += f"   Common Keywords: {row['common_keywords']}\n"
+        response += f"   Organic Keywords: {row['organic_keywords']}\n"
+        response += f"   Organic Traffic: {row['organic_traffic']}\n"
+        response += f"   Organic Cost: ${row['organic_cost']}\n"
+        response += f"   AdWords Keywords: {row['adwords_keywords']}\n\n"
+
+    return response
+
+
+@mcp.tool()
+async def analyze_competitors(domain: str, database: str = "us", limit: int = 10,
+                              format: str = "text") -> ToolResult:
+    """
+    Identify and analyze top organic competitors for a domain.
+
+    Args:
+        domain: Domain to analyze
+        database: Country database code (default: "us")
+        limit: Number of competitors to return (default: 10)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        List of competitors with competitive metrics
+    """
+    if not SEMRUSH_API_KEY:
+        return tool_error("SEMRUSH_API_KEY not configured in environment variables", format)
+
+    logger.info(f"Analyzing competitors for {domain}")
+
+    params = {
+        "type": "domain_organic_organic",
+        "key": SEMRUSH_API_KEY,
+        "export_columns": "Dn,Cr,Np,Or,Ot,Oc,Ad",
+        "domain": domain,
+        "database": database,
+        "display_limit": limit
+    }
+
+    try:
+        table = await fetch_semrush_report(params)
+    except Exception as e:
+        return tool_error(f"Could not fetch competitor data: {e}", format)
+
+    data = {"domain": domain, "database": database, "competitors": table.records()}
+    return tool_output(data, format, _render_competitors)
+
+
+def _render_backlink_profile(data: Dict[str, Any]) -> str:
+    backlinks = data["backlinks"]
+    if not backlinks:
+        return f"No backlink data found for {data['domain']}"
+
+    response = f"""
+Backlink Profile for {data['domain']}
+{'=' * 60}
+
+Total Backlinks Analyzed: {len(backlinks)}
+
+TOP ANCHOR TEXT DISTRIBUTION:
+"""
+
+    for anchor in data["top_anchors"][:10]:
+        response += f"\n- {anchor['anchor']}: {anchor['count']} backlinks"
+
+    response += f"\n\nTOP {min(15, len(backlinks))} BACKLINKS:\n\n"
+
+    for i, row in enumerate(backlinks[:15], 1):
+        response += f"{i}. {row.get('source_url', 'N/A')}\n"
+        response += f"   Title: {row.get('source_title', 'N/A')}\n"
+        response += f"   Anchor: {row.get('anchor', 'N/A')}\n"
+        response += f"   Status: {row.get('response_code', 'N/A')}\n\n"
+
+    return response
+
+
+@mcp.tool()
+async def get_backlink_profile(domain: str, limit: int = 50, format: str = "text") -> ToolResult:
+    """
+    Analyze backlink profile for a domain.
+
+    Args:
+        domain: Domain to analyze
+        limit: Number of backlinks to retrieve (default: 50)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Backlink analysis with top referring domains and anchor text
+    """
+    if not SEMRUSH_API_KEY:
+        return tool_error("SEMRUSH_API_KEY not configured in environment variables", format)
+
+    logger.info(f"Analyzing backlinks for {domain}")
+
+    params = {
+        "type": "backlinks",
+        "key": SEMRUSH_API_KEY,
+        "target": domain,
+        "target_type": "root_domain",
+        "export_columns": "source_url,source_title,target_url,anchor,response_code",
+        "display_limit": limit
+    }
+
+    try:
+        table = await fetch_semrush_report(params)
+    except Exception as e:
+        return tool_error(f"Could not fetch backlink data: {e}", format)
+
+    # Count anchor text distribution
+    anchor_counts = Counter(table.column('anchor') or ['N/A'] * len(table))
+
+    data = {
+        "domain": domain,
+        "top_anchors": [{"anchor": anchor, "count": count} for anchor, count in anchor_counts.most_common()],
+        "backlinks": table.records(),
+    }
+    return tool_output(data, format, _render_backlink_profile)
+
+
+# ============================================================================
+# MCP Tools - Local SEO
+# ============================================================================
+
+# Independent per-table aggregates: each child table is read once, so the cost
+# is citations + keywords + competitors rather than their product.
+LOCAL_SEO_PROFILE_QUERY = """
+SELECT c.*,
+       (SELECT COUNT(*) FROM citations cit WHERE cit.company_id = c.id) as citation_count,
+       (SELECT COUNT(*) FROM keywords k WHERE k.company_id = c.id) as keyword_count,
+       (SELECT AVG(comp.avg_rating) FROM competitors comp WHERE comp.company_id = c.id) as avg_competitor_rating
+FROM companies c
+WHERE c.id = $1
+"""
+
+LOCAL_SEO_SNAPSHOT_UPSERT = """
+INSERT INTO local_seo_snapshots
+    (company_id, score, citation_count, keyword_count, avg_competitor_rating, recommendations, computed_at)
+VALUES ($1, $2, $3, $4, $5, $6, CURRENT_TIMESTAMP)
+ON CONFLICT (company_id) DO UPDATE SET
+    score = excluded.score,
+    citation_count = excluded.citation_count,
+    keyword_count = excluded.keyword_count,
+    avg_competitor_rating = excluded.avg_competitor_rating,
+    recommendations = excluded.recommendations,
+    computed_at = excluded.computed_at
+"""
+
+
+def score_local_seo(profile: Dict) -> Tuple[int, List[str]]:
+    """Score a company's local SEO profile (0-100) and list what to fix."""
+    score = 0
+    recommendations = []
+
+    # GBP Profile (20 points)
+    if profile.get('gbp_url'):
+        score += 20
+    else:
+        recommendations.append("❌ Set up Google Business Profile (High Priority)")
+
+    # Citations (25 points)
+    citation_count = profile.get('citation_count') or 0
+    if citation_count >= 50:
+        score += 25
+    elif citation_count >= 20:
+        score += 15
+        recommendations.append("⚠️ Build more local citations (Target: 50+)")
+    else:
+        score += 5
+        recommendations.append("❌ Build local citations across directories (High Priority)")
+
+    # Website (20 points)
+    if profile.get('website'):
+        score += 20
+    else:
+        recommendations.append("❌ Add website URL")
+
+    # Keywords (15 points)
+    keyword_count = profile.get('keyword_count') or 0
+    if keyword_count >= 10:
+        score += 15
+    elif keyword_count >= 5:
+        score += 10
+        recommendations.append("⚠️ Track more local keywords (Target: 10+)")
+    else:
+        score += 5
+        recommendations.append("⚠️ Add local keyword tracking")
+
+    # Contact Info (20 points)
+    if profile.get('phone'):
+        score += 10
+    else:
+        recommendations.append("❌ Add phone number")
+
+    if profile.get('address'):
+        score += 10
+    else:
+        recommendations.append("❌ Add complete address")
+
+    return score, recommendations
+
+
+def _local_seo_snapshot_row(profile: Dict) -> tuple:
+    """Build a local_seo_snapshots upsert row from an aggregated company profile."""
+    score, recommendations = score_local_seo(profile)
+    rating = profile.get('avg_competitor_rating')
+    return (
+        profile['id'],
+        score,
+        profile.get('citation_count') or 0,
+        profile.get('keyword_count') or 0,
+        round(float(rating), 2) if rating is not None else None,
+        json.dumps(recommendations),
+    )
+
+
+async def get_local_seo_profile(company_id: Any) -> Optional[Dict]:
+    """
+    Return a company row with its local SEO score, recommendations and counts.
+
+    Reads the company's local_seo_snapshots row when one exists; otherwise the
+    profile is aggregated, scored and written back as the new snapshot. The
+    snapshot table's triggers delete it whenever the inputs change.
+    """
+    use_snapshots = await has_table("local_seo_snapshots")
+    if use_snapshots:
+        profile = await execute_query_async(
+            """
+            SELECT c.*, s.score, s.citation_count, s.keyword_count,
+                   s.avg_competitor_rating, s.recommendations, s.computed_at as snapshot_at
+            FROM companies c
+            JOIN local_seo_snapshots s ON s.company_id = c.id
+            WHERE c.id = $1
+            """,
+            (company_id,), fetch_one=True
+        )
+        if profile:
+            recommendations = profile.get('recommendations')
+            profile['recommendations'] = json.loads(recommendations) if isinstance(recommendations, str) else (recommendations or [])
+            return profile
+
+    profile = await execute_query_async(LOCAL_SEO_PROFILE_QUERY, (company_id,), fetch_one=True)
+    if not profile:
+        return None
+
+    row = _local_seo_snapshot_row(profile)
+    profile['score'] = row[1]
+    profile['avg_competitor_rating'] = row[4]
+    profile['recommendations'] = json.loads(row[5])
+    if use_snapshots:
+        await execute_many_async(LOCAL_SEO_SNAPSHOT_UPSERT, [row])
+    return profile
+
+
+def _render_local_seo(data: Dict[str, Any]) -> str:
+    company, profile, metrics = data["company"], data["profile"], data["metrics"]
+    recommendations = data["recommendations"]
+    avg_rating = metrics["avg_competitor_rating"]
+
+    response = f"""
+Local SEO Analysis: {company['name']}
+{'=' * 60}
+
+LOCATION: {company['city'] or ''}, {company['state'] or ''}
+INDUSTRY: {company['industry'] or 'N/A'}
+
+LOCAL SEO SCORE: {data['score']}/100
+
+PROFILE COMPLETENESS:
+- Google Business Profile: {'✅ Connected' if profile['gbp_connected'] else '❌ Not Set Up'}
+- Website: {'✅ ' + company['website'] if company['website'] else '❌ Missing'}
+- Phone: {'✅ ' + company['phone'] if company['phone'] else '❌ Missing'}
+- Address: {'✅ Complete' if company['address'] else '❌ Incomplete'}
+
+LOCAL VISIBILITY METRICS:
+- Local Citations: {metrics['citation_count']}
+- Tracked Keywords: {metrics['keyword_count']}
+- Average Competitor Rating: {avg_rating if avg_rating is not None else 'N/A'}
+
+RECOMMENDATIONS ({len(recommendations)}):
+"""
+
+    if recommendations:
+        for rec in recommendations:
+            response += f"\n{rec}"
+    else:
+        response += "\n✅ Local SEO profile is well-optimized!"
+
+    return response
+
+
+@mcp.tool()
+async def analyze_local_seo(business_name: str, location: str, format: str = "text") -> ToolResult:
+    """
+    Analyze local SEO factors for a business.
+
+    Args:
+        business_name: Name of the business
+        location: City and state (e.g., "San Francisco, CA")
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Local SEO analysis with recommendations
+    """
+    logger.info(f"Analyzing local SEO for {business_name} in {location}")
+
+    city = location.split(',')[0].strip()
+    company, candidates = await resolve_company(business_name, city=city)
+    if not company:
+        return company_not_found(business_name, candidates, format, city)
+    result = await get_local_seo_profile(company["id"])
+
+    if not result:
+        return tool_error(
+            f"No data found for {business_name} in {location}. Please add the business to the database first.",
+            format
+        )
+
+    avg_rating = result.get('avg_competitor_rating')
+    data = {
+        "company": {
+            "id": _json_value(result['id']),
+            "name": result.get('name', business_name),
+            **{key: result.get(key) for key in ('city', 'state', 'industry', 'website', 'phone', 'address')},
+        },
+        "score": result['score'],
+        "profile": {
+            "gbp_connected": bool(result.get('gbp_url')),
+            "has_website": bool(result.get('website')),
+            "has_phone": bool(result.get('phone')),
+            "has_address": bool(result.get('address')),
+        },
+        "metrics": {
+            "citation_count": result.get('citation_count') or 0,
+            "keyword_count": result.get('keyword_count') or 0,
+            "avg_competitor_rating": round(float(avg_rating), 2) if avg_rating is not None else None,
+        },
+        "recommendations": result['recommendations'],
+    }
+    return tool_output(data, format, _render_local_seo)
+
+
+def _render_local_seo_portfolio(data: Dict[str, Any]) -> str:
+    if not data["companies"]:
+        return "No companies found in the database."
+
+    bands = data["bands"]
+    flagged = data["flagged"]
+    response = f"""
+Local SEO Portfolio Scan
+{'=' * 60}
+
+Companies: {data['companies']} ({data['rescored']} re-scored, {data['companies'] - data['rescored']} from snapshots)
+Average Score: {data['average_score']:.1f}/100
+Strong (80+): {bands['strong']} | Fair (50-79): {bands['fair']} | Weak (<50): {bands['weak']}
+
+COMPANIES AT OR BELOW {data['max_score']}/100 ({data['flagged_count']}):
+"""
+
+    for i, row in enumerate(flagged, 1):
+        response += f"\n{i}. {row['name'] or 'N/A'} ({row['city'] or 'N/A'}, {row['state'] or 'N/A'}) - {row['score']}/100"
+        if row["top_fix"]:
+            response += f"\n   Top fix: {row['top_fix']}"
+
+    if data["flagged_count"] > len(flagged):
+        response += f"\n\n... and {data['flagged_count'] - len(flagged)} more"
+
+    return response
+
+
+@mcp.tool()
+async def scan_local_seo_portfolio(max_score: int = 100, limit: int = 50, format: str = "text") -> ToolResult:
+    """
+    Score local SEO for every company in the database, weakest first.
+
+    Only companies without a current snapshot are re-scored, using one
+    grouped aggregate per child table for the whole portfolio.
+
+    Args:
+        max_score: Only list companies scoring at or below this (default: 100)
+        limit: Maximum number of companies to list (default: 50)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Portfolio summary and the lowest-scoring companies with their top fix
+    """
+    logger.info(f"Scanning local SEO portfolio (max_score={max_score}, limit={limit})")
+
+    use_snapshots = await has_table("local_seo_snapshots")
+    stale_query = f"""
+    SELECT c.*,
+           COALESCE(cit.cnt, 0) as citation_count,
+           COALESCE(k.cnt, 0) as keyword_count,
+           comp.avg_rating as avg_competitor_rating
+    FROM companies c
+    LEFT JOIN (SELECT company_id, COUNT(*) as cnt FROM citations GROUP BY company_id) cit ON cit.company_id = c.id
+    LEFT JOIN (SELECT company_id, COUNT(*) as cnt FROM keywords GROUP BY company_id) k ON k.company_id = c.id
+    LEFT JOIN (SELECT company_id, AVG(avg_rating) as avg_rating FROM competitors GROUP BY company_id) comp
+           ON comp.company_id = c.id
+    {"WHERE NOT EXISTS (SELECT 1 FROM local_seo_snapshots s WHERE s.company_id = c.id)" if use_snapshots else ""}
+    """
+    profiles = await execute_query_async(stale_query)
+    if profiles is None:
+        return tool_error("Unable to scan portfolio. Check the database connection.", format)
+
+    rows = [_local_seo_snapshot_row(profile) for profile in profiles]
+    if use_snapshots:
+        if rows and not await execute_many_async(LOCAL_SEO_SNAPSHOT_UPSERT, rows):
+            return tool_error("Unable to store local SEO snapshots. Check the database connection.", format)
+        scored = await execute_query_async(
+            """
+            SELECT c.id, c.name, c.city, c.state, s.score, s.recommendations
+            FROM local_seo_snapshots s
+            JOIN companies c ON c.id = s.company_id
+            ORDER BY s.score ASC, c.name ASC
+            """
+        ) or []
+    else:
+        names = {profile['id']: profile for profile in profiles}
+        scored = [
+            {**{key: names[row[0]].get(key) for key in ('id', 'name', 'city', 'state')},
+             'score': row[1], 'recommendations': row[5]}
+            for row in sorted(rows, key=lambda r: (r[1], names[r[0]].get('name') or ''))
+        ]
+
+    scores = [row['score'] for row in scored]
+    flagged = [row for row in scored if row['score'] <= max_score]
+
+    listed = []
+    for row in flagged[:limit]:
+        recommendations = row.get('recommendations')
+        if isinstance(recommendations, str):
+            recommendations = json.loads(recommendations)
+        listed.append({
+            "id": _json_value(row['id']),
+            **{key: row.get(key) for key in ('name', 'city', 'state')},
+            "score": row['score'],
+            "top_fix": recommendations[0] if recommendations else None,
+        })
+
+    data = {
+        "companies": len(scored),
+        "rescored": len(rows),
+        "average_score": round(sum(scores) / len(scores), 1) if scores else None,
+        "bands": {
+            "strong": sum(1 for x in scores if x >= 80),
+            "fair": sum(1 for x in scores if 50 <= x < 80),
+            "weak": sum(1 for x in scores if x < 50),
+        },
+        "max_score": max_score,
+        "flagged_count": len(flagged),
+        "flagged": listed,
+    }
+    return tool_output(data, format, _render_local_seo_portfolio)
+
+
+CITATION_NEXT_STEPS = [
+    "Claim/verify all Critical and High priority listings",
+    "Ensure NAP (Name, Address, Phone) consistency across all sources",
+    "Complete all profile fields with detailed information",
+    "Add high-quality photos (minimum 5-10 per listing)",
+    "Actively collect and respond to reviews",
+    "Monitor listings monthly for accuracy",
+]
+
+
+def _render_citation_sources(data: Dict[str, Any]) -> str:
+    industry = data["industry"]
+    general = [source for source in data["sources"] if source["type"] != "Industry"]
+    specific = [source for source in data["sources"] if source["type"] == "Industry"]
+
+    response = f"""
+Citation Sources for {industry} in {data['location']}
+{'=' * 60}
+
+CRITICAL & HIGH PRIORITY (Build First):
+"""
+
+    # Universal sources
+    for source in general:
+        if source["priority"] in ["Critical", "High"]:
+            response += f"\n✅ {source['name']} ({source['type']} - {source['priority']})"
+
+    # Industry-specific
+    if specific:
+        response += f"\n\nINDUSTRY-SPECIFIC ({industry.title()}):\n"
+        for source in specific:
+            priority_emoji = "⭐" if source["priority"] == "Critical" else "✅" if source["priority"] == "High" else "📋"
+            response += f"\n{priority_emoji} {source['name']} ({source['priority']})"
+
+    # Medium priority
+    response += "\n\nMEDIUM PRIORITY (Build After High Priority):\n"
+    for source in general:
+        if source["priority"] == "Medium":
+            response += f"\n📋 {source['name']} ({source['type']})"
+
+    response += """
+
+NEXT STEPS:
+"""
+    response += "\n".join(f"{i}. {step}" for i, step in enumerate(data["next_steps"], 1)) + "\n"
+
+    return response
+
+
+@mcp.tool()
+async def find_citation_sources(industry: str, location: str, format: str = "text") -> ToolResult:
+    """
+    Find recommended citation sources for a specific industry and location.
+
+    Args:
+        industry: Business industry/category
+        location: City and state
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        List of recommended citation sources with priority levels
+    """
+    logger.info(f"Finding citation sources for {industry} in {location}")
+
+    # Universal citation sources (all industries)
+    universal_sources = [
+        {"name": "Google Business Profile", "priority": "Critical", "type": "Universal"},
+        {"name": "Bing Places", "priority": "High", "type": "Universal"},
+        {"name": "Apple Maps", "priority": "High", "type": "Universal"},
+        {"name": "Yelp", "priority": "High", "type": "Universal"},
+        {"name": "Facebook", "priority": "High", "type": "Universal"},
+        {"name": "Yellow Pages", "priority": "Medium", "type": "Universal"},
+        {"name": "Better Business Bureau", "priority": "High", "type": "Universal"},
+        {"name": "Chamber of Commerce", "priority": "Medium", "type": "Local"},
+    ]
+
+    # Industry-specific sources
+    industry_sources = {
+        "restaurant": [
+            {"name": "OpenTable", "priority": "High"},
+            {"name": "TripAdvisor", "priority": "High"},
+            {"name": "Zomato", "priority": "Medium"},
+            {"name": "Grubhub", "priority": "Medium"},
+        ],
+        "legal": [
+            {"name": "Avvo", "priority": "Critical"},
+            {"name": "Justia", "priority": "High"},
+            {"name": "FindLaw", "priority": "High"},
             {"name": "Lawyers.com", "priority": "Medium"},
         ],
         "healthcare": [
@@ -860,366 +3569,1985 @@ async def find_citation_sources(industry: str, location: str) -> str:
         ],
     }
 
-    # Find matching industry
-    industry_lower = industry.lower()
-    specific_sources = []
-    for key, sources in industry_sources.items():
-        if key in industry_lower or industry_lower in key:
-            specific_sources = sources
-            break
+    # Find matching industry
+    industry_lower = industry.lower()
+    specific_sources = []
+    for key, sources in industry_sources.items():
+        if key in industry_lower or industry_lower in key:
+            specific_sources = sources
+            break
+
+    data = {
+        "industry": industry,
+        "location": location,
+        "sources": universal_sources + [{**source, "type": "Industry"} for source in specific_sources],
+        "next_steps": CITATION_NEXT_STEPS,
+    }
+    return tool_output(data, format, _render_citation_sources)
+
+
+# ============================================================================
+# MCP Tools - Content Optimization
+# ============================================================================
+
+# Long pages are split at their H1-H3 headings into sections of at most
+# CONTENT_SECTION_MAX_CHARS; short neighbouring sections are packed together
+CONTENT_SECTION_MAX_CHARS = int(os.getenv("CONTENT_SECTION_MAX_CHARS", "6000"))
+CONTENT_MAX_SECTIONS = int(os.getenv("CONTENT_MAX_SECTIONS", "24"))
+CONTENT_ANALYSIS_CONCURRENCY = int(os.getenv("CONTENT_ANALYSIS_CONCURRENCY", "4"))
+
+# Claude responses are cached by model, prompt hash and request parameters
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "604800"))  # weekly
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "64"))
+
+_claude_tokens = {"spent": 0, "saved": 0, "shared": 0}
+
+_MD_HEADING = re.compile(r"^(#{1,3})\s+(.+?)\s*#*\s*$")
+_SECTION_LIST_FIELDS = {"FACTS": "facts", "EEAT": "eeat", "IMPROVEMENTS": "improvements"}
+
+
+def _split_oversized(text: str, max_chars: int) -> List[str]:
+    """Split text on paragraph boundaries, hard-cutting paragraphs that are still too long."""
+    pieces, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        if len(paragraph) > max_chars and current:
+            paragraph, current = f"{current}\n\n{paragraph}", ""
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > max_chars // 2 else max_chars
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def split_markdown_sections(markdown: str, max_chars: int = CONTENT_SECTION_MAX_CHARS) -> List[Dict[str, str]]:
+    """
+    Split markdown into semantic sections for map-reduce analysis.
+
+    Sections start at H1-H3 headings (ignoring ``#`` lines inside fenced code)
+    and carry their heading trail, e.g. "Pricing > Enterprise". Sections longer
+    than ``max_chars`` are split on paragraph boundaries; consecutive short
+    sections are packed together up to ``max_chars``.
+
+    Returns:
+        List of {"heading", "text"} dicts in document order
+    """
+    raw: List[Tuple[str, List[str]]] = []
+    trail: List[str] = []
+    lines: List[str] = []
+    heading = "Introduction"
+    in_fence = False
+
+    for line in markdown.splitlines():
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        match = None if in_fence else _MD_HEADING.match(line)
+        if match:
+            if any(text.strip() for text in lines):
+                raw.append((heading, lines))
+            level = len(match.group(1))
+            trail = trail[:level - 1] + [match.group(2).strip()]
+            heading = " > ".join(trail)
+            lines = [line]
+        else:
+            lines.append(line)
+    if any(text.strip() for text in lines):
+        raw.append((heading, lines))
+
+    sections: List[Dict[str, str]] = []
+    for heading, body in raw:
+        text = "\n".join(body).strip()
+        for index, piece in enumerate(_split_oversized(text, max_chars)):
+            label = heading if index == 0 else f"{heading} (cont. {index + 1})"
+            last = sections[-1] if sections else None
+            if last and index == 0 and len(last["text"]) + len(piece) + 2 <= max_chars:
+                last["heading"] = f"{last['heading']} + {label.rsplit(' > ', 1)[-1]}"
+                last["text"] = f"{last['text']}\n\n{piece}"
+            else:
+                sections.append({"heading": label, "text": piece})
+    return sections
+
+
+async def stream_claude(prompt: str, max_tokens: int = 1024,
+                        on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+    """
+    Send a prompt to Claude with a streamed (SSE) response.
+
+    Text arrives as ``content_block_delta`` events; ``on_text`` is awaited with
+    each delta so callers can forward partial output before the message ends.
+
+    Returns:
+        {"text", "input_tokens", "output_tokens", "stop_reason"}
+    """
+    parts: List[str] = []
+    usage = {"input_tokens": 0, "output_tokens": 0, "stop_reason": None}
+    async with get_http_client("anthropic").stream(
+        "POST",
+        "https://api.anthropic.com/v1/messages",
+        headers={
+            "x-api-key": ANTHROPIC_API_KEY,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        },
+        json={
+            "model": CLAUDE_MODEL,
+            "max_tokens": max_tokens,
+            "stream": True,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    ) as response:
+        if response.status_code >= 400:
+            body = (await response.aread()).decode("utf-8", "replace")
+            raise RuntimeError(f"Anthropic API returned {response.status_code}: {body[:300]}")
+
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:].strip() or "{}")
+            kind = event.get("type")
+            if kind == "message_start":
+                usage["input_tokens"] = event.get("message", {}).get("usage", {}).get("input_tokens", 0)
+            elif kind == "message_delta":
+                usage["output_tokens"] = event.get("usage", {}).get("output_tokens", 0)
+                usage["stop_reason"] = event.get("delta", {}).get("stop_reason")
+            elif kind == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                text = event["delta"]["text"]
+                parts.append(text)
+                if on_text:
+                    await on_text(text)
+            elif kind == "error":
+                raise RuntimeError(event.get("error", {}).get("message", "Anthropic stream error"))
+            elif kind == "message_stop":
+                break
+
+    return {"text": "".join(parts), **usage}
+
+
+async def call_claude(prompt: str, max_tokens: int = 1024, use_cache: bool = True,
+                      on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+    """
+    Get Claude's reply to a prompt, reusing cached and in-flight responses.
+
+    The cache key covers the model, a SHA-256 of the prompt and the request
+    parameters, so identical calls (e.g. agent retries) are answered from the
+    cache for ``LLM_CACHE_TTL`` seconds; at most ``LLM_CACHE_MAX_ENTRIES``
+    responses are kept on disk. Cached and shared replies are passed to
+    ``on_text`` in one piece. ``use_cache=False`` always calls the API and
+    stores nothing.
+
+    Returns:
+        The response text
+    """
+    if not use_cache or LLM_CACHE_TTL <= 0:
+        result = await stream_claude(prompt, max_tokens, on_text)
+        _claude_tokens["spent"] += result["input_tokens"] + result["output_tokens"]
+        return result["text"]
+
+    cache = get_cache("claude", LLM_CACHE_TTL, LLM_CACHE_MEMORY_ENTRIES, max_disk_entries=LLM_CACHE_MAX_ENTRIES)
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    key = cache.make_key(CLAUDE_MODEL, prompt_hash, {"max_tokens": max_tokens})
+
+    result, source = await cache.get_or_fetch(
+        key, lambda: stream_claude(prompt, max_tokens, on_text),
+        should_cache=lambda r: bool(r["text"]) and r["stop_reason"] != "max_tokens"
+    )
+
+    tokens = result["input_tokens"] + result["output_tokens"]
+    if source == "fetched":
+        _claude_tokens["spent"] += tokens
+    else:
+        _claude_tokens["saved" if source == "cache" else "shared"] += tokens
+        if on_text:
+            await on_text(result["text"])
+
+    logger.info(f"Claude {prompt_hash[:12]}: {source} ({tokens} tokens)")
+    return result["text"]
+
+
+def _section_prompt(url: str, target_keyword: str, heading: str, text: str, index: int, total: int) -> str:
+    return f"""Analyze one section of a web page for AI search optimization (Claude, ChatGPT, Google AI Overviews).
+
+URL: {url}
+Target Keyword: {target_keyword or 'Not specified'}
+Section {index} of {total}: {heading}
+
+Section Content:
+{text}
+
+Reply in exactly this format, with no other text:
+SCORE: <citation-worthiness 0-100>
+STRUCTURE: <one sentence on how well AI tools can parse this section>
+FACTS:
+- <unique fact or data point AI tools would cite>
+EEAT:
+- <experience/expertise/authority/trust signal present>
+IMPROVEMENTS:
+- <specific change that would increase AI citations>
+
+Use "- none" for an empty list. Be concise and actionable."""
+
+
+def parse_section_analysis(text: str) -> Dict[str, Any]:
+    """Parse a section reply (SCORE/STRUCTURE/FACTS/EEAT/IMPROVEMENTS) tolerantly."""
+    result: Dict[str, Any] = {"score": None, "structure": "", "facts": [], "eeat": [], "improvements": []}
+    field = None
+    for line in text.splitlines():
+        line = line.strip()
+        key, _, value = line.replace("**", "").partition(":")
+        key = key.strip().upper()
+        if key == "SCORE":
+            match = re.search(r"\d+", value)
+            result["score"] = min(100, int(match.group())) if match else None
+            field = None
+        elif key == "STRUCTURE":
+            result["structure"] = value.strip()
+            field = None
+        elif key in _SECTION_LIST_FIELDS and not value.strip():
+            field = _SECTION_LIST_FIELDS[key]
+        elif field and line.startswith(("-", "•", "*")):
+            item = line.lstrip("-•* ").strip()
+            if item and item.lower().rstrip(".") != "none":
+                result[field].append(item)
+    return result
+
+
+def merge_section_analyses(sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduce per-section analyses into one page-level result.
+
+    The page score is the section scores weighted by section length; list
+    fields are de-duplicated case-insensitively in document order, and
+    improvements are ordered weakest section first.
+    """
+    scored = [s for s in sections if s["analysis"]["score"] is not None]
+    weight = sum(len(s["text"]) for s in scored)
+    score = round(sum(s["analysis"]["score"] * len(s["text"]) for s in scored) / weight) if weight else None
+
+    def unique(items):
+        seen, out = set(), []
+        for item in items:
+            folded = item.casefold().rstrip(".")
+            if folded not in seen:
+                seen.add(folded)
+                out.append(item)
+        return out
+
+    by_score = sorted(scored, key=lambda s: s["analysis"]["score"])
+    return {
+        "score": score,
+        "facts": unique(f for s in sections for f in s["analysis"]["facts"]),
+        "eeat": unique(e for s in sections for e in s["analysis"]["eeat"]),
+        "improvements": unique(
+            f"[{s['heading']}] {item}" for s in by_score for item in s["analysis"]["improvements"]
+        ),
+    }
+
+
+AI_CITATION_QUICK_WINS = [
+    "Add unique statistics and data points",
+    "Include expert quotes and attributions",
+    "Structure with clear H2/H3 headings",
+    "Add FAQ section with natural language questions",
+    "Include publication/update dates",
+    "Link to authoritative sources",
+    "Add author bio with credentials",
+    "Use schema markup (Article, FAQPage, etc.)",
+]
+
+
+def _render_content_analysis(data: Dict[str, Any]) -> str:
+    score = data["score"]
+    response = f"""
+AI Search Optimization Analysis
+{'=' * 60}
+
+URL: {data['url']}
+Target Keyword: {data['target_keyword'] or 'Not specified'}
+Content: {data['word_count']:,} words in {data['section_count']} sections ({len(data['sections'])} analyzed)
+
+CITATION-WORTHINESS SCORE: {score if score is not None else 'n/a'}/100
+(weighted by section length)
+
+SECTION SCORES:
+"""
+
+    for section in data["sections"]:
+        section_score = section["score"] if section["score"] is not None else "n/a"
+        response += f"\n- {section['heading']}: {section_score}/100"
+        if section["structure"]:
+            response += f" - {section['structure']}"
+
+    for title, key in (("CITABLE FACTS & DATA POINTS", "facts"), ("E-E-A-T SIGNALS PRESENT", "eeat"),
+                       ("IMPROVEMENTS (weakest sections first)", "improvements")):
+        response += f"\n\n{title}:\n"
+        response += "\n".join(f"- {item}" for item in data[key]) if data[key] else "- None identified"
+
+    if data["not_analyzed"]:
+        response += "\n\nNOT ANALYZED:\n"
+        for section in data["not_analyzed"]:
+            response += f"\n- {section['heading']}: {section['reason']}"
+
+    response += "\n\nQUICK WINS FOR AI CITATIONS:\n"
+    response += "".join(f"- {tip}\n" for tip in data["quick_wins"])
+
+    return response
+
+
+@mcp.tool()
+async def analyze_content_for_ai(url: str, target_keyword: str = "", use_cache: bool = True,
+                                 format: str = "text", ctx: Context = None) -> ToolResult:
+    """
+    Analyze content for AI search optimization (Claude, ChatGPT, Google AI).
+
+    The page is split into heading-based sections which are analysed
+    concurrently (map) and merged into one report (reduce), so long pillar
+    pages are covered in full. Claude responses are streamed: each finished
+    line of a section's analysis is sent to the client as a log message while
+    other sections are still running. Section replies are cached, so re-running
+    on an unchanged page costs no tokens.
+
+    Args:
+        url: URL of the content to analyze
+        target_keyword: Optional target keyword for optimization
+        use_cache: Reuse cached Claude responses (default: True)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Content analysis with AI citation optimization recommendations
+    """
+    if not ANTHROPIC_API_KEY:
+        return tool_error("ANTHROPIC_API_KEY not configured in environment variables", format)
+
+    logger.info(f"Analyzing content for AI optimization: {url}")
+
+    # Scrape content first
+    if not FIRECRAWL_API_KEY:
+        return tool_error("FIRECRAWL_API_KEY required for content analysis", format)
+
+    headers = {
+        "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    try:
+        response = await get_http_client("firecrawl").post(
+            "https://api.firecrawl.dev/v1/scrape",
+            headers=headers,
+            json={
+                "url": url,
+                "formats": ["markdown"],
+                "onlyMainContent": True
+            }
+        )
+        scrape_data = response.json()
+    except Exception as e:
+        return tool_error(f"Could not scrape content: {e}", format)
+
+    if not scrape_data.get("success"):
+        return tool_error("Failed to scrape content", format)
+
+    content = scrape_data.get("data", scrape_data).get("markdown", "")
+    sections = split_markdown_sections(content)
+    if not sections:
+        return tool_error("No content found to analyze", format)
+    skipped = sections[CONTENT_MAX_SECTIONS:]
+    sections = sections[:CONTENT_MAX_SECTIONS]
+    total = len(sections)
+    logger.info(f"Analyzing {total} sections of {url} (concurrency {CONTENT_ANALYSIS_CONCURRENCY})")
+
+    semaphore = asyncio.Semaphore(max(1, CONTENT_ANALYSIS_CONCURRENCY))
+
+    async def analyze(index: int, section: Dict[str, str]):
+        buffer = ""
+
+        async def forward(text: str):
+            nonlocal buffer
+            buffer += text
+            *finished, buffer = buffer.split("\n")
+            for line in finished:
+                if line.strip():
+                    await ctx.info(f"[{index}/{total}] {section['heading']}: {line.strip()}")
+
+        prompt = _section_prompt(url, target_keyword, section["heading"], section["text"], index, total)
+        async with semaphore:
+            try:
+                text = await call_claude(prompt, max_tokens=1024, use_cache=use_cache,
+                                         on_text=forward if ctx else None)
+            except Exception as e:
+                return index, None, str(e)
+        if ctx and buffer.strip():
+            await ctx.info(f"[{index}/{total}] {section['heading']}: {buffer.strip()}")
+        return index, parse_section_analysis(text), None
+
+    failures = []
+    tasks = [analyze(i, s) for i, s in enumerate(sections, 1)]
+    for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+        index, analysis, error = await next_result
+        if error:
+            failures.append((sections[index - 1]["heading"], error))
+        else:
+            sections[index - 1]["analysis"] = analysis
+        if ctx:
+            await ctx.report_progress(done, total)
+
+    analyzed = [s for s in sections if "analysis" in s]
+    if not analyzed:
+        return tool_error(f"Claude analysis failed: {failures[0][1]}", format)
+
+    merged = merge_section_analyses(analyzed)
+
+    data = {
+        "url": url,
+        "target_keyword": target_keyword or None,
+        "word_count": len(content.split()),
+        "section_count": total + len(skipped),
+        **merged,
+        "sections": [{"heading": s["heading"], "chars": len(s["text"]), **s["analysis"]} for s in analyzed],
+        "not_analyzed": (
+            [{"heading": heading, "reason": error} for heading, error in failures]
+            + [{"heading": s["heading"], "reason": f"beyond the {CONTENT_MAX_SECTIONS}-section limit"}
+               for s in skipped]
+        ),
+        "quick_wins": AI_CITATION_QUICK_WINS,
+    }
+    return tool_output(data, format, _render_content_analysis)
+
+
+CONTENT_CHECKLIST = [
+    "Include unique research or data",
+    "Add expert quotes with credentials",
+    "Use clear, scannable structure (H2/H3)",
+    "Add FAQ section at the end",
+    "Include last updated/published date",
+    "Link to 3-5 authoritative sources",
+    "Add schema markup (Article, FAQPage)",
+    "Include author bio with E-E-A-T signals",
+    "Optimize images with descriptive alt text",
+    "Add table of contents for long-form content",
+]
+
+
+def _render_content_outline(data: Dict[str, Any]) -> str:
+    location_context = f" in {data['location']}" if data["location"] else ""
+    checklist = "\n".join(f"☐ {item}" for item in data["checklist"])
+    return f"""
+AI-Optimized Content Outline
+{'=' * 60}
+
+Topic: {data['topic']}{location_context}
+Industry: {data['industry']}
+
+{data['outline']}
+
+CONTENT OPTIMIZATION CHECKLIST:
+{checklist}
+"""
+
+
+@mcp.tool()
+async def generate_content_outline(topic: str, industry: str, location: str = "",
+                                   use_cache: bool = True, format: str = "text") -> ToolResult:
+    """
+    Generate an AI-optimized content outline for a topic.
+
+    Args:
+        topic: Content topic
+        industry: Business industry
+        location: Optional location for local relevance
+        use_cache: Reuse a cached outline for identical inputs (default: True)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Detailed content outline optimized for both traditional and AI search
+    """
+    if not ANTHROPIC_API_KEY:
+        return tool_error("ANTHROPIC_API_KEY not configured in environment variables", format)
+
+    logger.info(f"Generating content outline for: {topic}")
+
+    prompt = f"""Create a comprehensive content outline optimized for AI search visibility:
+
+Topic: {topic}
+Industry: {industry}
+Location: {location or 'Not specified'}
+
+Provide:
+1. SEO-optimized title (for both traditional and AI search)
+2. Content structure with H2/H3 headings
+3. Key facts and statistics to include (citeable by AI)
+4. Expert insights and first-hand experience angles
+5. Internal linking opportunities
+6. FAQ section with AI-common questions
+7. Unique data points to own in this topic space
+
+Format as a practical outline ready for content creation."""
+
+    try:
+        outline = await call_claude(prompt, max_tokens=3072, use_cache=use_cache)
+    except Exception as e:
+        return tool_error(f"Could not generate outline: {e}", format)
+
+    data = {
+        "topic": topic,
+        "industry": industry,
+        "location": location or None,
+        "outline": outline,
+        "checklist": CONTENT_CHECKLIST,
+    }
+    return tool_output(data, format, _render_content_outline)
+
+
+EEAT_REPORT_PAGES = 20
+
+
+def _render_eeat_report(data: Dict[str, Any]) -> str:
+    summary = data["summary"]
+    if not summary["pages"]:
+        return "No pages to score."
+
+    response = f"""
+E-E-A-T Report ({data['profile']} profile)
+{'=' * 60}
+
+Pages Scored: {summary['pages']:,} in {data['elapsed_ms']} ms
+Average Overall: {summary['overall']['average']}/100 (range {summary['overall']['min']}-{summary['overall']['max']})
+
+DIMENSIONS (average, max {data['cap']:g}):
+"""
+    for dim, stats in summary["dimensions"].items():
+        response += f"- {dim.title()}: {stats['average']} (range {stats['min']}-{stats['max']})\n"
+
+    response += "\nLEAST COMMON SIGNALS:\n"
+    for key, rate in sorted(summary["pass_rates"].items(), key=lambda item: item[1])[:5]:
+        response += f"- {key}: {rate:.0%} of pages\n"
+
+    response += f"\nWEAKEST {len(data['pages'])} PAGES:\n"
+    for page in data["pages"]:
+        response += f"\n- {page['page']}: {page['scores']['overall']}/100"
+        if page["missing"]:
+            response += f" | Missing: {', '.join(page['missing'][:4])}"
+    return response
+
+
+@mcp.tool()
+async def calculate_eeat_scores(
+    pages: List[Dict[str, Any]],
+    profile: str = "content",
+    weights: Optional[Dict[str, float]] = None,
+    limit: int = EEAT_REPORT_PAGES,
+    format: str = "text"
+) -> ToolResult:
+    """
+    Score E-E-A-T for many pages at once and summarize the site.
+
+    Runs the shared batch engine (also behind seo-audit's eeat_score), so
+    thousands of crawled pages score in milliseconds.
+
+    Args:
+        pages: Page feature records, e.g. {"url": ..., "has_author_bio": true, "word_count": 1800,
+               "external_citations": 7, "has_https": true}. Unknown keys are ignored.
+        profile: "content" (per-page content signals, 0-100 per dimension) or "site" (site trust signals,
+                 0-25 per dimension) (default: "content")
+        weights: Optional overall weight per dimension, e.g. {"trustworthiness": 2}
+        limit: Number of weakest pages to list (default: 20)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Sitewide averages per dimension, signal pass rates and the weakest pages
+    """
+    try:
+        start = time.perf_counter()
+        batch = await asyncio.to_thread(score_pages, pages, profile, weights)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    except (ValueError, TypeError, AttributeError) as e:
+        return tool_error(str(e), format)
+
+    logger.info(f"Scored E-E-A-T for {len(batch)} pages ({batch.profile.name}) in {elapsed_ms} ms")
+
+    weakest = sorted(range(len(batch)), key=lambda i: batch.overall[i])[:max(0, limit)]
+    rules = sorted(batch.profile.rules, key=lambda rule: -rule.points)
+    data = {
+        "profile": batch.profile.name,
+        "cap": max(batch.profile.cap.values()),
+        "elapsed_ms": elapsed_ms,
+        "summary": batch.summary(),
+        "pages": [
+            {
+                "page": pages[i].get("url") or f"#{i + 1}",
+                "scores": batch.page(i),
+                "missing": [rule.key for rule in rules if not batch.hits[rule.key][i]],
+            }
+            for i in weakest
+        ],
+    }
+    return tool_output(data, format, _render_eeat_report)
+
+
+# ============================================================================
+# MCP Tools - Database Operations
+# ============================================================================
+
+COMPANY_STAT_FIELDS = ("audit_count", "keyword_count", "competitor_count", "citation_count", "last_audit_date")
+
+
+def _render_company_overview(data: Dict[str, Any]) -> str:
+    result, stats = data["company"], data["seo_metrics"]
+    return f"""
+Company Overview: {result.get('name', 'N/A')}
+{'=' * 60}
+
+CONTACT INFORMATION:
+- Address: {result.get('address', 'N/A')}
+- City/State: {result.get('city', 'N/A')}, {result.get('state', 'N/A')} {result.get('zip', 'N/A')}
+- Phone: {result.get('phone', 'N/A')}
+- Email: {result.get('email', 'N/A')}
+- Website: {result.get('website', 'N/A')}
+
+BUSINESS DETAILS:
+- Industry: {result.get('industry', 'N/A')}
+- Services: {result.get('services', 'N/A')}
+- Description: {result.get('description', 'N/A')}
+
+ONLINE PRESENCE:
+- Google Business Profile: {result.get('gbp_url', 'Not set up')}
+- Social Profiles: {result.get('social_profiles', 'None')}
+
+SEO METRICS:
+- Total Audits: {stats['audit_count'] or 0}
+- Last Audit: {stats['last_audit_date'] or 'Never'}
+- Tracked Keywords: {stats['keyword_count'] or 0}
+- Tracked Competitors: {stats['competitor_count'] or 0}
+- Citations: {stats['citation_count'] or 0}
+
+CREATED: {result.get('created_at', 'N/A')}
+LAST UPDATED: {result.get('updated_at', 'N/A')}
+"""
+
+
+@mcp.tool()
+async def get_company_overview(company_name: str, format: str = "text") -> ToolResult:
+    """
+    Get comprehensive overview of a company from the database.
+
+    Args:
+        company_name: Name of the company to look up
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Complete company profile with SEO metrics
+    """
+    logger.info(f"Fetching company overview for: {company_name}")
+
+    company, candidates = await resolve_company(company_name)
+    if not company:
+        return company_not_found(company_name, candidates, format)
+
+    if await has_table("company_stats"):
+        # Trigger-maintained summary: one primary-key lookup per company
+        query = """
+        SELECT c.*,
+               COALESCE(s.audit_count, 0) as audit_count,
+               COALESCE(s.keyword_count, 0) as keyword_count,
+               COALESCE(s.competitor_count, 0) as competitor_count,
+               COALESCE(s.citation_count, 0) as citation_count,
+               s.last_audit_date
+        FROM companies c
+        LEFT JOIN company_stats s ON s.company_id = c.id
+        WHERE c.id = $1
+        """
+    else:
+        # Summary not installed: independent per-table aggregates (no fan-out)
+        query = """
+        SELECT c.*,
+               (SELECT COUNT(*) FROM audits a WHERE a.company_id = c.id) as audit_count,
+               (SELECT COUNT(*) FROM keywords k WHERE k.company_id = c.id) as keyword_count,
+               (SELECT COUNT(*) FROM competitors comp WHERE comp.company_id = c.id) as competitor_count,
+               (SELECT COUNT(*) FROM citations cit WHERE cit.company_id = c.id) as citation_count,
+               (SELECT MAX(a.audit_date) FROM audits a WHERE a.company_id = c.id) as last_audit_date
+        FROM companies c
+        WHERE c.id = $1
+        """
+
+    result = await execute_query_async(query, (company["id"],), fetch_one=True)
+
+    if not result:
+        return company_not_found(company_name, [], format)
+
+    data = {
+        "company": {key: _json_value(value) for key, value in result.items() if key not in COMPANY_STAT_FIELDS},
+        "seo_metrics": {key: _json_value(result.get(key)) for key in COMPANY_STAT_FIELDS},
+    }
+    return tool_output(data, format, _render_company_overview)
+
+
+def _render_company_search(data: Dict[str, Any]) -> str:
+    if not data["companies"]:
+        return f"No companies found matching '{data['query']}'"
+
+    response = f"""
+Company Search: {data['query']}
+{'=' * 60}
+
+"""
+
+    for i, company in enumerate(data["companies"], 1):
+        response += f"{i}. {company['name']} (ID: {company['id']})\n"
+        response += f"   Location: {company.get('city') or 'N/A'}, {company.get('state') or 'N/A'} | "
+        response += f"Match: {company['score']:.0%}\n"
+
+    return response
+
+
+@mcp.tool()
+async def search_companies(query: str, limit: int = 10, format: str = "text") -> ToolResult:
+    """
+    Find companies whose names match a (possibly misspelled) search string.
+
+    Args:
+        query: Full or partial company name
+        limit: Maximum number of candidates to return (default: 10)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Ranked list of matching companies with match scores
+    """
+    logger.info(f"Searching companies for: {query}")
+
+    candidates = await find_companies(query, limit=limit)
+    return tool_output({"query": query, "companies": candidates}, format, _render_company_search)
+
+
+def _render_keyword_rankings(data: Dict[str, Any]) -> str:
+    results = data["keywords"]
+    if not results:
+        return f"No keyword data found for '{data['company_name']}'"
+
+    response = f"""
+Keyword Rankings: {data['company_name']}
+{'=' * 60}
+
+Total Tracked Keywords: {len(results)}
+
+"""
+
+    for i, row in enumerate(results, 1):
+        rank_display = f"#{row.get('current_rank')}" if row.get('current_rank') else "Unranked"
+        response += f"{i}. {row.get('keyword', 'N/A')} ({row.get('location', 'N/A')})\n"
+        response += f"   Rank: {rank_display} | "
+        response += f"Volume: {row.get('search_volume', 'N/A')} | "
+        response += f"Difficulty: {row.get('difficulty', 'N/A')}/100\n"
+        response += f"   Competition: {row.get('competition_level', 'N/A')} | "
+        response += f"Last Checked: {row.get('last_checked', 'N/A')}\n\n"
+
+    return response
+
+
+@mcp.tool()
+async def get_keyword_rankings(company_name: str, limit: int = 20, format: str = "text") -> ToolResult:
+    """
+    Get current keyword rankings for a company.
+
+    Args:
+        company_name: Name of the company
+        limit: Maximum number of keywords to return (default: 20)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        List of tracked keywords with current rankings
+    """
+    logger.info(f"Fetching keyword rankings for: {company_name}")
+
+    query = """
+    SELECT k.keyword, k.location, k.current_rank, k.search_volume,
+           k.difficulty, k.competition_level, k.last_checked
+    FROM keywords k
+    WHERE k.company_id = $1
+    ORDER BY k.current_rank ASC, k.search_volume DESC
+    LIMIT $2
+    """
+
+    company, candidates = await resolve_company(company_name)
+    if not company:
+        return company_not_found(company_name, candidates, format)
+    results = await execute_query_async(query, (company["id"], limit))
+
+    data = {
+        "company_name": company_name,
+        "keywords": [{key: _json_value(value) for key, value in row.items()} for row in results or []],
+    }
+    return tool_output(data, format, _render_keyword_rankings)
+
+
+# Keyset ordering for keyword pages: rank ascending (unranked last), then
+# search volume descending, then id. Matches idx_keywords_rank_page.
+RANKINGS_UNRANKED = 2147483647
+RANKINGS_MAX_PAGE_SIZE = 500
+_RANK_KEY = f"COALESCE(k.current_rank, {RANKINGS_UNRANKED})"
+_VOLUME_KEY = "-COALESCE(k.search_volume, 0)"
+
+
+def _encode_cursor(values: List[Any]) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> List[Any]:
+    """Inverse of _encode_cursor; raises ValueError on a malformed cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    if not isinstance(values, list) or len(values) != 3:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _render_keyword_page(data: Dict[str, Any]) -> str:
+    response = f"""
+Keyword Rankings: {data['company']['name']}
+{'=' * 60}
+
+Rows: {len(data['rows'])} (page size {data['page_size']})
+"""
+
+    for row in data["rows"]:
+        rank_display = f"#{row['current_rank']}" if row['current_rank'] else "Unranked"
+        response += f"\n- {row['keyword']} ({row['location'] or 'N/A'}): {rank_display} | "
+        response += f"Volume: {row['search_volume'] if row['search_volume'] is not None else 'N/A'} | "
+        response += f"Last Checked: {row['last_checked'] or 'N/A'}"
+
+    if data["next_cursor"]:
+        response += f"\n\nNEXT CURSOR: {data['next_cursor']}"
+
+    return response
+
+
+@mcp.tool()
+async def list_keyword_rankings(
+    company_name: str,
+    min_rank: Optional[int] = None,
+    max_rank: Optional[int] = None,
+    location: Optional[str] = None,
+    checked_since: Optional[str] = None,
+    page_size: int = 50,
+    cursor: Optional[str] = None,
+    format: str = "json",
+) -> ToolResult:
+    """
+    Page through a company's tracked keywords as structured rows.
+
+    Rows are ordered by rank (unranked last), then search volume descending.
+    Pagination is keyset-based: pass the returned ``next_cursor`` to get the
+    next page, so deep pages cost the same as the first.
+
+    Args:
+        company_name: Name of the company
+        min_rank: Only keywords ranked at or below this position number (e.g. 1)
+        max_rank: Only keywords ranked at or above this position number (e.g. 10); excludes unranked
+        location: Only keywords tracked for this location (exact match)
+        checked_since: Only keywords checked on or after this date (YYYY-MM-DD)
+        page_size: Rows per page (default: 50, max: 500)
+        cursor: ``next_cursor`` from the previous page
+        format: "json" for structured rows or "text" for a readable list (default: "json")
+
+    Returns:
+        Dict with the resolved company, rows, and next_cursor (None on the last page)
+    """
+    logger.info(f"Listing keyword rankings for: {company_name} (cursor={'yes' if cursor else 'no'})")
+
+    page_size = max(1, min(page_size, RANKINGS_MAX_PAGE_SIZE))
+    try:
+        after = _decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return tool_error(str(e), format)
+    try:
+        since = date.fromisoformat(checked_since) if checked_since else None
+    except ValueError:
+        return tool_error(f"Invalid checked_since '{checked_since}': expected a date as YYYY-MM-DD", format)
+
+    company, candidates = await resolve_company(company_name)
+    if not company:
+        return company_not_found(company_name, candidates, format)
+
+    try:
+        is_postgres = get_db_pool().is_postgres
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return tool_error("Database unavailable", format)
+
+    conditions = ["k.company_id = $1"]
+    params: List[Any] = [company["id"]]
+
+    def bind(value: Any) -> str:
+        params.append(value)
+        return f"${len(params)}"
+
+    lower = min_rank
+    if after is not None:
+        lower = after[0] if min_rank is None else max(min_rank, after[0])
+    if lower is not None:
+        conditions.append(f"{_RANK_KEY} >= {bind(lower)}")
+    if max_rank is not None:
+        conditions.append(f"{_RANK_KEY} <= {bind(max_rank)}")
+    if after is not None:
+        rank, volume, last_id = after
+        if is_postgres:
+            conditions.append(f"({_RANK_KEY}, {_VOLUME_KEY}, k.id) > ({bind(rank)}, {bind(volume)}, {bind(last_id)})")
+        else:
+            # SQLite cannot seek on a row value over expressions; the leading
+            # rank bound above does the seek and this resolves ties within it
+            r, v, i = bind(rank), bind(volume), bind(last_id)
+            conditions.append(
+                f"({_RANK_KEY} > {r} OR ({_RANK_KEY} = {r} AND "
+                f"({_VOLUME_KEY} > {v} OR ({_VOLUME_KEY} = {v} AND k.id > {i}))))"
+            )
+    if location:
+        conditions.append(f"k.location = {bind(location)}")
+    if since is not None:
+        # psycopg2 adapts a date to a DATE literal; SQLite compares ISO text
+        conditions.append(f"k.last_checked >= {bind(since if is_postgres else since.isoformat())}")
+
+    query = f"""
+    SELECT k.id, k.keyword, k.location, k.current_rank, k.search_volume,
+           k.difficulty, k.competition_level, k.last_checked,
+           {_RANK_KEY} as rank_key, {_VOLUME_KEY} as volume_key
+    FROM keywords k
+    WHERE {' AND '.join(conditions)}
+    ORDER BY {_RANK_KEY}, {_VOLUME_KEY}, k.id
+    LIMIT {bind(page_size + 1)}
+    """
 
-    response = f"""
-Citation Sources for {industry} in {location}
+    rows = await execute_query_async(query, tuple(params))
+    if rows is None:
+        return tool_error("Keyword query failed", format)
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = _encode_cursor([last["rank_key"], last["volume_key"], _json_value(last["id"])])
+
+    data = {
+        "company": {"id": company["id"], "name": company["name"]},
+        "filters": {
+            "min_rank": min_rank,
+            "max_rank": max_rank,
+            "location": location,
+            "checked_since": since.isoformat() if since else None,
+        },
+        "rows": [
+            {key: _json_value(row.get(key)) for key in (
+                "id", "keyword", "location", "current_rank", "search_volume",
+                "difficulty", "competition_level", "last_checked",
+            )}
+            for row in rows
+        ],
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+    }
+    return tool_output(data, format, _render_keyword_page)
+
+
+def _render_database_stats(stats: Dict[str, Any]) -> str:
+    return f"""
+Database Pool Statistics
 {'=' * 60}
 
-CRITICAL & HIGH PRIORITY (Build First):
+BACKEND: {stats['backend']}
+DRIVER: {stats['driver']}
+
+POOL:
+- Max Size: {stats['max_size']}
+- Open Connections: {stats['open_connections']}
+- Idle Connections: {stats['idle_connections']}
+- In Use: {stats['in_use']}
+
+USAGE:
+- Checkouts: {stats['checkouts']}
+- Checkouts That Waited: {stats['waits'] if stats['waits'] is not None else 'N/A'}
+- Average Wait: {stats['avg_wait_ms']} ms
+- Max Wait: {stats['max_wait_ms']} ms
+- Reconnects: {stats['reconnects']}
 """
 
-    # Universal sources
-    for source in universal_sources:
-        if source["priority"] in ["Critical", "High"]:
-            response += f"\n✅ {source['name']} ({source['type']} - {source['priority']})"
 
-    # Industry-specific
-    if specific_sources:
-        response += f"\n\nINDUSTRY-SPECIFIC ({industry.title()}):\n"
-        for source in specific_sources:
-            priority_emoji = "⭐" if source["priority"] == "Critical" else "✅" if source["priority"] == "High" else "📋"
-            response += f"\n{priority_emoji} {source['name']} ({source['priority']})"
+@mcp.tool()
+async def get_database_stats(format: str = "text") -> ToolResult:
+    """
+    Get connection pool statistics for the server's database layer.
 
-    # Medium priority
-    response += "\n\nMEDIUM PRIORITY (Build After High Priority):\n"
-    for source in universal_sources:
-        if source["priority"] == "Medium":
-            response += f"\n📋 {source['name']} ({source['type']})"
+    Args:
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
-    response += f"""
+    Returns:
+        Pool size, checkout counts, wait times and reconnects
+    """
+    return tool_output(get_async_db().stats(), format, _render_database_stats)
 
-NEXT STEPS:
-1. Claim/verify all Critical and High priority listings
-2. Ensure NAP (Name, Address, Phone) consistency across all sources
-3. Complete all profile fields with detailed information
-4. Add high-quality photos (minimum 5-10 per listing)
-5. Actively collect and respond to reviews
-6. Monitor listings monthly for accuracy
+
+def _render_cache_stats(data: Dict[str, Any]) -> str:
+    if not data["caches"]:
+        return "No caches have been used yet in this server session."
+
+    response = f"""
+Result Cache Statistics
+{'=' * 60}
 """
 
-    return response
+    for stats in data["caches"]:
+        response += f"""
+{stats['namespace'].upper()} (TTL {stats['ttl_seconds']}s):
+- Hit Rate: {round(stats['hit_rate'] * 100, 1)}%
+- Memory Hits: {stats['memory_hits']}
+- Disk Hits: {stats['disk_hits']}
+- Misses: {stats['misses']}
+- Writes: {stats['writes']}
+- Shared In-Flight Requests: {stats['coalesced']}
+- Evicted From Disk: {stats['evictions']}
+- Entries In Memory: {stats['memory_entries']}
+"""
+
+    units = data["semrush_units"]
+    if any(units.values()):
+        response += f"""
+SEMRUSH API UNITS:
+- Spent: {units['spent']:,}
+- Saved By Cache: {units['saved']:,}
+- Saved By Request Sharing: {units['shared']:,}
+"""
 
+    tokens = data["claude_tokens"]
+    if any(tokens.values()):
+        response += f"""
+CLAUDE TOKENS (input + output):
+- Spent: {tokens['spent']:,}
+- Saved By Cache: {tokens['saved']:,}
+- Saved By Request Sharing: {tokens['shared']:,}
+"""
+
+    return response
 
-# ============================================================================
-# MCP Tools - Content Optimization
-# ============================================================================
 
 @mcp.tool()
-async def analyze_content_for_ai(url: str, target_keyword: str = "") -> str:
+async def get_cache_stats(format: str = "text") -> ToolResult:
     """
-    Analyze content for AI search optimization (Claude, ChatGPT, Google AI).
+    Get hit/miss counters for the server's result caches.
 
     Args:
-        url: URL of the content to analyze
-        target_keyword: Optional target keyword for optimization
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
     Returns:
-        Content analysis with AI citation optimization recommendations
+        Per-cache hit rates, memory usage and write counts
     """
-    if not ANTHROPIC_API_KEY:
-        return "Error: ANTHROPIC_API_KEY not configured in environment variables"
+    data = {
+        "caches": [cache.stats() for cache in _caches.values()],
+        "semrush_units": dict(_semrush_units),
+        "claude_tokens": dict(_claude_tokens),
+    }
+    return tool_output(data, format, _render_cache_stats)
 
-    logger.info(f"Analyzing content for AI optimization: {url}")
 
-    # Scrape content first
-    if not FIRECRAWL_API_KEY:
-        return "Error: FIRECRAWL_API_KEY required for content analysis"
+# ============================================================================
+# MCP Tools - Rank History
+# ============================================================================
 
-    headers = {
-        "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
-        "Content-Type": "application/json"
-    }
+# Raw rankings rows folded per ingestion batch
+RANK_HISTORY_BATCH_SIZE = int(os.getenv("RANK_HISTORY_BATCH_SIZE", "5000"))
+# Each run re-reads rows created this long before the watermark, to catch
+# rows whose transaction committed after a later row had been ingested
+RANK_HISTORY_OVERLAP_SECONDS = int(os.getenv("RANK_HISTORY_OVERLAP_SECONDS", "300"))
+RANK_HISTORY_JOB_ID = "rank_history_rollup"
+RANK_GRANULARITIES = ("week", "month")
+RANK_HISTORY_MISSING = (
+    "Rank history tables not found. Load database/rank-history-schema.sql (or the -sqlite variant) first."
+)
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://api.firecrawl.dev/v1/scrape",
-                headers=headers,
-                json={
-                    "url": url,
-                    "formats": ["markdown"],
-                    "onlyMainContent": True
-                },
-                timeout=30.0
-            )
-            scrape_data = response.json()
-        except Exception as e:
-            return f"Error scraping content: {e}"
 
-    if not scrape_data.get("success"):
-        return "Failed to scrape content"
+def encode_rank_block(ranks: Dict[int, int]) -> Tuple[int, bytes]:
+    """
+    Delta-encode one month of daily ranks (day of month -> rank).
 
-    content = scrape_data.get("markdown", "")[:4000]  # Limit content for analysis
+    Returns a presence bitmap (bit d-1 for day d) and the zigzag varint
+    deltas between consecutive present days. Stable ranks cost one byte a day.
+    """
+    bitmap = 0
+    out = bytearray()
+    previous = 0
+    for day in sorted(ranks):
+        bitmap |= 1 << (day - 1)
+        delta = ranks[day] - previous
+        previous = ranks[day]
+        value = (delta << 1) if delta >= 0 else ((-delta << 1) - 1)
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bitmap, bytes(out)
+
+
+def decode_rank_block(bitmap: int, blob: bytes) -> Dict[int, int]:
+    """Inverse of encode_rank_block."""
+    blob = bytes(blob)
+    ranks = {}
+    previous = 0
+    pos = 0
+    for day in range(1, 32):
+        if not (bitmap >> (day - 1)) & 1:
+            continue
+        value = shift = 0
+        while True:
+            byte = blob[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        previous += (value >> 1) if not value & 1 else -((value + 1) >> 1)
+        ranks[day] = previous
+    return ranks
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """Coerce a DATE/TIMESTAMP column value (date, datetime or ISO string) to a date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
 
-    # Use Claude to analyze for AI optimization
-    prompt = f"""Analyze this content for AI search optimization (Claude, ChatGPT, Google AI Overviews):
 
-URL: {url}
-Target Keyword: {target_keyword or 'Not specified'}
+def _period_start(day: date, granularity: str) -> date:
+    """First day of the ISO week (Monday) or calendar month containing ``day``."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
 
-Content Preview:
-{content}
 
-Provide:
-1. Citation-worthiness score (0-100) and reasoning
-2. Unique facts/data points AI tools would cite
-3. Content structure quality for AI parsing
-4. E-E-A-T signals present
-5. Specific improvements to increase AI citations
+def _months_before(month: date, months: int) -> date:
+    """First day of the calendar month ``months`` whole months before ``month``."""
+    index = month.year * 12 + month.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
 
-Be concise and actionable."""
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                },
-                json={
-                    "model": CLAUDE_MODEL,
-                    "max_tokens": 2048,
-                    "messages": [{"role": "user", "content": prompt}]
-                },
-                timeout=60.0
-            )
+def _rank_rollup(points: List[Tuple[date, int]]) -> Tuple[int, float, int, int, int, int]:
+    """(samples, avg, best, worst, first, last) for date-ordered rank points."""
+    ranks = [rank for _, rank in points]
+    return len(ranks), round(sum(ranks) / len(ranks), 2), min(ranks), max(ranks), ranks[0], ranks[-1]
 
-            result = response.json()
-            analysis = result["content"][0]["text"]
-    except Exception as e:
-        return f"Error analyzing with Claude: {e}"
 
+async def _fold_rank_batch(rows: List[Dict], is_postgres: bool) -> Dict[str, int]:
+    """
+    Merge one batch of raw rankings rows into blocks and rollups.
+
+    Only the keyword-months, weeks and company periods the batch touches are
+    rewritten; existing blocks are decoded and merged, so re-ingesting a row
+    is harmless.
+    """
+    def db_date(value: date):
+        return value if is_postgres else value.isoformat()
+
+    # keyword -> {day: rank}; later rows for the same day win
+    incoming: Dict[Any, Dict[date, int]] = {}
+    company_of: Dict[Any, Any] = {}
+    for row in rows:
+        day = _as_date(row.get('date')) or _as_date(row.get('checked_at'))
+        if day is None or row.get('rank') is None:
+            continue
+        incoming.setdefault(row['keyword_id'], {})[day] = int(row['rank'])
+        company_of[row['keyword_id']] = row['company_id']
+    if not incoming:
+        return {"blocks": 0, "keyword_rollups": 0, "company_rollups": 0}
+
+    # Months whose blocks are needed: the touched days plus both ends of every
+    # touched week, so weekly rollups can be recomputed across month edges
+    all_days = [day for days in incoming.values() for day in days]
+    first_month = _period_start(_period_start(min(all_days), "week"), "month")
+    last_month = _period_start(_period_start(max(all_days), "week") + timedelta(days=6), "month")
+
+    series: Dict[Any, Dict[date, int]] = {keyword_id: {} for keyword_id in incoming}
+    for chunk in _chunked(list(incoming), 500):
+        placeholders = ", ".join(f"${i}" for i in range(3, len(chunk) + 3))
+        blocks = await execute_query_async(
+            f"""
+            SELECT keyword_id, month_start, days_present, ranks
+            FROM rank_history_blocks
+            WHERE month_start >= $1 AND month_start <= $2 AND keyword_id IN ({placeholders})
+            """,
+            (db_date(first_month), db_date(last_month), *chunk)
+        )
+        if blocks is None:
+            raise RuntimeError("could not read rank_history_blocks")
+        for block in blocks:
+            month = _as_date(block['month_start'])
+            for day, rank in decode_rank_block(block['days_present'], block['ranks']).items():
+                series[block['keyword_id']][month.replace(day=day)] = rank
+
+    block_rows = []
+    keyword_rollups = []
+    company_periods = set()
+    for keyword_id, days in incoming.items():
+        points = series[keyword_id]
+        points.update(days)
+
+        for month in {_period_start(day, "month") for day in days}:
+            month_ranks = {day.day: rank for day, rank in points.items() if _period_start(day, "month") == month}
+            bitmap, blob = encode_rank_block(month_ranks)
+            block_rows.append((keyword_id, db_date(month), bitmap, blob, len(month_ranks)))
+
+        for granularity in RANK_GRANULARITIES:
+            for period in {_period_start(day, granularity) for day in days}:
+                in_period = sorted((day, rank) for day, rank in points.items()
+                                   if _period_start(day, granularity) == period)
+                keyword_rollups.append((keyword_id, granularity, db_date(period), *_rank_rollup(in_period)))
+                company_periods.add((company_of[keyword_id], granularity, db_date(period)))
+
+    ok = await execute_many_async(
+        """
+        INSERT INTO rank_history_blocks (keyword_id, month_start, days_present, ranks, samples, updated_at)
+        VALUES ($1, $2, $3, $4, $5, CURRENT_TIMESTAMP)
+        ON CONFLICT (keyword_id, month_start) DO UPDATE SET
+            days_present = excluded.days_present,
+            ranks = excluded.ranks,
+            samples = excluded.samples,
+            updated_at = excluded.updated_at
+        """,
+        block_rows
+    ) and await execute_many_async(
+        """
+        INSERT INTO keyword_rank_rollups
+            (keyword_id, granularity, period_start, samples, avg_rank, best_rank, worst_rank, first_rank, last_rank)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        ON CONFLICT (keyword_id, granularity, period_start) DO UPDATE SET
+            samples = excluded.samples,
+            avg_rank = excluded.avg_rank,
+            best_rank = excluded.best_rank,
+            worst_rank = excluded.worst_rank,
+            first_rank = excluded.first_rank,
+            last_rank = excluded.last_rank
+        """,
+        keyword_rollups
+    ) and await execute_many_async(
+        # Company periods are re-aggregated from keyword rollups, never raw rows
+        """
+        INSERT INTO company_rank_rollups
+            (company_id, granularity, period_start, keywords_tracked, avg_rank, best_rank,
+             top3_count, top10_count, top100_count)
+        SELECT k.company_id, r.granularity, r.period_start, COUNT(*), AVG(r.avg_rank), MIN(r.best_rank),
+               SUM(CASE WHEN r.last_rank <= 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.last_rank <= 10 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN r.last_rank <= 100 THEN 1 ELSE 0 END)
+        FROM keywords k
+        JOIN keyword_rank_rollups r ON r.keyword_id = k.id
+        WHERE k.company_id = $1 AND r.granularity = $2 AND r.period_start = $3
+        GROUP BY k.company_id, r.granularity, r.period_start
+        ON CONFLICT (company_id, granularity, period_start) DO UPDATE SET
+            keywords_tracked = excluded.keywords_tracked,
+            avg_rank = excluded.avg_rank,
+            best_rank = excluded.best_rank,
+            top3_count = excluded.top3_count,
+            top10_count = excluded.top10_count,
+            top100_count = excluded.top100_count
+        """,
+        sorted(company_periods, key=str)
+    )
+    if not ok:
+        raise RuntimeError("could not write rank history")
+
+    return {"blocks": len(block_rows), "keyword_rollups": len(keyword_rollups), "company_rollups": len(company_periods)}
+
+
+def _watermark_key(mark: Dict[str, Any]) -> Tuple[datetime, Any]:
+    return datetime.fromisoformat(mark["created_at"]), mark["id"]
+
+
+def _render_rank_history_refresh(data: Dict[str, Any]) -> str:
     return f"""
-AI Search Optimization Analysis
+Rank History Refresh
 {'=' * 60}
 
-URL: {url}
-Target Keyword: {target_keyword or 'Not specified'}
-
-{analysis}
-
-QUICK WINS FOR AI CITATIONS:
-- Add unique statistics and data points
-- Include expert quotes and attributions
-- Structure with clear H2/H3 headings
-- Add FAQ section with natural language questions
-- Include publication/update dates
-- Link to authoritative sources
-- Add author bio with credentials
-- Use schema markup (Article, FAQPage, etc.)
+Ranking Rows Ingested: {data['rows']:,} ({data['batches']} batches)
+Keyword-Month Blocks Written: {data['blocks']:,}
+Keyword Rollups Refreshed: {data['keyword_rollups']:,}
+Company Rollups Refreshed: {data['company_rollups']:,}
+Watermark: {data['watermark']['created_at'] if data['watermark'] else 'none'}
 """
 
 
 @mcp.tool()
-async def generate_content_outline(topic: str, industry: str, location: str = "") -> str:
+async def refresh_rank_history(format: str = "text", ctx: Context = None) -> ToolResult:
     """
-    Generate an AI-optimized content outline for a topic.
+    Fold new raw rankings rows into the rank history blocks and rollups.
+
+    Incremental job: reads rankings rows inserted since the last run (in
+    insertion order, RANK_HISTORY_BATCH_SIZE at a time), merges them into
+    per-keyword monthly blocks, and refreshes the weekly/monthly keyword and
+    company rollups they touch. The watermark is saved after every batch.
+    Each run starts RANK_HISTORY_OVERLAP_SECONDS behind the watermark so rows
+    that committed late are not skipped; folding a row twice is harmless.
 
     Args:
-        topic: Content topic
-        industry: Business industry
-        location: Optional location for local relevance
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
     Returns:
-        Detailed content outline optimized for both traditional and AI search
+        Summary of rows ingested and rollups refreshed
     """
-    if not ANTHROPIC_API_KEY:
-        return "Error: ANTHROPIC_API_KEY not configured in environment variables"
-
-    logger.info(f"Generating content outline for: {topic}")
+    if not await has_table("rank_history_blocks"):
+        return tool_error(RANK_HISTORY_MISSING, format)
 
-    location_context = f" in {location}" if location else ""
-
-    prompt = f"""Create a comprehensive content outline optimized for AI search visibility:
-
-Topic: {topic}
-Industry: {industry}
-Location: {location or 'Not specified'}
+    try:
+        is_postgres = get_db_pool().is_postgres
+    except Exception as e:
+        return tool_error(f"database unavailable ({e})", format)
+
+    watermark = await asyncio.to_thread(load_checkpoint, RANK_HISTORY_JOB_ID)
+    totals = {"rows": 0, "batches": 0, "blocks": 0, "keyword_rollups": 0, "company_rollups": 0}
+
+    position = None  # last row read this run; None until the overlap batch is read
+    while True:
+        params: Tuple = (RANK_HISTORY_BATCH_SIZE,)
+        condition = ""
+        if watermark and position is None:
+            # First batch of the run: step back over the overlap window
+            stored = watermark["created_at"]
+            created_at = datetime.fromisoformat(stored) - timedelta(seconds=RANK_HISTORY_OVERLAP_SECONDS)
+            if not is_postgres:
+                created_at = created_at.isoformat(sep="T" if "T" in stored else " ")
+            condition = "WHERE r.created_at >= $2"
+            params = (RANK_HISTORY_BATCH_SIZE, created_at)
+        elif position:
+            created_at = position["created_at"]
+            if is_postgres:
+                created_at = datetime.fromisoformat(created_at)
+            condition = "WHERE (r.created_at, r.id) > ($2, $3)"
+            params = (RANK_HISTORY_BATCH_SIZE, created_at, position["id"])
+
+        rows = await execute_query_async(
+            f"""
+            SELECT r.id, r.keyword_id, r.rank, r.date, r.checked_at, r.created_at, k.company_id
+            FROM rankings r
+            JOIN keywords k ON k.id = r.keyword_id
+            {condition}
+            ORDER BY r.created_at, r.id
+            LIMIT $1
+            """,
+            params
+        )
+        if rows is None:
+            return tool_error("could not read the rankings table", format)
+        if not rows:
+            break
 
-Provide:
-1. SEO-optimized title (for both traditional and AI search)
-2. Content structure with H2/H3 headings
-3. Key facts and statistics to include (citeable by AI)
-4. Expert insights and first-hand experience angles
-5. Internal linking opportunities
-6. FAQ section with AI-common questions
-7. Unique data points to own in this topic space
+        try:
+            counts = await _fold_rank_batch(rows, is_postgres)
+        except RuntimeError as e:
+            return tool_error(f"{e} after {totals['rows']} rows (run again to resume)", format)
+
+        last = rows[-1]
+        position = {"created_at": _json_value(last["created_at"]), "id": _json_value(last["id"])}
+        if not watermark or _watermark_key(position) > _watermark_key(watermark):
+            # Re-read overlap rows never move the saved watermark backwards
+            watermark = position
+            await asyncio.to_thread(save_checkpoint, RANK_HISTORY_JOB_ID, watermark)
+
+        totals["rows"] += len(rows)
+        totals["batches"] += 1
+        for key, value in counts.items():
+            totals[key] += value
+        if ctx:
+            await ctx.info(f"Ingested {totals['rows']} ranking rows")
+
+        if len(rows) < RANK_HISTORY_BATCH_SIZE:
+            break
 
-Format as a practical outline ready for content creation."""
+    return tool_output({**totals, "watermark": watermark}, format, _render_rank_history_refresh)
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                },
-                json={
-                    "model": CLAUDE_MODEL,
-                    "max_tokens": 3072,
-                    "messages": [{"role": "user", "content": prompt}]
-                },
-                timeout=60.0
-            )
 
-            result = response.json()
-            outline = result["content"][0]["text"]
-    except Exception as e:
-        return f"Error generating outline: {e}"
+def _render_rank_trend(data: Dict[str, Any]) -> str:
+    keyword, periods = data["keyword"], data["periods"]
+    subject = f"'{keyword}' for {data['company']['name']}" if keyword else data['company']['name']
+    if not periods:
+        return f"No rank history for {subject} since {data['since']}. Run refresh_rank_history to ingest rankings."
 
-    return f"""
-AI-Optimized Content Outline
+    response = f"""
+Rank Trend: {subject}
 {'=' * 60}
 
-Topic: {topic}{location_context}
-Industry: {industry}
-
-{outline}
+Period: {data['since']} to {data['until']} (by {data['granularity']})
 
-CONTENT OPTIMIZATION CHECKLIST:
-☐ Include unique research or data
-☐ Add expert quotes with credentials
-☐ Use clear, scannable structure (H2/H3)
-☐ Add FAQ section at the end
-☐ Include last updated/published date
-☐ Link to 3-5 authoritative sources
-☐ Add schema markup (Article, FAQPage)
-☐ Include author bio with E-E-A-T signals
-☐ Optimize images with descriptive alt text
-☐ Add table of contents for long-form content
 """
 
+    previous = None
+    for row in periods:
+        avg_rank = row['avg_rank']
+        change = ""
+        if previous is not None:
+            delta = previous - avg_rank
+            change = f" ({'▲' if delta > 0 else '▼' if delta < 0 else '='} {abs(delta):.1f})"
+        previous = avg_rank
+        response += f"{row['period_start']}: Avg #{avg_rank:.1f}{change} | "
+        response += f"Best #{row['best_rank']} | "
+        if keyword:
+            response += f"Last #{row['last_rank']}\n"
+        else:
+            response += f"Top 3: {row['top3_count']} | Top 10: {row['top10_count']} | "
+            response += f"Keywords: {row['keywords_tracked']}\n"
+
+    first, last = periods[0]['avg_rank'], periods[-1]['avg_rank']
+    response += f"\nOverall: average rank {data['direction']} from #{first:.1f} to #{last:.1f}"
+
+    return response
 
-# ============================================================================
-# MCP Tools - Database Operations
-# ============================================================================
 
 @mcp.tool()
-async def get_company_overview(company_name: str) -> str:
+async def get_rank_trend(company_name: str, months: int = 12, granularity: str = "month",
+                         keyword: str = "", format: str = "text") -> ToolResult:
     """
-    Get comprehensive overview of a company from the database.
+    Show how a company's (or one keyword's) rankings moved over time.
+
+    Answered from the weekly/monthly rollups maintained by
+    refresh_rank_history, so it never scans raw rankings rows.
 
     Args:
-        company_name: Name of the company to look up
+        company_name: Name of the company
+        months: How far back to look (default: 12)
+        granularity: "month" or "week" (default: "month")
+        keyword: Optional keyword to trend instead of the whole company
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
     Returns:
-        Complete company profile with SEO metrics
+        Period-by-period average rank, best rank and top-3/top-10 counts
     """
-    logger.info(f"Fetching company overview for: {company_name}")
+    logger.info(f"Fetching rank trend for {company_name} ({months} months by {granularity})")
 
-    query = """
-    SELECT c.*,
-           COUNT(DISTINCT a.id) as audit_count,
-           COUNT(DISTINCT k.id) as keyword_count,
-           COUNT(DISTINCT comp.id) as competitor_count,
-           COUNT(DISTINCT cit.id) as citation_count,
-           MAX(a.audit_date) as last_audit_date
-    FROM companies c
-    LEFT JOIN audits a ON c.id = a.company_id
-    LEFT JOIN keywords k ON c.id = k.company_id
-    LEFT JOIN competitors comp ON c.id = comp.company_id
-    LEFT JOIN citations cit ON c.id = cit.company_id
-    WHERE LOWER(c.name) LIKE LOWER($1)
-    GROUP BY c.id
+    granularity = granularity.lower()
+    if granularity not in RANK_GRANULARITIES:
+        return tool_error(f"Invalid granularity '{granularity}'. Use 'month' or 'week'.", format)
+    if not await has_table("company_rank_rollups"):
+        return tool_error(RANK_HISTORY_MISSING, format)
+
+    company, candidates = await resolve_company(company_name)
+    if not company:
+        return company_not_found(company_name, candidates, format)
+
+    try:
+        is_postgres = get_db_pool().is_postgres
+    except Exception as e:
+        return tool_error(f"database unavailable ({e})", format)
+
+    today = date.today()
+    since = _period_start(_months_before(today.replace(day=1), max(months - 1, 0)), granularity)
+    since_param = since if is_postgres else since.isoformat()
+
+    if keyword:
+        rows = await execute_query_async(
+            """
+            SELECT r.period_start, 1 as keywords_tracked, r.avg_rank, r.best_rank,
+                   CASE WHEN r.last_rank <= 3 THEN 1 ELSE 0 END as top3_count,
+                   CASE WHEN r.last_rank <= 10 THEN 1 ELSE 0 END as top10_count,
+                   r.last_rank
+            FROM keywords k
+            JOIN keyword_rank_rollups r ON r.keyword_id = k.id
+            WHERE k.company_id = $1 AND LOWER(k.keyword) = LOWER($2)
+              AND r.granularity = $3 AND r.period_start >= $4
+            ORDER BY r.period_start
+            """,
+            (company["id"], keyword, granularity, since_param)
+        )
+    else:
+        rows = await execute_query_async(
+            """
+            SELECT period_start, keywords_tracked, avg_rank, best_rank, top3_count, top10_count
+            FROM company_rank_rollups
+            WHERE company_id = $1 AND granularity = $2 AND period_start >= $3
+            ORDER BY period_start
+            """,
+            (company["id"], granularity, since_param)
+        )
+
+    fields = ("keywords_tracked", "best_rank", "top3_count", "top10_count") + (("last_rank",) if keyword else ())
+    periods = [
+        {"period_start": _as_date(row["period_start"]).isoformat(), "avg_rank": float(row["avg_rank"]),
+         **{key: _json_value(row[key]) for key in fields}}
+        for row in rows or []
+    ]
+
+    direction = None
+    if periods:
+        first, last = periods[0]["avg_rank"], periods[-1]["avg_rank"]
+        direction = "improved" if last < first else "declined" if last > first else "held steady"
+
+    data = {
+        "company": {"id": company["id"], "name": company["name"]},
+        "keyword": keyword or None,
+        "granularity": granularity,
+        "since": since.isoformat(),
+        "until": today.isoformat(),
+        "periods": periods,
+        "direction": direction,
+    }
+    return tool_output(data, format, _render_rank_trend)
+
+
+# ============================================================================
+# MCP Tools - Lighthouse History
+# ============================================================================
+
+LIGHTHOUSE_HISTORY_ENABLED = os.getenv("LIGHTHOUSE_HISTORY_ENABLED", "true").lower() != "false"
+LIGHTHOUSE_PAYLOAD_RETENTION_DAYS = int(os.getenv("LIGHTHOUSE_PAYLOAD_RETENTION_DAYS", "90"))
+LIGHTHOUSE_REGRESSION_THRESHOLD = int(os.getenv("LIGHTHOUSE_REGRESSION_THRESHOLD", "5"))  # score points
+LIGHTHOUSE_HISTORY_MISSING = (
+    "Lighthouse history tables not found. Load database/lighthouse-history-schema.sql (or the -sqlite variant) first."
+)
+
+# Runs table and payload table per backend. PostgreSQL stores runs in seo_audits (02-core-seo.sql);
+# SQLite's seo_audits comes from seo-monitor-schema.sql without url/strategy columns, so
+# lighthouse-history-schema-sqlite.sql creates lighthouse_runs with the same columns instead.
+LIGHTHOUSE_TABLES = {
+    True: ("seo_audits", "seo_audit_payloads"),
+    False: ("lighthouse_runs", "lighthouse_run_payloads"),
+}
+
+# Score dict key -> runs table column
+LIGHTHOUSE_SCORE_COLUMNS = {
+    "performance": "performance_score",
+    "accessibility": "accessibility_score",
+    "best_practices": "best_practices_score",
+    "seo": "seo_score",
+}
+
+# zstd needs the optional zstandard package (pip install zstandard); gzip is the fallback.
+# The encoding is stored per row, so payloads written either way stay readable.
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+def compress_payload(result: Dict) -> Tuple[str, bytes, int]:
+    """Serialize and compress a lighthouseResult. Returns (encoding, payload, raw_bytes)."""
+    raw = json.dumps(result, separators=(",", ":")).encode("utf-8")
+    if ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw), len(raw)
+    return "gzip", gzip.compress(raw, compresslevel=6), len(raw)
+
+
+def decompress_payload(encoding: str, payload: bytes) -> Dict:
+    """Inverse of compress_payload."""
+    payload = bytes(payload)
+    if encoding == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("payload is zstd-compressed - install the zstandard package to read it")
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    elif encoding == "gzip":
+        raw = gzip.decompress(payload)
+    else:
+        raise ValueError(f"unknown payload encoding '{encoding}'")
+    return json.loads(raw)
+
+
+async def lighthouse_tables() -> Optional[Tuple[str, str]]:
+    """(runs table, payload table) for this database, or None when the history schema is not loaded."""
+    try:
+        is_postgres = get_db_pool().is_postgres
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        return None
+    runs, payloads = LIGHTHOUSE_TABLES[is_postgres]
+    # The url/strategy index comes from the history schema, so it doubles as the "history can be written" probe
+    if not await has_table(f"idx_{runs}_url_strategy_created"):
+        return None
+    return runs, payloads
+
+
+def _db_timestamp(value: datetime, is_postgres: bool) -> Any:
+    """Bind a UTC timestamp: a datetime for PostgreSQL, a sortable text value for SQLite."""
+    return value if is_postgres else value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _json_column(value: Any, default: Any) -> Any:
+    """Read a JSON column (parsed by psycopg2, text from asyncpg and SQLite)."""
+    if value is None:
+        return default
+    return json.loads(value) if isinstance(value, str) else value
+
+
+async def store_lighthouse_run(url: str, strategy: str, result: Dict) -> Optional[Any]:
+    """
+    Store one PSI run: scores in a seo_audits row (lighthouse_runs on SQLite),
+    the full lighthouseResult compressed in the matching payload table.
+
+    Best effort - a missing schema or a failed write is logged and never
+    fails the audit itself. Returns the new run id, or None.
     """
+    tables = await lighthouse_tables() if LIGHTHOUSE_HISTORY_ENABLED else None
+    if not tables:
+        return None
+    runs_table, payload_table = tables
+    is_postgres = get_db_pool().is_postgres
+
+    report = build_lighthouse_report(url, strategy, result)
+    scores = report["scores"]
+    now = _db_timestamp(datetime.now(timezone.utc), is_postgres)
+    metadata = {
+        "source": "pagespeed",
+        "final_url": result.get("finalDisplayedUrl") or result.get("finalUrl"),
+        "lighthouse_version": result.get("lighthouseVersion"),
+        "fetch_time": result.get("fetchTime"),
+        "metrics": {key: metric["value"] for key, metric in report["metrics"].items()},
+    }
+    issues = [{"id": opp["id"], "title": opp["title"], "score": opp["score"]} for opp in report["opportunities"]]
+
+    row = await execute_query_async(
+        f"""
+        INSERT INTO {runs_table}
+            (url, strategy, overall_score, performance_score, accessibility_score, best_practices_score,
+             seo_score, issues, metadata, created_at, updated_at)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $10)
+        RETURNING id
+        """,
+        (normalize_url(url), strategy, round(sum(scores.values()) / len(scores)), scores["performance"],
+         scores["accessibility"], scores["best_practices"], scores["seo"], json.dumps(issues),
+         json.dumps(metadata), now),
+        fetch_one=True
+    )
+    if not row:
+        logger.warning(f"Could not store Lighthouse run for {url} ({strategy})")
+        return None
+
+    encoding, payload, raw_bytes = await asyncio.to_thread(compress_payload, result)
+    stored = await execute_many_async(
+        f"INSERT INTO {payload_table} (audit_id, encoding, payload, raw_bytes, created_at) VALUES ($1, $2, $3, $4, $5)",
+        [(row["id"], encoding, payload, raw_bytes, now)]
+    )
+    if stored:
+        logger.info(f"Stored Lighthouse run {row['id']} for {url} ({strategy}): "
+                    f"{raw_bytes:,} bytes -> {len(payload):,} ({encoding})")
+    else:
+        logger.warning(f"Stored Lighthouse scores for {url} ({strategy}) without the raw payload")
+    return row["id"]
+
+
+def compare_lighthouse_runs(current: Dict[str, Any], previous: Dict[str, Any],
+                            threshold: int) -> Tuple[Dict[str, int], List[str]]:
+    """Score deltas between two runs, and the categories that dropped by at least ``threshold`` points."""
+    deltas = {}
+    for key in LIGHTHOUSE_SCORE_COLUMNS:
+        if current.get(key) is not None and previous.get(key) is not None:
+            deltas[key] = current[key] - previous[key]
+    return deltas, [key for key, delta in deltas.items() if delta <= -threshold]
+
+
+def _lighthouse_run(row: Dict) -> Dict[str, Any]:
+    """Shape a stored run row for output."""
+    return {
+        "audit_id": _json_value(row["id"]),
+        "audited_at": _json_value(row["created_at"]),
+        "overall": row["overall_score"],
+        **{key: row[column] for key, column in LIGHTHOUSE_SCORE_COLUMNS.items()},
+    }
 
-    result = execute_query(query, (f"%{company_name}%",), fetch_one=True)
 
-    if not result:
-        return f"No company found matching '{company_name}'. Please check the name or add the company to the database."
+_SCORE_LABELS = {"performance": "Perf", "accessibility": "A11y", "best_practices": "BP", "seo": "SEO"}
+
+
+def _format_deltas(deltas: Dict[str, int]) -> str:
+    return ", ".join(f"{_SCORE_LABELS[key]} {delta:+d}" for key, delta in deltas.items() if delta)
+
+
+def _render_lighthouse_history(data: Dict[str, Any]) -> str:
+    runs = data["runs"]
+    if not runs:
+        return f"No stored Lighthouse runs for {data['url']} ({data['strategy']}). Run run_lighthouse_audit first."
 
     response = f"""
-Company Overview: {result.get('name', 'N/A')}
+Lighthouse History for {data['url']} ({data['strategy']})
 {'=' * 60}
 
-CONTACT INFORMATION:
-- Address: {result.get('address', 'N/A')}
-- City/State: {result.get('city', 'N/A')}, {result.get('state', 'N/A')} {result.get('zip', 'N/A')}
-- Phone: {result.get('phone', 'N/A')}
-- Email: {result.get('email', 'N/A')}
-- Website: {result.get('website', 'N/A')}
+Runs: {len(runs)} (newest first) | Regression threshold: {data['threshold']} points
 
-BUSINESS DETAILS:
-- Industry: {result.get('industry', 'N/A')}
-- Services: {result.get('services', 'N/A')}
-- Description: {result.get('description', 'N/A')}
+"""
+    for run in runs:
+        response += (f"{run['audited_at']}: Overall {run['overall']} | Perf {run['performance']} | "
+                     f"A11y {run['accessibility']} | BP {run['best_practices']} | SEO {run['seo']}")
+        if _format_deltas(run["deltas"]):
+            response += f" ({_format_deltas(run['deltas'])})"
+        if run["regressions"]:
+            response += " ⚠️ REGRESSION"
+        response += "\n"
+
+    if data["regressions"]:
+        response += f"\n{len(data['regressions'])} run(s) regressed. Use get_stored_lighthouse_audit with an audit_id "
+        response += "to see the full report for a run."
+    return response
 
-ONLINE PRESENCE:
-- Google Business Profile: {result.get('gbp_url', 'Not set up')}
-- Social Profiles: {result.get('social_profiles', 'None')}
 
-SEO METRICS:
-- Total Audits: {result.get('audit_count', 0)}
-- Last Audit: {result.get('last_audit_date', 'Never')}
-- Tracked Keywords: {result.get('keyword_count', 0)}
-- Tracked Competitors: {result.get('competitor_count', 0)}
-- Citations: {result.get('citation_count', 0)}
+@mcp.tool()
+async def get_lighthouse_history(url: str, strategy: str = "mobile", limit: int = 20,
+                                 threshold: int = LIGHTHOUSE_REGRESSION_THRESHOLD,
+                                 format: str = "text") -> ToolResult:
+    """
+    Show stored Lighthouse scores for a URL over time, flagging regressions.
 
-CREATED: {result.get('created_at', 'N/A')}
-LAST UPDATED: {result.get('updated_at', 'N/A')}
+    Read from stored runs only - no PageSpeed Insights call is made.
+
+    Args:
+        url: Website URL that was audited
+        strategy: "mobile" or "desktop" (default: "mobile")
+        limit: Maximum number of runs to return, newest first (default: 20)
+        threshold: Score drop (in points) that counts as a regression (default: LIGHTHOUSE_REGRESSION_THRESHOLD)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Each run's category scores, change since the previous run and regression flags
+    """
+    tables = await lighthouse_tables()
+    if not tables:
+        return tool_error(LIGHTHOUSE_HISTORY_MISSING, format)
+    runs_table, _ = tables
+
+    strategy = strategy.lower()
+    url = normalize_url(url)
+    logger.info(f"Fetching Lighthouse history for {url} ({strategy})")
+
+    # One extra row so the oldest returned run still gets a comparison
+    rows = await execute_query_async(
+        f"""
+        SELECT id, created_at, overall_score, performance_score, accessibility_score,
+               best_practices_score, seo_score
+        FROM {runs_table}
+        WHERE url = $1 AND strategy = $2
+        ORDER BY created_at DESC
+        LIMIT $3
+        """,
+        (url, strategy, max(1, limit) + 1)
+    )
+    runs = [{**_lighthouse_run(row), "deltas": {}, "regressions": []} for row in rows or []]
+
+    for current, previous in pairwise(runs):
+        current["deltas"], current["regressions"] = compare_lighthouse_runs(current, previous, threshold)
+    runs = runs[:max(1, limit)]
+
+    data = {
+        "url": url,
+        "strategy": strategy,
+        "threshold": threshold,
+        "runs": runs,
+        "regressions": [run["audit_id"] for run in runs if run["regressions"]],
+    }
+    return tool_output(data, format, _render_lighthouse_history)
+
+
+def _render_lighthouse_regressions(data: Dict[str, Any]) -> str:
+    response = f"""
+Lighthouse Regressions (last {data['days']} days)
+{'=' * 60}
+
+URLs Compared: {data['compared']}
+Regressions (drop of {data['threshold']}+ points): {len(data['regressions'])}
 """
+    if not data["regressions"]:
+        return response + "\nNo regressions between each URL's two most recent runs."
 
+    response += "\n"
+    for row in data["regressions"]:
+        response += f"❌ {row['url']} ({row['strategy']}) at {row['audited_at']}: {_format_deltas(row['deltas'])}\n"
     return response
 
 
 @mcp.tool()
-async def get_keyword_rankings(company_name: str, limit: int = 20) -> str:
+async def find_lighthouse_regressions(days: int = 30, threshold: int = LIGHTHOUSE_REGRESSION_THRESHOLD,
+                                      limit: int = 50, format: str = "text") -> ToolResult:
     """
-    Get current keyword rankings for a company.
+    Find every URL whose latest stored Lighthouse run scored worse than the run before it.
+
+    Compares the two most recent runs per URL/strategy recorded in the last
+    ``days`` days, straight from the stored runs - no PageSpeed Insights calls.
 
     Args:
-        company_name: Name of the company
-        limit: Maximum number of keywords to return (default: 20)
+        days: Only consider runs from this many days back (default: 30)
+        threshold: Score drop (in points) that counts as a regression (default: LIGHTHOUSE_REGRESSION_THRESHOLD)
+        limit: Maximum regressions to return, largest drop first (default: 50)
+        format: "text" for a readable report or "json" for structured data (default: "text")
 
     Returns:
-        List of tracked keywords with current rankings
+        URLs with regressed categories and the size of each drop
     """
-    logger.info(f"Fetching keyword rankings for: {company_name}")
+    tables = await lighthouse_tables()
+    if not tables:
+        return tool_error(LIGHTHOUSE_HISTORY_MISSING, format)
+    runs_table, _ = tables
+
+    since = _db_timestamp(datetime.now(timezone.utc) - timedelta(days=days), get_db_pool().is_postgres)
+    rows = await execute_query_async(
+        f"""
+        SELECT url, strategy, id, created_at, overall_score, performance_score, accessibility_score,
+               best_practices_score, seo_score
+        FROM (
+            SELECT a.*, ROW_NUMBER() OVER (PARTITION BY url, strategy ORDER BY created_at DESC) as run_number
+            FROM {runs_table} a
+            WHERE strategy IS NOT NULL AND created_at >= $1
+        ) ranked
+        WHERE run_number <= 2
+        ORDER BY url, strategy, run_number
+        """,
+        (since,)
+    )
+
+    latest: Dict[Tuple[str, str], List[Dict]] = {}
+    for row in rows or []:
+        latest.setdefault((row["url"], row["strategy"]), []).append(row)
+
+    regressions = []
+    compared = 0
+    for (url, strategy), pair in latest.items():
+        if len(pair) < 2:
+            continue
+        compared += 1
+        current, previous = _lighthouse_run(pair[0]), _lighthouse_run(pair[1])
+        deltas, regressed = compare_lighthouse_runs(current, previous, threshold)
+        if regressed:
+            regressions.append({
+                "url": url,
+                "strategy": strategy,
+                "audit_id": current["audit_id"],
+                "previous_audit_id": previous["audit_id"],
+                "audited_at": current["audited_at"],
+                "deltas": {key: deltas[key] for key in regressed},
+            })
 
-    query = """
-    SELECT k.keyword, k.location, k.current_rank, k.search_volume,
-           k.difficulty, k.competition_level, k.last_checked
-    FROM keywords k
-    JOIN companies c ON k.company_id = c.id
-    WHERE LOWER(c.name) LIKE LOWER($1)
-    ORDER BY k.current_rank ASC, k.search_volume DESC
-    LIMIT $2
+    regressions.sort(key=lambda row: min(row["deltas"].values()))
+    data = {
+        "days": days,
+        "threshold": threshold,
+        "compared": compared,
+        "regressions": regressions[:max(1, limit)],
+    }
+    return tool_output(data, format, _render_lighthouse_regressions)
+
+
+@mcp.tool()
+async def get_stored_lighthouse_audit(url: str = "", strategy: str = "mobile", audit_id: str = "",
+                                      format: str = "text") -> ToolResult:
+    """
+    Re-render a stored Lighthouse run from its compressed payload, without calling PageSpeed Insights.
+
+    Args:
+        url: Website URL - returns its most recent stored run with a payload
+        strategy: "mobile" or "desktop" (default: "mobile")
+        audit_id: A specific run id (from get_lighthouse_history); overrides url/strategy
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        The same report as run_lighthouse_audit, plus when the run happened
     """
+    if not url and not audit_id:
+        return tool_error("Provide a url or an audit_id", format)
+    tables = await lighthouse_tables()
+    if not tables:
+        return tool_error(LIGHTHOUSE_HISTORY_MISSING, format)
+    runs_table, payload_table = tables
+
+    columns = f"SELECT a.id, a.url, a.strategy, a.created_at, p.encoding, p.payload FROM {runs_table} a " \
+              f"JOIN {payload_table} p ON p.audit_id = a.id"
+    if audit_id:
+        row = await execute_query_async(f"{columns} WHERE a.id = $1", (audit_id,), fetch_one=True)
+        subject = f"audit {audit_id}"
+    else:
+        strategy = strategy.lower()
+        row = await execute_query_async(
+            f"{columns} WHERE a.url = $1 AND a.strategy = $2 ORDER BY a.created_at DESC LIMIT 1",
+            (normalize_url(url), strategy), fetch_one=True
+        )
+        subject = f"{url} ({strategy})"
+    if not row:
+        return tool_error(f"No stored Lighthouse payload for {subject} (it may have been pruned)", format)
+
+    try:
+        result = await asyncio.to_thread(decompress_payload, row["encoding"], row["payload"])
+    except Exception as e:
+        return tool_error(f"Could not read stored payload: {e}", format)
 
-    results = execute_query(query, (f"%{company_name}%", limit))
+    data = build_lighthouse_report(row["url"], row["strategy"], result)
+    data["audit_id"] = _json_value(row["id"])
+    data["audited_at"] = _json_value(row["created_at"])
+    return tool_output(data, format, _render_lighthouse_audit)
 
-    if not results:
-        return f"No keyword data found for '{company_name}'"
 
-    response = f"""
-Keyword Rankings: {company_name}
+def _render_lighthouse_prune(data: Dict[str, Any]) -> str:
+    return f"""
+Lighthouse Payload Pruning
 {'=' * 60}
 
-Total Tracked Keywords: {len(results)}
+Retention: {data['retention_days']} days (cutoff {data['cutoff']})
+Latest Payload Per URL Kept: {'Yes' if data['keep_latest'] else 'No'}
+Payloads Deleted: {data['deleted']:,}
+Space Freed: {data['stored_bytes_freed']:,} bytes compressed ({data['raw_bytes_freed']:,} bytes raw)
 
+Scores stay in the runs table, so get_lighthouse_history is unaffected.
 """
 
-    for i, row in enumerate(results, 1):
-        rank_display = f"#{row.get('current_rank')}" if row.get('current_rank') else "Unranked"
-        response += f"{i}. {row.get('keyword', 'N/A')} ({row.get('location', 'N/A')})\n"
-        response += f"   Rank: {rank_display} | "
-        response += f"Volume: {row.get('search_volume', 'N/A')} | "
-        response += f"Difficulty: {row.get('difficulty', 'N/A')}/100\n"
-        response += f"   Competition: {row.get('competition_level', 'N/A')} | "
-        response += f"Last Checked: {row.get('last_checked', 'N/A')}\n\n"
 
-    return response
+@mcp.tool()
+async def prune_lighthouse_payloads(retention_days: int = LIGHTHOUSE_PAYLOAD_RETENTION_DAYS,
+                                    keep_latest: bool = True, format: str = "text") -> ToolResult:
+    """
+    Delete stored raw Lighthouse payloads older than the retention period.
+
+    Only the compressed blobs go; score rows are kept, so
+    history and regression checks keep working for pruned runs.
+
+    Args:
+        retention_days: Keep payloads newer than this many days (default: LIGHTHOUSE_PAYLOAD_RETENTION_DAYS)
+        keep_latest: Always keep the newest payload for each URL/strategy (default: True)
+        format: "text" for a readable report or "json" for structured data (default: "text")
+
+    Returns:
+        Number of payloads deleted and bytes freed
+    """
+    tables = await lighthouse_tables()
+    if not tables:
+        return tool_error(LIGHTHOUSE_HISTORY_MISSING, format)
+    runs_table, payload_table = tables
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max(0, retention_days))
+    query = f"DELETE FROM {payload_table} WHERE created_at < $1"
+    if keep_latest:
+        query += f"""
+          AND audit_id NOT IN (
+              SELECT id FROM (
+                  SELECT a.id, ROW_NUMBER() OVER (PARTITION BY a.url, a.strategy ORDER BY a.created_at DESC) as run_number
+                  FROM {runs_table} a
+                  JOIN {payload_table} p ON p.audit_id = a.id
+              ) latest
+              WHERE run_number = 1
+          )"""
+    query += "\nRETURNING raw_bytes, length(payload) as stored_bytes"
+
+    rows = await execute_query_async(query, (_db_timestamp(cutoff, get_db_pool().is_postgres),))
+    if rows is None:
+        return tool_error("Failed to prune Lighthouse payloads", format)
+
+    logger.info(f"Pruned {len(rows)} Lighthouse payloads older than {retention_days} days")
+    data = {
+        "retention_days": retention_days,
+        "cutoff": cutoff.isoformat(timespec="seconds"),
+        "keep_latest": keep_latest,
+        "deleted": len(rows),
+        "raw_bytes_freed": sum(row["raw_bytes"] for row in rows),
+        "stored_bytes_freed": sum(row["stored_bytes"] for row in rows),
+    }
+    return tool_output(data, format, _render_lighthouse_prune)
 
 
 # ============================================================================
@@ -1246,7 +5574,10 @@ def main():
         logger.warning("Some features will be unavailable without these keys")
 
     # Run the server
-    mcp.run(transport='stdio')
+    try:
+        mcp.run(transport='stdio')
+    finally:
+        close_db_pool()
 
 
 if __name__ == "__main__":
@@ -65,6 +65,7 @@ def check_dependencies():
         "mcp": "MCP SDK",
         "httpx": "HTTP Client",
         "psycopg2": "PostgreSQL Driver (optional)",
+        "asyncpg": "Async PostgreSQL Driver (optional)",
     }
 
     all_installed = True
@@ -74,7 +75,7 @@ def check_dependencies():
             __import__(module)
             print_success(f"{name} is installed")
         except ImportError:
-            if module == "psycopg2":
+            if module in ("psycopg2", "asyncpg"):
                 print_warning(f"{name} is not installed (only needed for PostgreSQL)")
             else:
                 print_error(f"{name} is not installed")
@@ -0,0 +1,54 @@
+"""
+Shared pytest setup: put the server module and mcp-servers/shared on sys.path,
+the same way server.py imports the shared engines.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_DIR = os.path.join(HERE, "..", "..", "..", "database")
+sys.path.insert(0, os.path.join(HERE, "..", "..", "shared"))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+
+@pytest.fixture
+async def sqlite_db(tmp_path, monkeypatch):
+    """
+    The server pointed at a fresh SQLite database with the core, seo-monitor,
+    rank history and Lighthouse history schemas loaded; yields a sqlite3 connection for seeding rows.
+
+    Result caches are memory-only and job checkpoints live under tmp_path, so
+    tests never share state or write outside it.
+    """
+    import server
+
+    path = str(tmp_path / "geo-seo.db")
+    conn = sqlite3.connect(path)
+    # seo-monitor-schema.sql goes first, as in scripts/init-db-ordered.js, so its seo_audits is the one in place
+    for name in ("schema.sql", "seo-monitor-schema.sql", "rank-history-schema-sqlite.sql",
+                 "lighthouse-history-schema-sqlite.sql"):
+        with open(os.path.join(SCHEMA_DIR, name)) as f:
+            conn.executescript(f.read())
+    conn.commit()
+
+    await server.close_async_db()
+    server.close_db_pool()
+    monkeypatch.setattr(server, "DATABASE_URL", None)
+    monkeypatch.setattr(server, "SQLITE_PATH", path)
+    monkeypatch.setattr(server, "CACHE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(server, "_checkpoint_db", None)
+    monkeypatch.setattr(server, "_table_probes", {})
+    monkeypatch.setattr(server, "get_cache", lambda namespace, ttl, max_memory_entries=128, **_: server.ResultCache(
+        namespace, ttl, max_memory_entries, db_path=None))
+    try:
+        yield conn
+    finally:
+        conn.close()
+        await server.close_async_db()
+        server.close_db_pool()
+        if server._checkpoint_db is not None:
+            server._checkpoint_db.close()
@@ -0,0 +1,102 @@
+"""Tests for keyset pagination in list_keyword_rankings."""
+
+import pytest
+
+import server
+from server import RANKINGS_UNRANKED, _decode_cursor, _encode_cursor
+
+
+@pytest.mark.parametrize("values", [
+    [1, 0, 1],
+    [RANKINGS_UNRANKED, -5000, 123456789],
+    [7, -320, "5b0c9c4e-0d1e-4d8a-9f3e-6f1c2d3a4b5c"],
+])
+def test_cursor_round_trip(values):
+    cursor = _encode_cursor(values)
+    assert _decode_cursor(cursor) == values
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+def test_cursor_is_stable():
+    assert _encode_cursor([3, -100, 42]) == _encode_cursor([3, -100, 42])
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor!", _encode_cursor([1, 2]), _encode_cursor({"a": 1})])
+def test_malformed_cursor_raises(cursor):
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
+
+
+async def test_invalid_cursor_is_a_tool_error():
+    result = await server.list_keyword_rankings("Acme", cursor="%%%")
+    assert result["error"].startswith("Invalid cursor")
+
+
+@pytest.fixture
+def company(sqlite_db):
+    company_id = sqlite_db.execute(
+        "INSERT INTO companies (name, address, city, state, zip, phone, website) "
+        "VALUES ('Acme Plumbing', '', 'Brisbane', 'QLD', '4000', '', 'https://acme.example')").lastrowid
+    # Ties on rank and on volume, plus unranked keywords, so paging has to use every key column
+    rows = [(f"kw{i:02d}", rank, volume) for i, (rank, volume) in enumerate(
+        [(1, 500), (1, 500), (1, 200), (3, 900), (3, None), (None, 800), (None, 800), (2, 100), (None, None),
+         (3, 900), (10, 50), (1, 500)])]
+    sqlite_db.executemany(
+        "INSERT INTO keywords (company_id, keyword, location, current_rank, search_volume) "
+        "VALUES (?, ?, 'Brisbane', ?, ?)", [(company_id, *row) for row in rows])
+    sqlite_db.commit()
+    return sqlite_db
+
+
+async def collect(page_size, **filters):
+    pages, cursor = [], None
+    while True:
+        page = await server.list_keyword_rankings("Acme Plumbing", page_size=page_size, cursor=cursor, **filters)
+        assert "error" not in page
+        pages.append([row["keyword"] for row in page["rows"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 5, 12, 50])
+async def test_pages_cover_every_row_once_in_order(company, page_size):
+    pages = await collect(page_size)
+
+    # Rank ascending (unranked last), then volume descending, then id
+    assert [keyword for page in pages for keyword in page] == [
+        "kw00", "kw01", "kw11", "kw02", "kw07", "kw03", "kw09", "kw04", "kw10", "kw05", "kw06", "kw08"]
+    assert all(len(page) == page_size for page in pages[:-1])
+
+
+async def test_pages_respect_rank_filters(company):
+    pages = await collect(2, min_rank=2, max_rank=3)
+    assert [keyword for page in pages for keyword in page] == ["kw07", "kw03", "kw09", "kw04"]
+
+
+async def test_rows_inserted_ahead_of_the_cursor_do_not_shift_later_pages(company):
+    first = await server.list_keyword_rankings("Acme Plumbing", page_size=4)
+    company.execute("INSERT INTO keywords (company_id, keyword, location, current_rank, search_volume) "
+                    "VALUES (1, 'late', 'Brisbane', 1, 9999)")
+    company.commit()
+    rest = await server.list_keyword_rankings("Acme Plumbing", page_size=50, cursor=first["next_cursor"])
+
+    seen = [row["keyword"] for row in first["rows"] + rest["rows"]]
+    assert "late" not in seen
+    assert len(seen) == len(set(seen)) == 12
+
+
+async def test_checked_since_filters_by_date(company):
+    company.execute("UPDATE keywords SET last_checked = '2026-05-01 08:00:00'")
+    company.execute("UPDATE keywords SET last_checked = '2026-06-15 08:00:00' WHERE keyword IN ('kw03', 'kw08')")
+    company.commit()
+
+    page = await server.list_keyword_rankings("Acme Plumbing", checked_since="2026-06-15")
+    assert [row["keyword"] for row in page["rows"]] == ["kw03", "kw08"]
+    assert page["filters"]["checked_since"] == "2026-06-15"
+
+
+@pytest.mark.parametrize("checked_since", ["15/06/2026", "2026-13-01", "yesterday"])
+async def test_invalid_checked_since_is_a_tool_error(checked_since):
+    result = await server.list_keyword_rankings("Acme Plumbing", checked_since=checked_since)
+    assert result["error"].startswith("Invalid checked_since")
@@ -0,0 +1,54 @@
+"""Tests for refresh_keyword_metrics scoping updates to the requested SEMrush database."""
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def keywords(sqlite_db, monkeypatch):
+    company_id = sqlite_db.execute(
+        "INSERT INTO companies (name, address, city, state, zip, phone, website) "
+        "VALUES ('Acme Plumbing', '', 'Brisbane', 'QLD', '4000', '', 'https://acme.example')").lastrowid
+    sqlite_db.executemany("INSERT INTO keywords (company_id, keyword, location) VALUES (?, ?, ?)", [
+        (company_id, "plumber", "Brisbane"),
+        (company_id, "plumber", "Sydney"),
+        (company_id, "plumber", "Austin"),
+        (company_id, "blocked drain", "brisbane"),
+    ])
+    sqlite_db.commit()
+
+    monkeypatch.setattr(server, "SEMRUSH_API_KEY", "test")
+    monkeypatch.setattr(server, "SEMRUSH_LOCATION_DATABASES", {"brisbane": "au", "sydney": "au"})
+    monkeypatch.setattr(server, "SEMRUSH_DEFAULT_DATABASE", "us")
+    return sqlite_db
+
+
+def metrics_from(volumes, requested):
+    async def fetch(phrases, database):
+        requested.append((sorted(phrases), database))
+        return {phrase: {"Ph": phrase, "Nq": volumes[database], "Kd": 40} for phrase in phrases}
+    return fetch
+
+
+async def test_only_rows_in_the_databases_country_are_updated(keywords, monkeypatch):
+    requested = []
+    monkeypatch.setattr(server, "fetch_keyword_metrics_chunk", metrics_from({"au": 1900, "us": 60500}, requested))
+
+    result = await server.refresh_keyword_metrics(database="AU", resume=False, format="json")
+
+    assert requested == [(["blocked drain", "plumber"], "au")]
+    assert (result["processed"], result["updated"], result["other_databases"]) == (2, 3, 1)
+    assert sorted(keywords.execute("SELECT keyword, location, search_volume FROM keywords")) == [
+        ("blocked drain", "brisbane", 1900), ("plumber", "Austin", None), ("plumber", "Brisbane", 1900),
+        ("plumber", "Sydney", 1900)]
+
+    await server.refresh_keyword_metrics(database="us", resume=False, format="json")
+    assert keywords.execute("SELECT location, search_volume FROM keywords WHERE keyword = 'plumber' "
+                            "ORDER BY location").fetchall() == [("Austin", 60500), ("Brisbane", 1900), ("Sydney", 1900)]
+
+
+def test_unlisted_locations_use_the_default_database(keywords):
+    assert server.location_database(" Sydney ") == "au"
+    assert server.location_database("Perth") == "us"
+    assert server.location_database(None) == "us"
@@ -0,0 +1,67 @@
+"""Tests for storing Lighthouse runs and reading them back on SQLite."""
+
+import pytest
+
+import server
+
+
+def lighthouse_result(performance, seo=0.9, fetch_time="2026-06-01T08:00:00.000Z"):
+    return {
+        "finalDisplayedUrl": "https://acme.example/",
+        "fetchTime": fetch_time,
+        "categories": {"performance": {"score": performance}, "accessibility": {"score": 0.8},
+                       "best-practices": {"score": 0.75}, "seo": {"score": seo}},
+        "audits": {"largest-contentful-paint": {"displayValue": "2.1 s", "numericValue": 2100.0},
+                   "render-blocking-resources": {"score": 0.4, "title": "Eliminate render-blocking resources"}},
+    }
+
+
+async def test_runs_are_stored_beside_the_seo_monitor_table(sqlite_db):
+    audit_id = await server.store_lighthouse_run("https://Acme.example", "mobile", lighthouse_result(0.92))
+
+    assert audit_id
+    (url, strategy, performance, overall), = sqlite_db.execute(
+        "SELECT url, strategy, performance_score, overall_score FROM lighthouse_runs")
+    assert (url, strategy, performance, overall) == ("https://acme.example/", "mobile", 92, 84)
+    assert sqlite_db.execute("SELECT COUNT(*) FROM seo_audits").fetchone() == (0,)
+    (encoding,), = sqlite_db.execute("SELECT encoding FROM lighthouse_run_payloads WHERE audit_id = ?", (audit_id,))
+    assert encoding in ("zstd", "gzip")
+
+
+async def test_history_flags_regressions_and_rerenders_from_the_payload(sqlite_db):
+    await server.store_lighthouse_run("https://acme.example", "mobile", lighthouse_result(0.95))
+    await server.store_lighthouse_run("https://acme.example", "mobile", lighthouse_result(0.70, seo=0.91))
+
+    history = await server.get_lighthouse_history("https://acme.example", format="json")
+    assert [run["performance"] for run in history["runs"]] == [70, 95]
+    assert history["runs"][0]["deltas"] == {"performance": -25, "accessibility": 0, "best_practices": 0, "seo": 1}
+    assert history["regressions"] == [history["runs"][0]["audit_id"]]
+
+    regressions = await server.find_lighthouse_regressions(format="json")
+    assert regressions["compared"] == 1
+    assert regressions["regressions"][0]["deltas"] == {"performance": -25}
+
+    stored = await server.get_stored_lighthouse_audit("https://acme.example", format="json")
+    assert stored["audit_id"] == history["runs"][0]["audit_id"]
+    assert stored["scores"]["performance"] == 70
+    assert stored["metrics"]["largest_contentful_paint"]["value"] == 2100.0
+
+
+async def test_prune_keeps_the_latest_payload(sqlite_db):
+    for performance in (0.9, 0.8, 0.7):
+        await server.store_lighthouse_run("https://acme.example", "mobile", lighthouse_result(performance))
+
+    pruned = await server.prune_lighthouse_payloads(retention_days=0, format="json")
+
+    assert pruned["deleted"] == 2
+    assert sqlite_db.execute("SELECT COUNT(*) FROM lighthouse_run_payloads").fetchone() == (1,)
+    assert sqlite_db.execute("SELECT COUNT(*) FROM lighthouse_runs").fetchone() == (3,)
+
+
+@pytest.mark.parametrize("tool", [server.get_lighthouse_history, server.get_stored_lighthouse_audit])
+async def test_missing_schema_is_a_tool_error(sqlite_db, tool):
+    sqlite_db.executescript("DROP TABLE lighthouse_run_payloads; DROP TABLE lighthouse_runs;")
+    server._table_probes.clear()
+
+    result = await tool("https://acme.example", format="json")
+    assert result["error"].startswith("Lighthouse history tables not found")
@@ -0,0 +1,125 @@
+"""Tests for the rank history block codec, rollups and incremental refresh."""
+
+from datetime import date
+
+import pytest
+
+import server
+from server import _fold_rank_batch, _months_before, decode_rank_block, encode_rank_block
+
+
+@pytest.mark.parametrize("ranks", [
+    {},
+    {1: 1},
+    {1: 5, 2: 5, 3: 5},
+    {1: 100, 2: 1, 31: 100},
+    {day: (day * 37) % 101 + 1 for day in range(1, 32)},
+    {3: 64, 4: 1, 9: 8000, 10: 3},  # deltas that need multi-byte varints
+])
+def test_rank_block_round_trip(ranks):
+    bitmap, blob = encode_rank_block(ranks)
+    assert decode_rank_block(bitmap, blob) == ranks
+    assert bin(bitmap).count("1") == len(ranks)
+
+
+def test_rank_block_stable_ranks_cost_one_byte_a_day():
+    bitmap, blob = encode_rank_block(dict.fromkeys(range(1, 29), 12))
+    assert bitmap == (1 << 28) - 1
+    assert len(blob) == 28
+
+
+def test_months_before_steps_whole_calendar_months():
+    assert _months_before(date(2026, 3, 1), 1) == date(2026, 2, 1)
+    assert _months_before(date(2026, 3, 1), 11) == date(2025, 4, 1)
+    assert _months_before(date(2026, 1, 1), 1) == date(2025, 12, 1)
+    assert _months_before(date(2026, 12, 1), 0) == date(2026, 12, 1)
+
+
+def seed_company(db, name="Acme Plumbing", keywords=("plumber", "blocked drain")):
+    cursor = db.execute(
+        "INSERT INTO companies (name, address, city, state, zip, phone, website) VALUES (?, '', 'Brisbane', 'QLD', "
+        "'4000', '', 'https://acme.example')", (name,))
+    company_id = cursor.lastrowid
+    keyword_ids = [
+        db.execute("INSERT INTO keywords (company_id, keyword, location) VALUES (?, ?, 'Brisbane')",
+                   (company_id, keyword)).lastrowid
+        for keyword in keywords
+    ]
+    db.commit()
+    return company_id, keyword_ids
+
+
+def rows_for(company_id, keyword_id, ranks):
+    return [{"keyword_id": keyword_id, "company_id": company_id, "date": day, "rank": rank}
+            for day, rank in ranks.items()]
+
+
+def query(db, sql, *params):
+    return [tuple(row) for row in db.execute(sql, params)]
+
+
+async def test_fold_writes_blocks_and_rollups(sqlite_db):
+    company_id, (plumber, drain) = seed_company(sqlite_db)
+    rows = (rows_for(company_id, plumber, {"2026-03-30": 4, "2026-03-31": 2, "2026-04-01": 3})
+            + rows_for(company_id, drain, {"2026-04-01": 15}))
+
+    counts = await _fold_rank_batch(rows, is_postgres=False)
+
+    assert counts == {"blocks": 3, "keyword_rollups": 5, "company_rollups": 3}
+    blocks = {(keyword_id, month): decode_rank_block(bitmap, blob) for keyword_id, month, bitmap, blob in
+              query(sqlite_db, "SELECT keyword_id, month_start, days_present, ranks FROM rank_history_blocks")}
+    assert blocks == {(plumber, "2026-03-01"): {30: 4, 31: 2}, (plumber, "2026-04-01"): {1: 3},
+                      (drain, "2026-04-01"): {1: 15}}
+
+    # 2026-03-30 is a Monday, so the week spans the month edge
+    assert query(sqlite_db, """
+        SELECT period_start, samples, avg_rank, best_rank, worst_rank, first_rank, last_rank
+        FROM keyword_rank_rollups WHERE keyword_id = ? AND granularity = 'week'""", plumber) == [
+        ("2026-03-30", 3, 3.0, 2, 4, 4, 3)]
+    assert query(sqlite_db, """
+        SELECT period_start, keywords_tracked, avg_rank, best_rank, top3_count, top10_count, top100_count
+        FROM company_rank_rollups WHERE company_id = ? AND granularity = 'month' ORDER BY period_start""",
+        company_id) == [("2026-03-01", 1, 3.0, 2, 1, 1, 1), ("2026-04-01", 2, 9.0, 3, 1, 1, 2)]
+
+
+async def test_fold_merges_with_existing_blocks(sqlite_db):
+    company_id, (plumber, _) = seed_company(sqlite_db)
+    await _fold_rank_batch(rows_for(company_id, plumber, {"2026-05-01": 9, "2026-05-02": 8}), is_postgres=False)
+    # A later batch adds a day and corrects one; re-folding is idempotent
+    batch = rows_for(company_id, plumber, {"2026-05-02": 6, "2026-05-03": 5})
+    await _fold_rank_batch(batch, is_postgres=False)
+    await _fold_rank_batch(batch, is_postgres=False)
+
+    (bitmap, blob), = query(sqlite_db, "SELECT days_present, ranks FROM rank_history_blocks")
+    assert decode_rank_block(bitmap, blob) == {1: 9, 2: 6, 3: 5}
+    assert query(sqlite_db, """
+        SELECT samples, avg_rank, first_rank, last_rank FROM keyword_rank_rollups
+        WHERE granularity = 'month'""") == [(3, 6.67, 9, 5)]
+
+
+async def test_fold_skips_rows_without_a_rank_or_date(sqlite_db):
+    company_id, (plumber, _) = seed_company(sqlite_db)
+    rows = [{"keyword_id": plumber, "company_id": company_id, "date": None, "rank": 3},
+            {"keyword_id": plumber, "company_id": company_id, "date": "2026-05-01", "rank": None}]
+    assert await _fold_rank_batch(rows, is_postgres=False) == {"blocks": 0, "keyword_rollups": 0,
+                                                               "company_rollups": 0}
+
+
+async def test_refresh_picks_up_rows_committed_behind_the_watermark(sqlite_db):
+    company_id, (plumber, drain) = seed_company(sqlite_db)
+    sqlite_db.executemany("INSERT INTO rankings (keyword_id, rank, date, created_at) VALUES (?, ?, ?, ?)", [
+        (plumber, 5, "2026-06-01", "2026-06-01 10:00:00"),
+        (plumber, 4, "2026-06-02", "2026-06-02 10:00:00"),
+    ])
+    sqlite_db.commit()
+    first = await server.refresh_rank_history(format="json")
+    assert first["watermark"]["created_at"] == "2026-06-02 10:00:00"
+
+    # Created before the watermark but only visible now (a late commit)
+    sqlite_db.execute("INSERT INTO rankings (keyword_id, rank, date, created_at) VALUES (?, 20, '2026-06-02', "
+                      "'2026-06-02 09:58:00')", (drain,))
+    sqlite_db.commit()
+    second = await server.refresh_rank_history(format="json")
+
+    assert second["watermark"] == first["watermark"]
+    assert query(sqlite_db, "SELECT keyword_id FROM rank_history_blocks ORDER BY keyword_id") == [(plumber,), (drain,)]
@@ -0,0 +1,66 @@
+"""Tests for fetch_semrush_report's handling of upstream responses."""
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.fixture
+def semrush(monkeypatch):
+    """Serve SEMrush requests from a queue of (status, body) responses; yields the request log."""
+    responses, requests = [], []
+
+    def handler(request):
+        requests.append(request)
+        status, body = responses.pop(0)
+        return httpx.Response(status, text=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(server, "get_http_client", lambda upstream="default": client)
+    # A memory-only cache that lives for the whole test
+    monkeypatch.setattr(server, "_caches", {"semrush": server.ResultCache("semrush", 3600, db_path=None)})
+    monkeypatch.setattr(server, "_semrush_units", {"spent": 0, "saved": 0, "shared": 0})
+    return responses, requests
+
+
+PARAMS = {"type": "phrase_this", "key": "secret", "export_columns": "Ph,Nq", "phrase": "plumber", "database": "au"}
+
+
+async def test_report_is_parsed_and_cached(semrush):
+    responses, requests = semrush
+    responses.append((200, "Keyword;Search Volume\nplumber;1900\n"))
+
+    first = await server.fetch_semrush_report(PARAMS)
+    second = await server.fetch_semrush_report(PARAMS)
+
+    assert first.column("Nq") == second.column("Nq") == [1900]
+    assert len(requests) == 1
+    assert server._semrush_units["spent"] == 10
+
+
+async def test_gateway_error_page_is_raised_and_not_cached(semrush):
+    responses, requests = semrush
+    responses.append((502, "<html>\n<head><title>502 Bad Gateway</title></head>\n<body>nginx</body>\n</html>\n"))
+    responses.append((200, "Keyword;Search Volume\nplumber;1900\n"))
+
+    with pytest.raises(RuntimeError, match="HTTP 502") as raised:
+        await server.fetch_semrush_report(PARAMS)
+    assert "secret" not in str(raised.value)
+    assert server._semrush_units["spent"] == 0
+
+    table = await server.fetch_semrush_report(PARAMS)
+    assert table.column("Ph") == ["plumber"]
+    assert len(requests) == 2
+
+
+async def test_semrush_error_on_a_non_2xx_status_is_an_error_table(semrush):
+    responses, requests = semrush
+    responses.extend([(403, "ERROR 120 :: WRONG KEY - ID PAIR\n"), (403, "ERROR 120 :: WRONG KEY - ID PAIR\n")])
+
+    table = await server.fetch_semrush_report(PARAMS)
+    assert table.error == "ERROR 120 :: WRONG KEY - ID PAIR"
+    assert len(table) == 0
+
+    await server.fetch_semrush_report(PARAMS)
+    assert len(requests) == 2
@@ -0,0 +1,246 @@
+"""
+E-E-A-T Scoring Engine
+
+Batch E-E-A-T (Experience, Expertise, Authoritativeness, Trustworthiness)
+scoring shared by the seo-toolkit and seo-audit MCP servers.
+
+Scoring is column-oriented: page feature records are turned into one column
+per feature, each rule is evaluated over a whole column at once, and the
+four dimension totals are accumulated column by column. A sitewide report
+over thousands of crawled pages costs one pass per rule instead of an
+if-chain per page.
+
+Rules and weights live in named profiles:
+- "content": per-page content signals, each dimension 0-100 from a base of 50
+  (seo-toolkit calculate_eeat_score)
+- "site": site-level trust signals, each dimension 0-25 (seo-audit eeat_score)
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+DIMENSIONS = ("experience", "expertise", "authoritativeness", "trustworthiness")
+
+
+class Rule:
+    """One scoring rule: ``points`` go to ``dimension`` where ``feature`` passes ``op``."""
+
+    OPS = ("truthy", "gt", "ge", "eq")
+
+    def __init__(self, key: str, dimension: str, feature: str, points: float,
+                 op: str = "truthy", value: Any = None, default: Any = None):
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"unknown dimension '{dimension}'")
+        if op not in self.OPS:
+            raise ValueError(f"unknown rule op '{op}'")
+        self.key = key
+        self.dimension = dimension
+        self.feature = feature
+        self.points = points
+        self.op = op
+        self.value = value
+        self.default = default
+
+    def evaluate(self, column: Sequence[Any]) -> List[bool]:
+        """Evaluate the rule over a whole feature column (missing values take ``default``)."""
+        default, value = self.default, self.value
+        column = [default if x is None else x for x in column] if default is not None else column
+        if self.op == "truthy":
+            return [bool(x) for x in column]
+        if self.op == "eq":
+            return [x == value for x in column]
+        if self.op == "gt":
+            return [x is not None and x > value for x in column]
+        return [x is not None and x >= value for x in column]
+
+
+class WeightProfile:
+    """
+    A named set of rules plus per-dimension base, cap and overall weight.
+
+    The overall score is the weighted mean of each dimension's share of its
+    cap, on a 0-100 scale.
+    """
+
+    def __init__(self, name: str, rules: Iterable[Rule], base: Mapping[str, float],
+                 cap: Mapping[str, float], weights: Optional[Mapping[str, float]] = None):
+        self.name = name
+        self.rules = tuple(rules)
+        self.base = {dim: float(base.get(dim, 0)) for dim in DIMENSIONS}
+        self.cap = {dim: float(cap[dim]) for dim in DIMENSIONS}
+        self.weights = {dim: float((weights or {}).get(dim, 1)) for dim in DIMENSIONS}
+        if sum(self.weights.values()) <= 0:
+            raise ValueError("dimension weights must add up to more than zero")
+
+    @property
+    def features(self) -> List[str]:
+        """Feature keys the profile's rules read."""
+        return list(dict.fromkeys(rule.feature for rule in self.rules))
+
+    def with_overrides(self, weights: Optional[Mapping[str, float]] = None,
+                       points: Optional[Mapping[str, float]] = None) -> "WeightProfile":
+        """
+        Copy the profile with different dimension weights and/or rule points.
+
+        Args:
+            weights: Overall weight per dimension (unlisted dimensions keep theirs)
+            points: Points per rule key (unlisted rules keep theirs)
+
+        Returns:
+            A new profile named "<name>+custom"
+        """
+        unknown = set(weights or {}) - set(DIMENSIONS) | set(points or {}) - {rule.key for rule in self.rules}
+        if unknown:
+            raise ValueError(f"unknown dimension or rule: {', '.join(sorted(unknown))}")
+        rules = [
+            Rule(rule.key, rule.dimension, rule.feature, (points or {}).get(rule.key, rule.points),
+                 rule.op, rule.value, rule.default)
+            for rule in self.rules
+        ]
+        return WeightProfile(f"{self.name}+custom", rules, self.base, self.cap, {**self.weights, **(weights or {})})
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON-friendly description of the profile."""
+        return {
+            "name": self.name,
+            "base": self.base,
+            "cap": self.cap,
+            "weights": self.weights,
+            "rules": [{"key": rule.key, "dimension": rule.dimension, "feature": rule.feature, "op": rule.op,
+                       "value": rule.value, "points": rule.points} for rule in self.rules],
+        }
+
+
+PROFILES: Dict[str, WeightProfile] = {
+    "content": WeightProfile(
+        "content",
+        [
+            Rule("case_studies", "experience", "has_case_studies", 15),
+            Rule("testimonials", "experience", "has_testimonials", 10),
+            Rule("long_form", "experience", "word_count", 10, "gt", 1500, default=0),
+            Rule("author_bio", "expertise", "has_author_bio", 15),
+            Rule("author_credentials", "expertise", "author_credentials", 20),
+            Rule("technical_depth", "expertise", "technical_depth", 10, "eq", "high", default="low"),
+            Rule("external_citations", "authoritativeness", "external_citations", 15, "gt", 5, default=0),
+            Rule("schema_markup", "authoritativeness", "has_schema_markup", 10),
+            Rule("domain_authority", "authoritativeness", "domain_authority", 10, "gt", 50, default=0),
+            Rule("https", "trustworthiness", "has_https", 10),
+            Rule("privacy_policy", "trustworthiness", "has_privacy_policy", 10),
+            Rule("contact_info", "trustworthiness", "has_contact_info", 15),
+            Rule("last_updated", "trustworthiness", "last_updated", 10),
+        ],
+        base=dict.fromkeys(DIMENSIONS, 50),
+        cap=dict.fromkeys(DIMENSIONS, 100),
+    ),
+    "site": WeightProfile(
+        "site",
+        [
+            Rule("author_bio", "experience", "has_author_bio", 15),
+            Rule("domain_age_moderate", "experience", "domain_age_years", 5, "ge", 2, default=0),
+            Rule("domain_age_established", "experience", "domain_age_years", 5, "ge", 5, default=0),
+            Rule("citations", "expertise", "has_citations", 15),
+            Rule("about_page", "expertise", "has_about_page", 10),
+            Rule("https", "trustworthiness", "https_enabled", 10),
+            Rule("contact_page", "trustworthiness", "has_contact_page", 8),
+            Rule("privacy_policy", "trustworthiness", "has_privacy_policy", 7),
+        ],
+        # Authoritativeness needs backlink data the site signals don't carry: moderate baseline
+        base={"authoritativeness": 15},
+        cap=dict.fromkeys(DIMENSIONS, 25),
+    ),
+}
+
+
+def get_profile(profile: Any = "content", weights: Optional[Mapping[str, float]] = None,
+                points: Optional[Mapping[str, float]] = None) -> WeightProfile:
+    """Resolve a profile by name (or pass one through), applying any overrides."""
+    if not isinstance(profile, WeightProfile):
+        if profile not in PROFILES:
+            raise ValueError(f"unknown E-E-A-T profile '{profile}' (use one of: {', '.join(PROFILES)})")
+        profile = PROFILES[profile]
+    return profile.with_overrides(weights, points) if weights or points else profile
+
+
+class EEATScores:
+    """Column-oriented batch result: one list per dimension, per rule hit mask and overall."""
+
+    def __init__(self, profile: WeightProfile, dimensions: Dict[str, List[int]],
+                 overall: List[int], hits: Dict[str, List[bool]]):
+        self.profile = profile
+        self.dimensions = dimensions
+        self.overall = overall
+        self.hits = hits
+
+    def __len__(self) -> int:
+        return len(self.overall)
+
+    def page(self, index: int) -> Dict[str, int]:
+        """Scores for one page: the four dimensions plus ``overall``."""
+        scores = {dim: self.dimensions[dim][index] for dim in DIMENSIONS}
+        scores["overall"] = self.overall[index]
+        return scores
+
+    def passed(self, index: int) -> List[str]:
+        """Rule keys that scored for one page."""
+        return [key for key, mask in self.hits.items() if mask[index]]
+
+    def summary(self) -> Dict[str, Any]:
+        """Sitewide averages and ranges per dimension and overall, plus rule pass rates."""
+        count = len(self)
+        if not count:
+            return {"pages": 0}
+
+        def stats(column: List[int]) -> Dict[str, float]:
+            return {"average": round(sum(column) / count, 1), "min": min(column), "max": max(column)}
+
+        return {
+            "pages": count,
+            "overall": stats(self.overall),
+            "dimensions": {dim: stats(self.dimensions[dim]) for dim in DIMENSIONS},
+            "pass_rates": {key: round(sum(mask) / count, 3) for key, mask in self.hits.items()},
+        }
+
+
+def score_pages(records: Sequence[Mapping[str, Any]], profile: Any = "content",
+                weights: Optional[Mapping[str, float]] = None,
+                points: Optional[Mapping[str, float]] = None) -> EEATScores:
+    """
+    Score many page feature records in one pass per rule.
+
+    Args:
+        records: Feature dicts, one per page (keys listed by ``profile.features``)
+        profile: Profile name ("content" or "site") or a WeightProfile
+        weights: Optional overall weight per dimension
+        points: Optional points per rule key
+
+    Returns:
+        EEATScores with integer 0-cap dimension scores and a 0-100 overall score per page
+    """
+    profile = get_profile(profile, weights, points)
+    if not all(isinstance(record, Mapping) for record in records):
+        raise TypeError("page feature records must be objects (dicts)")
+    count = len(records)
+
+    columns = {feature: [record.get(feature) for record in records] for feature in profile.features}
+    totals = {dim: [profile.base[dim]] * count for dim in DIMENSIONS}
+    hits: Dict[str, List[bool]] = {}
+
+    for rule in profile.rules:
+        mask = rule.evaluate(columns[rule.feature])
+        hits[rule.key] = mask
+        gain = rule.points
+        totals[rule.dimension] = [total + gain if hit else total for total, hit in zip(totals[rule.dimension], mask, strict=True)]
+
+    dimensions = {}
+    for dim in DIMENSIONS:
+        cap = profile.cap[dim]
+        dimensions[dim] = [round(min(cap, max(0.0, total))) for total in totals[dim]]
+
+    # Weighted mean of each dimension's share of its cap, scaled to 0-100
+    factors = [(dimensions[dim], profile.weights[dim] / profile.cap[dim]) for dim in DIMENSIONS]
+    scale = 100 / sum(profile.weights.values())
+    overall = [0.0] * count
+    for column, factor in factors:
+        overall = [acc + value * factor for acc, value in zip(overall, column, strict=True)]
+    overall = [round(value * scale) for value in overall]
+
+    return EEATScores(profile, dimensions, overall, hits)
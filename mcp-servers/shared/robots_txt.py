@@ -0,0 +1,366 @@
+"""
+robots.txt Cache
+
+Fetches, parses and matches robots.txt files (RFC 9309) for the seo-audit,
+seo-toolkit and siteone-crawler MCP servers.
+
+Each host's robots.txt is downloaded once and kept in a per-origin cache
+whose lifetime follows the response's HTTP caching headers (Cache-Control
+max-age / s-maxage, Expires), capped at 24 hours as RFC 9309 recommends.
+Stale entries are revalidated with If-None-Match / If-Modified-Since, so an
+unchanged file costs a 304 rather than a download.
+
+Rules are compiled once per user-agent group into a matcher: plain path
+prefixes are looked up by length in a hash table and only patterns with
+``*`` or ``$`` fall back to regular expressions. The longest matching rule
+wins and Allow wins ties, so checking thousands of URLs against a cached
+file takes milliseconds.
+
+Fetch outcomes follow RFC 9309:
+- 2xx: rules are parsed ("ok")
+- 4xx (other than 429): no restrictions ("missing")
+- 429, 5xx or network errors: everything disallowed ("unreachable"), unless
+  a previously fetched copy can be served instead
+"""
+
+import asyncio
+import email.utils
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+ROBOTS_MAX_AGE = 24 * 3600  # seconds; RFC 9309 upper bound for reusing a fetched file
+ROBOTS_MIN_AGE = 60  # seconds; floor so no-cache files are not re-fetched for every URL
+ROBOTS_ERROR_TTL = 300  # seconds before an unreachable host is retried
+ROBOTS_MAX_BYTES = 512 * 1024  # RFC 9309 requires parsing at least 500 KiB
+
+_ESCAPE_RE = re.compile(r"%[0-9a-fA-F]{2}")
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*(s-maxage|max-age)\s*=\s*\"?(\d+)")
+
+
+def normalize_path(path: str) -> str:
+    """Percent-encode a path the same way for rules and URLs (uppercase escapes)."""
+    encoded = quote(path, safe="/?=&;:@!$'()*+,~-._%[]")
+    return _ESCAPE_RE.sub(lambda m: m.group(0).upper(), encoded)
+
+
+def url_path(url: str) -> str:
+    """The path and query of a URL, as robots.txt rules see it."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    return normalize_path(path)
+
+
+def url_origin(url: str) -> str:
+    """scheme://host[:port] for a URL (a missing scheme is taken as https)."""
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def product_token(user_agent: str) -> str:
+    """Reduce a user-agent string such as "Googlebot/2.1" to its lowercase product token."""
+    return user_agent.strip().split("/", 1)[0].split()[0].lower() if user_agent.strip() else "*"
+
+
+class RobotsMatcher:
+    """Compiled Allow/Disallow rules for one user-agent group."""
+
+    def __init__(self, rules: Iterable[Tuple[bool, str]]):
+        self.prefixes: Dict[str, bool] = {}
+        wildcards: Dict[str, bool] = {}
+        for allow, pattern in rules:
+            table = wildcards if ("*" in pattern or pattern.endswith("$")) else self.prefixes
+            table[pattern] = table.get(pattern, False) or allow
+        self.lengths = sorted({len(pattern) for pattern in self.prefixes}, reverse=True)
+        self.wildcards = sorted(
+            ((len(pattern), allow, pattern, self._compile(pattern)) for pattern, allow in wildcards.items()),
+            key=lambda rule: (rule[0], rule[1]), reverse=True,
+        )
+
+    @staticmethod
+    def _compile(pattern: str) -> "re.Pattern[str]":
+        anchored = pattern.endswith("$")
+        body = pattern[:-1] if anchored else pattern
+        regex = ".*".join(re.escape(piece) for piece in body.split("*"))
+        return re.compile(regex + (r"\Z" if anchored else ""))
+
+    def match(self, path: str) -> Tuple[bool, Optional[str]]:
+        """(allowed, deciding rule pattern) for a normalized path; no matching rule allows."""
+        best: Tuple[int, bool] = (-1, True)
+        rule = None
+        for length in self.lengths:
+            if length <= len(path):
+                pattern = path[:length]
+                if pattern in self.prefixes:
+                    best, rule = (length, self.prefixes[pattern]), pattern
+                    break
+        for length, allow, pattern, regex in self.wildcards:
+            if (length, allow) <= best:
+                break
+            if regex.match(path):
+                best, rule = (length, allow), pattern
+                break
+        return best[1], rule
+
+
+class RobotsFile:
+    """One host's fetched robots.txt: rules by user agent, sitemaps and cache metadata."""
+
+    def __init__(self, origin: str, status: str, status_code: Optional[int] = None, text: str = "",
+                 error: Optional[str] = None):
+        self.origin = origin
+        self.url = f"{origin}/robots.txt"
+        self.status = status
+        self.status_code = status_code
+        self.error = error
+        self.bytes = len(text.encode("utf-8"))
+        self.groups: Dict[str, List[Tuple[bool, str]]] = {}
+        self.crawl_delays: Dict[str, float] = {}
+        self.sitemaps: List[str] = []
+        self.fetched_at = time.time()
+        self.expires_at = self.fetched_at
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.stale = False
+        self._matchers: Dict[str, RobotsMatcher] = {}
+        if text:
+            self._parse(text)
+
+    def _parse(self, text: str):
+        agents: List[str] = []
+        in_rules = False
+        for line in text.lstrip("\ufeff").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            key, value = (part.strip() for part in line.split(":", 1))
+            key = key.lower()
+            if key == "user-agent":
+                if in_rules:
+                    agents, in_rules = [], False
+                agent = product_token(value)
+                agents.append(agent)
+                self.groups.setdefault(agent, [])
+            elif key in ("allow", "disallow"):
+                in_rules = True
+                if value:
+                    for agent in agents:
+                        self.groups[agent].append((key == "allow", normalize_path(value)))
+            elif key == "crawl-delay":
+                in_rules = True
+                try:
+                    for agent in agents:
+                        self.crawl_delays[agent] = float(value)
+                except ValueError:
+                    pass
+            elif key == "sitemap" and value:
+                self.sitemaps.append(value)
+
+    def group_for(self, user_agent: str) -> Optional[str]:
+        """The group that applies to a user agent: exact token, longest token prefix, then "*"."""
+        token = product_token(user_agent)
+        if token in self.groups:
+            return token
+        prefixes = [agent for agent in self.groups if agent != "*" and token.startswith(agent)]
+        if prefixes:
+            return max(prefixes, key=len)
+        return "*" if "*" in self.groups else None
+
+    def matcher(self, user_agent: str) -> RobotsMatcher:
+        group = self.group_for(user_agent) or ""
+        matcher = self._matchers.get(group)
+        if matcher is None:
+            matcher = RobotsMatcher(self.groups.get(group, ()))
+            self._matchers[group] = matcher
+        return matcher
+
+    def check(self, url: str, user_agent: str) -> Tuple[bool, Optional[str]]:
+        """(allowed, deciding rule) for a URL on this host."""
+        path = url_path(url)
+        if path == "/robots.txt":
+            return True, None
+        if self.status == "unreachable":
+            return False, "unreachable"
+        return self.matcher(user_agent).match(path)
+
+    def allowed(self, url: str, user_agent: str) -> bool:
+        return self.check(url, user_agent)[0]
+
+    def crawl_delay(self, user_agent: str) -> Optional[float]:
+        return self.crawl_delays.get(self.group_for(user_agent) or "")
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.expires_at
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "status": self.status,
+            "status_code": self.status_code,
+            "error": self.error,
+            "bytes": self.bytes,
+            "groups": sorted(self.groups),
+            "rules": sum(len(rules) for rules in self.groups.values()),
+            "sitemaps": self.sitemaps,
+            "stale": self.stale,
+            "age_seconds": round(time.time() - self.fetched_at, 1),
+            "expires_in_seconds": round(max(0.0, self.expires_at - time.time()), 1),
+        }
+
+
+def cache_lifetime(headers: httpx.Headers, default: float = ROBOTS_MAX_AGE) -> float:
+    """Seconds a response may be reused, from Cache-Control, Age and Expires/Date headers."""
+    cache_control = headers.get("cache-control", "").lower()
+    ages = dict(_MAX_AGE_RE.findall(cache_control))
+    if "s-maxage" in ages or "max-age" in ages:
+        lifetime = float(ages.get("s-maxage", ages.get("max-age")))
+    elif "no-cache" in cache_control or "no-store" in cache_control:
+        lifetime = 0.0
+    elif headers.get("expires"):
+        try:
+            expires = email.utils.parsedate_to_datetime(headers["expires"]).timestamp()
+            date = email.utils.parsedate_to_datetime(headers["date"]).timestamp() if headers.get("date") else time.time()
+            lifetime = expires - date
+        except (TypeError, ValueError):
+            lifetime = 0.0  # an invalid Expires means already expired
+    else:
+        lifetime = default
+    try:
+        lifetime -= float(headers.get("age", 0))
+    except ValueError:
+        pass
+    return min(max(lifetime, ROBOTS_MIN_AGE), ROBOTS_MAX_AGE)
+
+
+class RobotsCache:
+    """
+    Per-origin robots.txt cache shared by every tool in a server process.
+
+    ``client`` returns the httpx client used for fetches (the server's shared
+    keep-alive client). Concurrent lookups for the same origin share one fetch.
+    """
+
+    def __init__(self, client: Callable[[], httpx.AsyncClient], user_agent: str,
+                 max_hosts: int = 1024, timeout: float = 10.0):
+        self.client = client
+        self.user_agent = user_agent
+        self.max_hosts = max_hosts
+        self.timeout = timeout
+        self._entries: "OrderedDict[str, RobotsFile]" = OrderedDict()
+        self._fetches: Dict[str, "asyncio.Task[RobotsFile]"] = {}
+        self.hits = 0
+        self.fetches = 0
+        self.revalidations = 0
+
+    async def _fetch(self, origin: str, previous: Optional[RobotsFile]) -> RobotsFile:
+        headers = {"User-Agent": self.user_agent}
+        if previous and previous.status == "ok":
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        self.fetches += 1
+        try:
+            async with self.client().stream("GET", f"{origin}/robots.txt", headers=headers,
+                                            timeout=self.timeout) as response:
+                if response.status_code == 304 and previous:
+                    self.revalidations += 1
+                    previous.fetched_at = time.time()
+                    previous.expires_at = previous.fetched_at + cache_lifetime(response.headers)
+                    previous.stale = False
+                    return previous
+                body = bytearray()
+                if 200 <= response.status_code < 300:
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) >= ROBOTS_MAX_BYTES:
+                            del body[ROBOTS_MAX_BYTES:]
+                            break
+        except httpx.HTTPError as e:
+            return self._unreachable(origin, previous, None, f"{e.__class__.__name__} {e}".strip())
+
+        code = response.status_code
+        if code == 429 or code >= 500:
+            return self._unreachable(origin, previous, code, f"HTTP {code}")
+        if 200 <= code < 300:
+            robots = RobotsFile(origin, "ok", code, body.decode("utf-8", errors="replace"))
+            robots.etag = response.headers.get("etag")
+            robots.last_modified = response.headers.get("last-modified")
+        else:
+            robots = RobotsFile(origin, "missing", code)
+        robots.expires_at = robots.fetched_at + cache_lifetime(response.headers)
+        return robots
+
+    @staticmethod
+    def _unreachable(origin: str, previous: Optional[RobotsFile], code: Optional[int], error: str) -> RobotsFile:
+        if previous and previous.status != "unreachable":
+            # Keep using the last good copy while the host is failing
+            previous.stale = True
+            previous.error = error
+            previous.expires_at = time.time() + ROBOTS_ERROR_TTL
+            return previous
+        robots = RobotsFile(origin, "unreachable", code, error=error)
+        robots.expires_at = robots.fetched_at + ROBOTS_ERROR_TTL
+        return robots
+
+    async def get(self, url: str) -> RobotsFile:
+        """The robots.txt that governs ``url``, fetched only when no fresh copy is cached."""
+        origin = url_origin(url)
+        cached = self._entries.get(origin)
+        if cached and cached.is_fresh():
+            self.hits += 1
+            self._entries.move_to_end(origin)
+            return cached
+
+        task = self._fetches.get(origin)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(origin, cached))
+            self._fetches[origin] = task
+            task.add_done_callback(lambda _: self._fetches.pop(origin, None))
+
+        robots = await asyncio.shield(task)
+        self._entries[origin] = robots
+        self._entries.move_to_end(origin)
+        while len(self._entries) > self.max_hosts:
+            self._entries.popitem(last=False)
+        return robots
+
+    async def check(self, url: str, user_agent: str) -> Tuple[bool, Optional[str]]:
+        robots = await self.get(url)
+        return robots.check(url, user_agent)
+
+    async def allowed(self, url: str, user_agent: str) -> bool:
+        return (await self.check(url, user_agent))[0]
+
+    async def check_many(self, urls: Iterable[str], user_agent: str,
+                         concurrency: int = 20) -> List[Tuple[str, bool, Optional[str]]]:
+        """
+        Check many URLs, fetching each distinct host's robots.txt once
+        (``concurrency`` hosts at a time). Returns (url, allowed, rule) in input order.
+        """
+        urls = list(urls)
+        origins = list(dict.fromkeys(url_origin(url) for url in urls))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def load(origin: str) -> Tuple[str, RobotsFile]:
+            async with semaphore:
+                return origin, await self.get(origin)
+
+        files = dict(await asyncio.gather(*(load(origin) for origin in origins)))
+        return [(url, *files[url_origin(url)].check(url, user_agent)) for url in urls]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hosts": len(self._entries), "hits": self.hits, "fetches": self.fetches,
+                "revalidations": self.revalidations}
+
+    def clear(self):
+        self._entries.clear()
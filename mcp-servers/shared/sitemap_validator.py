@@ -0,0 +1,424 @@
+"""
+Streaming Sitemap Validator
+
+Validates XML sitemaps and sitemap indexes of any size for the seo-audit MCP
+server (and anything else that imports it).
+
+Each sitemap is parsed while it downloads: response chunks are gunzipped on
+the fly (``.xml.gz`` files are detected by their magic bytes, whatever the
+Content-Type) and fed to an incremental ``XMLPullParser``. Every ``<url>`` is
+counted and dropped as soon as its end tag arrives, so a parser only ever
+holds one entry. Child sitemaps listed by an index are fetched by a fixed
+pool of workers, so at most ``concurrency`` files are open at once.
+
+Duplicates are found with a FingerprintSet: 64-bit URL fingerprints in one
+open-addressing ``array`` (under 30 bytes per unique URL, against ~100 for a
+``set`` of strings). That table is the only state that grows with the
+sitemap, and ``dedupe=False`` turns it off.
+
+The report covers files (indexes, urlsets, failures, protocol limits), URL
+counts (unique, duplicate, invalid, off-host), the lastmod distribution,
+changefreq/priority values and capped samples of each problem.
+"""
+
+import asyncio
+import re
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import httpx
+
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+MAX_URLS_PER_FILE = 50_000  # sitemaps.org protocol limits
+MAX_FILE_BYTES = 50 * 1024 * 1024  # uncompressed
+INFLATE_CHUNK = 1024 * 1024  # largest block gunzipped (and parsed) at a time
+MAX_URL_LENGTH = 2048
+CHANGEFREQS = {"always", "hourly", "daily", "weekly", "monthly", "yearly", "never"}
+
+# W3C Datetime: YYYY, YYYY-MM, YYYY-MM-DD or a full timestamp with a timezone
+_W3C_DATETIME = re.compile(
+    r"^\d{4}(-\d{2}(-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:\d{2}))?)?)?$"
+)
+_LASTMOD_AGES = (("7_days", 7), ("30_days", 30), ("90_days", 90), ("365_days", 365))
+LASTMOD_MEMO_SIZE = 10_000
+# Absolute http(s) URL without whitespace; group 1 is the host[:port]
+_URL_RE = re.compile(r"https?://([^/?#\s@]+)[^\s]*\Z", re.IGNORECASE)
+
+
+class FingerprintSet:
+    """
+    Compact set of 64-bit string fingerprints (open addressing, linear probing).
+
+    ``add`` returns False when the string was already present. Fingerprints
+    come from ``hash()``, so a set is only meaningful within one process; a
+    false duplicate needs a 64-bit collision.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        size = 1024
+        while size < capacity * 2:
+            size *= 2
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: str) -> bool:
+        fingerprint = hash(value) & 0xFFFFFFFFFFFFFFFF or 1  # 0 marks an empty slot
+        slots, mask = self._slots, self._mask
+        index = fingerprint & mask
+        while True:
+            current = slots[index]
+            if current == 0:
+                break
+            if current == fingerprint:
+                return False
+            index = (index + 1) & mask
+        slots[index] = fingerprint
+        self.count += 1
+        if self.count * 10 > len(slots) * 6:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array("Q", bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        slots, mask = self._slots, self._mask
+        for fingerprint in old:
+            if fingerprint:
+                index = fingerprint & mask
+                while slots[index]:
+                    index = (index + 1) & mask
+                slots[index] = fingerprint
+
+    @property
+    def nbytes(self) -> int:
+        return self._slots.itemsize * len(self._slots)
+
+
+def parse_w3c_datetime(value: str) -> Optional[datetime]:
+    """Parse a sitemap <lastmod> (W3C Datetime) into an aware datetime, or None if invalid."""
+    if not _W3C_DATETIME.match(value):
+        return None
+    if len(value) == 4:
+        value += "-01-01"
+    elif len(value) == 7:
+        value += "-01"
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def inflate(decoder: "zlib._Decompress", chunk: bytes) -> Iterator[bytes]:
+    """Gunzip a chunk in blocks of at most INFLATE_CHUNK bytes (bounds memory on gzip bombs)."""
+    data = decoder.decompress(chunk, INFLATE_CHUNK)
+    while data:
+        yield data
+        data = decoder.decompress(decoder.unconsumed_tail, INFLATE_CHUNK) if decoder.unconsumed_tail else b""
+
+
+class SitemapValidator:
+    """
+    One validation run over a sitemap or sitemap index and every child it lists.
+
+    ``client`` returns the httpx client used for fetches. ``find`` is an
+    optional set of URLs to look for (e.g. the audited page).
+    """
+
+    def __init__(self, client: Callable[[], httpx.AsyncClient], concurrency: int = 8,
+                 max_sitemaps: int = 1000, sample_size: int = 20, dedupe: bool = True,
+                 find: Iterable[str] = (), max_depth: int = 2):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.max_sitemaps = max(1, max_sitemaps)
+        self.sample_size = sample_size
+        self.max_depth = max_depth
+        self.seen = FingerprintSet() if dedupe else None
+        self.find = dict.fromkeys(find, False)
+        self.now = datetime.now(timezone.utc)
+        self._lastmod_memo: Dict[str, Optional[Tuple[datetime, str]]] = {}
+
+        self.queued: set = set()
+        self.files: List[Dict[str, Any]] = []
+        self.skipped_sitemaps = 0
+        self.bytes_downloaded = 0
+        self.bytes_uncompressed = 0
+        self.urls = {"total": 0, "unique": 0, "duplicates": 0, "invalid": 0, "off_host": 0}
+        self.lastmod = {"present": 0, "missing": 0, "invalid": 0, "future": 0, "newest": None, "oldest": None}
+        self.lastmod_age = {**{f"within_{name}": 0 for name, _ in _LASTMOD_AGES}, "older": 0}
+        self.lastmod_years: Dict[str, int] = {}
+        self.changefreq: Dict[str, int] = {}
+        self.priority_invalid = 0
+        self.samples: Dict[str, List[Any]] = {"invalid": [], "duplicates": [], "off_host": [],
+                                              "invalid_lastmod": []}
+
+    def _sample(self, kind: str, value: Any):
+        if len(self.samples[kind]) < self.sample_size:
+            self.samples[kind].append(value)
+
+    def _check_url(self, loc: str, host: str) -> bool:
+        match = _URL_RE.match(loc)
+        if not match or len(loc) > MAX_URL_LENGTH:
+            self.urls["invalid"] += 1
+            self._sample("invalid", loc)
+            return False
+        if match.group(1).lower() != host:
+            self.urls["off_host"] += 1
+            self._sample("off_host", loc)
+        return True
+
+    def _classify_lastmod(self, value: str) -> Optional[Tuple[datetime, str]]:
+        """(timestamp, age bucket) for a lastmod string, memoized since sites reuse a few dates."""
+        if value in self._lastmod_memo:
+            return self._lastmod_memo[value]
+        parsed = parse_w3c_datetime(value)
+        result = None
+        if parsed is not None:
+            age_days = (self.now - parsed).total_seconds() / 86400
+            bucket = "future" if age_days < -1 else next(
+                (f"within_{name}" for name, days in _LASTMOD_AGES if age_days <= days), "older")
+            result = (parsed, bucket)
+        if len(self._lastmod_memo) >= LASTMOD_MEMO_SIZE:
+            self._lastmod_memo.clear()
+        self._lastmod_memo[value] = result
+        return result
+
+    def _record_url(self, fields: Dict[str, str], host: str, file: Dict[str, Any]):
+        loc = fields.get("loc", "")
+        self.urls["total"] += 1
+        file["urls"] += 1
+        if not self._check_url(loc, host):
+            return
+        if loc in self.find:
+            self.find[loc] = True
+        if self.seen is not None:
+            if self.seen.add(loc):
+                self.urls["unique"] += 1
+            else:
+                self.urls["duplicates"] += 1
+                self._sample("duplicates", loc)
+
+        lastmod = fields.get("lastmod")
+        if not lastmod:
+            self.lastmod["missing"] += 1
+        else:
+            classified = self._classify_lastmod(lastmod)
+            if classified is None:
+                self.lastmod["invalid"] += 1
+                self._sample("invalid_lastmod", {"url": loc, "lastmod": lastmod})
+            else:
+                parsed, bucket = classified
+                self.lastmod["present"] += 1
+                if self.lastmod["newest"] is None or parsed > self.lastmod["newest"]:
+                    self.lastmod["newest"] = parsed
+                if self.lastmod["oldest"] is None or parsed < self.lastmod["oldest"]:
+                    self.lastmod["oldest"] = parsed
+                year = str(parsed.year)
+                self.lastmod_years[year] = self.lastmod_years.get(year, 0) + 1
+                if bucket == "future":
+                    self.lastmod["future"] += 1
+                else:
+                    self.lastmod_age[bucket] += 1
+
+        changefreq = fields.get("changefreq")
+        if changefreq:
+            key = changefreq.lower() if changefreq.lower() in CHANGEFREQS else "invalid"
+            self.changefreq[key] = self.changefreq.get(key, 0) + 1
+        priority = fields.get("priority")
+        if priority:
+            try:
+                if not 0.0 <= float(priority) <= 1.0:
+                    self.priority_invalid += 1
+            except ValueError:
+                self.priority_invalid += 1
+
+    def _enqueue(self, queue: "asyncio.Queue", loc: str, depth: int, file: Dict[str, Any]):
+        try:
+            parts = urlsplit(loc)
+            valid = parts.scheme in ("http", "https") and bool(parts.hostname)
+        except ValueError:  # e.g. an unbalanced "[" in the host
+            valid = False
+        if not valid:
+            file["errors"].append(f"Invalid child sitemap URL: {loc[:200]}")
+            return
+        if loc in self.queued:
+            return
+        if len(self.queued) >= self.max_sitemaps:
+            self.skipped_sitemaps += 1
+            return
+        self.queued.add(loc)
+        queue.put_nowait((loc, depth + 1))
+
+    def _new_file(self, url: str) -> Dict[str, Any]:
+        file: Dict[str, Any] = {"url": url, "type": None, "status_code": None, "compressed": False,
+                                "urls": 0, "sitemaps": 0, "bytes": 0, "errors": [], "warnings": []}
+        self.files.append(file)
+        return file
+
+    async def _read(self, url: str, depth: int, queue: "asyncio.Queue"):
+        file = self._new_file(url)
+        host = ""
+        parser = XMLPullParser(events=("start", "end"))
+        root = None
+        names: Dict[str, str] = {}  # qualified tag -> name, for the tags this file type uses
+        decoder = None
+        fields: Dict[str, str] = {}
+
+        def drain():
+            nonlocal root
+            for event, elem in parser.read_events():
+                if root is None:
+                    root = elem
+                    namespace, _, tag = elem.tag[1:].rpartition("}") if elem.tag[0] == "{" else ("", "", elem.tag)
+                    file["type"] = {"urlset": "urlset", "sitemapindex": "index"}.get(tag)
+                    if file["type"] is None:
+                        raise ParseError(f"root element <{tag}> is not <urlset> or <sitemapindex>")
+                    if namespace != SITEMAP_NAMESPACE:
+                        file["warnings"].append(f"Unexpected namespace '{namespace or 'none'}'")
+                    if file["type"] == "index" and depth:
+                        file["warnings"].append("Sitemap index listed inside another index")
+                    prefix = f"{{{namespace}}}" if namespace else ""
+                    entry = "url" if file["type"] == "urlset" else "sitemap"
+                    # image:, video: and news: extension tags are not in the table and are skipped
+                    names.update((prefix + name, name) for name in (entry, "loc", "lastmod", "changefreq", "priority"))
+                    continue
+                if event == "start":
+                    continue
+                name = names.get(elem.tag)
+                if name is None:
+                    continue
+                if name == "url":
+                    self._record_url(fields, host, file)
+                elif name == "sitemap":
+                    file["sitemaps"] += 1
+                    if depth + 1 > self.max_depth:
+                        file["errors"].append("Sitemap index nested too deeply; child not followed")
+                    else:
+                        self._enqueue(queue, fields.get("loc", ""), depth, file)
+                else:
+                    fields[name] = (elem.text or "").strip()
+                    continue
+                fields.clear()
+                root.clear()  # drop processed entries so memory stays flat
+
+        try:
+            host = urlsplit(url).netloc.lower()
+            async with self.client().stream("GET", url) as response:
+                file["status_code"] = response.status_code
+                if response.status_code >= 400:
+                    file["errors"].append(f"HTTP {response.status_code}")
+                    return
+                async for chunk in response.aiter_bytes():
+                    self.bytes_downloaded += len(chunk)
+                    if decoder is None and not file["bytes"] and chunk[:2] == b"\x1f\x8b":
+                        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                        file["compressed"] = True
+                    for data in (inflate(decoder, chunk) if decoder else (chunk,)):
+                        file["bytes"] += len(data)
+                        if file["bytes"] > MAX_FILE_BYTES:
+                            file["errors"].append(f"Larger than {MAX_FILE_BYTES // (1024 * 1024)} MB uncompressed; "
+                                                  f"stopped reading")
+                            return
+                        parser.feed(data)
+                        drain()
+                if decoder:
+                    parser.feed(decoder.flush())
+                parser.close()
+                drain()
+        except ParseError as e:
+            file["errors"].append(f"Invalid XML: {e}")
+        except zlib.error as e:
+            file["errors"].append(f"Corrupt gzip data: {e}")
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            file["errors"].append(f"Fetch failed: {e.__class__.__name__} {e}".strip())
+        except Exception as e:  # anything else fails this file, not the run
+            file["errors"].append(f"Validation failed: {e.__class__.__name__} {e}".strip())
+        finally:
+            self.bytes_uncompressed += file["bytes"]
+
+        if file["urls"] > MAX_URLS_PER_FILE:
+            file["errors"].append(f"{file['urls']:,} URLs (protocol limit is {MAX_URLS_PER_FILE:,})")
+        if file["type"] == "urlset" and depth == 0 and not file["urls"] and not file["errors"]:
+            file["warnings"].append("Sitemap lists no URLs")
+
+    async def run(self, urls: Union[str, List[str]]) -> Dict[str, Any]:
+        """Validate one or more sitemaps (e.g. every Sitemap line in robots.txt) and their children."""
+        started = time.perf_counter()
+        urls = [urls] if isinstance(urls, str) else list(dict.fromkeys(urls))
+        queue: "asyncio.Queue" = asyncio.Queue()
+        for url in urls:
+            self.queued.add(url)
+            queue.put_nowait((url, 0))
+
+        async def worker():
+            while True:
+                next_url, depth = await queue.get()
+                try:
+                    await self._read(next_url, depth, queue)
+                except Exception as e:  # a dead worker would leave queue.join() waiting forever
+                    self._new_file(next_url)["errors"].append(f"Validation failed: {e.__class__.__name__} {e}")
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return self.report(urls, (time.perf_counter() - started) * 1000)
+
+    def report(self, urls: List[str], elapsed_ms: float) -> Dict[str, Any]:
+        failed = [file for file in self.files if file["errors"]]
+        counts = dict(self.urls)
+        lastmod = {key: value.isoformat() if isinstance(value, datetime) else value
+                   for key, value in self.lastmod.items()}
+        if self.seen is None:
+            counts["unique"] = counts["duplicates"] = None
+        report = {
+            "sitemap_urls": urls,
+            "valid": bool(self.files) and not failed and not counts["invalid"] and bool(counts["total"]),
+            "sitemaps": {
+                "fetched": len(self.files),
+                "indexes": sum(1 for file in self.files if file["type"] == "index"),
+                "urlsets": sum(1 for file in self.files if file["type"] == "urlset"),
+                "failed": len(failed),
+                "compressed": sum(1 for file in self.files if file["compressed"]),
+                "skipped": self.skipped_sitemaps,
+            },
+            "urls": counts,
+            "lastmod": {**lastmod, "age": self.lastmod_age,
+                        "by_year": dict(sorted(self.lastmod_years.items()))},
+            "changefreq": self.changefreq,
+            "priority_invalid": self.priority_invalid,
+            "samples": self.samples,
+            "files": [
+                {key: value for key, value in file.items() if value or key in ("urls", "status_code")}
+                for file in self.files
+            ],
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_uncompressed": self.bytes_uncompressed,
+            "dedupe_table_bytes": self.seen.nbytes if self.seen is not None else 0,
+            "elapsed_ms": round(elapsed_ms, 1),
+        }
+        if self.find:
+            report["found"] = self.find
+        return report
+
+
+async def validate_sitemap(urls: Union[str, List[str]], client: Callable[[], httpx.AsyncClient],
+                           **options) -> Dict[str, Any]:
+    """Validate sitemaps or sitemap indexes and their children (options as for SitemapValidator)."""
+    return await SitemapValidator(client, **options).run(urls)
@@ -0,0 +1,6 @@
+"""Put mcp-servers/shared on sys.path, the same way the servers import these modules."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,101 @@
+"""Tests for robots.txt matching (mcp-servers/shared/robots_txt.py)."""
+
+import pytest
+from robots_txt import RobotsFile, RobotsMatcher
+
+ROBOTS = """
+User-agent: *
+Disallow: /private/
+Allow: /private/public/
+Crawl-delay: 5
+
+User-agent: Googlebot
+User-agent: Bingbot
+Disallow: /search
+Allow: /search/about
+
+User-agent: Googlebot-Image
+Disallow: /
+
+Sitemap: https://example.com/sitemap.xml
+"""
+
+
+@pytest.fixture
+def robots() -> RobotsFile:
+    return RobotsFile("https://example.com", "ok", 200, ROBOTS)
+
+
+def test_no_matching_rule_allows():
+    assert RobotsMatcher([(False, "/admin")]).match("/blog") == (True, None)
+
+
+def test_longest_match_wins():
+    matcher = RobotsMatcher([(False, "/shop"), (True, "/shop/sale"), (False, "/shop/sale/old")])
+    assert matcher.match("/shop/cart") == (False, "/shop")
+    assert matcher.match("/shop/sale/today") == (True, "/shop/sale")
+    assert matcher.match("/shop/sale/old/1") == (False, "/shop/sale/old")
+
+
+def test_allow_wins_ties():
+    assert RobotsMatcher([(False, "/page"), (True, "/page")]).match("/page") == (True, "/page")
+    # Equal-length wildcard rules
+    assert RobotsMatcher([(False, "/*.pdf"), (True, "/*.pdf")]).match("/a.pdf") == (True, "/*.pdf")
+
+
+def test_wildcard_patterns():
+    matcher = RobotsMatcher([(False, "/*.php"), (False, "/*/print/"), (True, "/")])
+    assert matcher.match("/index.php?x=1") == (False, "/*.php")
+    assert matcher.match("/docs/print/page") == (False, "/*/print/")
+    assert matcher.match("/docs/page") == (True, "/")
+
+
+def test_end_anchor():
+    matcher = RobotsMatcher([(False, "/*.pdf$"), (False, "/exact$")])
+    assert matcher.match("/files/report.pdf")[0] is False
+    assert matcher.match("/files/report.pdf?download=1") == (True, None)
+    assert matcher.match("/exact")[0] is False
+    assert matcher.match("/exactly") == (True, None)
+
+
+def test_longer_wildcard_beats_shorter_prefix():
+    matcher = RobotsMatcher([(True, "/blog"), (False, "/blog/*/drafts")])
+    assert matcher.match("/blog/2026/drafts/1") == (False, "/blog/*/drafts")
+    assert matcher.match("/blog/2026/posts/1") == (True, "/blog")
+
+
+def test_group_selection(robots):
+    assert robots.group_for("Googlebot/2.1") == "googlebot"
+    assert robots.group_for("bingbot") == "bingbot"
+    assert robots.group_for("Googlebot-Image/1.0") == "googlebot-image"
+    # Longest token prefix before falling back to "*"
+    assert robots.group_for("Googlebot-News") == "googlebot"
+    assert robots.group_for("SomeCrawler/1.0") == "*"
+
+
+def test_group_fallback_rules(robots):
+    # The specific group replaces "*" entirely
+    assert robots.allowed("https://example.com/private/page", "Googlebot")
+    assert not robots.allowed("https://example.com/search?q=x", "Googlebot")
+    assert robots.allowed("https://example.com/search/about", "Bingbot")
+    assert not robots.allowed("https://example.com/private/page", "SomeCrawler")
+    assert robots.allowed("https://example.com/private/public/page", "SomeCrawler")
+    assert not robots.allowed("https://example.com/anything", "Googlebot-Image")
+
+
+def test_no_star_group_allows_unknown_agents():
+    robots = RobotsFile("https://example.com", "ok", 200, "User-agent: Googlebot\nDisallow: /\n")
+    assert robots.group_for("OtherBot") is None
+    assert robots.allowed("https://example.com/page", "OtherBot")
+
+
+def test_robots_txt_itself_and_unreachable_hosts():
+    unreachable = RobotsFile("https://example.com", "unreachable", 503, error="HTTP 503")
+    assert unreachable.check("https://example.com/page", "Googlebot") == (False, "unreachable")
+    assert unreachable.allowed("https://example.com/robots.txt", "Googlebot")
+
+
+def test_crawl_delay_and_sitemaps(robots):
+    assert robots.crawl_delay("SomeCrawler") == 5.0
+    assert robots.crawl_delay("Googlebot") is None
+    assert robots.sitemaps == ["https://example.com/sitemap.xml"]
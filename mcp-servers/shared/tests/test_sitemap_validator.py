@@ -0,0 +1,138 @@
+"""Tests for the streaming sitemap validator (mcp-servers/shared/sitemap_validator.py)."""
+
+import asyncio
+import gzip
+
+import httpx
+import pytest
+from sitemap_validator import validate_sitemap
+
+pytestmark = pytest.mark.asyncio
+
+URLSET = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</urlset>"""
+INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</sitemapindex>"""
+
+
+def urlset(*locs: str) -> str:
+    return URLSET.format("".join(f"<url><loc>{loc}</loc></url>" for loc in locs))
+
+
+def index(*locs: str) -> str:
+    return INDEX.format("".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs))
+
+
+def serve(pages):
+    """A client factory for validate_sitemap that serves ``pages`` (url -> body) and 404s the rest."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = pages.get(str(request.url))
+        if body is None:
+            return httpx.Response(404)
+        return httpx.Response(200, content=body if isinstance(body, bytes) else body.encode())
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return lambda: client
+
+
+async def validate(urls, pages, **options):
+    # A hung worker pool shows up as a timeout rather than a stuck test run
+    return await asyncio.wait_for(validate_sitemap(urls, serve(pages), **options), timeout=5)
+
+
+async def test_gzip_sitemap_detected_by_magic_bytes():
+    body = gzip.compress(urlset("https://example.com/a", "https://example.com/b").encode())
+    report = await validate("https://example.com/sitemap.xml.gz", {"https://example.com/sitemap.xml.gz": body})
+
+    assert report["valid"]
+    assert report["sitemaps"]["compressed"] == 1
+    assert report["urls"]["total"] == 2
+    assert report["bytes_downloaded"] == len(body)
+    assert report["bytes_uncompressed"] > len(body)
+
+
+async def test_corrupt_gzip_is_a_file_error():
+    body = gzip.compress(urlset("https://example.com/a").encode())[:-12] + b"garbage!" * 4
+    report = await validate("https://example.com/s.xml.gz", {"https://example.com/s.xml.gz": body})
+
+    assert not report["valid"]
+    assert report["sitemaps"]["failed"] == 1
+
+
+async def test_duplicates_counted_across_files():
+    pages = {
+        "https://example.com/sitemap.xml": index("https://example.com/one.xml", "https://example.com/two.xml"),
+        "https://example.com/one.xml": urlset("https://example.com/a", "https://example.com/b"),
+        "https://example.com/two.xml": urlset("https://example.com/b", "https://example.com/c",
+                                              "https://example.com/a"),
+    }
+    report = await validate("https://example.com/sitemap.xml", pages)
+
+    assert report["sitemaps"]["indexes"] == 1
+    assert report["sitemaps"]["urlsets"] == 2
+    assert report["urls"] == {"total": 5, "unique": 3, "duplicates": 2, "invalid": 0, "off_host": 0}
+    assert sorted(report["samples"]["duplicates"]) == ["https://example.com/a", "https://example.com/b"]
+
+
+async def test_dedupe_off():
+    pages = {"https://example.com/s.xml": urlset("https://example.com/a", "https://example.com/a")}
+    report = await validate("https://example.com/s.xml", pages, dedupe=False)
+
+    assert report["urls"]["total"] == 2
+    assert report["urls"]["unique"] is None
+    assert report["dedupe_table_bytes"] == 0
+
+
+async def test_malformed_children_are_reported_per_file():
+    pages = {
+        "https://example.com/sitemap.xml": index("https://example.com/good.xml", "https://example.com/broken.xml",
+                                                 "https://example.com/html.xml", "https://example.com/gone.xml",
+                                                 "ftp://example.com/x.xml"),
+        "https://example.com/good.xml": urlset("https://example.com/a", "not a url", "https://other.com/b"),
+        "https://example.com/broken.xml": urlset("https://example.com/c")[:-20],
+        "https://example.com/html.xml": "<html><body>Not found</body></html>",
+    }
+    report = await validate("https://example.com/sitemap.xml", pages)
+    files = {file["url"]: file for file in report["files"]}
+
+    assert not report["valid"]
+    assert report["sitemaps"]["fetched"] == 5
+    assert any("Invalid child sitemap URL" in error for error in files["https://example.com/sitemap.xml"]["errors"])
+    assert any("Invalid XML" in error for error in files["https://example.com/broken.xml"]["errors"])
+    assert any("<html>" in error for error in files["https://example.com/html.xml"]["errors"])
+    assert files["https://example.com/gone.xml"]["errors"] == ["HTTP 404"]
+    assert "errors" not in files["https://example.com/good.xml"]
+    assert report["urls"]["invalid"] == 1
+    assert report["urls"]["off_host"] == 1
+
+
+async def test_find_reports_listed_urls():
+    pages = {"https://example.com/s.xml": urlset("https://example.com/a")}
+    report = await validate("https://example.com/s.xml", pages,
+                            find=["https://example.com/a", "https://example.com/missing"])
+
+    assert report["found"] == {"https://example.com/a": True, "https://example.com/missing": False}
+
+
+async def test_malformed_child_does_not_stall_the_run():
+    pages = {
+        "https://example.com/sitemap.xml": index("https://example.com/posts.xml", "http://[::1/broken.xml"),
+        "https://example.com/posts.xml": urlset("https://example.com/a", "https://example.com/b"),
+    }
+    report = await validate("https://example.com/sitemap.xml", pages, concurrency=1)
+
+    assert report["urls"]["total"] == 2
+    assert report["sitemaps"]["fetched"] == 2
+    index_file = report["files"][0]
+    assert any("Invalid child sitemap URL" in error for error in index_file["errors"])
+
+
+async def test_bad_sitemap_urls_do_not_kill_workers():
+    urls = ["http://[bad/sitemap.xml", "http://[worse/sitemap.xml", "https://example.com/sitemap.xml"]
+    pages = {"https://example.com/sitemap.xml": urlset("https://example.com/a")}
+    report = await validate(urls, pages, concurrency=2)
+
+    assert report["sitemaps"]["fetched"] == 3
+    assert report["sitemaps"]["failed"] == 2
+    assert report["urls"]["total"] == 1
+    assert not report["valid"]
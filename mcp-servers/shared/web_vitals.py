@@ -0,0 +1,300 @@
+"""
+Core Web Vitals Client
+
+Field and lab Core Web Vitals for the seo-audit MCP server (and anything else
+that imports it).
+
+Field data comes from the Chrome UX Report API: the 75th percentile of real
+Chrome users over the last 28 days, for the page URL and for its whole origin.
+Lab data comes from a PageSpeed Insights (Lighthouse) performance run. The
+metrics follow Google's current set: LCP, INP (which replaced FID in March
+2024) and CLS, plus FCP and TTFB, with TBT from the lab run standing in for
+interactivity when there is no field INP.
+
+Every record is cached in memory per (kind, target, form factor): CrUX data
+only changes once a day and a PSI run takes 10-30 seconds, so repeated audits
+of a page or of pages on the same origin reuse earlier results. Concurrent
+requests for the same record share one upstream call. "No data" answers are
+cached like any other result; upstream failures (including responses that are
+not the JSON we expect) raise UpstreamError and are not cached, so the caller
+can fall back to locally measured numbers.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+CRUX_API_URL = "https://chromeuxreport.googleapis.com/v1/records:queryRecord"
+PSI_API_URL = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+
+# Metric: (good threshold, poor threshold, unit, description) - web.dev thresholds at p75
+METRICS = {
+    "lcp": (2500, 4000, "ms", "Largest Contentful Paint - measures loading performance"),
+    "inp": (200, 500, "ms", "Interaction to Next Paint - measures responsiveness"),
+    "cls": (0.1, 0.25, "", "Cumulative Layout Shift - measures visual stability"),
+    "fcp": (1800, 3000, "ms", "First Contentful Paint - when first content renders"),
+    "ttfb": (800, 1800, "ms", "Time to First Byte - server response time"),
+    "tbt": (200, 600, "ms", "Total Blocking Time - lab proxy for responsiveness"),
+}
+CORE_METRICS = ("lcp", "inp", "cls")
+
+# CrUX metric names (newest first where the API has renamed one)
+CRUX_METRICS = {
+    "lcp": ("largest_contentful_paint",),
+    "inp": ("interaction_to_next_paint",),
+    "cls": ("cumulative_layout_shift",),
+    "fcp": ("first_contentful_paint",),
+    "ttfb": ("time_to_first_byte", "experimental_time_to_first_byte"),
+}
+LIGHTHOUSE_AUDITS = {
+    "lcp": "largest-contentful-paint",
+    "cls": "cumulative-layout-shift",
+    "fcp": "first-contentful-paint",
+    "ttfb": "server-response-time",
+    "tbt": "total-blocking-time",
+}
+FORM_FACTORS = {"mobile": "PHONE", "desktop": "DESKTOP"}
+
+
+class UpstreamError(Exception):
+    """CrUX or PageSpeed Insights could not be reached or refused the request."""
+
+
+def rate(metric: str, value: Optional[float]) -> Optional[str]:
+    """'good', 'needs-improvement' or 'poor' for a metric value (None when unknown)."""
+    if value is None:
+        return None
+    good, poor = METRICS[metric][:2]
+    if value <= good:
+        return "good"
+    return "needs-improvement" if value <= poor else "poor"
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_crux_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """p75 value and rating per metric, plus the collection period, from a CrUX queryRecord response."""
+    record = data.get("record", {})
+    metrics = {}
+    for metric, names in CRUX_METRICS.items():
+        for name in names:
+            p75 = _number(record.get("metrics", {}).get(name, {}).get("percentiles", {}).get("p75"))
+            if p75 is not None:
+                metrics[metric] = {"p75": p75, "rating": rate(metric, p75)}
+                break
+
+    period = record.get("collectionPeriod", {})
+
+    def day(key: str) -> Optional[str]:
+        try:
+            date = period[key]
+            return f"{date['year']:04d}-{date['month']:02d}-{date['day']:02d}"
+        except (KeyError, TypeError, ValueError):  # absent or partial date
+            return None
+
+    return {"metrics": metrics, "collection_period": {"first": day("firstDate"), "last": day("lastDate")}}
+
+
+def parse_lighthouse(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Performance score, lab metrics and the largest opportunities from a PSI lighthouseResult."""
+    audits = result.get("audits", {})
+    metrics = {}
+    for metric, audit_id in LIGHTHOUSE_AUDITS.items():
+        value = _number(audits.get(audit_id, {}).get("numericValue"))
+        if value is not None:
+            value = round(value, 3) if metric == "cls" else round(value)
+            metrics[metric] = {"value": value, "rating": rate(metric, value)}
+
+    opportunities = sorted(
+        (
+            {"id": audit_id, "title": audit.get("title", audit_id),
+             "savings_ms": round(audit["details"].get("overallSavingsMs") or 0)}
+            for audit_id, audit in audits.items()
+            if (audit.get("details") or {}).get("type") == "opportunity"
+            and (audit["details"].get("overallSavingsMs") or 0) > 0
+        ),
+        key=lambda item: -item["savings_ms"],
+    )
+    score = (result.get("categories", {}).get("performance") or {}).get("score")
+    return {
+        "performance_score": round(score * 100) if score is not None else None,
+        "metrics": metrics,
+        "total_byte_weight": _number(audits.get("total-byte-weight", {}).get("numericValue")),
+        "opportunities": opportunities[:5],
+        "fetch_time": result.get("fetchTime"),
+        "lighthouse_version": result.get("lighthouseVersion"),
+    }
+
+
+class VitalsCache:
+    """Bounded in-memory LRU of records that expire after ``ttl`` seconds; concurrent misses share one fetch."""
+
+    def __init__(self, ttl: float, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float]]" = OrderedDict()
+        self._fetches: Dict[Tuple, "asyncio.Task[Any]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_fetch(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Return (value, source) where source is "cache" or "fetched". Exceptions are not cached."""
+        cached = self._entries.get(key)
+        if cached and time.monotonic() - cached[1] < self.ttl:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return cached[0], "cache"
+
+        task = self._fetches.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._fetches[key] = task
+            task.add_done_callback(lambda _: self._fetches.pop(key, None))
+
+        value = await asyncio.shield(task)
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value, "fetched"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        self._entries.clear()
+
+
+class WebVitalsClient:
+    """
+    Cached CrUX and PageSpeed Insights lookups.
+
+    ``client`` returns the httpx client used for requests (the server's shared
+    keep-alive client). CrUX needs ``api_key``; without one, field lookups
+    raise UpstreamError. PSI runs without a key at a low anonymous quota.
+    """
+
+    def __init__(self, client: Callable[[], httpx.AsyncClient], api_key: Optional[str] = None,
+                 crux_ttl: float = 12 * 3600, psi_ttl: float = 6 * 3600, max_entries: int = 512,
+                 crux_timeout: float = 10.0, psi_timeout: float = 60.0):
+        self.client = client
+        self.api_key = api_key
+        self.crux_timeout = crux_timeout
+        self.psi_timeout = psi_timeout
+        self.crux_cache = VitalsCache(crux_ttl, max_entries)
+        self.psi_cache = VitalsCache(psi_ttl, max_entries)
+
+    async def _request(self, method: str, url: str, timeout: float, **kwargs) -> httpx.Response:
+        try:
+            response = await self.client().request(method, url, timeout=timeout, **kwargs)
+        except httpx.HTTPError as e:
+            raise UpstreamError(f"{e.__class__.__name__} {e}".strip()) from e
+        if response.status_code >= 400 and response.status_code != 404:
+            try:
+                message = response.json().get("error", {}).get("message", "")
+            except ValueError:
+                message = ""
+            raise UpstreamError(f"HTTP {response.status_code} {message}".strip())
+        return response
+
+    @staticmethod
+    def _decode(response: httpx.Response, parse: Callable[[Any], Any], service: str) -> Any:
+        """``parse`` applied to a response's JSON body; a body that cannot be read raises UpstreamError."""
+        try:
+            return parse(response.json())
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise UpstreamError(f"Unreadable {service} response: {e.__class__.__name__} {e}".strip()) from e
+
+    async def field(self, target: str, device: str = "mobile", origin: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        CrUX p75 metrics for a page URL (or, with ``origin=True``, a whole origin).
+
+        Returns None when CrUX has no data for the target (too little traffic).
+        """
+        if not self.api_key:
+            raise UpstreamError("GOOGLE_API_KEY not configured (required for CrUX field data)")
+        kind = "origin" if origin else "url"
+        form_factor = FORM_FACTORS.get(device, "PHONE")
+
+        async def fetch():
+            response = await self._request("POST", CRUX_API_URL, self.crux_timeout,
+                                           params={"key": self.api_key},
+                                           json={kind: target, "formFactor": form_factor})
+            if response.status_code == 404:
+                return None
+            return self._decode(response, parse_crux_record, "CrUX")
+
+        record, _ = await self.crux_cache.get_or_fetch((kind, target, form_factor), fetch)
+        return record
+
+    async def lab(self, url: str, device: str = "mobile") -> Dict[str, Any]:
+        """Lab metrics from a PageSpeed Insights performance run."""
+        strategy = device if device in FORM_FACTORS else "mobile"
+
+        async def fetch():
+            params = {"url": url, "strategy": strategy, "category": "performance"}
+            if self.api_key:
+                params["key"] = self.api_key
+            response = await self._request("GET", PSI_API_URL, self.psi_timeout, params=params)
+            if response.status_code == 404:
+                raise UpstreamError("PageSpeed Insights returned no Lighthouse result")
+
+            def parse(data: Dict[str, Any]) -> Dict[str, Any]:
+                if "lighthouseResult" not in data:
+                    raise UpstreamError("PageSpeed Insights returned no Lighthouse result")
+                return parse_lighthouse(data["lighthouseResult"])
+
+            return self._decode(response, parse, "PageSpeed Insights")
+
+        result, _ = await self.psi_cache.get_or_fetch(("psi", url, strategy), fetch)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"crux": self.crux_cache.stats(), "psi": self.psi_cache.stats()}
+
+
+def combine(url_field: Optional[Dict[str, Any]], origin_field: Optional[Dict[str, Any]],
+            lab: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    One value per metric, preferring URL field data, then origin field data, then lab data.
+
+    Each metric records the value, unit, rating and which source it came from.
+    """
+    metrics = {}
+    for metric, (_, _, unit, description) in METRICS.items():
+        for source, record, key in (("field_url", url_field, "p75"), ("field_origin", origin_field, "p75"),
+                                    ("lab", lab, "value")):
+            value = ((record or {}).get("metrics") or {}).get(metric, {}).get(key)
+            if value is not None:
+                metrics[metric] = {"value": value, "unit": unit, "rating": rate(metric, value),
+                                   "source": source, "description": description}
+                break
+    return metrics
+
+
+def assess(field: Optional[Dict[str, Any]]) -> str:
+    """Core Web Vitals assessment of a field record: "passed" when LCP, INP and CLS are all good at p75."""
+    metrics = (field or {}).get("metrics", {})
+    ratings = [metrics[metric]["rating"] for metric in CORE_METRICS if metric in metrics]
+    if not ratings:
+        return "no-data"
+    if any(rating != "good" for rating in ratings):
+        return "failed"
+    return "passed" if len(ratings) == len(CORE_METRICS) else "partial"
+
+
+def score_metrics(metrics: Dict[str, Dict[str, Any]]) -> int:
+    """0-100 score: good metrics count fully, needs-improvement half, poor not at all."""
+    points = {"good": 1.0, "needs-improvement": 0.5, "poor": 0.0}
+    rated = [points[metric["rating"]] for metric in metrics.values() if metric.get("rating") in points]
+    return round(100 * sum(rated) / len(rated)) if rated else 0
+
@@ -11,16 +11,28 @@ Features:
 - Generate sitemaps
 - Track broken links
 - Performance analysis
+
+Before the crawler is started, the start URL is checked against the host's
+robots.txt through the same cache module the seo-audit and seo-toolkit servers
+use (../shared/robots_txt.py). The crawler itself is an external PHP binary
+and reads robots.txt on its own for the pages it discovers.
 """
 
 import subprocess
 import json
 import os
 import re
+import sys
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
 from fastmcp import FastMCP
 
+# robots.txt cache shared with the seo-audit and seo-toolkit servers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from robots_txt import RobotsCache  # noqa: E402
+
 # Initialize MCP server
 mcp = FastMCP("SiteOne Crawler Server")
 
@@ -30,6 +42,47 @@ CRAWLER_PATH = os.path.join(
     "../../integrations/siteone-crawler/crawler"
 )
 
+# User agent whose robots.txt group decides whether a crawl may start
+CRAWLER_USER_AGENT = os.getenv("SITEONE_USER_AGENT", "SiteOne-Crawler/1.0")
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Keep-alive HTTP client for robots.txt fetches."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            follow_redirects=True,
+            headers={"User-Agent": CRAWLER_USER_AGENT},
+        )
+    return _http_client
+
+
+# One robots.txt per host for every tool in this process
+robots_cache = RobotsCache(get_http_client, CRAWLER_USER_AGENT,
+                           max_hosts=int(os.getenv("SITEONE_ROBOTS_CACHE_SIZE", "1024")))
+
+
+async def robots_preflight(url: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Check the start URL against its host's robots.txt.
+
+    Returns the robots.txt summary and, when the crawl must not start, the reason.
+    """
+    robots = await robots_cache.get(url)
+    summary = robots.summary()
+    allowed, rule = robots.check(url, CRAWLER_USER_AGENT)
+    summary["crawlable"] = allowed
+    summary["rule"] = rule
+    if robots.status == "unreachable":
+        return summary, f"robots.txt unreachable ({robots.error}) - not crawling"
+    if not allowed:
+        return summary, f"robots.txt disallows {url} for {CRAWLER_USER_AGENT} (rule: {rule})"
+    return summary, None
+
+
 @mcp.tool()
 async def run_technical_audit(
     url: str,
@@ -72,6 +125,10 @@ async def run_technical_audit(
     if check_broken_links:
         cmd.append("--check-broken-links")
 
+    robots, blocked = await robots_preflight(url)
+    if blocked:
+        return {"success": False, "error": blocked, "url": url, "robots": robots}
+
     try:
         # Run crawler
         result = subprocess.run(
@@ -96,6 +153,7 @@ async def run_technical_audit(
             "success": True,
             "url": url,
             "timestamp": datetime.now().isoformat(),
+            "robots": robots,
             **audit_data
         }
 
@@ -161,6 +219,10 @@ async def generate_sitemap_only(
         "--output=json"
     ]
 
+    robots, blocked = await robots_preflight(url)
+    if blocked:
+        return {"success": False, "error": blocked, "url": url, "robots": robots}
+
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
 
@@ -178,6 +240,7 @@ async def generate_sitemap_only(
             "url": url,
             "format": format,
             "timestamp": datetime.now().isoformat(),
+            "robots": robots,
             **sitemap_data
         }
 
@@ -210,6 +273,10 @@ async def check_single_page(url: str) -> Dict[str, Any]:
         "--output=json"
     ]
 
+    robots, blocked = await robots_preflight(url)
+    if blocked:
+        return {"success": False, "error": blocked, "url": url, "robots": robots}
+
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
 
@@ -226,6 +293,7 @@ async def check_single_page(url: str) -> Dict[str, Any]:
             "success": True,
             "url": url,
             "timestamp": datetime.now().isoformat(),
+            "robots": robots,
             **page_data
         }
 
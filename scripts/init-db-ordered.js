@@ -78,6 +78,11 @@ const SCHEMA_ORDER = [
 
   // 14. Core SEO enhancements (must come after schema.sql)
   '02-core-seo.sql',
+  'company-stats-schema-sqlite.sql',
+  'company-search-schema-sqlite.sql',
+  'local-seo-snapshot-schema-sqlite.sql',
+  'rank-history-schema-sqlite.sql',
+  'lighthouse-history-schema-sqlite.sql',
 
   // 15. Migrations and additions (last)
   'add-user-id-columns.sql',